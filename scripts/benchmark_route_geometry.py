@@ -0,0 +1,79 @@
+"""Benchmark of the memory and decode time of route responses, with regular and with columnar points.
+
+Usage: python scripts/benchmark_route_geometry.py [number of points]
+"""
+
+import gc
+import math
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+
+from tomtom_apis.routing.columnar import ColumnarRouteResponse
+from tomtom_apis.routing.models import CalculatedRouteResponse
+
+SUMMARY = {
+    "lengthInMeters": 1_000_000,
+    "travelTimeInSeconds": 36_000,
+    "trafficDelayInSeconds": 0,
+    "trafficLengthInMeters": 0,
+    "departureTime": "2026-06-20T13:00:20+02:00",
+    "arrivalTime": "2026-06-20T23:00:20+02:00",
+}
+
+
+def route_json(points: int, legs: int = 4) -> bytes:
+    """Build the JSON of a calculate route response with the given number of points."""
+    per_leg = points // legs
+    return orjson.dumps(  # pylint: disable=maybe-no-member
+        {
+            "formatVersion": "0.0.12",
+            "routes": [
+                {
+                    "summary": SUMMARY,
+                    "legs": [
+                        {
+                            "summary": SUMMARY,
+                            "points": [
+                                {"latitude": 48.0 + (j * per_leg + i) * 1e-4, "longitude": 2.0 + math.sin(i / 50) * 1e-2} for i in range(per_leg)
+                            ],
+                        }
+                        for j in range(legs)
+                    ],
+                    "sections": [{"startPointIndex": 0, "endPointIndex": per_leg * legs - 1, "sectionType": "TRAVEL_MODE", "travelMode": "car"}],
+                },
+            ],
+        },
+    )
+
+
+def measure(decode: Callable[[bytes], Any], data: bytes) -> tuple[float, int, int]:
+    """Decode the data, returning the seconds, the retained bytes and the peak bytes."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = decode(data)
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del response
+    return seconds, retained, peak
+
+
+def main() -> None:
+    """Run the benchmark."""
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    data = route_json(points)
+    print(f"{points} points, {len(data) / 1e6:.1f} MB of JSON")
+    print(f"{'model':<28}{'decode (ms)':>14}{'retained (MB)':>16}{'peak (MB)':>12}")
+    for name, decode in (("CalculatedRouteResponse", CalculatedRouteResponse.from_json), ("ColumnarRouteResponse", ColumnarRouteResponse.from_json)):
+        seconds, retained, peak = measure(decode, data)
+        print(f"{name:<28}{seconds * 1000:>14.1f}{retained / 1e6:>16.2f}{peak / 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
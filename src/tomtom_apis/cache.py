@@ -0,0 +1,155 @@
+"""In-memory caching helpers."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Self
+
+import orjson
+
+from .api import BaseParams
+
+
+@dataclass(kw_only=True)
+class CacheStats:
+    """Counters describing how a cache performs.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not answered from the cache.
+        evictions (int): The number of entries removed to respect the size bound or because they expired.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self: Self) -> float:
+        """Return the fraction of lookups answered from the cache.
+
+        Returns:
+            float: The hit rate between 0.0 and 1.0, 0.0 when there were no lookups yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def params_key(params: BaseParams | None) -> str:
+    """Build a canonical cache key from request parameters.
+
+    The api key is left out, so requests that only differ in the key share cache entries.
+
+    Args:
+        params (BaseParams | None): The parameters of a request.
+
+    Returns:
+        str: A string that is equal for parameters that serialize to the same query.
+    """
+    if params is None:
+        return ""
+    serialized = {k: v for k, v in params.to_dict().items() if k != "key"}
+    return orjson.dumps(serialized, option=orjson.OPT_SORT_KEYS).decode()  # pylint: disable=maybe-no-member
+
+
+class LRUCache[K, V]:
+    """A least recently used cache with an optional time to live.
+
+    Attributes:
+        max_size (int): The maximum number of entries kept in the cache.
+        ttl (float | None): The number of seconds an entry stays valid, None to keep entries until they are evicted.
+        max_bytes (int | None): The maximum total size of the entries, as passed to `set`, None to only bound the number of entries.
+        bytes (int): The total size of the cached entries.
+        stats (CacheStats): The counters of this cache.
+    """
+
+    def __init__(self: Self, *, max_size: int, ttl: float | None = None, max_bytes: int | None = None) -> None:
+        """Initialize the LRUCache.
+
+        Args:
+            max_size (int): The maximum number of entries kept in the cache.
+            ttl (float | None, optional): The number of seconds an entry stays valid. Defaults to None.
+            max_bytes (int | None, optional): The maximum total size of the entries. Defaults to None.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = CacheStats()
+        self._data: OrderedDict[K, tuple[float, V, int]] = OrderedDict()
+
+    def get(self: Self, key: K) -> V | None:
+        """Return the value for the key and mark it as recently used.
+
+        Args:
+            key (K): The key to look up.
+
+        Returns:
+            V | None: The cached value, or None if the key is not cached or has expired.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value, _ = item
+        if expires_at < time.monotonic():
+            self.pop(key)
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self: Self, key: K, value: V, *, ttl: float | None = None, size: int = 0) -> None:
+        """Store a value, evicting the least recently used entries when the cache is full.
+
+        Args:
+            key (K): The key to store the value under.
+            value (V): The value to store.
+            ttl (float | None, optional): The number of seconds this entry stays valid. Defaults to None, the ttl of the cache.
+            size (int, optional): The size of the entry in bytes, counted against `max_bytes`. Defaults to 0.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        self.pop(key)
+        self._data[key] = (expires_at, value, size)
+        self.bytes += size
+
+        while len(self._data) > self.max_size or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.bytes -= evicted_size
+            self.stats.evictions += 1
+
+    def pop(self: Self, key: K) -> V | None:
+        """Remove a key from the cache.
+
+        Args:
+            key (K): The key to remove.
+
+        Returns:
+            V | None: The removed value, or None if the key was not cached.
+        """
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self.bytes -= item[2]
+        return item[1]
+
+    def clear(self: Self) -> None:
+        """Remove all entries from the cache."""
+        self._data.clear()
+        self.bytes = 0
+
+    def __contains__(self: Self, key: K) -> bool:
+        """Return whether the key is cached, without marking it as recently used."""
+        item = self._data.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+    def __len__(self: Self) -> int:
+        """Return the number of cached entries, including entries that have expired but were not looked up yet."""
+        return len(self._data)
@@ -20,6 +20,9 @@ class HttpStatus(IntEnum):
     """HTTP status codes used in TomTom API responses."""
 
     OK = 200
+    ACCEPTED = 202
     UNASSIGNED = 399
     BAD_REQUEST = 400
+    TOO_MANY_REQUESTS = 429
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
@@ -0,0 +1,150 @@
+"""Geospatial helpers."""
+
+import math
+from collections.abc import Sequence
+from typing import Final
+
+EARTH_RADIUS_METERS: Final[float] = 6_371_008.8
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate the great-circle distance between two locations.
+
+    Args:
+        lat1 (float): The latitude of the first location.
+        lon1 (float): The longitude of the first location.
+        lat2 (float): The latitude of the second location.
+        lon2 (float): The longitude of the second location.
+
+    Returns:
+        float: The distance in meters.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_lat_lon(position: str) -> tuple[float, float]:
+    """Parse a position in the "lat, lon" format used by the API.
+
+    Args:
+        position (str): The position, e.g. "52.37, 4.89".
+
+    Returns:
+        tuple[float, float]: The latitude and longitude.
+    """
+    lat, lon = position.split(",")
+    return float(lat), float(lon)
+
+
+def point_in_polygon(lat: float, lon: float, polygon: Sequence[tuple[float, float]]) -> bool:
+    """Check whether a location lies inside a polygon, using the even-odd rule.
+
+    Coordinates are treated as planar, which is accurate for polygons that do not span large distances or cross the antimeridian.
+
+    Args:
+        lat (float): The latitude of the location.
+        lon (float): The longitude of the location.
+        polygon (Sequence[tuple[float, float]]): The (lat, lon) vertices of the polygon, the polygon is closed implicitly.
+
+    Returns:
+        bool: Whether the location lies inside the polygon.
+    """
+    inside = False
+    count = len(polygon)
+    for i in range(count):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[i - 1]
+        if (lat1 > lat) != (lat2 > lat) and lon < (lon2 - lon1) * (lat - lat1) / (lat2 - lat1) + lon1:
+            inside = not inside
+    return inside
+
+
+def rectangle_intersects_polygon(  # pylint: disable=too-many-arguments
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    polygon: Sequence[tuple[float, float]],
+) -> bool:
+    """Check whether a rectangle and a polygon overlap.
+
+    Args:
+        south (float): The southern latitude of the rectangle.
+        west (float): The western longitude of the rectangle.
+        north (float): The northern latitude of the rectangle.
+        east (float): The eastern longitude of the rectangle.
+        polygon (Sequence[tuple[float, float]]): The (lat, lon) vertices of the polygon, the polygon is closed implicitly.
+
+    Returns:
+        bool: Whether the rectangle and the polygon overlap.
+    """
+    if any(south <= lat <= north and west <= lon <= east for lat, lon in polygon):
+        return True
+    if point_in_polygon(south, west, polygon):
+        return True
+
+    corners = ((south, west), (south, east), (north, east), (north, west))
+    for i, vertex in enumerate(polygon):
+        for j, corner in enumerate(corners):
+            if _segments_intersect(polygon[i - 1], vertex, corners[j - 1], corner):
+                return True
+    return False
+
+
+def _segments_intersect(a1: tuple[float, float], a2: tuple[float, float], b1: tuple[float, float], b2: tuple[float, float]) -> bool:
+    """Check whether two line segments intersect, touching segments count as intersecting."""
+
+    def orientation(p: tuple[float, float], q: tuple[float, float], r: tuple[float, float]) -> float:
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    d1 = orientation(b1, b2, a1)
+    d2 = orientation(b1, b2, a2)
+    d3 = orientation(a1, a2, b1)
+    d4 = orientation(a1, a2, b2)
+    return ((d1 >= 0 >= d2) or (d2 >= 0 >= d1)) and ((d3 >= 0 >= d4) or (d4 >= 0 >= d3))
+
+
+def douglas_peucker(points: Sequence[tuple[float, float]], tolerance: float) -> list[int]:
+    """Simplify a line with the Douglas-Peucker algorithm.
+
+    Distances are measured in an equirectangular projection around the first point, which is accurate for lines that do not span large distances.
+
+    Args:
+        points (Sequence[tuple[float, float]]): The (lat, lon) points of the line.
+        tolerance (float): The maximum distance in meters between the line and its simplification.
+
+    Returns:
+        list[int]: The indices of the points that are kept, in order, the first and the last point are always kept.
+    """
+    if len(points) < 3:  # noqa: PLR2004
+        return list(range(len(points)))
+
+    scale = math.cos(math.radians(points[0][0]))
+    projected = [(math.radians(lon) * scale * EARTH_RADIUS_METERS, math.radians(lat) * EARTH_RADIUS_METERS) for lat, lon in points]
+
+    keep = {0, len(points) - 1}
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, max_distance = first, 0.0
+        for i in range(first + 1, last):
+            distance = _segment_distance(projected[i], projected[first], projected[last])
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if max_distance > tolerance:
+            keep.add(farthest)
+            stack.extend(((first, farthest), (farthest, last)))
+
+    return sorted(keep)
+
+
+def _segment_distance(point: tuple[float, float], start: tuple[float, float], end: tuple[float, float]) -> float:
+    """Calculate the planar distance between a point and a line segment."""
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length))
+    return math.hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
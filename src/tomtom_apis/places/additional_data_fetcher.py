@@ -0,0 +1,241 @@
+"""Batched and cached additional data fetcher."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from array import array
+from typing import TYPE_CHECKING, Any, Final, Self
+from urllib.parse import quote
+
+import orjson
+
+from tomtom_apis.cache import CacheStats, LRUCache
+from tomtom_apis.places.models import AdditionalDataItem, AdditionalDataParams
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+MAX_GEOMETRIES_PER_REQUEST: Final[int] = 20
+
+type _Key = tuple[str, int | None]
+
+
+class AdditionalDataFetcher:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """Batched and cached additional data fetcher.
+
+    Geometries are requested by id. Ids requested by concurrent callers are collected for a short delay and deduplicated, then fetched in chunks
+    of at most 20 ids per request, with the chunks in parallel. Geometries are effectively static, so they are cached in memory and, when a cache
+    directory is given, on disk as one JSON file per id and zoom level.
+
+    With `compact` enabled, the coordinates of the cached geometries are stored as flat `array("d")` instances of [lon, lat, lon, lat, ...]
+    instead of nested lists, which takes a fraction of the memory, see `expand_coordinates`.
+
+    Attributes:
+        api (SearchApi): The API used to fetch the geometries.
+        cache_dir (Path | None): The directory the geometries are stored in, None to only cache in memory.
+        compact (bool): Whether coordinates are stored as flat arrays.
+        stats (CacheStats): The counters of the cache lookups.
+        requests (int): The number of requests sent to the API.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: SearchApi,
+        *,
+        cache_dir: Path | None = None,
+        compact: bool = False,
+        max_cached: int = 10_000,
+        max_concurrency: int = 4,
+        batch_delay: float = 0.01,
+    ) -> None:
+        """Initialize the AdditionalDataFetcher.
+
+        Args:
+            api (SearchApi): The API used to fetch the geometries.
+            cache_dir (Path | None, optional): The directory the geometries are stored in, None to only cache in memory. Defaults to None.
+            compact (bool, optional): Whether coordinates are stored as flat arrays. Defaults to False.
+            max_cached (int, optional): The maximum number of geometries kept in memory. Defaults to 10_000.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 4.
+            batch_delay (float, optional): The number of seconds ids of concurrent callers are collected before they are fetched. Defaults to 0.01.
+        """
+        self.api = api
+        self.cache_dir = cache_dir
+        self.compact = compact
+        self.batch_delay = batch_delay
+        self.stats = CacheStats()
+        self.requests = 0
+        self._items: LRUCache[_Key, AdditionalDataItem] = LRUCache(max_size=max_cached)
+        self._in_flight: dict[_Key, asyncio.Future[AdditionalDataItem | None]] = {}
+        self._queued: dict[int | None, list[str]] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_additional_data(self: Self, *, geometries: list[str], geometriesZoom: int | None = None) -> dict[str, AdditionalDataItem]:
+        """Get the additional data of geometries.
+
+        Args:
+            geometries (list[str]): The geometry ids, as found in the dataSources of search results.
+            geometriesZoom (int | None, optional): The zoom level of the geometries, None for the default of the service. Defaults to None.
+
+        Returns:
+            dict[str, AdditionalDataItem]: The additional data by id in the requested order, ids the service did not return are left out.
+        """
+        futures: dict[str, asyncio.Future[AdditionalDataItem | None]] = {}
+        items: dict[str, AdditionalDataItem] = {}
+        for geometry_id in dict.fromkeys(geometries):
+            key = (geometry_id, geometriesZoom)
+            cached = self._lookup(key)
+            if cached is not None:
+                items[geometry_id] = cached
+            elif key in self._in_flight:
+                futures[geometry_id] = self._in_flight[key]
+            else:
+                futures[geometry_id] = self._enqueue(key)
+
+        # The futures are shared with concurrent callers, shield them so cancelling this caller does not cancel theirs.
+        fetched = await asyncio.gather(*(asyncio.shield(future) for future in futures.values()))
+        items.update((geometry_id, item) for geometry_id, item in zip(futures, fetched, strict=True) if item is not None)
+        return {geometry_id: items[geometry_id] for geometry_id in dict.fromkeys(geometries) if geometry_id in items}
+
+    def _lookup(self: Self, key: _Key) -> AdditionalDataItem | None:
+        """Look up a geometry in memory, then on disk."""
+        item = self._items.get(key)
+        if item is None and self.cache_dir is not None and (path := _cache_file(self.cache_dir, key)).exists():
+            item = self._store(key, orjson.loads(path.read_bytes()), persist=False)  # pylint: disable=maybe-no-member
+
+        if item is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return item
+
+    def _enqueue(self: Self, key: _Key) -> asyncio.Future[AdditionalDataItem | None]:
+        """Queue a geometry for the next batch."""
+        future: asyncio.Future[AdditionalDataItem | None] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        geometry_id, zoom = key
+        self._queued.setdefault(zoom, []).append(geometry_id)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        return future
+
+    async def _flush(self: Self) -> None:
+        """Fetch the queued geometries, in chunks in parallel."""
+        await asyncio.sleep(self.batch_delay)
+        queued, self._queued, self._flush_task = self._queued, {}, None
+        await asyncio.gather(
+            *(
+                self._fetch_chunk(ids[start : start + MAX_GEOMETRIES_PER_REQUEST], zoom)
+                for zoom, ids in queued.items()
+                for start in range(0, len(ids), MAX_GEOMETRIES_PER_REQUEST)
+            )
+        )
+
+    async def _fetch_chunk(self: Self, ids: list[str], zoom: int | None) -> None:
+        """Fetch a chunk of geometries and resolve their futures."""
+        try:
+            async with self._semaphore:
+                self.requests += 1
+                params = AdditionalDataParams(geometriesZoom=zoom) if zoom is not None else None
+                response = await self.api.get_additional_data(geometries=ids, params=params)
+        except Exception as error:  # pylint: disable=broad-exception-caught  # noqa: BLE001
+            self._resolve(ids, zoom, error=error)
+            return
+        except BaseException:
+            self._resolve(ids, zoom)
+            raise
+
+        returned = {item.providerID: item for item in response.additionalData}
+        stored = {geometry_id: self._store((geometry_id, zoom), _to_dict(item)) for geometry_id, item in returned.items() if geometry_id in ids}
+        self._resolve(ids, zoom, items=stored)
+
+    def _resolve(
+        self: Self,
+        ids: list[str],
+        zoom: int | None,
+        *,
+        items: dict[str, AdditionalDataItem] | None = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Resolve the futures of a chunk with its items or error, or cancel them when the fetch itself was cancelled."""
+        for geometry_id in ids:
+            future = self._in_flight.pop((geometry_id, zoom))
+            if not future.done():
+                if items is not None:
+                    future.set_result(items.get(geometry_id))
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.cancel()
+
+    def _store(self: Self, key: _Key, data: dict[str, Any], *, persist: bool = True) -> AdditionalDataItem:
+        """Cache a geometry in memory and, when enabled, on disk."""
+        if persist and self.cache_dir is not None:
+            path = _cache_file(self.cache_dir, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write a temporary file and rename it, so a concurrent reader never sees a partial file.
+            temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temporary.write_bytes(orjson.dumps(data))  # pylint: disable=maybe-no-member
+            temporary.replace(path)
+
+        geometry_data = data.get("geometryData")
+        if self.compact and geometry_data is not None:
+            geometry_data = compact_coordinates(geometry_data)
+        item = AdditionalDataItem(providerID=data["providerID"], error=data.get("error"), geometryData=geometry_data)
+        self._items.set(key, item)
+        return item
+
+
+def compact_coordinates(geojson: Any) -> Any:  # noqa: ANN401
+    """Replace the coordinate lists of a GeoJSON object with flat arrays.
+
+    Every list of positions, like a line string or a polygon ring, becomes an `array("d")` of [lon, lat, lon, lat, ...]. Single positions are
+    kept as lists.
+
+    Args:
+        geojson (Any): A GeoJSON object, or a part of it.
+
+    Returns:
+        Any: A copy of the object with compact coordinates.
+    """
+    if isinstance(geojson, dict):
+        return {key: compact_coordinates(value) for key, value in geojson.items()}
+    if isinstance(geojson, list):
+        if geojson and all(_is_position(position) for position in geojson):
+            return array("d", (coordinate for position in geojson for coordinate in position[:2]))
+        return [compact_coordinates(value) for value in geojson]
+    return geojson
+
+
+def expand_coordinates(coordinates: array[float]) -> list[list[float]]:
+    """Expand a flat coordinate array back into a list of [lon, lat] positions.
+
+    Args:
+        coordinates (array[float]): The flat array, as created by `compact_coordinates`.
+
+    Returns:
+        list[list[float]]: The positions.
+    """
+    return [[coordinates[i], coordinates[i + 1]] for i in range(0, len(coordinates), 2)]
+
+
+def _is_position(value: Any) -> bool:  # noqa: ANN401
+    """Check whether a value is a GeoJSON position."""
+    return isinstance(value, list) and len(value) >= 2 and all(isinstance(coordinate, int | float) for coordinate in value)  # noqa: PLR2004
+
+
+def _cache_file(cache_dir: Path, key: _Key) -> Path:
+    """Get the cache file of a geometry, the id is quoted so it cannot name another directory."""
+    geometry_id, zoom = key
+    return cache_dir / ("default" if zoom is None else str(zoom)) / f"{quote(geometry_id, safe='')}.json"
+
+
+def _to_dict(item: AdditionalDataItem) -> dict[str, Any]:
+    """Convert an item to a JSON serializable dictionary."""
+    return {"providerID": item.providerID, "error": item.error, "geometryData": item.geometryData}
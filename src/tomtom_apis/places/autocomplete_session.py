@@ -0,0 +1,214 @@
+"""Autocomplete session."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Final, Self
+
+from tomtom_apis.cache import LRUCache
+from tomtom_apis.models import Language
+from tomtom_apis.places.models import AutocompleteParams, AutocompleteResponse, AutocompleteResult, Context, Match, Matches, Segment
+from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTOCOMPLETE_LIMIT: Final[int] = 5
+
+
+@dataclass(kw_only=True)
+class KeystrokeLatency:
+    """The end-to-end latency of a single keystroke.
+
+    Attributes:
+        query (str): The query typed so far.
+        seconds (float): The time between the keystroke and its suggestions.
+        local (bool): Whether the suggestions were served without calling the API.
+    """
+
+    query: str
+    seconds: float
+    local: bool
+
+
+@dataclass(kw_only=True)
+class AutocompleteSessionStats:
+    """Counters of an autocomplete session.
+
+    Attributes:
+        keystrokes (int): The number of queries typed.
+        requests (int): The number of autocomplete requests sent to the API.
+        cancelled (int): The number of keystrokes superseded before their suggestions were available.
+        served_locally (int): The number of keystrokes answered from earlier responses.
+    """
+
+    keystrokes: int = 0
+    requests: int = 0
+    cancelled: int = 0
+    served_locally: int = 0
+
+
+class AutocompleteSession:  # pylint: disable=too-many-instance-attributes
+    """Autocomplete session for typeahead inputs.
+
+    Call `suggest` for every keystroke. Requests are debounced, a new keystroke cancels the request of the previous one, and queries that extend a
+    cached query are answered locally when the cached response was complete, which is when it returned fewer results than the limit.
+
+    Attributes:
+        api (SearchApi): The API used to fetch suggestions.
+        language (Language): The language in which to return the suggestions.
+        params (AutocompleteParams | None): Additional parameters for the autocomplete requests.
+        debounce (float): The number of seconds to wait for a next keystroke before sending a request.
+        stats (AutocompleteSessionStats): The counters of this session.
+        latencies (deque[KeystrokeLatency]): The latencies of the most recent keystrokes that returned suggestions.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: SearchApi,
+        *,
+        language: Language,
+        params: AutocompleteParams | None = None,
+        debounce: float = 0.15,
+        max_cached_queries: int = 256,
+        max_latencies: int = 100,
+    ) -> None:
+        """Initialize the AutocompleteSession.
+
+        Args:
+            api (SearchApi): The API used to fetch suggestions.
+            language (Language): The language in which to return the suggestions.
+            params (AutocompleteParams | None, optional): Additional parameters for the autocomplete requests. Defaults to None.
+            debounce (float, optional): The number of seconds to wait for a next keystroke before sending a request. Defaults to 0.15.
+            max_cached_queries (int, optional): The maximum number of responses kept for local answers. Defaults to 256.
+            max_latencies (int, optional): The number of keystroke latencies kept. Defaults to 100.
+        """
+        self.api = api
+        self.language = language
+        self.params = params
+        self.debounce = debounce
+        self.stats = AutocompleteSessionStats()
+        self.latencies: deque[KeystrokeLatency] = deque(maxlen=max_latencies)
+        self._responses: LRUCache[str, AutocompleteResponse] = LRUCache(max_size=max_cached_queries)
+        self._task: asyncio.Task[AutocompleteResponse] | None = None
+
+    async def suggest(self: Self, query: str) -> AutocompleteResponse | None:
+        """Get suggestions for the query typed so far.
+
+        Args:
+            query (str): The query typed so far.
+
+        Returns:
+            AutocompleteResponse | None: The suggestions, or None when the query is empty or the keystroke was superseded by a newer one.
+        """
+        started = time.perf_counter()
+        self.stats.keystrokes += 1
+        self._cancel_pending()
+
+        normalized = _normalize(query)
+        if not normalized:
+            return None
+
+        local = self._lookup(query=query, normalized=normalized)
+        if local is not None:
+            self.stats.served_locally += 1
+            self.latencies.append(KeystrokeLatency(query=query, seconds=time.perf_counter() - started, local=True))
+            return local
+
+        task = asyncio.create_task(self._fetch(query=query, normalized=normalized))
+        self._task = task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+        if task.cancelled():
+            self.stats.cancelled += 1
+            return None
+
+        response = task.result()
+        self.latencies.append(KeystrokeLatency(query=query, seconds=time.perf_counter() - started, local=False))
+        return response
+
+    async def close(self: Self) -> None:
+        """Cancel the pending request, if any."""
+        self._cancel_pending()
+
+    def _cancel_pending(self: Self) -> None:
+        """Cancel the request of the previous keystroke when it is still in flight."""
+        if self._task is not None and not self._task.done():
+            logger.debug("Cancelling superseded autocomplete request")
+            self._task.cancel()
+        self._task = None
+
+    async def _fetch(self: Self, *, query: str, normalized: str) -> AutocompleteResponse:
+        """Wait for the debounce period and fetch suggestions from the API."""
+        await asyncio.sleep(self.debounce)
+        self.stats.requests += 1
+        response = await self.api.get_autocomplete(query=query, language=self.language, params=self.params)
+        self._responses.set(normalized, response)
+        return response
+
+    def _lookup(self: Self, *, query: str, normalized: str) -> AutocompleteResponse | None:
+        """Answer a query from the response of the query itself, or of its longest complete prefix."""
+        cached = self._responses.get(normalized)
+        if cached is not None:
+            return cached
+
+        limit = self.params.limit if self.params is not None and self.params.limit is not None else DEFAULT_AUTOCOMPLETE_LIMIT
+        for length in range(len(normalized) - 1, 0, -1):
+            prefix_response = self._responses.get(normalized[:length])
+            if prefix_response is None:
+                continue
+            if len(prefix_response.results) >= limit:
+                # The response might have been truncated, so the results for a longer query can not be derived from it.
+                return None
+            return _filter_response(prefix_response, query=query)
+
+        return None
+
+
+def _normalize(query: str) -> str:
+    """Normalize a query for case- and whitespace-insensitive lookups."""
+    return " ".join(query.casefold().split())
+
+
+def _filter_response(response: AutocompleteResponse, *, query: str) -> AutocompleteResponse:
+    """Keep the results of a response that match every word of the query, with the matches recalculated for the query."""
+    tokens: list[tuple[int, str]] = []
+    offset = 0
+    for word in query.split():
+        offset = query.index(word, offset)
+        tokens.append((offset, word.casefold()))
+        offset += len(word)
+
+    results: list[AutocompleteResult] = []
+    for result in response.results:
+        words = [
+            word
+            for segment in result.segments
+            for value in (segment.value, segment.matchedAlternativeName)
+            if value is not None
+            for word in value.casefold().split()
+        ]
+        if all(any(word.startswith(token) for word in words) for _, token in tokens):
+            results.append(AutocompleteResult(segments=[_rematch_segment(segment, tokens=tokens) for segment in result.segments]))
+
+    return AutocompleteResponse(context=Context(inputQuery=query, geoBias=response.context.geoBias), results=results)
+
+
+def _rematch_segment(segment: Segment, *, tokens: list[tuple[int, str]]) -> Segment:
+    """Copy a segment with the matches of the query tokens that are a prefix of one of its words."""
+    words = [word for value in (segment.value, segment.matchedAlternativeName) if value is not None for word in value.casefold().split()]
+    matches = [Match(offset=offset, length=len(token)) for offset, token in tokens if any(word.startswith(token) for word in words)]
+    return Segment(
+        type=segment.type,
+        value=segment.value,
+        matches=Matches(inputQuery=matches),
+        id=segment.id,
+        matchedAlternativeName=segment.matchedAlternativeName,
+    )
@@ -0,0 +1,346 @@
+"""Streaming bulk geocoding."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, Self
+from urllib.parse import quote, urlencode
+
+import orjson
+
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.cache import LRUCache
+from tomtom_apis.places.batch_search import BatchSearchApi
+from tomtom_apis.places.geocoding import GeocodingApi
+from tomtom_apis.places.models import BatchItem, BatchPostData, GeocodeParams, Result
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+MAX_SYNCHRONOUS_BATCH_ITEMS: Final[int] = 100
+NDJSON_SUFFIXES: Final[frozenset[str]] = frozenset({".ndjson", ".jsonl"})
+
+
+@dataclass(kw_only=True)
+class BulkGeocodingProgress:
+    """Progress of a bulk geocoding job.
+
+    Attributes:
+        rows (int): The number of rows written, including rows of an earlier run that was resumed.
+        requests (int): The number of geocode queries sent to the API, a batch counts every query in it.
+        cached (int): The number of rows answered by an earlier row with the same normalized address.
+        failed (int): The number of rows without a result because the query failed or was empty.
+        total_rows (int | None): The total number of rows in the input, None when unknown.
+        started (float): The monotonic time the job started.
+        resumed_rows (int): The number of rows written by an earlier run that was resumed.
+    """
+
+    rows: int = 0
+    requests: int = 0
+    cached: int = 0
+    failed: int = 0
+    total_rows: int | None = None
+    started: float = field(default_factory=time.monotonic)
+    resumed_rows: int = 0
+
+    @property
+    def throughput(self: Self) -> float:
+        """Return the number of rows processed per second by this run.
+
+        Returns:
+            float: The rows per second.
+        """
+        elapsed = time.monotonic() - self.started
+        return (self.rows - self.resumed_rows) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self: Self) -> float | None:
+        """Return the estimated number of seconds until the job finishes.
+
+        Returns:
+            float | None: The seconds left, None when the total number of rows is unknown or nothing was processed yet.
+        """
+        if self.total_rows is None or self.throughput == 0:
+            return None
+        return max(0, self.total_rows - self.rows) / self.throughput
+
+
+class BulkGeocoder:  # pylint: disable=too-few-public-methods
+    """Streaming bulk geocoder for CSV and NDJSON address files.
+
+    Rows are read lazily and processed in chunks. Addresses are normalized, and rows with an address that was geocoded before are answered
+    without a request. The remaining addresses are geocoded with synchronous batches when the API is a `BatchSearchApi`, or with concurrent
+    single requests when it is a `GeocodingApi`. The best result of every row is appended to an NDJSON output file, in input order.
+
+    When a checkpoint path is given, the number of rows written and the size of the output are stored after every chunk, so a job that was
+    killed resumes after the last completed chunk without geocoding those rows again.
+
+    Attributes:
+        api (GeocodingApi | BatchSearchApi): The API used to geocode.
+        params (GeocodeParams | None): Additional parameters for the geocode requests.
+        chunk_size (int): The number of rows processed per chunk, the maximum batch size for batches.
+        max_concurrency (int): The maximum number of single requests in flight.
+    """
+
+    def __init__(
+        self: Self,
+        api: GeocodingApi | BatchSearchApi,
+        *,
+        params: GeocodeParams | None = None,
+        chunk_size: int = MAX_SYNCHRONOUS_BATCH_ITEMS,
+        max_concurrency: int = 8,
+        max_cached: int = 100_000,
+    ) -> None:
+        """Initialize the BulkGeocoder.
+
+        Args:
+            api (GeocodingApi | BatchSearchApi): The API used to geocode.
+            params (GeocodeParams | None, optional): Additional parameters for the geocode requests. Defaults to None.
+            chunk_size (int, optional): The number of rows processed per chunk, at most 100 for batches. Defaults to 100.
+            max_concurrency (int, optional): The maximum number of single requests in flight. Defaults to 8.
+            max_cached (int, optional): The maximum number of normalized addresses kept for deduplication. Defaults to 100_000.
+        """
+        self.api = api
+        self.params = params
+        self.chunk_size = min(chunk_size, MAX_SYNCHRONOUS_BATCH_ITEMS) if isinstance(api, BatchSearchApi) else chunk_size
+        self.max_concurrency = max_concurrency
+        self._results: LRUCache[str, Result | None] = LRUCache(max_size=max_cached)
+
+    async def run(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        input_path: Path,
+        output_path: Path,
+        *,
+        column: str | None = "address",
+        checkpoint_path: Path | None = None,
+        total_rows: int | None = None,
+        on_progress: Callable[[BulkGeocodingProgress], None] | None = None,
+    ) -> BulkGeocodingProgress:
+        """Geocode all rows of an input file.
+
+        Args:
+            input_path (Path): The CSV or NDJSON file with addresses, NDJSON files have the .ndjson or .jsonl suffix.
+            output_path (Path): The NDJSON file to write the results to, a resumed job appends to it.
+            column (str | None, optional): The column or field with the address, None to join all CSV columns. Defaults to "address".
+            checkpoint_path (Path | None, optional): The file to store the progress in, None to not resume. Defaults to None.
+            total_rows (int | None, optional): The number of rows in the input, for the ETA. Defaults to None.
+            on_progress (Callable[[BulkGeocodingProgress], None] | None, optional): Called after every chunk. Defaults to None.
+
+        Returns:
+            BulkGeocodingProgress: The final progress of the job.
+        """
+        skip, output_size = _load_checkpoint(checkpoint_path)
+        progress = BulkGeocodingProgress(rows=skip, total_rows=total_rows, resumed_rows=skip)
+        if skip:
+            logger.info("Resuming bulk geocoding after %d rows", skip)
+
+        with output_path.open("ab") as output:
+            output.truncate(output_size if skip else 0)
+            for chunk in itertools.batched(itertools.islice(read_addresses(input_path, column=column), skip, None), self.chunk_size, strict=False):
+                lines = await self._geocode_chunk(list(chunk), progress)
+                output.write(b"".join(lines))
+                output.flush()
+                progress.rows += len(lines)
+                _write_checkpoint(checkpoint_path, rows=progress.rows, output_size=output.tell())
+                if on_progress is not None:
+                    on_progress(progress)
+
+        _remove_checkpoint(checkpoint_path)
+        return progress
+
+    async def _geocode_chunk(self: Self, rows: list[tuple[int, str]], progress: BulkGeocodingProgress) -> list[bytes]:
+        """Geocode the new addresses of a chunk and return an output line per row."""
+        normalized = [normalize_address(address) for _, address in rows]
+        queries = [query for query in dict.fromkeys(normalized) if query and query not in self._results]
+        errors = await self._geocode(queries, progress) if queries else {}
+
+        fetched = set(queries)
+        lines: list[bytes] = []
+        for (row, address), query in zip(rows, normalized, strict=True):
+            error = errors.get(query) or (None if query else "Empty address")
+            result = self._results.get(query) if error is None else None
+            if error is not None:
+                progress.failed += 1
+            elif query not in fetched:
+                progress.cached += 1
+            fetched.discard(query)
+
+            record: dict[str, Any] = {"row": row, "address": address, "result": result.to_dict() if result is not None else None}
+            if error is not None:
+                record["error"] = error
+            lines.append(orjson.dumps(record) + b"\n")  # pylint: disable=maybe-no-member
+        return lines
+
+    async def _geocode(self: Self, queries: list[str], progress: BulkGeocodingProgress) -> dict[str, str]:
+        """Geocode addresses, cache their best results and return the error messages of the failed addresses."""
+        progress.requests += len(queries)
+        api = self.api
+        outcomes = await (self._geocode_batch(api, queries) if isinstance(api, BatchSearchApi) else self._geocode_single(api, queries))
+        errors: dict[str, str] = {}
+        for query, outcome in zip(queries, outcomes, strict=True):
+            if isinstance(outcome, str):
+                errors[query] = outcome
+            else:
+                self._results.set(query, outcome)
+        return errors
+
+    async def _geocode_single(self: Self, api: GeocodingApi, queries: list[str]) -> list[Result | str | None]:
+        """Geocode addresses with concurrent single requests, a failed request returns its error message."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def geocode(query: str) -> Result | str | None:
+            async with semaphore:
+                try:
+                    response = await api.get_geocode(query=query, params=self.params)
+                except Exception as error:  # pylint: disable=broad-exception-caught  # noqa: BLE001
+                    logger.warning("Geocoding %r failed: %s", query, error)
+                    return str(error)
+            return response.results[0] if response.results else None
+
+        return list(await asyncio.gather(*(geocode(query) for query in queries)))
+
+    async def _geocode_batch(self: Self, api: BatchSearchApi, queries: list[str]) -> list[Result | str | None]:
+        """Geocode addresses with a synchronous batch, a failed batch item returns its error message and a failed batch that of every item."""
+        query_string = f"?{urlencode(self.params.to_dict())}" if self.params is not None else ""
+        items = [BatchItem(query=f"/geocode/{quote(query, safe='')}.json{query_string}") for query in queries]
+        try:
+            response = await api.post_synchronous_batch(data=BatchPostData(batchItems=items))
+        except Exception as error:  # pylint: disable=broad-exception-caught  # noqa: BLE001
+            logger.warning("Geocoding a batch of %d addresses failed: %s", len(queries), error)
+            return [str(error)] * len(queries)
+        if len(response.batchItems) != len(queries):
+            logger.warning("Geocoding a batch of %d addresses returned %d items", len(queries), len(response.batchItems))
+            return [f"Batch of {len(queries)} addresses returned {len(response.batchItems)} items"] * len(queries)
+
+        outcomes: list[Result | str | None] = []
+        for item in response.batchItems:
+            if item.response.results is None:
+                outcomes.append(item.response.errorText or item.response.message or f"Status {item.statusCode}")
+            else:
+                outcomes.append(item.response.results[0] if item.response.results else None)
+        return outcomes
+
+
+def normalize_address(address: str) -> str:
+    """Normalize an address for deduplication.
+
+    Args:
+        address (str): The address as read from the input.
+
+    Returns:
+        str: The address with collapsed whitespace and without leading and trailing whitespace and commas, case-folded.
+    """
+    return " ".join(address.split()).strip(" ,").casefold()
+
+
+def read_addresses(path: Path, *, column: str | None = "address") -> Iterator[tuple[int, str]]:
+    """Read the addresses of a CSV or NDJSON file lazily.
+
+    Args:
+        path (Path): The CSV or NDJSON file, NDJSON files have the .ndjson or .jsonl suffix.
+        column (str | None, optional): The column or field with the address, None to join all CSV columns. Defaults to "address".
+
+    Yields:
+        tuple[int, str]: The row number, starting at 0, and the address.
+    """
+    with path.open(encoding="utf-8", newline="") as file:
+        if path.suffix in NDJSON_SUFFIXES:
+            for row, line in enumerate(line for line in file if line.strip()):
+                yield row, str(orjson.loads(line).get(column or "address") or "")  # pylint: disable=maybe-no-member
+        else:
+            for row, record in enumerate(csv.DictReader(file)):
+                yield row, (record.get(column) or "") if column is not None else ", ".join(value for value in record.values() if value)
+
+
+def _load_checkpoint(path: Path | None) -> tuple[int, int]:
+    """Load the number of rows written and the output size from a checkpoint."""
+    if path is None or not path.exists():
+        return 0, 0
+    checkpoint = orjson.loads(path.read_bytes())  # pylint: disable=maybe-no-member
+    return checkpoint["rows"], checkpoint["output_size"]
+
+
+def _write_checkpoint(path: Path | None, *, rows: int, output_size: int) -> None:
+    """Write the number of rows written and the output size to a checkpoint."""
+    if path is None:
+        return
+    temporary = path.with_suffix(".tmp")
+    temporary.write_bytes(orjson.dumps({"rows": rows, "output_size": output_size}))  # pylint: disable=maybe-no-member
+    temporary.replace(path)
+
+
+def _remove_checkpoint(path: Path | None) -> None:
+    """Remove the checkpoint after a completed job."""
+    if path is not None:
+        path.unlink(missing_ok=True)
+
+
+def _print_progress(progress: BulkGeocodingProgress) -> None:
+    """Print the progress of a job to stderr."""
+    total = f"/{progress.total_rows}" if progress.total_rows is not None else ""
+    eta = f", ETA {progress.eta:.0f}s" if progress.eta is not None else ""
+    print(  # noqa: T201
+        f"{progress.rows}{total} rows, {progress.requests} requests, {progress.cached} cached, {progress.failed} failed, "
+        f"{progress.throughput:.1f} rows/s{eta}",
+        file=sys.stderr,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run a bulk geocoding job from the command line.
+
+    Args:
+        argv (list[str] | None, optional): The command line arguments, None to use sys.argv. Defaults to None.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(prog="tomtom-bulk-geocode", description="Geocode a CSV or NDJSON file of addresses to NDJSON.")
+    parser.add_argument("input", type=Path, help="CSV or NDJSON (.ndjson, .jsonl) file with addresses")
+    parser.add_argument("output", type=Path, help="NDJSON file to write the results to")
+    parser.add_argument("--column", default="address", help="column or field with the address (default: address)")
+    parser.add_argument("--checkpoint", type=Path, help="file to store progress in, to resume a killed job")
+    parser.add_argument("--batch", action="store_true", help="use synchronous batches instead of single requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum single requests in flight (default: 8)")
+    parser.add_argument("--country", action="append", help="restrict results to a country code, can be repeated")
+    parser.add_argument("--api-key", default=os.getenv("TOMTOM_API_KEY"), help="API key (default: $TOMTOM_API_KEY)")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an API key is required, use --api-key or set TOMTOM_API_KEY")
+    if not args.input.exists():
+        parser.error(f"input file {args.input} does not exist")
+
+    with args.input.open("rb") as file:
+        total_rows = sum(1 for line in file if line.strip()) - (0 if args.input.suffix in NDJSON_SUFFIXES else 1)
+
+    progress = asyncio.run(_run(args, total_rows))
+    _print_progress(progress)
+    return 0
+
+
+async def _run(args: argparse.Namespace, total_rows: int) -> BulkGeocodingProgress:
+    """Run a bulk geocoding job with parsed command line arguments."""
+    options = ApiOptions(api_key=args.api_key)
+    params = GeocodeParams(limit=1, countrySet=args.country)
+    async with BatchSearchApi(options) if args.batch else GeocodingApi(options) as api:
+        geocoder = BulkGeocoder(api, params=params, max_concurrency=args.concurrency)
+        return await geocoder.run(
+            args.input,
+            args.output,
+            column=args.column,
+            checkpoint_path=args.checkpoint,
+            total_rows=total_rows,
+            on_progress=_print_progress,
+        )
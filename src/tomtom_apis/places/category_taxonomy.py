@@ -0,0 +1,225 @@
+"""Indexed POI category taxonomy."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import time
+from typing import TYPE_CHECKING, Self
+
+from tomtom_apis.places.models import PoiCategoriesParams, PoiCategoriesResponse, PoiCategory
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from tomtom_apis.models import Language
+    from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryTaxonomy:
+    """Indexed POI category taxonomy.
+
+    Indexes the category tree of `SearchApi.get_poi_categories` for lookups without network calls: categories and their parents and children by
+    id, categories by exact name or synonym, and categories by prefix of their name, their synonyms or any word in them. Names are matched case-
+    and whitespace-insensitively.
+
+    Use `load` to fetch the taxonomy once and cache it on disk per language.
+    """
+
+    def __init__(self: Self, categories: Iterable[PoiCategory]) -> None:
+        """Initialize the CategoryTaxonomy.
+
+        Args:
+            categories (Iterable[PoiCategory]): The categories, as returned by `SearchApi.get_poi_categories`.
+        """
+        self._categories: dict[int, PoiCategory] = {category.id: category for category in categories}
+        self._parents: dict[int, list[int]] = {}
+        self._names: dict[str, list[int]] = {}
+        terms: set[tuple[str, int]] = set()
+
+        for category in self._categories.values():
+            for child_id in category.childCategoryIds:
+                self._parents.setdefault(child_id, []).append(category.id)
+            for name in (category.name, *category.synonyms):
+                normalized = _normalize(name)
+                ids = self._names.setdefault(normalized, [])
+                if category.id not in ids:
+                    ids.append(category.id)
+                words = normalized.split()
+                terms.update((" ".join(words[i:]), category.id) for i in range(len(words)))
+
+        self._terms = sorted(terms)
+
+    @classmethod
+    def from_response(cls: type[Self], response: PoiCategoriesResponse) -> Self:
+        """Create a taxonomy from a POI categories response.
+
+        Args:
+            response (PoiCategoriesResponse): The response of `SearchApi.get_poi_categories`.
+
+        Returns:
+            Self: The indexed taxonomy.
+        """
+        return cls(response.poiCategories or [])
+
+    @classmethod
+    async def load(
+        cls: type[Self],
+        api: SearchApi,
+        *,
+        language: Language | None = None,
+        cache_dir: Path | None = None,
+        max_age: float | None = None,
+    ) -> Self:
+        """Load the taxonomy from the cache directory, or fetch it and store it in the cache directory.
+
+        Args:
+            api (SearchApi): The API used to fetch the categories.
+            language (Language | None, optional): The language of the category names. Defaults to None.
+            cache_dir (Path | None, optional): The directory to cache the categories in, None to always fetch them. Defaults to None.
+            max_age (float | None, optional): The number of seconds a cached file stays valid, None to keep it forever. Defaults to None.
+
+        Returns:
+            Self: The indexed taxonomy.
+        """
+        path = cache_dir / f"poi_categories.{language or 'default'}.json" if cache_dir is not None else None
+        if path is not None and path.exists() and (max_age is None or time.time() - path.stat().st_mtime < max_age):
+            logger.debug("Loading POI categories from %s", path)
+            return cls.from_response(PoiCategoriesResponse.from_json(path.read_bytes()))
+
+        response = await api.get_poi_categories(params=PoiCategoriesParams(language=language) if language is not None else None)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(response.to_jsonb())
+        return cls.from_response(response)
+
+    def get(self: Self, category_id: int) -> PoiCategory | None:
+        """Get a category by id.
+
+        Args:
+            category_id (int): The id of the category.
+
+        Returns:
+            PoiCategory | None: The category, or None if the id is unknown.
+        """
+        return self._categories.get(category_id)
+
+    def children(self: Self, category_id: int) -> list[PoiCategory]:
+        """Get the direct children of a category.
+
+        Args:
+            category_id (int): The id of the category.
+
+        Returns:
+            list[PoiCategory]: The known children of the category.
+        """
+        category = self._categories.get(category_id)
+        if category is None:
+            return []
+        return [self._categories[child_id] for child_id in category.childCategoryIds if child_id in self._categories]
+
+    def parents(self: Self, category_id: int) -> list[PoiCategory]:
+        """Get the categories that list a category as a child.
+
+        Args:
+            category_id (int): The id of the category.
+
+        Returns:
+            list[PoiCategory]: The parents of the category.
+        """
+        return [self._categories[parent_id] for parent_id in self._parents.get(category_id, [])]
+
+    def descendants(self: Self, category_id: int) -> list[PoiCategory]:
+        """Get all categories below a category.
+
+        Args:
+            category_id (int): The id of the category.
+
+        Returns:
+            list[PoiCategory]: The children, their children and so on, each category once.
+        """
+        seen = {category_id}
+        result: list[PoiCategory] = []
+        stack = [category_id]
+        while stack:
+            for child in self.children(stack.pop()):
+                if child.id not in seen:
+                    seen.add(child.id)
+                    result.append(child)
+                    stack.append(child.id)
+        return result
+
+    def lookup(self: Self, name: str) -> list[PoiCategory]:
+        """Get the categories with a name or synonym.
+
+        Args:
+            name (str): The name or synonym, matched case- and whitespace-insensitively.
+
+        Returns:
+            list[PoiCategory]: The matching categories.
+        """
+        return [self._categories[category_id] for category_id in self._names.get(_normalize(name), [])]
+
+    def search(self: Self, prefix: str, *, limit: int = 10) -> list[PoiCategory]:
+        """Get the categories with a name, synonym or word in them that starts with a prefix.
+
+        Args:
+            prefix (str): The prefix, matched case- and whitespace-insensitively.
+            limit (int, optional): The maximum number of categories to return. Defaults to 10.
+
+        Returns:
+            list[PoiCategory]: The matching categories, exact name and synonym matches first.
+        """
+        normalized = _normalize(prefix)
+        if not normalized:
+            return []
+
+        ids = list(self._names.get(normalized, []))
+        start = bisect.bisect_left(self._terms, (normalized, -1))
+        for term, category_id in self._terms[start:]:
+            if len(ids) >= limit or not term.startswith(normalized):
+                break
+            if category_id not in ids:
+                ids.append(category_id)
+        return [self._categories[category_id] for category_id in ids[:limit]]
+
+    def category_set(self: Self, *categories: int | str, include_descendants: bool = False) -> list[str]:
+        """Build a categorySet value for `CategorySearchParams` or `NearbySearchParams`.
+
+        Args:
+            *categories (int | str): Category ids, or exact names or synonyms.
+            include_descendants (bool, optional): Whether to add all categories below the given categories. Defaults to False.
+
+        Returns:
+            list[str]: The category ids, each id once.
+
+        Raises:
+            ValueError: If a category id or name is unknown.
+        """
+        ids: dict[int, None] = {}
+        for category in categories:
+            matches = [self._categories[category]] if isinstance(category, int) and category in self._categories else []
+            if isinstance(category, str):
+                matches = self.lookup(category)
+            if not matches:
+                msg = f"Unknown POI category: {category}"
+                raise ValueError(msg)
+
+            for match in matches:
+                ids[match.id] = None
+                if include_descendants:
+                    ids.update(dict.fromkeys(descendant.id for descendant in self.descendants(match.id)))
+
+        return [str(category_id) for category_id in ids]
+
+    def __len__(self: Self) -> int:
+        """Return the number of categories."""
+        return len(self._categories)
+
+
+def _normalize(name: str) -> str:
+    """Normalize a name for case- and whitespace-insensitive lookups."""
+    return " ".join(name.casefold().split())
@@ -0,0 +1,231 @@
+"""Circle cover planner for nearby searches."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Final, Self
+
+from tomtom_apis.geo import EARTH_RADIUS_METERS, haversine_distance
+from tomtom_apis.places.models import NearbySearchParams
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tomtom_apis.models import LatLon
+    from tomtom_apis.places.models import Result
+    from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+MAX_NEARBY_RADIUS: Final[int] = 50_000
+MAX_NEARBY_LIMIT: Final[int] = 100
+METERS_PER_DEGREE: Final[float] = math.radians(1) * EARTH_RADIUS_METERS
+
+
+@dataclass(kw_only=True)
+class SearchCircle:
+    """A nearby search that covers the surroundings of a group of sites.
+
+    Attributes:
+        lat (float): The latitude of the center.
+        lon (float): The longitude of the center.
+        radius (int): The radius in meters.
+        sites (list[int]): The indices of the covered sites.
+    """
+
+    lat: float
+    lon: float
+    radius: int
+    sites: list[int] = field(default_factory=list)
+
+
+class _GridIndex:  # pylint: disable=too-few-public-methods
+    """A grid of cells of about the same size in meters, for radius queries over points."""
+
+    def __init__(self: Self, points: Sequence[tuple[float, float]], cell_size: float) -> None:
+        """Index the (lat, lon) points in cells of cell_size meters."""
+        self.points = points
+        max_lat = max((abs(lat) for lat, _ in points), default=0.0)
+        self._lat_size = cell_size / METERS_PER_DEGREE
+        self._lon_size = cell_size / (METERS_PER_DEGREE * max(math.cos(math.radians(min(max_lat, 89.0))), 1e-6))
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for i, (lat, lon) in enumerate(points):
+            self._cells.setdefault(self._cell(lat, lon), []).append(i)
+
+    def near(self: Self, lat: float, lon: float, radius: float) -> list[tuple[float, int]]:
+        """Get the (distance, index) of the points within radius meters of a location."""
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + d_lat, 89.0))), 1e-6))
+        south, west = self._cell(lat - d_lat, lon - d_lon)
+        north, east = self._cell(lat + d_lat, lon + d_lon)
+        found: list[tuple[float, int]] = []
+        for x in range(south, north + 1):
+            for y in range(west, east + 1):
+                for i in self._cells.get((x, y), ()):
+                    distance = haversine_distance(lat, lon, *self.points[i])
+                    if distance <= radius:
+                        found.append((distance, i))
+        return found
+
+    def _cell(self: Self, lat: float, lon: float) -> tuple[int, int]:
+        """Get the cell of a location."""
+        return math.floor(lat / self._lat_size), math.floor(lon / self._lon_size)
+
+
+def plan_circles(sites: Sequence[LatLon], *, search_radius: float, max_circle_radius: float = 5_000.0) -> list[SearchCircle]:
+    """Plan a small set of search circles that cover the surroundings of all sites.
+
+    Every circle contains the search radius around each of its sites. Sites with the most neighbours are grouped first, each group is centered on
+    the centroid of its sites when that keeps the circle within the maximum radius.
+
+    Args:
+        sites (Sequence[LatLon]): The sites.
+        search_radius (float): The radius in meters around each site to search.
+        max_circle_radius (float, optional): The maximum radius of a circle in meters. Defaults to 5_000.0.
+
+    Returns:
+        list[SearchCircle]: The circles, each site is covered by exactly one circle.
+
+    Raises:
+        ValueError: If the search radius exceeds the maximum circle radius, or the maximum circle radius exceeds the limit of nearby search.
+    """
+    if search_radius > max_circle_radius or max_circle_radius > MAX_NEARBY_RADIUS:
+        msg = f"search_radius must not exceed max_circle_radius, which must not exceed {MAX_NEARBY_RADIUS}"
+        raise ValueError(msg)
+
+    points = [(site.lat, site.lon) for site in sites]
+    reach = max_circle_radius - search_radius
+    index = _GridIndex(points, max(reach, 1.0))
+    neighbours = [index.near(lat, lon, reach) for lat, lon in points]
+    covered: set[int] = set()
+    circles: list[SearchCircle] = []
+
+    for seed in sorted(range(len(points)), key=lambda i: -len(neighbours[i])):
+        if seed in covered:
+            continue
+        members = {i for _, i in neighbours[seed]} - covered
+        covered |= members
+
+        lat, lon, spread = _enclose(points, members)
+        if spread > reach:
+            (lat, lon), spread = points[seed], max(distance for distance, i in neighbours[seed] if i in members)
+        circles.append(SearchCircle(lat=lat, lon=lon, radius=math.ceil(spread + search_radius), sites=sorted(members)))
+
+    return circles
+
+
+def _enclose(points: Sequence[tuple[float, float]], members: set[int]) -> tuple[float, float, float]:
+    """Get the centroid of a group of points and the distance in meters to the farthest point."""
+    lat = sum(points[i][0] for i in members) / len(members)
+    lon = sum(points[i][1] for i in members) / len(members)
+    return lat, lon, max(haversine_distance(lat, lon, *points[i]) for i in members)
+
+
+@dataclass(kw_only=True)
+class CircleCoverStats:
+    """Counters of circle cover searches.
+
+    Attributes:
+        sites (int): The number of sites searched around.
+        requests (int): The number of nearby searches sent to the API.
+        splits (int): The number of circles with more results than returned, that were searched again as smaller circles.
+        truncated (int): The number of circles around a single site with more results than returned, that could not be split.
+    """
+
+    sites: int = 0
+    requests: int = 0
+    splits: int = 0
+    truncated: int = 0
+
+
+class CircleCoverSearch:  # pylint: disable=too-few-public-methods
+    """Nearby search around many sites.
+
+    Instead of a nearby search per site, the sites are grouped into a small set of search circles with `plan_circles`, the circles are searched
+    concurrently, and each result is assigned to every site it is within the search radius of. The more the sites are clustered, the fewer
+    requests are needed. The result limit of the nearby search applies per circle and defaults to the maximum of the API. The API returns the
+    results nearest the center of a circle, so a circle with more results than returned is planned again as circles of half its radius and those
+    are searched instead, down to a circle per site.
+
+    Attributes:
+        api (SearchApi): The API used for the nearby searches.
+        search_radius (float): The radius in meters around each site to search.
+        max_circle_radius (float): The maximum radius of a search circle in meters.
+        stats (CircleCoverStats): The counters of the searches.
+    """
+
+    def __init__(
+        self: Self,
+        api: SearchApi,
+        *,
+        search_radius: float = 500.0,
+        max_circle_radius: float = 5_000.0,
+        max_concurrency: int = 8,
+    ) -> None:
+        """Initialize the CircleCoverSearch.
+
+        Args:
+            api (SearchApi): The API used for the nearby searches.
+            search_radius (float, optional): The radius in meters around each site to search. Defaults to 500.0.
+            max_circle_radius (float, optional): The maximum radius of a search circle in meters. Defaults to 5_000.0.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+        """
+        self.api = api
+        self.search_radius = search_radius
+        self.max_circle_radius = max_circle_radius
+        self.stats = CircleCoverStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search(self: Self, sites: Sequence[LatLon], *, params: NearbySearchParams | None = None) -> list[list[Result]]:
+        """Search the surroundings of all sites.
+
+        Args:
+            sites (Sequence[LatLon]): The sites.
+            params (NearbySearchParams | None, optional): Additional parameters for the requests, the radius is set per circle. Defaults to None.
+
+        Returns:
+            list[list[Result]]: The results within the search radius of each site, in the order of the sites, nearest first.
+        """
+        circles = plan_circles(sites, search_radius=self.search_radius, max_circle_radius=self.max_circle_radius)
+        self.stats.sites += len(sites)
+        logger.debug("Searching around %d sites with %d circles", len(sites), len(circles))
+
+        responses = await asyncio.gather(*(self._search_circle(sites, circle, params) for circle in circles))
+
+        index = _GridIndex([(site.lat, site.lon) for site in sites], self.search_radius)
+        found: list[dict[str, tuple[float, Result]]] = [{} for _ in sites]
+        for response in responses:
+            for result in response:
+                for distance, i in index.near(result.position.lat, result.position.lon, self.search_radius):
+                    found[i].setdefault(result.id, (distance, result))
+
+        return [[result for _, result in sorted(results.values(), key=lambda item: item[0])] for results in found]
+
+    async def _search_circle(self: Self, sites: Sequence[LatLon], circle: SearchCircle, params: NearbySearchParams | None) -> list[Result]:
+        """Search a circle under the concurrency limit, and search it again as smaller circles when it has more results than were returned."""
+        if params is None:
+            params = NearbySearchParams(limit=MAX_NEARBY_LIMIT)
+        elif params.limit is None:
+            params = replace(params, limit=MAX_NEARBY_LIMIT)
+        async with self._semaphore:
+            self.stats.requests += 1
+            response = await self.api.get_nearby_search(lat=circle.lat, lon=circle.lon, params=replace(params, radius=circle.radius))
+
+        total = response.summary.totalResults
+        if total is None or total <= len(response.results):
+            return response.results
+        if circle.radius <= math.ceil(self.search_radius):
+            self.stats.truncated += 1
+            logger.debug("Circle around site %d has %d results, only %d were returned", circle.sites[0], total, len(response.results))
+            return response.results
+
+        self.stats.splits += 1
+        members = [sites[i] for i in circle.sites]
+        smaller = plan_circles(members, search_radius=self.search_radius, max_circle_radius=max(self.search_radius, circle.radius / 2))
+        logger.debug("Circle of %d sites has %d results, searching it as %d smaller circles", len(members), total, len(smaller))
+        for part in smaller:
+            part.sites = [circle.sites[i] for i in part.sites]
+        return [result for results in await asyncio.gather(*(self._search_circle(sites, part, params) for part in smaller)) for result in results]
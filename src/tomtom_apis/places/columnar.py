@@ -0,0 +1,122 @@
+"""Columnar export of search results."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Final, Self
+
+import orjson
+
+FLOAT_COLUMNS: Final[tuple[str, ...]] = ("lat", "lon", "score", "dist")
+STRING_COLUMNS: Final[dict[str, str]] = {
+    "id": "ids",
+    "type": "types",
+    "name": "names",
+    "freeform_address": "freeform_addresses",
+    "country_code": "country_codes",
+}
+
+
+@dataclass(kw_only=True)
+class SearchResultColumns:  # pylint: disable=too-many-instance-attributes
+    """The results of a search response as columns.
+
+    Missing floats are NaN, missing strings are None and missing category ids are an empty list.
+
+    Attributes:
+        ids (list[str]): The ids of the results.
+        types (list[str | None]): The result types, e.g. "POI" or "Street".
+        names (list[str | None]): The POI names.
+        freeform_addresses (list[str | None]): The formatted addresses.
+        country_codes (list[str | None]): The country codes.
+        lat (array[float]): The latitudes of the positions.
+        lon (array[float]): The longitudes of the positions.
+        score (array[float]): The scores.
+        dist (array[float]): The distances to the bias position in meters.
+        category_ids (list[list[int]]): The POI category ids.
+    """
+
+    ids: list[str] = field(default_factory=list)
+    types: list[str | None] = field(default_factory=list)
+    names: list[str | None] = field(default_factory=list)
+    freeform_addresses: list[str | None] = field(default_factory=list)
+    country_codes: list[str | None] = field(default_factory=list)
+    lat: array[float] = field(default_factory=lambda: array("d"))
+    lon: array[float] = field(default_factory=lambda: array("d"))
+    score: array[float] = field(default_factory=lambda: array("d"))
+    dist: array[float] = field(default_factory=lambda: array("d"))
+    category_ids: list[list[int]] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls: type[Self], data: bytes | str) -> Self:
+        """Build the columns from the raw JSON of a search response, without creating result objects.
+
+        Args:
+            data (bytes | str): The JSON of a search response, e.g. from `Response.bytes`.
+
+        Returns:
+            Self: The columns, with a row per result.
+        """
+        columns = cls()
+        nan = math.nan
+        for result in orjson.loads(data).get("results") or ():  # pylint: disable=maybe-no-member
+            poi = result.get("poi") or {}
+            address = result.get("address") or {}
+            position = result.get("position") or {}
+            columns.ids.append(result["id"])
+            columns.types.append(result.get("type"))
+            columns.names.append(poi.get("name"))
+            columns.freeform_addresses.append(address.get("freeformAddress"))
+            columns.country_codes.append(address.get("countryCode"))
+            columns.lat.append(position.get("lat", nan))
+            columns.lon.append(position.get("lon", nan))
+            columns.score.append(result.get("score", nan))
+            columns.dist.append(result.get("dist", nan))
+            columns.category_ids.append([category["id"] for category in poi.get("categorySet") or ()])
+        return columns
+
+    def to_numpy(self: Self) -> Any:  # noqa: ANN401
+        """Convert the columns to a NumPy structured array.
+
+        The float columns are float64 fields, the string and category id columns are object fields.
+
+        Returns:
+            numpy.ndarray: The structured array, with a record per result.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        import numpy as np  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        dtype = [(name, object) for name in STRING_COLUMNS] + [(name, np.float64) for name in FLOAT_COLUMNS] + [("category_ids", object)]
+        records = np.empty(len(self), dtype=dtype)
+        for name, attribute in STRING_COLUMNS.items():
+            records[name] = getattr(self, attribute)
+        records["category_ids"] = self.category_ids
+        for name in FLOAT_COLUMNS:
+            records[name] = np.frombuffer(getattr(self, name), dtype=np.float64)
+        return records
+
+    def to_arrow(self: Self) -> Any:  # noqa: ANN401
+        """Convert the columns to an Arrow table.
+
+        The float columns are float64 columns, the string columns are string columns and the category ids are a list of int64 column.
+
+        Returns:
+            pyarrow.Table: The table, with a row per result.
+
+        Raises:
+            ImportError: If PyArrow is not installed.
+        """
+        import pyarrow as pa  # noqa: PLC0415  # pylint: disable=import-outside-toplevel,import-error
+
+        columns: dict[str, Any] = {name: pa.array(getattr(self, attribute), type=pa.string()) for name, attribute in STRING_COLUMNS.items()}
+        columns |= {name: pa.array(getattr(self, name), type=pa.float64()) for name in FLOAT_COLUMNS}
+        columns["category_ids"] = pa.array(self.category_ids, type=pa.list_(pa.int64()))
+        return pa.table(columns)
+
+    def __len__(self: Self) -> int:
+        """Return the number of results."""
+        return len(self.ids)
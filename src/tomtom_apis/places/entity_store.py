@@ -0,0 +1,240 @@
+"""POI entity store."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, fields, is_dataclass, replace
+from typing import TYPE_CHECKING, Self
+
+from tomtom_apis.cache import CacheStats, LRUCache
+from tomtom_apis.places.models import (
+    CategorySearchParams,
+    Geometry,
+    GeometrySearchParams,
+    GeometrySearchPostData,
+    NearbySearchParams,
+    PlaceByIdParams,
+    PlaceByIdResponse,
+    PoiSearchParams,
+    RelatedPoisType,
+    Result,
+    SearchAlongRouteData,
+    SearchAlongRouteParams,
+    SearchParams,
+    SearchResponse,
+    Summary,
+)
+from tomtom_apis.places.search import SearchApi
+
+if TYPE_CHECKING:
+    from _typeshed import DataclassInstance
+    from aiohttp import ClientSession
+
+    from tomtom_apis.api import ApiOptions, BaseParams
+    from tomtom_apis.models import Language, ViewType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True)
+class _Entity:
+    """A stored result with the language and view it was requested in."""
+
+    result: Result
+    language: Language | None
+    view: ViewType | None
+
+
+class PoiEntityStore:
+    """POI entity store.
+
+    Holds the results of search responses by id, so a place by id request for an entity that was returned by an earlier search can be answered
+    without calling the API. A stored result answers a request when it was returned in the same language and view, and contains every optional
+    field the request asks for: opening hours, time zone, mapcodes and related POIs. A result for an entity that is already stored in the same
+    language and view is merged into the stored result, so a later, less detailed result does not drop the fields of a richer one.
+
+    Attributes:
+        stats (CacheStats): The counters of the place by id lookups.
+    """
+
+    def __init__(self: Self, *, max_entities: int = 10_000, ttl: float | None = 3600.0) -> None:
+        """Initialize the PoiEntityStore.
+
+        Args:
+            max_entities (int, optional): The maximum number of results kept, the least recently used result is evicted first. Defaults to 10_000.
+            ttl (float | None, optional): The number of seconds a result stays valid, None to keep results until they are evicted.
+                Defaults to 3600.0.
+        """
+        self.stats = CacheStats()
+        self._entities: LRUCache[str, _Entity] = LRUCache(max_size=max_entities, ttl=ttl)
+
+    def add(self: Self, results: list[Result], *, params: BaseParams | None = None) -> None:
+        """Store the results of a response.
+
+        Args:
+            results (list[Result]): The results to store.
+            params (BaseParams | None, optional): The parameters of the request that returned the results, for its language and view.
+                Defaults to None.
+        """
+        language = getattr(params, "language", None)
+        view = getattr(params, "view", None)
+        for result in results:
+            stored = self._entities.get(result.id)
+            merged = _merge(stored.result, result) if stored is not None and (stored.language, stored.view) == (language, view) else result
+            self._entities.set(result.id, _Entity(result=merged, language=language, view=view))
+
+    def get_place_by_id(self: Self, params: PlaceByIdParams) -> PlaceByIdResponse | None:
+        """Answer a place by id request from the stored results.
+
+        Args:
+            params (PlaceByIdParams): The parameters of the request.
+
+        Returns:
+            PlaceByIdResponse | None: The response with the stored result, or None if no stored result answers the request.
+        """
+        entity = self._entities.get(params.entityId)
+        if entity is None or not _answers(entity, params):
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return PlaceByIdResponse(summary=Summary(query="", queryTime=0, numResults=1, offset=0, totalResults=1), results=[entity.result])
+
+    def clear(self: Self) -> None:
+        """Remove all stored results."""
+        self._entities.clear()
+
+    @property
+    def evictions(self: Self) -> int:
+        """Return the number of results evicted because the store was full or they expired.
+
+        Returns:
+            int: The number of evicted results.
+        """
+        return self._entities.stats.evictions
+
+    def __contains__(self: Self, entity_id: str) -> bool:
+        """Return whether a result with the id is stored."""
+        return entity_id in self._entities
+
+    def __len__(self: Self) -> int:
+        """Return the number of stored results."""
+        return len(self._entities)
+
+
+def _merge[T: DataclassInstance](stored: T, new: T) -> T:
+    """Fill the fields a new result lacks from the stored result of the same entity, nested objects such as the POI field by field."""
+    changes = {}
+    for item in fields(new):
+        value, old = getattr(new, item.name), getattr(stored, item.name)
+        if value is None and old is not None:
+            changes[item.name] = old
+        elif is_dataclass(value) and not isinstance(value, type) and type(value) is type(old):
+            changes[item.name] = _merge(old, value)
+    return replace(new, **changes) if changes else new
+
+
+def _answers(entity: _Entity, params: PlaceByIdParams) -> bool:
+    """Check whether a stored result has everything a place by id request asks for."""
+    result = entity.result
+    poi = result.poi
+    return (
+        entity.language == params.language
+        and entity.view == params.view
+        and (params.openingHours is None or result.openingHours is not None or (poi is not None and poi.openingHours is not None))
+        and (params.timeZone is None or result.timeZone is not None or (poi is not None and poi.timeZone is not None))
+        and (not params.mapcodes or set(params.mapcodes) <= {mapcode.type for mapcode in result.mapcodes or ()})
+        and (params.relatedPois in {None, RelatedPoisType.OFF} or result.relatedPois is not None)
+    )
+
+
+class EntityCachingSearchApi(SearchApi):
+    """Search API that stores every search result in a POI entity store.
+
+    Results of the search, POI search, category search, geometry search, nearby search and search along route calls are added to the store as
+    they pass through, and place by id requests are answered from the store when possible.
+
+    Attributes:
+        store (PoiEntityStore): The store the results are added to.
+    """
+
+    def __init__(
+        self: Self,
+        options: ApiOptions,
+        session: ClientSession | None = None,
+        *,
+        store: PoiEntityStore | None = None,
+    ) -> None:
+        """Initialize the EntityCachingSearchApi.
+
+        Args:
+            options (ApiOptions): The options for the client.
+            session (ClientSession | None, optional): The client session to use for requests. Defaults to None.
+            store (PoiEntityStore | None, optional): The store to use, a new store with the default bounds when None. Defaults to None.
+        """
+        super().__init__(options, session)
+        self.store = store if store is not None else PoiEntityStore()
+
+    async def get_search(self: Self, *, query: str, params: SearchParams | None = None) -> SearchResponse:
+        """Get search, see `SearchApi.get_search`."""
+        return self._add(await super().get_search(query=query, params=params), params)
+
+    async def get_poi_search(self: Self, *, query: str, params: PoiSearchParams | None = None) -> SearchResponse:
+        """Get poi search, see `SearchApi.get_poi_search`."""
+        return self._add(await super().get_poi_search(query=query, params=params), params)
+
+    async def get_category_search(self: Self, *, query: str, params: CategorySearchParams | None = None) -> SearchResponse:
+        """Get category search, see `SearchApi.get_category_search`."""
+        return self._add(await super().get_category_search(query=query, params=params), params)
+
+    async def get_geometry_search(
+        self: Self,
+        *,
+        query: str,
+        geometryList: list[Geometry],
+        params: GeometrySearchParams | None = None,
+    ) -> SearchResponse:
+        """Get geometry search, see `SearchApi.get_geometry_search`."""
+        return self._add(await super().get_geometry_search(query=query, geometryList=geometryList, params=params), params)
+
+    async def post_geometry_search(
+        self: Self,
+        *,
+        query: str,
+        params: GeometrySearchParams | None = None,
+        data: GeometrySearchPostData,
+    ) -> SearchResponse:
+        """Post geometry search, see `SearchApi.post_geometry_search`."""
+        return self._add(await super().post_geometry_search(query=query, params=params, data=data), params)
+
+    async def get_nearby_search(self: Self, *, lat: float, lon: float, params: NearbySearchParams | None = None) -> SearchResponse:
+        """Get nearby search, see `SearchApi.get_nearby_search`."""
+        return self._add(await super().get_nearby_search(lat=lat, lon=lon, params=params), params)
+
+    async def post_search_along_route(
+        self: Self,
+        *,
+        query: str,
+        maxDetourTime: int,
+        params: SearchAlongRouteParams | None = None,
+        data: SearchAlongRouteData,
+    ) -> SearchResponse:
+        """Post search along route, see `SearchApi.post_search_along_route`."""
+        return self._add(await super().post_search_along_route(query=query, maxDetourTime=maxDetourTime, params=params, data=data), params)
+
+    async def get_place_by_id(self: Self, *, params: PlaceByIdParams | None = None) -> PlaceByIdResponse:
+        """Get place by id, from the store when a stored result answers the request, see `SearchApi.get_place_by_id`."""
+        if params is not None:
+            stored = self.store.get_place_by_id(params)
+            if stored is not None:
+                logger.debug("Place %s served from the entity store", params.entityId)
+                return stored
+
+        response = await super().get_place_by_id(params=params)
+        self.store.add(response.results, params=params)
+        return response
+
+    def _add(self: Self, response: SearchResponse, params: BaseParams | None) -> SearchResponse:
+        """Add the results of a response to the store."""
+        self.store.add(response.results, params=params)
+        return response
@@ -0,0 +1,246 @@
+"""EV charging availability aggregator."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Self
+
+from tomtom_apis.places.models import ConnectorType, Current, EVChargingStationsAvailabilityParams, EVChargingStationsAvailabilityResponse
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from tomtom_apis.places.ev_search import EVSearchApi
+    from tomtom_apis.places.models import EvSearchNearbyParams, Result
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True, frozen=True)
+class ConnectorAvailabilityChange:
+    """A change of the availability of the connectors of a type in a charging park.
+
+    Attributes:
+        charging_availability (str): The chargingAvailability id of the charging park.
+        connector_type (ConnectorType | None): The type of the connectors.
+        previous (Current | None): The counts before the change, None if the connectors were not known before.
+        current (Current | None): The counts after the change, None if the connectors are no longer reported.
+    """
+
+    charging_availability: str
+    connector_type: ConnectorType | None
+    previous: Current | None
+    current: Current | None
+
+
+@dataclass(kw_only=True)
+class AvailabilityAggregatorStats:
+    """Counters of an availability aggregator.
+
+    Attributes:
+        requests (int): The number of availability requests sent to the API.
+        coalesced (int): The number of availability lookups that shared a request already in flight.
+        failures (int): The number of availability requests that failed during a refresh.
+        refreshes (int): The number of completed refreshes.
+    """
+
+    requests: int = 0
+    coalesced: int = 0
+    failures: int = 0
+    refreshes: int = 0
+
+
+class ChargingAvailabilityAggregator:
+    """EV charging availability aggregator.
+
+    Tracks the availability of a set of charging parks, for example all parks in an area found with `resolve`. A refresh requests the availability
+    of every tracked park in parallel under a concurrency limit, lookups of a park that is already being requested share that request, and only
+    the connector types whose counts changed since the previous refresh are returned. Use `watch` to refresh on a fixed schedule.
+
+    Attributes:
+        api (EVSearchApi): The API used to fetch the availability.
+        params (EVChargingStationsAvailabilityParams | None): Additional parameters for the availability requests.
+        stats (AvailabilityAggregatorStats): The counters of this aggregator.
+    """
+
+    def __init__(
+        self: Self,
+        api: EVSearchApi,
+        *,
+        params: EVChargingStationsAvailabilityParams | None = None,
+        max_concurrency: int = 8,
+    ) -> None:
+        """Initialize the ChargingAvailabilityAggregator.
+
+        Args:
+            api (EVSearchApi): The API used to fetch the availability.
+            params (EVChargingStationsAvailabilityParams | None, optional): Additional parameters for the availability requests. Defaults to None.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+        """
+        self.api = api
+        self.params = params
+        self.stats = AvailabilityAggregatorStats()
+        self._tracked: dict[str, None] = {}
+        self._state: dict[str, dict[ConnectorType | None, Current]] = {}
+        self._in_flight: dict[str, asyncio.Task[EVChargingStationsAvailabilityResponse]] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def resolve(self: Self, params: EvSearchNearbyParams) -> list[str]:
+        """Find the charging parks in an area and track them.
+
+        Args:
+            params (EvSearchNearbyParams): The parameters of the EV search nearby request that describe the area.
+
+        Returns:
+            list[str]: The chargingAvailability ids of the parks found.
+        """
+        response = await self.api.get_ev_search_nearby(params=params)
+        ids = list(dict.fromkeys(_availability_id(result) for result in response.results))
+        self.track(*ids)
+        return ids
+
+    def track(self: Self, *charging_availabilities: str) -> None:
+        """Add charging parks to the next refreshes.
+
+        Args:
+            *charging_availabilities (str): The chargingAvailability ids of the parks.
+        """
+        self._tracked.update(dict.fromkeys(charging_availabilities))
+
+    def untrack(self: Self, *charging_availabilities: str) -> None:
+        """Remove charging parks and their state from the aggregator.
+
+        Args:
+            *charging_availabilities (str): The chargingAvailability ids of the parks.
+        """
+        for charging_availability in charging_availabilities:
+            self._tracked.pop(charging_availability, None)
+            self._state.pop(charging_availability, None)
+
+    @property
+    def tracked(self: Self) -> list[str]:
+        """Return the tracked charging parks.
+
+        Returns:
+            list[str]: The chargingAvailability ids, in the order they were added.
+        """
+        return list(self._tracked)
+
+    def availability(self: Self, charging_availability: str) -> dict[ConnectorType | None, Current]:
+        """Get the availability of a charging park as of the last refresh.
+
+        Args:
+            charging_availability (str): The chargingAvailability id of the park.
+
+        Returns:
+            dict[ConnectorType | None, Current]: The counts per connector type, empty if the park was not refreshed yet.
+        """
+        return dict(self._state.get(charging_availability, {}))
+
+    async def fetch(self: Self, charging_availability: str) -> EVChargingStationsAvailabilityResponse:
+        """Fetch the availability of a charging park, sharing the request with concurrent lookups of the same park.
+
+        Args:
+            charging_availability (str): The chargingAvailability id of the park.
+
+        Returns:
+            EVChargingStationsAvailabilityResponse: The availability of the park.
+        """
+        task = self._in_flight.get(charging_availability)
+        if task is None:
+            task = asyncio.create_task(self._fetch(charging_availability))
+            self._in_flight[charging_availability] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(charging_availability, None))
+        else:
+            self.stats.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def refresh(self: Self) -> list[ConnectorAvailabilityChange]:
+        """Fetch the availability of all tracked charging parks.
+
+        Parks whose request fails keep their previous state and are retried on the next refresh.
+
+        Returns:
+            list[ConnectorAvailabilityChange]: The connector types whose counts changed, a park refreshed for the first time reports all its
+                connector types.
+        """
+        ids = list(self._tracked)
+        responses = await asyncio.gather(*(self.fetch(charging_availability) for charging_availability in ids), return_exceptions=True)
+
+        changes: list[ConnectorAvailabilityChange] = []
+        for charging_availability, response in zip(ids, responses, strict=True):
+            if isinstance(response, BaseException):
+                self.stats.failures += 1
+                logger.warning("Availability of %s failed: %s", charging_availability, response)
+            elif charging_availability in self._tracked:
+                changes.extend(self._update(charging_availability, response))
+
+        self.stats.refreshes += 1
+        return changes
+
+    async def watch(self: Self, interval: float) -> AsyncGenerator[list[ConnectorAvailabilityChange]]:
+        """Refresh on a fixed schedule and yield the changes.
+
+        Refreshes start every interval seconds; when a refresh takes longer than the interval, the next one starts right after it.
+
+        Args:
+            interval (float): The number of seconds between the starts of two refreshes.
+
+        Yields:
+            list[ConnectorAvailabilityChange]: The changes of each refresh that changed anything.
+        """
+        loop = asyncio.get_running_loop()
+        next_refresh = loop.time()
+        while True:
+            changes = await self.refresh()
+            if changes:
+                yield changes
+            next_refresh = max(next_refresh + interval, loop.time())
+            await asyncio.sleep(next_refresh - loop.time())
+
+    async def _fetch(self: Self, charging_availability: str) -> EVChargingStationsAvailabilityResponse:
+        """Fetch the availability of a charging park under the concurrency limit."""
+        async with self._semaphore:
+            self.stats.requests += 1
+            return await self.api.get_ev_charging_stations_availability(chargingAvailability=charging_availability, params=self.params)
+
+    def _update(self: Self, charging_availability: str, response: EVChargingStationsAvailabilityResponse) -> list[ConnectorAvailabilityChange]:
+        """Store the availability of a charging park and return the changes."""
+        current: dict[ConnectorType | None, Current] = {}
+        for connector in response.connectors:
+            counts = connector.availability.current
+            known = current.get(connector.type_)
+            current[connector.type_] = counts if known is None else _add(known, counts)
+
+        previous = self._state.get(charging_availability, {})
+        self._state[charging_availability] = current
+        return [
+            ConnectorAvailabilityChange(
+                charging_availability=charging_availability,
+                connector_type=connector_type,
+                previous=previous.get(connector_type),
+                current=current.get(connector_type),
+            )
+            for connector_type in dict.fromkeys([*previous, *current])
+            if previous.get(connector_type) != current.get(connector_type)
+        ]
+
+
+def _availability_id(result: Result) -> str:
+    """Get the chargingAvailability id of a search result, EV search results use the id of the result itself."""
+    if result.dataSources is not None and result.dataSources.chargingAvailability is not None:
+        return result.dataSources.chargingAvailability.id
+    return result.id
+
+
+def _add(first: Current, second: Current) -> Current:
+    """Add the counts of two connectors of the same type."""
+    return Current(
+        available=first.available + second.available,
+        occupied=first.occupied + second.occupied,
+        reserved=first.reserved + second.reserved,
+        unknown=first.unknown + second.unknown,
+        outOfService=first.outOfService + second.outOfService,
+    )
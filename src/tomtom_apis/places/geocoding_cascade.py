@@ -0,0 +1,202 @@
+"""Cost-aware geocoding cascade."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Self
+
+from tomtom_apis.cache import CacheStats, LRUCache, params_key
+from tomtom_apis.exceptions import TomTomAPIError
+from tomtom_apis.places.models import GeocodeParams, PremiumGeocodeParams, SearchResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from tomtom_apis.places.geocoding import GeocodingApi
+    from tomtom_apis.places.premium_geocoding import PremiumGeocodingApi
+
+logger = logging.getLogger(__name__)
+
+_PREMIUM_FIELDS = frozenset(f.name for f in fields(PremiumGeocodeParams))
+
+
+@dataclass(kw_only=True)
+class TierStats:
+    """Counters of a geocoding tier.
+
+    Attributes:
+        transactions (int): The number of requests sent to the API.
+        failures (int): The number of requests that raised an error or ran out of time.
+        milliseconds (float): The total time spent waiting for the API.
+    """
+
+    transactions: int = 0
+    failures: int = 0
+    milliseconds: float = 0.0
+
+
+@dataclass(kw_only=True)
+class GeocodingCascadeStats:
+    """Counters of a geocoding cascade.
+
+    Attributes:
+        cache (CacheStats): The counters of the cache lookups.
+        standard (TierStats): The counters of the Geocoding API.
+        premium (TierStats): The counters of the Premium Geocoding API.
+        escalations (int): The number of queries the standard result was not confident enough for.
+        deadline_exceeded (int): The number of queries that ran out of time.
+    """
+
+    cache: CacheStats = field(default_factory=CacheStats)
+    standard: TierStats = field(default_factory=TierStats)
+    premium: TierStats = field(default_factory=TierStats)
+    escalations: int = 0
+    deadline_exceeded: int = 0
+
+
+class GeocodingCascade:  # pylint: disable=too-few-public-methods
+    """Cost-aware geocoding cascade.
+
+    Geocodes a query with the cheapest tier that is confident enough: first the cache, then the Geocoding API, and only when the top result of
+    the standard response scores below the thresholds, the Premium Geocoding API. Both API calls share a single deadline per query. When the
+    premium tier fails or runs out of time, the standard response is returned instead, so the transaction already paid for is not lost.
+
+    Confident responses are cached by normalized query and parameters; responses of a premium tier that failed are not cached, so the query is
+    escalated again the next time.
+
+    Attributes:
+        geocoding (GeocodingApi): The standard tier.
+        premium (PremiumGeocodingApi | None): The premium tier, None to never escalate.
+        min_score (float | None): The minimum score of the top standard result, None to ignore the score.
+        min_match_confidence (float | None): The minimum match confidence of the top standard result, None to ignore the match confidence.
+        time_limit (float | None): The default number of seconds a query may take across both tiers, None for no deadline.
+        stats (GeocodingCascadeStats): The counters of this cascade.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        geocoding: GeocodingApi,
+        premium: PremiumGeocodingApi | None = None,
+        *,
+        min_score: float | None = None,
+        min_match_confidence: float | None = 0.8,
+        time_limit: float | None = 10.0,
+        max_cached: int = 10_000,
+        ttl: float | None = None,
+    ) -> None:
+        """Initialize the GeocodingCascade.
+
+        Args:
+            geocoding (GeocodingApi): The standard tier.
+            premium (PremiumGeocodingApi | None, optional): The premium tier, None to never escalate. Defaults to None.
+            min_score (float | None, optional): The minimum score of the top standard result, None to ignore the score. Defaults to None.
+            min_match_confidence (float | None, optional): The minimum match confidence of the top standard result, None to ignore the match
+                confidence. Defaults to 0.8.
+            time_limit (float | None, optional): The default number of seconds a query may take across both tiers, None for no deadline.
+                Defaults to 10.0.
+            max_cached (int, optional): The maximum number of responses kept in the cache. Defaults to 10_000.
+            ttl (float | None, optional): The number of seconds a cached response stays valid, None to keep responses until they are evicted.
+                Defaults to None.
+        """
+        self.geocoding = geocoding
+        self.premium = premium
+        self.min_score = min_score
+        self.min_match_confidence = min_match_confidence
+        self.time_limit = time_limit
+        self.stats = GeocodingCascadeStats()
+        self._cache: LRUCache[tuple[str, str], SearchResponse] = LRUCache(max_size=max_cached, ttl=ttl)
+        self.stats.cache = self._cache.stats
+
+    async def get_geocode(
+        self: Self,
+        *,
+        query: str,
+        params: GeocodeParams | None = None,
+        premium_params: PremiumGeocodeParams | None = None,
+        time_limit: float | None = None,
+    ) -> SearchResponse:
+        """Get geocode from the cheapest tier that is confident enough.
+
+        Args:
+            query (str): The query string representing the address or place to geocode.
+            params (GeocodeParams | None, optional): Additional parameters for the standard request. Defaults to None.
+            premium_params (PremiumGeocodeParams | None, optional): Additional parameters for the premium request, None to use the parameters
+                the standard request shares with it. Defaults to None.
+            time_limit (float | None, optional): The number of seconds the query may take, None to use the default of the cascade. Defaults to None.
+
+        Returns:
+            SearchResponse: The response of the cache, the premium tier, or the standard tier.
+
+        Raises:
+            TimeoutError: If the standard tier does not respond before the deadline.
+        """
+        key = (" ".join(query.split()).casefold(), params_key(params))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        deadline = asyncio.get_running_loop().time() + time_limit if time_limit is not None else None
+
+        try:
+            standard = await self._call(self.stats.standard, self.geocoding.get_geocode(query=query, params=params), deadline)
+        except TimeoutError:
+            self.stats.deadline_exceeded += 1
+            raise
+
+        if self.premium is None or self.is_confident(standard):
+            self._cache.set(key, standard)
+            return standard
+
+        self.stats.escalations += 1
+        logger.debug("Escalating %s to premium geocoding", query)
+        if premium_params is None and params is not None:
+            premium_params = PremiumGeocodeParams(**{f.name: getattr(params, f.name) for f in fields(params) if f.name in _PREMIUM_FIELDS})
+
+        try:
+            premium = await self._call(self.stats.premium, self.premium.get_geocode(query=query, params=premium_params), deadline)
+        except TimeoutError:
+            self.stats.deadline_exceeded += 1
+            logger.debug("Premium geocoding of %s ran out of time", query)
+            return standard
+        except TomTomAPIError:
+            logger.exception("Premium geocoding of %s failed", query)
+            return standard
+
+        response = premium if premium.results else standard
+        self._cache.set(key, response)
+        return response
+
+    def is_confident(self: Self, response: SearchResponse) -> bool:
+        """Check whether the top result of a response meets the thresholds.
+
+        Args:
+            response (SearchResponse): The response to check.
+
+        Returns:
+            bool: Whether the response has a result that meets the score and match confidence thresholds, a missing value does not meet them.
+        """
+        if not response.results:
+            return False
+
+        top = response.results[0]
+        if self.min_score is not None and (top.score is None or top.score < self.min_score):
+            return False
+        return self.min_match_confidence is None or (top.matchConfidence is not None and top.matchConfidence.score >= self.min_match_confidence)
+
+    @staticmethod
+    async def _call(stats: TierStats, request: Awaitable[SearchResponse], deadline: float | None) -> SearchResponse:
+        """Await a request of a tier before the deadline, and count it."""
+        stats.transactions += 1
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await request
+        except BaseException:
+            stats.failures += 1
+            raise
+        finally:
+            stats.milliseconds += (time.perf_counter() - start) * 1000
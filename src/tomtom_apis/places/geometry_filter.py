@@ -0,0 +1,198 @@
+"""Local geometry filter."""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Final, Self
+
+from tomtom_apis.geo import EARTH_RADIUS_METERS, haversine_distance, parse_lat_lon, point_in_polygon
+from tomtom_apis.places.models import Geometry, GeometryFilterResponse, GeometryPoi, Summary
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+CIRCLE: Final[str] = "CIRCLE"
+POLYGON: Final[str] = "POLYGON"
+METERS_PER_DEGREE: Final[float] = math.radians(1) * EARTH_RADIUS_METERS
+
+
+class LocalGeometryFilter:
+    """Local geometry filter, an offline alternative to `SearchApi.get_geometry_filter`.
+
+    The positions of the POIs are stored once as coordinate arrays, so the same POIs can be filtered by many geometries without sending them to
+    the API. Each geometry is tested against all positions at once: points outside the bounding box of the geometry are discarded first, the
+    remaining points get an exact point-in-polygon or point-in-circle test. NumPy is used when it is installed, otherwise plain Python.
+
+    Attributes:
+        pois (list[GeometryPoi]): The POIs to filter.
+        use_numpy (bool): Whether the tests run on NumPy arrays.
+    """
+
+    def __init__(self: Self, pois: Sequence[GeometryPoi], *, use_numpy: bool | None = None) -> None:
+        """Initialize the LocalGeometryFilter.
+
+        Args:
+            pois (Sequence[GeometryPoi]): The POIs to filter.
+            use_numpy (bool | None, optional): Whether to run the tests on NumPy arrays, None to use NumPy when it is installed. Defaults to None.
+        """
+        self.pois = list(pois)
+        self.use_numpy = HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY
+        self._lats = array("d", (poi.position.lat for poi in self.pois))
+        self._lons = array("d", (poi.position.lon for poi in self.pois))
+        self._np_lats: Any = np.frombuffer(self._lats, dtype=np.float64) if self.use_numpy else None
+        self._np_lons: Any = np.frombuffer(self._lons, dtype=np.float64) if self.use_numpy else None
+
+    def mask(self: Self, geometries: Sequence[Geometry]) -> list[bool]:
+        """Test which POIs lie inside at least one of the geometries.
+
+        Args:
+            geometries (Sequence[Geometry]): The polygons and circles to test against.
+
+        Returns:
+            list[bool]: Per POI, in order, whether it lies inside at least one geometry.
+
+        Raises:
+            ValueError: If a geometry is not a polygon or a circle.
+        """
+        if self.use_numpy:
+            inside = np.zeros(len(self.pois), dtype=bool)
+            for geometry in geometries:
+                inside |= self._numpy_mask(geometry)
+            return inside.tolist()
+
+        result = [False] * len(self.pois)
+        for geometry in geometries:
+            for i in self._python_matches(geometry):
+                result[i] = True
+        return result
+
+    def filter(self: Self, geometries: Sequence[Geometry]) -> GeometryFilterResponse:
+        """Filter the POIs by geometries, with the same response as the API.
+
+        Args:
+            geometries (Sequence[Geometry]): The polygons and circles to filter by.
+
+        Returns:
+            GeometryFilterResponse: The POIs that lie inside at least one geometry, in their original order.
+        """
+        started = time.perf_counter()
+        results = [poi for poi, inside in zip(self.pois, self.mask(geometries), strict=True) if inside]
+        query_time = round((time.perf_counter() - started) * 1000)
+        logger.debug("Filtered %d POIs by %d geometries in %d ms", len(self.pois), len(geometries), query_time)
+        return GeometryFilterResponse(summary=Summary(numResults=len(results), queryTime=query_time), results=results)
+
+    def _numpy_mask(self: Self, geometry: Geometry) -> Any:  # noqa: ANN401
+        """Test all positions against a geometry with NumPy."""
+        lats, lons = self._np_lats, self._np_lons
+        shape = _parse_geometry(geometry)
+        south, west, north, east = _bounds(shape)
+        candidates = np.flatnonzero((lats >= south) & (lats <= north) & (lons >= west) & (lons <= east))
+        if isinstance(shape, _Circle):
+            inside = _numpy_in_circle(lats[candidates], lons[candidates], shape)
+        else:
+            inside = _numpy_in_polygon(lats[candidates], lons[candidates], shape)
+
+        mask = np.zeros(len(self.pois), dtype=bool)
+        mask[candidates[inside]] = True
+        return mask
+
+    def _python_matches(self: Self, geometry: Geometry) -> list[int]:
+        """Get the indices of the positions inside a geometry, without NumPy."""
+        shape = _parse_geometry(geometry)
+        south, west, north, east = _bounds(shape)
+        candidates = [i for i, (lat, lon) in enumerate(zip(self._lats, self._lons, strict=True)) if south <= lat <= north and west <= lon <= east]
+
+        if isinstance(shape, _Circle):
+            return [i for i in candidates if haversine_distance(shape.lat, shape.lon, self._lats[i], self._lons[i]) <= shape.radius]
+        return [i for i in candidates if point_in_polygon(self._lats[i], self._lons[i], shape.vertices)]
+
+
+def filter_geometries(
+    *,
+    geometryList: Sequence[Geometry],
+    poiList: Sequence[GeometryPoi],
+    use_numpy: bool | None = None,
+) -> GeometryFilterResponse:
+    """Filter POIs by geometries locally, see `LocalGeometryFilter`.
+
+    Args:
+        geometryList (Sequence[Geometry]): The polygons and circles to filter by.
+        poiList (Sequence[GeometryPoi]): The POIs to filter.
+        use_numpy (bool | None, optional): Whether to run the tests on NumPy arrays, None to use NumPy when it is installed. Defaults to None.
+
+    Returns:
+        GeometryFilterResponse: The POIs that lie inside at least one geometry, in their original order.
+    """
+    return LocalGeometryFilter(poiList, use_numpy=use_numpy).filter(geometryList)
+
+
+@dataclass(kw_only=True, frozen=True)
+class _Circle:
+    """A parsed circle geometry."""
+
+    lat: float
+    lon: float
+    radius: float
+
+
+@dataclass(kw_only=True, frozen=True)
+class _Polygon:
+    """A parsed polygon geometry."""
+
+    vertices: list[tuple[float, float]]
+
+
+def _numpy_in_circle(lats: Any, lons: Any, circle: _Circle) -> Any:  # noqa: ANN401
+    """Test positions against a circle with the vectorized haversine distance."""
+    phi1, phi2 = math.radians(circle.lat), np.radians(lats)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lons - circle.lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.minimum(1.0, np.sqrt(a))) <= circle.radius
+
+
+def _numpy_in_polygon(lats: Any, lons: Any, polygon: _Polygon) -> Any:  # noqa: ANN401
+    """Test positions against a polygon with the even-odd rule, one vectorized pass per edge."""
+    inside = np.zeros(len(lats), dtype=bool)
+    vertices = polygon.vertices
+    for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[-1:] + vertices[:-1], strict=True):
+        if lat1 == lat2:
+            # Horizontal edges are never crossed.
+            continue
+        crosses = (lat1 > lats) != (lat2 > lats)
+        inside ^= crosses & (lons < (lon2 - lon1) * (lats - lat1) / (lat2 - lat1) + lon1)
+    return inside
+
+
+def _parse_geometry(geometry: Geometry) -> _Circle | _Polygon:
+    """Parse the position and vertex strings of a geometry."""
+    kind = geometry.type.upper()
+    if kind == CIRCLE and geometry.position is not None and geometry.radius is not None:
+        lat, lon = parse_lat_lon(geometry.position)
+        return _Circle(lat=lat, lon=lon, radius=geometry.radius)
+    if kind == POLYGON and geometry.vertices:
+        return _Polygon(vertices=[parse_lat_lon(vertex) for vertex in geometry.vertices])
+    msg = f"Unsupported geometry: {geometry}"
+    raise ValueError(msg)
+
+
+def _bounds(shape: _Circle | _Polygon) -> tuple[float, float, float, float]:
+    """Get the south, west, north and east bounds of a geometry."""
+    if isinstance(shape, _Circle):
+        d_lat = shape.radius / METERS_PER_DEGREE
+        d_lon = d_lat / max(math.cos(math.radians(shape.lat)), 1e-6)
+        return shape.lat - d_lat, shape.lon - d_lon, shape.lat + d_lat, shape.lon + d_lon
+    lats = [lat for lat, _ in shape.vertices]
+    lons = [lon for _, lon in shape.vertices]
+    return min(lats), min(lons), max(lats), max(lons)
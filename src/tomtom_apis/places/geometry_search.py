@@ -0,0 +1,173 @@
+"""Geometry search with simplification and automatic POST switching."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass, replace
+from typing import Final, Self
+
+import orjson
+from yarl import URL
+
+from tomtom_apis.api import BaseParams
+from tomtom_apis.geo import douglas_peucker, parse_lat_lon
+from tomtom_apis.places.models import (
+    Geometry,
+    GeometryFilterData,
+    GeometryFilterResponse,
+    GeometryPoi,
+    GeometrySearchParams,
+    GeometrySearchPostData,
+    SearchResponse,
+)
+from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_URL_LENGTH: Final[int] = 8_000
+MIN_POLYGON_VERTICES: Final[int] = 3
+
+
+@dataclass(kw_only=True)
+class GeometryRequestStats:
+    """Counters of geometry requests.
+
+    Attributes:
+        requests (int): The number of requests sent to the API.
+        posted (int): The number of requests sent as POST because the URL would exceed the maximum length.
+        vertices_removed (int): The number of polygon vertices removed by simplification.
+        bytes_saved (int): The number of bytes the simplification removed from the encoded geometries.
+    """
+
+    requests: int = 0
+    posted: int = 0
+    vertices_removed: int = 0
+    bytes_saved: int = 0
+
+
+def simplify_geometry(geometry: Geometry, tolerance: float) -> Geometry:
+    """Simplify the vertices of a polygon with the Douglas-Peucker algorithm, other geometries are returned as is.
+
+    Args:
+        geometry (Geometry): The geometry to simplify, polygon vertices are "lat, lon" strings.
+        tolerance (float): The maximum distance in meters between the polygon outline and its simplification.
+
+    Returns:
+        Geometry: The simplified geometry, the kept vertices are copied unchanged.
+    """
+    if geometry.vertices is None or len(geometry.vertices) <= MIN_POLYGON_VERTICES:
+        return geometry
+
+    points = [parse_lat_lon(vertex) for vertex in geometry.vertices]
+    kept = douglas_peucker(points, tolerance)
+    if len(kept) < MIN_POLYGON_VERTICES:
+        return geometry
+    return replace(geometry, vertices=[geometry.vertices[i] for i in kept])
+
+
+class GeometrySearch:
+    """Geometry search and filter with simplification and automatic POST switching.
+
+    Polygons are simplified to the tolerance before they are sent. Requests are sent with GET, unless the encoded URL would exceed the maximum
+    length, in which case the POST variant of the endpoint is used with the same geometries.
+
+    Attributes:
+        api (SearchApi): The API used for the requests.
+        tolerance (float | None): The simplification tolerance in meters, None to send polygons unchanged.
+        max_url_length (int): The maximum length of a GET URL.
+        stats (GeometryRequestStats): The counters of the requests.
+    """
+
+    def __init__(
+        self: Self,
+        api: SearchApi,
+        *,
+        tolerance: float | None = 10.0,
+        max_url_length: int = DEFAULT_MAX_URL_LENGTH,
+    ) -> None:
+        """Initialize the GeometrySearch.
+
+        Args:
+            api (SearchApi): The API used for the requests.
+            tolerance (float | None, optional): The simplification tolerance in meters, None to send polygons unchanged. Defaults to 10.0.
+            max_url_length (int, optional): The maximum length of a GET URL. Defaults to 8_000.
+        """
+        self.api = api
+        self.tolerance = tolerance
+        self.max_url_length = max_url_length
+        self.stats = GeometryRequestStats()
+
+    async def search(
+        self: Self,
+        *,
+        query: str,
+        geometryList: list[Geometry],
+        params: GeometrySearchParams | None = None,
+    ) -> SearchResponse:
+        """Search within geometries, see `SearchApi.get_geometry_search`.
+
+        Args:
+            query (str): The query string representing the address, category, or place to search for.
+            geometryList (list[Geometry]): A list of geometric shapes defining the search area.
+            params (GeometrySearchParams | None, optional): Additional parameters for the request. Defaults to None.
+
+        Returns:
+            SearchResponse: The response containing search results within the specified geometry.
+        """
+        geometries = self._simplify(geometryList)
+        self.stats.requests += 1
+        endpoint = f"/search/2/geometrySearch/{query}.json?geometryList={_to_json(geometries)}"
+        if self._fits(endpoint, params):
+            return await self.api.get_geometry_search(query=query, geometryList=geometries, params=params)
+
+        self.stats.posted += 1
+        logger.debug("Geometry search URL exceeds %d characters, using POST", self.max_url_length)
+        return await self.api.post_geometry_search(query=query, params=params, data=GeometrySearchPostData(geometryList=geometries))
+
+    async def filter(
+        self: Self,
+        *,
+        geometryList: list[Geometry],
+        poiList: list[GeometryPoi],
+        params: BaseParams | None = None,
+    ) -> GeometryFilterResponse:
+        """Filter POIs by geometries, see `SearchApi.get_geometry_filter`.
+
+        Args:
+            geometryList (list[Geometry]): A list of geometric shapes (e.g., polygons, circles) used for filtering the results.
+            poiList (list[GeometryPoi]): A list of points of interest (POIs) used for filtering the results.
+            params (BaseParams | None, optional): Additional parameters for the request. Defaults to None.
+
+        Returns:
+            GeometryFilterResponse: The response containing the results filtered by the provided geometry and POIs.
+        """
+        geometries = self._simplify(geometryList)
+        self.stats.requests += 1
+        endpoint = f"/search/2/geometryFilter.json?geometryList={_to_json(geometries)}&poiList={_to_json(poiList)}"
+        if self._fits(endpoint, params):
+            return await self.api.get_geometry_filter(geometryList=geometries, poiList=poiList, params=params)
+
+        self.stats.posted += 1
+        logger.debug("Geometry filter URL exceeds %d characters, using POST", self.max_url_length)
+        return await self.api.post_geometry_filter(params=params, data=GeometryFilterData(geometryList=geometries, poiList=poiList))
+
+    def _simplify(self: Self, geometries: list[Geometry]) -> list[Geometry]:
+        """Simplify the polygons and count the vertices and bytes removed."""
+        if self.tolerance is None:
+            return geometries
+
+        simplified = [simplify_geometry(geometry, self.tolerance) for geometry in geometries]
+        self.stats.vertices_removed += sum(len(g.vertices or ()) for g in geometries) - sum(len(g.vertices or ()) for g in simplified)
+        self.stats.bytes_saved += len(_to_json(geometries)) - len(_to_json(simplified))
+        return simplified
+
+    def _fits(self: Self, endpoint: str, params: BaseParams | None) -> bool:
+        """Check whether the encoded GET URL stays within the maximum length."""
+        query = {"key": self.api.options.api_key} | (params.to_dict() if params is not None else {})
+        url = URL(self.api.options.base_url).join(URL(endpoint)).update_query({key: str(value) for key, value in query.items()})
+        return len(str(url)) <= self.max_url_length
+
+
+def _to_json(items: list[Geometry] | list[GeometryPoi]) -> str:
+    """Encode geometries or POIs the way the GET endpoints expect them."""
+    return orjson.dumps([{k: v for k, v in asdict(item).items() if v is not None} for item in items]).decode()  # pylint: disable=maybe-no-member
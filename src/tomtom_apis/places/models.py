@@ -703,6 +703,13 @@ class Match(DataClassORJSONMixin):
     length: int
 
 
+@dataclass(kw_only=True)
+class MatchConfidence(DataClassORJSONMixin):
+    """Represents a match confidence."""
+
+    score: float
+
+
 class MatchType(StrEnum):
     """Supported match types."""
 
@@ -1004,6 +1011,7 @@ class Result(DataClassORJSONMixin):
     score: float | None = None
     dist: float | None = None
     info: str | None = None
+    matchConfidence: MatchConfidence | None = None
     entityType: EntityType | None = None
     poi: Poi | None = None
     relatedPois: list[RelatedPoi] | None = None
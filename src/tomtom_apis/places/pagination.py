@@ -0,0 +1,172 @@
+"""Pagination of search results."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Callable, Coroutine
+from dataclasses import replace
+from typing import Any, Final
+
+from tomtom_apis.places.models import CategorySearchParams, NearbySearchParams, PoiSearchParams, Result, SearchParams, SearchResponse
+from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE: Final[int] = 100
+MAX_OFFSET: Final[int] = 1900
+
+
+async def paginate(
+    fetch_page: Callable[[int, int], Coroutine[Any, Any, SearchResponse]],
+    *,
+    page_size: int = MAX_PAGE_SIZE,
+    offset: int = 0,
+    max_offset: int = MAX_OFFSET,
+) -> AsyncGenerator[Result]:
+    """Iterate over the results of all pages of a search.
+
+    The next page is requested while the results of the current page are processed. Iteration stops at the last page, which is a page with fewer
+    results than the page size, at the total number of results reported in the summary, or at the maximum offset the service accepts. Results that
+    were already returned by an earlier page are skipped.
+
+    Args:
+        fetch_page (Callable[[int, int], Coroutine[Any, Any, SearchResponse]]): A callable that fetches the page for an offset and a page size.
+        page_size (int, optional): The number of results per page. Defaults to 100.
+        offset (int, optional): The offset of the first page. Defaults to 0.
+        max_offset (int, optional): The largest offset the service accepts. Defaults to 1900.
+
+    Yields:
+        Result: The results of all pages, without duplicates.
+    """
+    seen: set[str] = set()
+    pending: asyncio.Task[SearchResponse] | None = asyncio.create_task(fetch_page(offset, page_size))
+    try:
+        while pending is not None:
+            response = await pending
+            pending = None
+
+            next_offset = offset + page_size
+            total = response.summary.totalResults
+            if len(response.results) >= page_size and next_offset <= max_offset and (total is None or next_offset < total):
+                pending = asyncio.create_task(fetch_page(next_offset, page_size))
+
+            for result in response.results:
+                if result.id in seen:
+                    logger.debug("Skipping duplicate result %s", result.id)
+                    continue
+                seen.add(result.id)
+                yield result
+
+            offset = next_offset
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def paginate_search(
+    api: SearchApi,
+    *,
+    query: str,
+    params: SearchParams | None = None,
+    page_size: int = MAX_PAGE_SIZE,
+) -> AsyncGenerator[Result]:
+    """Iterate over the results of all pages of a fuzzy search, see `paginate`.
+
+    Args:
+        api (SearchApi): The API used to fetch the pages.
+        query (str): The query string representing the address or place to search for.
+        params (SearchParams | None, optional): Additional parameters for the request, the limit and offset are set per page. Defaults to None.
+        page_size (int, optional): The number of results per page. Defaults to 100.
+
+    Returns:
+        AsyncGenerator[Result]: The results of all pages, without duplicates.
+    """
+    base = params or SearchParams()
+    return paginate(
+        lambda ofs, limit: api.get_search(query=query, params=replace(base, ofs=ofs, limit=limit)),
+        page_size=page_size,
+        offset=base.ofs or 0,
+    )
+
+
+def paginate_poi_search(
+    api: SearchApi,
+    *,
+    query: str,
+    params: PoiSearchParams | None = None,
+    page_size: int = MAX_PAGE_SIZE,
+) -> AsyncGenerator[Result]:
+    """Iterate over the results of all pages of a POI search, see `paginate`.
+
+    Args:
+        api (SearchApi): The API used to fetch the pages.
+        query (str): The query string representing the POI to search for.
+        params (PoiSearchParams | None, optional): Additional parameters for the request, the limit and offset are set per page. Defaults to None.
+        page_size (int, optional): The number of results per page. Defaults to 100.
+
+    Returns:
+        AsyncGenerator[Result]: The results of all pages, without duplicates.
+    """
+    base = params or PoiSearchParams()
+    return paginate(
+        lambda ofs, limit: api.get_poi_search(query=query, params=replace(base, ofs=ofs, limit=limit)),
+        page_size=page_size,
+        offset=base.ofs or 0,
+    )
+
+
+def paginate_category_search(
+    api: SearchApi,
+    *,
+    query: str,
+    params: CategorySearchParams | None = None,
+    page_size: int = MAX_PAGE_SIZE,
+) -> AsyncGenerator[Result]:
+    """Iterate over the results of all pages of a category search, see `paginate`.
+
+    Args:
+        api (SearchApi): The API used to fetch the pages.
+        query (str): The category or search term to look for (e.g., "restaurant", "hospital").
+        params (CategorySearchParams | None, optional): Additional parameters for the request, the limit and offset are set per page.
+            Defaults to None.
+        page_size (int, optional): The number of results per page. Defaults to 100.
+
+    Returns:
+        AsyncGenerator[Result]: The results of all pages, without duplicates.
+    """
+    base = params or CategorySearchParams()
+    return paginate(
+        lambda ofs, limit: api.get_category_search(query=query, params=replace(base, ofs=ofs, limit=limit)),
+        page_size=page_size,
+        offset=base.ofs or 0,
+    )
+
+
+def paginate_nearby_search(
+    api: SearchApi,
+    *,
+    lat: float,
+    lon: float,
+    params: NearbySearchParams | None = None,
+    page_size: int = MAX_PAGE_SIZE,
+) -> AsyncGenerator[Result]:
+    """Iterate over the results of all pages of a nearby search, see `paginate`.
+
+    Args:
+        api (SearchApi): The API used to fetch the pages.
+        lat (float): The latitude of the location to search around.
+        lon (float): The longitude of the location to search around.
+        params (NearbySearchParams | None, optional): Additional parameters for the request, the limit and offset are set per page.
+            Defaults to None.
+        page_size (int, optional): The number of results per page. Defaults to 100.
+
+    Returns:
+        AsyncGenerator[Result]: The results of all pages, without duplicates.
+    """
+    base = params or NearbySearchParams()
+    return paginate(
+        lambda ofs, limit: api.get_nearby_search(lat=lat, lon=lon, params=replace(base, ofs=ofs, limit=limit)),
+        page_size=page_size,
+        offset=base.ofs or 0,
+    )
@@ -0,0 +1,254 @@
+"""POI crawler for large areas."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Final, Self
+
+import orjson
+
+from tomtom_apis.geo import point_in_polygon, rectangle_intersects_polygon
+from tomtom_apis.models import LatLon
+from tomtom_apis.places.models import BoundingBox, CategorySearchParams, Result
+from tomtom_apis.places.search import SearchApi
+
+logger = logging.getLogger(__name__)
+
+MAX_CELL_RESULTS: Final[int] = 100
+RESULTS_SUFFIX: Final[str] = ".results.ndjson"
+
+
+@dataclass(kw_only=True)
+class CrawlStats:
+    """Counters of a crawl.
+
+    Attributes:
+        requests (int): The number of search requests sent to the API.
+        subdivided (int): The number of cells that hit the result limit and were split into four.
+        truncated (int): The number of cells that hit the result limit at the maximum depth, these might miss POIs.
+        skipped (int): The number of cells that were skipped because they lie outside the polygon.
+    """
+
+    requests: int = 0
+    subdivided: int = 0
+    truncated: int = 0
+    skipped: int = 0
+
+
+@dataclass(kw_only=True)
+class CrawlResult:
+    """The result of a crawl.
+
+    Attributes:
+        results (dict[str, Result]): The POIs found, by id.
+        stats (CrawlStats): The counters of the crawl.
+    """
+
+    results: dict[str, Result] = field(default_factory=dict)
+    stats: CrawlStats = field(default_factory=CrawlStats)
+
+
+@dataclass(kw_only=True, frozen=True)
+class _Cell:
+    """A rectangular cell of the crawled area."""
+
+    south: float
+    west: float
+    north: float
+    east: float
+    depth: int = 0
+
+    def quadrants(self: Self) -> list[_Cell]:
+        """Split the cell into four equally sized cells."""
+        lat = (self.south + self.north) / 2
+        lon = (self.west + self.east) / 2
+        depth = self.depth + 1
+        return [
+            _Cell(south=lat, west=self.west, north=self.north, east=lon, depth=depth),
+            _Cell(south=lat, west=lon, north=self.north, east=self.east, depth=depth),
+            _Cell(south=self.south, west=self.west, north=lat, east=lon, depth=depth),
+            _Cell(south=self.south, west=lon, north=lat, east=self.east, depth=depth),
+        ]
+
+
+class PoiCrawler:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """POI crawler for large areas.
+
+    Finds all POIs of a category search in a bounding box or polygon. The area is covered by cells that are searched concurrently; a cell that hits
+    the result limit is split into four cells, so dense areas are searched in small cells and sparse areas in large cells. POIs found by more than
+    one cell are deduplicated by id.
+
+    When a checkpoint path is given, the cells still to be searched are written to that file and the POIs found to a file next to it with the
+    `.results.ndjson` suffix, so a crawl that was interrupted resumes where it stopped when it is started again with the same path.
+
+    Attributes:
+        api (SearchApi): The API used for the category searches.
+        max_concurrency (int): The maximum number of searches in flight.
+        max_depth (int): The maximum number of times a cell is split.
+        checkpoint_path (Path | None): The file to write the progress to, None to not write progress.
+    """
+
+    def __init__(
+        self: Self,
+        api: SearchApi,
+        *,
+        max_concurrency: int = 8,
+        max_depth: int = 12,
+        checkpoint_path: Path | None = None,
+    ) -> None:
+        """Initialize the PoiCrawler.
+
+        Args:
+            api (SearchApi): The API used for the category searches.
+            max_concurrency (int, optional): The maximum number of searches in flight. Defaults to 8.
+            max_depth (int, optional): The maximum number of times a cell is split. Defaults to 12.
+            checkpoint_path (Path | None, optional): The file to write the progress to. Defaults to None.
+        """
+        self.api = api
+        self.max_concurrency = max_concurrency
+        self.max_depth = max_depth
+        self.checkpoint_path = checkpoint_path
+        self._pending: set[_Cell] = set()
+        self._polygon: list[tuple[float, float]] | None = None
+        self._result = CrawlResult()
+        self._error: Exception | None = None
+
+    async def crawl(
+        self: Self,
+        *,
+        query: str,
+        area: BoundingBox | list[LatLon],
+        params: CategorySearchParams | None = None,
+    ) -> CrawlResult:
+        """Crawl all POIs of a category search in an area.
+
+        Args:
+            query (str): The category or search term to look for (e.g., "restaurant", "hospital").
+            area (BoundingBox | list[LatLon]): The bounding box, or the vertices of the polygon, to crawl.
+            params (CategorySearchParams | None, optional): Additional parameters for the searches, the bounding box and limit are set per cell.
+                Defaults to None.
+
+        Returns:
+            CrawlResult: The POIs found and the counters of the crawl.
+        """
+        self._result = CrawlResult()
+        if isinstance(area, BoundingBox):
+            self._polygon = None
+            root = _Cell(south=area.btmRightPoint.lat, west=area.topLeftPoint.lon, north=area.topLeftPoint.lat, east=area.btmRightPoint.lon)
+        else:
+            self._polygon = [(point.lat, point.lon) for point in area]
+            lats = [lat for lat, _ in self._polygon]
+            lons = [lon for _, lon in self._polygon]
+            root = _Cell(south=min(lats), west=min(lons), north=max(lats), east=max(lons))
+
+        self._pending = self._load_checkpoint() or {root}
+        self._error = None
+        queue: asyncio.Queue[_Cell] = asyncio.Queue()
+        for cell in self._pending:
+            queue.put_nowait(cell)
+
+        base = params or CategorySearchParams()
+        workers = [asyncio.create_task(self._worker(queue, query=query, params=base)) for _ in range(self.max_concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if self._error is not None:
+            # The pending cells are kept in the checkpoint, so the crawl can be resumed.
+            raise self._error
+
+        self._remove_checkpoint()
+        return self._result
+
+    async def _worker(self: Self, queue: asyncio.Queue[_Cell], *, query: str, params: CategorySearchParams) -> None:
+        """Search cells from the queue until the worker is cancelled, cells are skipped after a search failed."""
+        while True:
+            cell = await queue.get()
+            try:
+                if self._error is None:
+                    for subcell in await self._search_cell(cell, query=query, params=params):
+                        queue.put_nowait(subcell)
+            except Exception as error:  # pylint: disable=broad-exception-caught  # noqa: BLE001
+                # Keep draining the queue, so the crawl finishes and raises the error.
+                self._error = error
+            finally:
+                queue.task_done()
+
+    async def _search_cell(self: Self, cell: _Cell, *, query: str, params: CategorySearchParams) -> list[_Cell]:
+        """Search a cell and return the cells it is split into, if any."""
+        if self._polygon is not None and not rectangle_intersects_polygon(cell.south, cell.west, cell.north, cell.east, self._polygon):
+            self._result.stats.skipped += 1
+            self._complete(cell, [], [])
+            return []
+
+        self._result.stats.requests += 1
+        response = await self.api.get_category_search(
+            query=query,
+            params=replace(params, topLeft=f"{cell.north},{cell.west}", btmRight=f"{cell.south},{cell.east}", limit=MAX_CELL_RESULTS, ofs=None),
+        )
+
+        results = [
+            result
+            for result in response.results
+            if self._polygon is None or point_in_polygon(result.position.lat, result.position.lon, self._polygon)
+        ]
+        subcells: list[_Cell] = []
+        total = response.summary.totalResults
+        if len(response.results) >= MAX_CELL_RESULTS or (total is not None and total > len(response.results)):
+            if cell.depth < self.max_depth:
+                self._result.stats.subdivided += 1
+                subcells = cell.quadrants()
+            else:
+                logger.warning("Cell %s hit the result limit at the maximum depth, POIs might be missing", cell)
+                self._result.stats.truncated += 1
+
+        self._complete(cell, subcells, results)
+        return subcells
+
+    def _complete(self: Self, cell: _Cell, subcells: list[_Cell], results: list[Result]) -> None:
+        """Record the results of a searched cell and write the checkpoint."""
+        new_results = [result for result in results if result.id not in self._result.results]
+        for result in new_results:
+            self._result.results[result.id] = result
+        self._pending.discard(cell)
+        self._pending.update(subcells)
+        self._write_checkpoint(new_results)
+
+    def _load_checkpoint(self: Self) -> set[_Cell]:
+        """Load the pending cells and the POIs found from the checkpoint, if any."""
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return set()
+
+        logger.info("Resuming crawl from %s", self.checkpoint_path)
+        results_path = self.checkpoint_path.with_suffix(RESULTS_SUFFIX)
+        if results_path.exists():
+            for line in results_path.read_bytes().splitlines():
+                result = Result.from_json(line)
+                self._result.results[result.id] = result
+        return {_Cell(**cell) for cell in orjson.loads(self.checkpoint_path.read_bytes())}  # pylint: disable=maybe-no-member
+
+    def _write_checkpoint(self: Self, new_results: list[Result]) -> None:
+        """Append the new POIs and write the pending cells to the checkpoint, if any."""
+        if self.checkpoint_path is None:
+            return
+
+        if new_results:
+            with self.checkpoint_path.with_suffix(RESULTS_SUFFIX).open("ab") as file:
+                file.writelines(result.to_jsonb() + b"\n" for result in new_results)
+
+        temporary = self.checkpoint_path.with_suffix(".tmp")
+        temporary.write_bytes(orjson.dumps([asdict(cell) for cell in self._pending]))  # pylint: disable=maybe-no-member
+        temporary.replace(self.checkpoint_path)
+
+    def _remove_checkpoint(self: Self) -> None:
+        """Remove the checkpoint files after a completed crawl."""
+        if self.checkpoint_path is None:
+            return
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.checkpoint_path.with_suffix(RESULTS_SUFFIX).unlink(missing_ok=True)
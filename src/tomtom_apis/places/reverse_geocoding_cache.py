@@ -0,0 +1,158 @@
+"""Reverse Geocoding cache."""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Self
+
+from tomtom_apis.cache import CacheStats, LRUCache, params_key
+from tomtom_apis.exceptions import RangeExceptionError
+from tomtom_apis.geo import haversine_distance
+from tomtom_apis.models import LatLon
+from tomtom_apis.places.models import ReverseGeocodeParams, ReverseGeocodeResponse
+from tomtom_apis.places.reverse_geocoding import ReverseGeocodingApi
+from tomtom_apis.utils import lat_lon_to_tile_zxy
+
+logger = logging.getLogger(__name__)
+
+type _CellKey = tuple[str, int, int]
+
+
+@dataclass(kw_only=True)
+class _CachedPosition:
+    """A reverse geocoded position with its response and the monotonic time it expires."""
+
+    lat: float
+    lon: float
+    response: ReverseGeocodeResponse
+    expires_at: float = math.inf
+
+
+class ReverseGeocodingCache:
+    """Reverse Geocoding cache.
+
+    Answers reverse geocode requests from earlier responses for positions that lie within a tolerance radius of a position that was reverse
+    geocoded before, which is typical for tracking feeds where consecutive fixes are on the same street. Responses are grouped per map tile at a
+    configurable zoom level and per request parameters; the tiles are evicted in least recently used order.
+
+    Attributes:
+        api (ReverseGeocodingApi): The API used for cache misses.
+        zoom_level (int): The zoom level of the map tiles used as cache cells.
+        tolerance (float): The maximum distance in meters between a position and a cached position to reuse its response.
+        max_positions_per_cell (int): The maximum number of positions kept per cell, the oldest position is dropped first.
+        ttl (float | None): The number of seconds a cached position stays valid, None to keep positions until they are dropped.
+        stats (CacheStats): The counters of this cache.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: ReverseGeocodingApi,
+        *,
+        zoom_level: int = 17,
+        tolerance: float = 25.0,
+        max_cells: int = 10_000,
+        max_positions_per_cell: int = 8,
+        ttl: float | None = None,
+    ) -> None:
+        """Initialize the ReverseGeocodingCache.
+
+        The tolerance should be smaller than the width of a map tile at the zoom level, about 300 meters at the equator for zoom level 17.
+
+        Args:
+            api (ReverseGeocodingApi): The API used for cache misses.
+            zoom_level (int, optional): The zoom level of the map tiles used as cache cells. Defaults to 17.
+            tolerance (float, optional): The maximum distance in meters to reuse a cached response. Defaults to 25.0.
+            max_cells (int, optional): The maximum number of cells kept in the cache. Defaults to 10_000.
+            max_positions_per_cell (int, optional): The maximum number of positions kept per cell. Defaults to 8.
+            ttl (float | None, optional): The number of seconds a cached position stays valid, None to keep positions until they are dropped.
+                Defaults to None.
+        """
+        self.api = api
+        self.zoom_level = zoom_level
+        self.tolerance = tolerance
+        self.max_positions_per_cell = max_positions_per_cell
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._cells: LRUCache[_CellKey, list[_CachedPosition]] = LRUCache(max_size=max_cells, ttl=ttl)
+
+    def nearest(
+        self: Self,
+        *,
+        position: LatLon,
+        params: ReverseGeocodeParams | None = None,
+    ) -> ReverseGeocodeResponse | None:
+        """Get the cached response of the nearest position within the tolerance, without calling the API.
+
+        Args:
+            position (LatLon): The latitude and longitude of the location to reverse geocode.
+            params (ReverseGeocodeParams | None, optional): Additional parameters for the request. Defaults to None.
+
+        Returns:
+            ReverseGeocodeResponse | None: The cached response, or None if no cached position is within the tolerance.
+        """
+        try:
+            tile = lat_lon_to_tile_zxy(position.lat, position.lon, self.zoom_level)
+        except RangeExceptionError:
+            return None
+
+        key = params_key(params)
+        now = time.monotonic()
+        best: _CachedPosition | None = None
+        best_distance = self.tolerance
+        for x in (tile.x - 1, tile.x, tile.x + 1):
+            for y in (tile.y - 1, tile.y, tile.y + 1):
+                for cached in self._cells.get((key, x, y)) or ():
+                    if cached.expires_at < now:
+                        continue
+                    distance = haversine_distance(position.lat, position.lon, cached.lat, cached.lon)
+                    if distance <= best_distance:
+                        best, best_distance = cached, distance
+
+        return best.response if best is not None else None
+
+    async def get_reverse_geocode(
+        self: Self,
+        *,
+        position: LatLon,
+        params: ReverseGeocodeParams | None = None,
+    ) -> ReverseGeocodeResponse:
+        """Get reverse geocode, from the cache when a position within the tolerance was reverse geocoded before.
+
+        Args:
+            position (LatLon): The latitude and longitude of the location to reverse geocode.
+            params (ReverseGeocodeParams | None, optional): Additional parameters for the request. Defaults to None.
+
+        Returns:
+            ReverseGeocodeResponse: The response containing the reverse geocode results.
+        """
+        cached = self.nearest(position=position, params=params)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        self.stats.misses += 1
+        response = await self.api.get_reverse_geocode(position=position, params=params)
+        self._store(position=position, params=params, response=response)
+        return response
+
+    def clear(self: Self) -> None:
+        """Remove all cached responses."""
+        self._cells.clear()
+
+    def _store(self: Self, *, position: LatLon, params: ReverseGeocodeParams | None, response: ReverseGeocodeResponse) -> None:
+        """Store a response in the cell of its position."""
+        try:
+            tile = lat_lon_to_tile_zxy(position.lat, position.lon, self.zoom_level)
+        except RangeExceptionError:
+            logger.debug("Not caching reverse geocode for %s, outside the tile grid", position)
+            return
+
+        key = (params_key(params), tile.x, tile.y)
+        now = time.monotonic()
+        cell = [cached for cached in self._cells.get(key) or () if cached.expires_at >= now]
+        expires_at = now + self.ttl if self.ttl is not None else math.inf
+        cell.append(_CachedPosition(lat=position.lat, lon=position.lon, response=response, expires_at=expires_at))
+        self._cells.set(key, cell[-self.max_positions_per_cell :])
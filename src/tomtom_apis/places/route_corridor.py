@@ -0,0 +1,251 @@
+"""Route corridor search."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final, Self
+
+from tomtom_apis.geo import douglas_peucker, haversine_distance
+from tomtom_apis.models import LatLon
+from tomtom_apis.places.models import Points, SearchAlongRouteData, SearchResponse, Summary
+
+if TYPE_CHECKING:
+    from tomtom_apis.places.models import Result, SearchAlongRouteParams
+    from tomtom_apis.places.search import SearchApi
+    from tomtom_apis.routing.models import CalculatedRouteResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_ROUTE_POINTS: Final[int] = 2_000
+
+
+@dataclass(kw_only=True)
+class RouteCorridorStats:
+    """Counters of route corridor searches.
+
+    Attributes:
+        points (int): The number of route points before simplification.
+        simplified_points (int): The number of route points after simplification.
+        segments (int): The number of segments searched, each segment is one request.
+        duplicates (int): The number of results dropped because an overlapping segment returned them too.
+    """
+
+    points: int = 0
+    simplified_points: int = 0
+    segments: int = 0
+    duplicates: int = 0
+
+
+@dataclass(kw_only=True, frozen=True)
+class _Segment:
+    """A part of the simplified route, as indices into its points."""
+
+    start: int
+    end: int
+
+
+class RouteCorridorSearch:  # pylint: disable=too-few-public-methods
+    """Route corridor search.
+
+    Searches along a calculated route of any length with a single call. The points of the route are simplified and split into segments that
+    respect the point limit of search along route and a maximum length, because every request returns a limited number of results. Consecutive
+    segments overlap, so results near a segment boundary are found by at least one of them. The segments are searched concurrently, and the
+    results are merged, deduplicated by id and ordered by their distance along the route.
+
+    Attributes:
+        api (SearchApi): The API used to search the segments.
+        tolerance (float): The maximum distance in meters between the route and its simplification.
+        max_points (int): The maximum number of route points per request.
+        segment_length (float): The maximum length of a segment in meters.
+        overlap (float): The length in meters that consecutive segments share.
+        stats (RouteCorridorStats): The counters of the searches.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: SearchApi,
+        *,
+        tolerance: float = 25.0,
+        max_points: int = MAX_ROUTE_POINTS,
+        segment_length: float = 50_000.0,
+        overlap: float = 2_000.0,
+        max_concurrency: int = 4,
+    ) -> None:
+        """Initialize the RouteCorridorSearch.
+
+        Args:
+            api (SearchApi): The API used to search the segments.
+            tolerance (float, optional): The maximum distance in meters between the route and its simplification. Defaults to 25.0.
+            max_points (int, optional): The maximum number of route points per request. Defaults to 2_000.
+            segment_length (float, optional): The maximum length of a segment in meters. Defaults to 50_000.0.
+            overlap (float, optional): The length in meters that consecutive segments share. Defaults to 2_000.0.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 4.
+
+        Raises:
+            ValueError: If max_points is smaller than 2 or the overlap is not shorter than the segment length.
+        """
+        if max_points < 2:  # noqa: PLR2004
+            msg = "max_points must be at least 2"
+            raise ValueError(msg)
+        if overlap >= segment_length:
+            msg = "overlap must be shorter than segment_length"
+            raise ValueError(msg)
+
+        self.api = api
+        self.tolerance = tolerance
+        self.max_points = max_points
+        self.segment_length = segment_length
+        self.overlap = overlap
+        self.stats = RouteCorridorStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search(  # pylint: disable=too-many-arguments
+        self: Self,
+        *,
+        query: str,
+        maxDetourTime: int,
+        route: CalculatedRouteResponse,
+        route_index: int = 0,
+        params: SearchAlongRouteParams | None = None,
+    ) -> SearchResponse:
+        """Search along the whole route.
+
+        Args:
+            query (str): The query string representing the category, address, or place to search for along the route.
+            maxDetourTime (int): The maximum allowable detour time (in seconds) from the route.
+            route (CalculatedRouteResponse): The calculated route to search along.
+            route_index (int, optional): The index of the route in the response, for responses with alternatives. Defaults to 0.
+            params (SearchAlongRouteParams | None, optional): Additional parameters for the requests, the limit applies per segment.
+                Defaults to None.
+
+        Returns:
+            SearchResponse: The results of all segments, each result once, ordered by distance along the route.
+
+        Raises:
+            ValueError: If the route has fewer than 2 distinct points.
+        """
+        points = route_points(route, route_index)
+        if len(points) < 2:  # noqa: PLR2004
+            msg = "The route must have at least 2 distinct points"
+            raise ValueError(msg)
+
+        simplified = [points[i] for i in douglas_peucker(points, self.tolerance)]
+        cumulative = _cumulative_distances(simplified)
+        segments = self._split(cumulative)
+        self.stats.points += len(points)
+        self.stats.simplified_points += len(simplified)
+        self.stats.segments += len(segments)
+        logger.debug("Searching %s along %d segments of %d route points", query, len(segments), len(simplified))
+
+        responses = await asyncio.gather(
+            *(self._search_segment(query, maxDetourTime, params, simplified[segment.start : segment.end + 1]) for segment in segments)
+        )
+
+        results = self._merge(segments, responses, simplified, cumulative)
+        query_time = sum(response.summary.queryTime or 0 for response in responses)
+        return SearchResponse(
+            summary=Summary(query=query, queryTime=query_time, numResults=len(results), offset=0, totalResults=len(results)),
+            results=results,
+        )
+
+    def _merge(
+        self: Self,
+        segments: list[_Segment],
+        responses: list[SearchResponse],
+        points: list[tuple[float, float]],
+        cumulative: list[float],
+    ) -> list[Result]:
+        """Merge the results of the segments, keeping the smallest detour of a result found by several segments."""
+        found: dict[str, tuple[float, Result]] = {}
+        for segment, response in zip(segments, responses, strict=True):
+            for result in response.results:
+                known = found.get(result.id)
+                if known is not None:
+                    self.stats.duplicates += 1
+                    if _detour(known[1]) <= _detour(result):
+                        continue
+                found[result.id] = (_distance_along(result.position, points, cumulative, segment), result)
+
+        return [result for _, result in sorted(found.values(), key=lambda item: (item[0], _detour(item[1])))]
+
+    def _split(self: Self, cumulative: list[float]) -> list[_Segment]:
+        """Split the simplified route into overlapping segments."""
+        segments: list[_Segment] = []
+        last = len(cumulative) - 1
+        start = 0
+        while True:
+            end = min(start + self.max_points - 1, bisect.bisect_right(cumulative, cumulative[start] + self.segment_length) - 1, last)
+            end = max(end, start + 1)
+            segments.append(_Segment(start=start, end=end))
+            if end >= last:
+                return segments
+            start = max(start + 1, min(end, bisect.bisect_left(cumulative, cumulative[end] - self.overlap)))
+
+    async def _search_segment(
+        self: Self,
+        query: str,
+        max_detour_time: int,
+        params: SearchAlongRouteParams | None,
+        points: list[tuple[float, float]],
+    ) -> SearchResponse:
+        """Search along a segment under the concurrency limit."""
+        data = SearchAlongRouteData(route=Points(points=[LatLon(lat=lat, lon=lon) for lat, lon in points]))
+        async with self._semaphore:
+            return await self.api.post_search_along_route(query=query, maxDetourTime=max_detour_time, params=params, data=data)
+
+
+def route_points(route: CalculatedRouteResponse, route_index: int = 0) -> list[tuple[float, float]]:
+    """Get the points of a calculated route, with the points where legs meet once.
+
+    Args:
+        route (CalculatedRouteResponse): The calculated route.
+        route_index (int, optional): The index of the route in the response, for responses with alternatives. Defaults to 0.
+
+    Returns:
+        list[tuple[float, float]]: The (lat, lon) points of all legs.
+    """
+    points: list[tuple[float, float]] = []
+    for leg in route.routes[route_index].legs:
+        for point in leg.points:
+            position = (point.latitude, point.longitude)
+            if not points or points[-1] != position:
+                points.append(position)
+    return points
+
+
+def _cumulative_distances(points: list[tuple[float, float]]) -> list[float]:
+    """Get the distance in meters from the first point to every point along the line."""
+    cumulative = [0.0]
+    for (lat1, lon1), (lat2, lon2) in itertools.pairwise(points):
+        cumulative.append(cumulative[-1] + haversine_distance(lat1, lon1, lat2, lon2))
+    return cumulative
+
+
+def _distance_along(position: LatLon, points: list[tuple[float, float]], cumulative: list[float], segment: _Segment) -> float:
+    """Get the distance along the route of the point of a segment nearest to a position."""
+    best_distance, best_offset = math.inf, cumulative[segment.start]
+    for i in range(segment.start, segment.end):
+        distance, t = _project(position, points[i], points[i + 1])
+        if distance < best_distance:
+            best_distance, best_offset = distance, cumulative[i] + t * (cumulative[i + 1] - cumulative[i])
+    return best_offset
+
+
+def _project(position: LatLon, start: tuple[float, float], end: tuple[float, float]) -> tuple[float, float]:
+    """Project a position onto a line segment, returning the distance in degrees and the fraction along the segment."""
+    scale = math.cos(math.radians((start[0] + end[0]) / 2))
+    dx, dy = (end[1] - start[1]) * scale, end[0] - start[0]
+    px, py = (position.lon - start[1]) * scale, position.lat - start[0]
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, (px * dx + py * dy) / length))
+    return math.hypot(px - t * dx, py - t * dy), t
+
+
+def _detour(result: Result) -> float:
+    """Get the detour time of a result, results without one sort last."""
+    return result.detourTime if result.detourTime is not None else math.inf
@@ -1,11 +1,13 @@
 """Routing APIs."""
 
+from .batch_routing import BatchRoutingApi
 from .long_distance_ev_routing import LongDistanceEVRoutingApi
 from .matrix_routing_v2 import MatrixRoutingApiV2
 from .routing import RoutingApi
 from .waypoint_optimization import WaypointOptimizationApi
 
 __all__ = [
+    "BatchRoutingApi",
     "LongDistanceEVRoutingApi",
     "MatrixRoutingApiV2",
     "RoutingApi",
@@ -0,0 +1,250 @@
+"""Batch route executor."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final, Self
+from urllib.parse import urlencode, urlsplit
+
+from aiohttp import ClientResponseError
+
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.exceptions import TomTomAPIServerError
+from tomtom_apis.places.models import AsynchronousBatchDownloadParams, AsynchronousSynchronousBatchParams, RedirectModeType
+from tomtom_apis.routing.models import BatchRoutingItem, BatchRoutingPostData, CalculatedRouteResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tomtom_apis.models import LatLonList
+    from tomtom_apis.routing.batch_routing import BatchRoutingApi
+    from tomtom_apis.routing.models import BatchRoutingItemResponse, BatchRoutingResponse, CalculateRouteParams
+
+logger = logging.getLogger(__name__)
+
+MAX_SYNC_BATCH_ITEMS: Final[int] = 100
+MAX_ASYNC_BATCH_ITEMS: Final[int] = 700
+MAX_WAIT_TIME_SECONDS: Final[int] = 120
+TIMEOUT_MARGIN_SECONDS: Final[int] = 2
+MAX_POLL_INTERVAL: Final[float] = 30.0
+
+
+@dataclass(kw_only=True)
+class BatchRouteResult:
+    """The result of a route calculated in a batch.
+
+    Attributes:
+        status_code (int): The HTTP status code of the item.
+        response (CalculatedRouteResponse | None): The calculated route, None if the item failed.
+        error (str | None): The description of the error of a failed item.
+    """
+
+    status_code: int
+    response: CalculatedRouteResponse | None = None
+    error: str | None = None
+
+    @property
+    def retryable(self: Self) -> bool:
+        """Return whether the item failed temporarily, because of rate limiting or a server error.
+
+        Returns:
+            bool: True for a 429 or 5xx status code, other errors like a 400 for a route that can not be found are permanent.
+        """
+        return self.status_code == HttpStatus.TOO_MANY_REQUESTS or self.status_code >= HttpStatus.INTERNAL_SERVER_ERROR
+
+
+@dataclass(kw_only=True)
+class BatchRouteStats:
+    """Counters of a batch route executor.
+
+    Attributes:
+        batches (int): The number of batches sent to the API.
+        items (int): The number of routes requested.
+        failures (int): The number of routes that failed, after retries.
+        retries (int): The number of routes that were sent again after a temporary failure.
+    """
+
+    batches: int = 0
+    items: int = 0
+    failures: int = 0
+    retries: int = 0
+
+
+def route_query(locations: LatLonList, params: CalculateRouteParams | None = None) -> str:
+    """Build the query of a batch item that calculates a route.
+
+    Args:
+        locations (LatLonList): The locations of the route.
+        params (CalculateRouteParams | None, optional): The parameters of the route. Defaults to None.
+
+    Returns:
+        str: The path and query string of the calculate route request, without the api key.
+    """
+    path = f"/calculateRoute/{locations.to_colon_separated()}/json"
+    query = {k: v for k, v in params.to_dict().items() if k != "key"} if params is not None else {}
+    return f"{path}?{urlencode(query, doseq=True, safe=',:')}" if query else path
+
+
+class BatchRouteExecutor:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Batch route executor.
+
+    Calculates any number of routes with the Batch Routing API. The routes are turned into batch items, split into batches within the item limit of
+    the service and sent concurrently, either as synchronous batches or as asynchronous batches that are downloaded when done. Every item is
+    decoded into a `CalculatedRouteResponse`, a failed item only fails its own route. A batch that fails as a whole fails each of its items with
+    the status code of the response, or a 500 when there is none, like a timeout. Items that fail temporarily, with a 429 or 5xx status code, are
+    sent again in a new batch after an exponential backoff, other failures are permanent.
+
+    The service holds a request of an asynchronous batch for up to the wait time, so the wait time is capped below the timeout of the client.
+    Downloads of a batch that is not done yet are repeated with an exponential backoff from the poll interval.
+
+    Attributes:
+        api (BatchRoutingApi): The API used to send the batches.
+        use_async (bool): Whether the batches are sent as asynchronous batches.
+        max_items (int): The maximum number of items of a batch.
+        wait_time_seconds (int): The number of seconds the service waits for an asynchronous batch before answering a request.
+        poll_interval (float): The number of seconds before the first repeated download of an asynchronous batch.
+        max_retries (int): The maximum number of times an item that failed temporarily is sent again.
+        retry_delay (float): The number of seconds before the first retry, doubled for every next retry.
+        stats (BatchRouteStats): The counters of this executor.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: BatchRoutingApi,
+        *,
+        use_async: bool = False,
+        max_items: int | None = None,
+        max_concurrency: int = 2,
+        wait_time_seconds: int = MAX_WAIT_TIME_SECONDS,
+        poll_interval: float = 1.0,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+    ) -> None:
+        """Initialize the BatchRouteExecutor.
+
+        Args:
+            api (BatchRoutingApi): The API used to send the batches.
+            use_async (bool, optional): Whether the batches are sent as asynchronous batches. Defaults to False.
+            max_items (int | None, optional): The maximum number of items of a batch. Defaults to None, the limit of the service for the mode.
+            max_concurrency (int, optional): The maximum number of batches in flight. Defaults to 2.
+            wait_time_seconds (int, optional): The number of seconds the service waits for an asynchronous batch, capped at 2 seconds below the
+                total timeout of the api options. Defaults to 120.
+            poll_interval (float, optional): The number of seconds before the first repeated download of an asynchronous batch. Defaults to 1.0.
+            max_retries (int, optional): The maximum number of times an item that failed temporarily is sent again. Defaults to 2.
+            retry_delay (float, optional): The number of seconds before the first retry, doubled for every next retry. Defaults to 1.0.
+
+        Raises:
+            ValueError: If max_items is not between 1 and the limit of the service for the mode.
+        """
+        limit = MAX_ASYNC_BATCH_ITEMS if use_async else MAX_SYNC_BATCH_ITEMS
+        max_items = limit if max_items is None else max_items
+        if not 1 <= max_items <= limit:
+            msg = f"max_items must be between 1 and {limit}"
+            raise ValueError(msg)
+
+        self.api = api
+        self.use_async = use_async
+        self.max_items = max_items
+        self.wait_time_seconds = _cap_wait_time(wait_time_seconds, api.options.timeout.total)
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stats = BatchRouteStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def calculate_routes(self: Self, routes: Sequence[tuple[LatLonList, CalculateRouteParams | None]]) -> list[BatchRouteResult]:
+        """Calculate routes in batches.
+
+        Args:
+            routes (Sequence[tuple[LatLonList, CalculateRouteParams | None]]): The locations and parameters of each route.
+
+        Returns:
+            list[BatchRouteResult]: The result of each route, in the order of the routes.
+        """
+        items = [BatchRoutingItem(query=route_query(locations, params)) for locations, params in routes]
+        self.stats.items += len(items)
+        results: list[BatchRouteResult] = []
+        pending = list(range(len(items)))
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats.retries += len(pending)
+                logger.debug("Retrying %d routes that failed temporarily", len(pending))
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            decoded = await self._calculate([items[i] for i in pending])
+            if not results:
+                results = decoded
+            else:
+                for index, result in zip(pending, decoded, strict=True):
+                    results[index] = result
+            pending = [i for i in pending if results[i].retryable]
+            if not pending:
+                break
+
+        self.stats.failures += sum(1 for result in results if result.response is None)
+        return results
+
+    async def _calculate(self: Self, items: list[BatchRoutingItem]) -> list[BatchRouteResult]:
+        """Send items in batches and decode the results, in the order of the items."""
+        batches = [items[i : i + self.max_items] for i in range(0, len(items), self.max_items)]
+        self.stats.batches += len(batches)
+        logger.debug("Calculating %d routes in %d batches", len(items), len(batches))
+        responses = await asyncio.gather(*(self._send(batch) for batch in batches), return_exceptions=True)
+        return [result for batch, response in zip(batches, responses, strict=True) for result in _decode_batch(len(batch), response)]
+
+    async def _send(self: Self, items: list[BatchRoutingItem]) -> BatchRoutingResponse:
+        """Send a batch under the concurrency limit, and wait for the result of an asynchronous batch."""
+        data = BatchRoutingPostData(batchItems=items)
+        async with self._semaphore:
+            if not self.use_async:
+                return await self.api.post_synchronous_batch(data=data)
+
+            location = await self.api.post_asynchronous_batch_submission(
+                params=AsynchronousSynchronousBatchParams(redirectMode=RedirectModeType.MANUAL, waitTimeSeconds=self.wait_time_seconds),
+                data=data,
+            )
+            if location is None:
+                msg = "Asynchronous batch submission did not return a Location"
+                raise TomTomAPIServerError(msg)
+
+            batch_id = urlsplit(location).path.rstrip("/").rsplit("/", 1)[-1]
+            params = AsynchronousBatchDownloadParams(waitTimeSeconds=self.wait_time_seconds)
+            delay = self.poll_interval
+            while (response := await self.api.get_asynchronous_batch_download(batch_id=batch_id, params=params)) is None:
+                logger.debug("Batch %s is still being processed, polling again in %.1f seconds", batch_id, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+            return response
+
+
+def _cap_wait_time(wait_time_seconds: int, timeout: float | None) -> int:
+    """Cap the wait time of the service below the total timeout of the client, so the service answers before the client gives up."""
+    if timeout is None:
+        return wait_time_seconds
+    return max(0, min(wait_time_seconds, math.floor(timeout) - TIMEOUT_MARGIN_SECONDS))
+
+
+def _decode_batch(size: int, response: BatchRoutingResponse | BaseException) -> list[BatchRouteResult]:
+    """Decode the items of a batch, or fail every item of a batch that failed as a whole or did not return an item for every item sent."""
+    if isinstance(response, BaseException):
+        if not isinstance(response, Exception):
+            raise response
+        cause = response.__cause__
+        status_code = cause.status if isinstance(cause, ClientResponseError) else HttpStatus.INTERNAL_SERVER_ERROR
+        logger.debug("Batch of %d routes failed with status code %d: %s", size, status_code, response)
+        return [BatchRouteResult(status_code=status_code, error=str(response)) for _ in range(size)]
+    if len(response.batchItems) != size:
+        error = f"Batch of {size} routes returned {len(response.batchItems)} items"
+        logger.debug(error)
+        return [BatchRouteResult(status_code=HttpStatus.INTERNAL_SERVER_ERROR, error=error) for _ in range(size)]
+    return [_decode(item) for item in response.batchItems]
+
+
+def _decode(item: BatchRoutingItemResponse) -> BatchRouteResult:
+    """Decode a batch item into the calculated route or its error."""
+    if item.statusCode >= 300:  # noqa: PLR2004
+        error = item.response.get("error") or {}
+        return BatchRouteResult(status_code=item.statusCode, error=error.get("description"))
+    return BatchRouteResult(status_code=item.statusCode, response=CalculatedRouteResponse.from_dict(item.response))
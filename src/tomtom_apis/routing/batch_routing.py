@@ -0,0 +1,95 @@
+"""Batch Routing API."""
+
+from typing import Self
+
+from tomtom_apis.api import BaseApi, BaseParams
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places.models import AsynchronousBatchDownloadParams, AsynchronousSynchronousBatchParams
+from tomtom_apis.routing.models import BatchRoutingPostData, BatchRoutingResponse
+
+
+class BatchRoutingApi(BaseApi):
+    """Batch Routing API.
+
+    Batch Routing sends batches of calculate route and calculate reachable range requests in a single call. You can call Batch Routing APIs to run
+    either asynchronously or synchronously.
+
+    For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/batch-routing/batch-routing-service
+    """
+
+    async def post_synchronous_batch(
+        self: Self,
+        *,
+        params: BaseParams | None = None,  # No extra params.
+        data: BatchRoutingPostData,
+    ) -> BatchRoutingResponse:
+        """Post synchronous batch.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/batch-routing/synchronous-batch
+
+        Args:
+            params (BaseParams, optional): Query parameters for the request. Defaults to None.
+            data (BatchRoutingPostData): Data for the batch request.
+
+        Returns:
+            BatchRoutingResponse: The response object for the synchronous batch request.
+        """
+        response = await self.post(
+            endpoint="/routing/1/batch/sync/json",
+            params=params,
+            data=data,
+        )
+
+        return await response.deserialize(BatchRoutingResponse)
+
+    async def post_asynchronous_batch_submission(
+        self: Self,
+        *,
+        params: AsynchronousSynchronousBatchParams | None = None,
+        data: BatchRoutingPostData,
+    ) -> str | None:
+        """Post Asynchronous Batch Submission.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/batch-routing/asynchronous-batch-submission
+
+        Args:
+            params (AsynchronousSynchronousBatchParams, optional): Query parameters for the request. Defaults to None.
+            data (BatchRoutingPostData): Data for the batch request.
+
+        Returns:
+            str | None: The 'Location' header from the response, if available, otherwise None.
+        """
+        response = await self.post(
+            endpoint="/routing/1/batch/json",
+            params=params,
+            data=data,
+        )
+
+        return response.headers.get("Location", None)
+
+    async def get_asynchronous_batch_download(
+        self: Self,
+        *,
+        batch_id: str,
+        params: AsynchronousBatchDownloadParams | None = None,
+    ) -> BatchRoutingResponse | None:
+        """Fetches the result of an asynchronous batch download.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/batch-routing/asynchronous-batch-download
+
+        Args:
+            batch_id (str): The ID of the batch to download.
+            params (AsynchronousBatchDownloadParams, optional): Optional parameters for the download request. Defaults to None.
+
+        Returns:
+            BatchRoutingResponse | None: The response object representing the downloaded batch, None if the batch is still being processed.
+        """
+        response = await self.get(
+            endpoint=f"/routing/1/batch/{batch_id}",
+            params=params,
+        )
+
+        if response.status == HttpStatus.ACCEPTED:
+            return None
+
+        return await response.deserialize(BatchRoutingResponse)
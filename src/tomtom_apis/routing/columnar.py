@@ -0,0 +1,194 @@
+"""Columnar route geometry."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Final, Self
+
+import orjson
+
+from tomtom_apis.geo import EARTH_RADIUS_METERS
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.models import EVLegSummary, EVSummary, Section, Summary
+
+EV_SUMMARY_FIELDS: Final[frozenset[str]] = frozenset({"batteryConsumptionInkWh", "remainingChargeAtArrivalInkWh", "totalChargingTimeInSeconds"})
+EV_LEG_SUMMARY_FIELDS: Final[frozenset[str]] = frozenset(
+    {"batteryConsumptionInkWh", "remainingChargeAtArrivalInkWh", "chargingInformationAtEndOfLeg"},
+)
+
+
+@dataclass(kw_only=True)
+class PointColumns:
+    """The points of a line as packed latitude and longitude columns.
+
+    Attributes:
+        lat (array[float]): The latitudes.
+        lon (array[float]): The longitudes.
+    """
+
+    lat: array[float] = field(default_factory=lambda: array("d"))
+    lon: array[float] = field(default_factory=lambda: array("d"))
+
+    def points(self: Self) -> list[LatitudeLongitude]:
+        """Decode the points into LatitudeLongitude objects.
+
+        Returns:
+            list[LatitudeLongitude]: The points.
+        """
+        return [LatitudeLongitude(latitude=lat, longitude=lon) for lat, lon in zip(self.lat, self.lon, strict=True)]
+
+    def cumulative_distances(self: Self) -> array[float]:
+        """Calculate the distance along the line from the first point to every point.
+
+        Returns:
+            array[float]: The distances in meters, starting at 0.0 for the first point.
+        """
+        distances = array("d", bytes(8 * len(self)))
+        if not self.lat:
+            return distances
+        total = 0.0
+        phi1, lambda1 = math.radians(self.lat[0]), math.radians(self.lon[0])
+        cos1 = math.cos(phi1)
+        for i in range(1, len(self)):
+            phi2, lambda2 = math.radians(self.lat[i]), math.radians(self.lon[i])
+            cos2 = math.cos(phi2)
+            a = math.sin((phi2 - phi1) / 2) ** 2 + cos1 * cos2 * math.sin((lambda2 - lambda1) / 2) ** 2
+            total += 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+            distances[i] = total
+            phi1, lambda1, cos1 = phi2, lambda2, cos2
+        return distances
+
+    def to_numpy(self: Self) -> tuple[Any, Any]:
+        """Get the columns as NumPy arrays, without copying.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The latitudes and the longitudes, float64 arrays that share memory with the columns.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        import numpy as np  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        return np.frombuffer(self.lat, dtype=np.float64), np.frombuffer(self.lon, dtype=np.float64)
+
+    def extend(self: Self, other: PointColumns) -> None:
+        """Append the points of another line.
+
+        Args:
+            other (PointColumns): The line to append.
+        """
+        self.lat.extend(other.lat)
+        self.lon.extend(other.lon)
+
+    def __len__(self: Self) -> int:
+        """Return the number of points."""
+        return len(self.lat)
+
+
+@dataclass(kw_only=True)
+class ColumnarLeg:
+    """A leg of a route with columnar points.
+
+    Attributes:
+        summary (EVLegSummary | Summary): The summary of the leg.
+        geometry (PointColumns): The points of the leg.
+    """
+
+    summary: EVLegSummary | Summary
+    geometry: PointColumns
+
+    @cached_property
+    def points(self: Self) -> list[LatitudeLongitude]:
+        """Return the points as LatitudeLongitude objects, like `Leg.points`, decoded on first access.
+
+        Returns:
+            list[LatitudeLongitude]: The points.
+        """
+        return self.geometry.points()
+
+
+@dataclass(kw_only=True)
+class ColumnarRoute:
+    """A route with columnar points, sections and guidance are decoded on access.
+
+    Attributes:
+        summary (EVSummary | Summary): The summary of the route.
+        legs (list[ColumnarLeg]): The legs of the route.
+        raw_sections (list[dict[str, Any]]): The sections as parsed from the JSON.
+        guidance (dict[str, Any] | None): The guidance as parsed from the JSON, None if it was not requested.
+    """
+
+    summary: EVSummary | Summary
+    legs: list[ColumnarLeg]
+    raw_sections: list[dict[str, Any]] = field(default_factory=list)
+    guidance: dict[str, Any] | None = None
+
+    @cached_property
+    def sections(self: Self) -> list[Section]:
+        """Return the sections, decoded on first access.
+
+        Returns:
+            list[Section]: The sections.
+        """
+        return [Section.from_dict(section) for section in self.raw_sections]
+
+    def geometry(self: Self) -> PointColumns:
+        """Join the points of all legs, the point indices of the sections refer to these points.
+
+        Returns:
+            PointColumns: The points of the route.
+        """
+        geometry = PointColumns()
+        for leg in self.legs:
+            geometry.extend(leg.geometry)
+        return geometry
+
+
+@dataclass(kw_only=True)
+class ColumnarRouteResponse:
+    """A calculate route or long distance EV route response with columnar points.
+
+    Attributes:
+        format_version (str): The format version of the response.
+        routes (list[ColumnarRoute]): The routes.
+    """
+
+    format_version: str
+    routes: list[ColumnarRoute]
+
+    @classmethod
+    def from_json(cls: type[Self], data: bytes | str) -> Self:
+        """Build the response from the raw JSON of a route response, without creating point objects.
+
+        Args:
+            data (bytes | str): The JSON of a calculate route or long distance EV route response, e.g. from `Response.bytes`.
+
+        Returns:
+            Self: The response.
+        """
+        parsed = orjson.loads(data)  # pylint: disable=maybe-no-member
+        return cls(format_version=parsed["formatVersion"], routes=[_route(route) for route in parsed["routes"]])
+
+
+def _route(route: dict[str, Any]) -> ColumnarRoute:
+    """Build a route from its parsed JSON."""
+    summary = route["summary"]
+    return ColumnarRoute(
+        summary=EVSummary.from_dict(summary) if summary.keys() >= EV_SUMMARY_FIELDS else Summary.from_dict(summary),
+        legs=[_leg(leg) for leg in route["legs"]],
+        raw_sections=route.get("sections") or [],
+        guidance=route.get("guidance"),
+    )
+
+
+def _leg(leg: dict[str, Any]) -> ColumnarLeg:
+    """Build a leg from its parsed JSON, packing its points."""
+    summary = leg["summary"]
+    points = leg.get("points") or ()
+    return ColumnarLeg(
+        summary=EVLegSummary.from_dict(summary) if summary.keys() >= EV_LEG_SUMMARY_FIELDS else Summary.from_dict(summary),
+        geometry=PointColumns(lat=array("d", [point["latitude"] for point in points]), lon=array("d", [point["longitude"] for point in points])),
+    )
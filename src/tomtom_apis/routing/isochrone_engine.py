@@ -0,0 +1,399 @@
+"""Multi-origin isochrone engine."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final, Self
+
+from tomtom_apis.cache import LRUCache, params_key
+from tomtom_apis.exceptions import TomTomAPIError
+from tomtom_apis.geo import EARTH_RADIUS_METERS, douglas_peucker, point_in_polygon
+from tomtom_apis.routing.columnar import PointColumns
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from tomtom_apis.models import LatLon
+    from tomtom_apis.routing import RoutingApi
+    from tomtom_apis.routing.models import CalculateReachableRouteParams, ReachableRange
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE: Final[float] = math.radians(EARTH_RADIUS_METERS)
+POINT_BYTES: Final[int] = 16
+
+type _IsochroneKey = tuple[float, float, str]
+type _Raster = dict[int, list[tuple[int, int]]]
+
+
+@dataclass(kw_only=True)
+class Isochrone:
+    """A simplified reachable range, stored as packed columns.
+
+    Attributes:
+        center (tuple[float, float]): The (lat, lon) center of the range.
+        boundary (PointColumns): The simplified boundary, the polygon is closed implicitly.
+        bbox (tuple[float, float, float, float]): The (south, west, north, east) bounding box of the boundary.
+    """
+
+    center: tuple[float, float]
+    boundary: PointColumns
+    bbox: tuple[float, float, float, float]
+
+    @classmethod
+    def from_reachable_range(cls: type[Self], reachable_range: ReachableRange, *, tolerance: float = 0.0) -> Self:
+        """Create an isochrone from a reachable range, simplifying its boundary.
+
+        Args:
+            reachable_range (ReachableRange): The reachable range.
+            tolerance (float, optional): The maximum distance in meters between the boundary and its simplification. Defaults to 0.0, none.
+
+        Returns:
+            Isochrone: The isochrone.
+        """
+        ring = [(point.latitude, point.longitude) for point in reachable_range.boundary]
+        if tolerance > 0 and len(ring) > 3:  # noqa: PLR2004
+            ring = [ring[i] for i in douglas_peucker([*ring, ring[0]], tolerance)[:-1]]
+        boundary = PointColumns(lat=array("d", (lat for lat, _ in ring)), lon=array("d", (lon for _, lon in ring)))
+        bbox = (min(boundary.lat), min(boundary.lon), max(boundary.lat), max(boundary.lon)) if ring else (0.0, 0.0, 0.0, 0.0)
+        return cls(center=(reachable_range.center.latitude, reachable_range.center.longitude), boundary=boundary, bbox=bbox)
+
+    def polygon(self: Self) -> list[tuple[float, float]]:
+        """Get the boundary as (lat, lon) vertices.
+
+        Returns:
+            list[tuple[float, float]]: The vertices.
+        """
+        return list(zip(self.boundary.lat, self.boundary.lon, strict=True))
+
+    def contains(self: Self, lat: float, lon: float) -> bool:
+        """Check whether a position is within the isochrone.
+
+        Args:
+            lat (float): The latitude of the position.
+            lon (float): The longitude of the position.
+
+        Returns:
+            bool: Whether the position is within the boundary.
+        """
+        south, west, north, east = self.bbox
+        return south <= lat <= north and west <= lon <= east and point_in_polygon(lat, lon, self.polygon())
+
+    @property
+    def area(self: Self) -> float:
+        """Return the area within the boundary, in an equirectangular projection around the center.
+
+        Returns:
+            float: The area in square meters.
+        """
+        scale = math.cos(math.radians(self.center[0])) * METERS_PER_DEGREE * METERS_PER_DEGREE
+        lat, lon = self.boundary.lat, self.boundary.lon
+        return abs(sum(lon[i - 1] * lat[i] - lon[i] * lat[i - 1] for i in range(len(lat)))) / 2 * scale
+
+
+@dataclass(kw_only=True)
+class IsochroneEngineStats:
+    """Counters of an isochrone engine.
+
+    Attributes:
+        requests (int): The number of requests sent to the API.
+        failures (int): The number of requests that failed.
+        points (int): The number of boundary points returned by the API.
+        stored_points (int): The number of boundary points left after simplification.
+    """
+
+    requests: int = 0
+    failures: int = 0
+    points: int = 0
+    stored_points: int = 0
+
+
+class IsochroneEngine:
+    """Multi-origin isochrone engine, in front of `RoutingApi.get_calculate_reachable_range`.
+
+    Calculates the reachable ranges of many origins for several budgets, e.g. a `timeBudgetInSec`, `energyBudgetInkWh` or `fuelBudgetInLiters`,
+    with a bounded number of requests in flight. The same origin and budget is requested once per call, and the isochrones are cached by their
+    origin snapped to a grid and their parameters without the api key. Boundaries are simplified with the Douglas-Peucker algorithm and stored as
+    packed columns of 16 bytes per point, the cache is bounded by that size. Requests that fail are logged and give no isochrone, so one bad origin
+    does not fail a whole batch.
+
+    Attributes:
+        api (RoutingApi): The api used to calculate the reachable ranges that are not cached.
+        tolerance (float): The maximum distance in meters between a boundary and its simplification.
+        grid (float): The size of the grid cells in degrees that origins are snapped to.
+        stats (IsochroneEngineStats): The counters of the engine.
+        cache_stats (CacheStats): The counters of the cache.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: RoutingApi,
+        *,
+        max_concurrency: int = 8,
+        tolerance: float = 50.0,
+        grid: float = 0.0001,
+        ttl: float | None = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_isochrones: int = 100_000,
+    ) -> None:
+        """Initialize the IsochroneEngine.
+
+        Args:
+            api (RoutingApi): The api used to calculate the reachable ranges that are not cached.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+            tolerance (float, optional): The maximum distance in meters between a boundary and its simplification. Defaults to 50.0.
+            grid (float, optional): The size of the grid cells in degrees that origins are snapped to. Defaults to 0.0001.
+            ttl (float | None, optional): The number of seconds the isochrones stay valid. Defaults to None, until they are evicted.
+            max_bytes (int, optional): The maximum total size of the cached boundaries. Defaults to 64 MiB.
+            max_isochrones (int, optional): The maximum number of cached isochrones. Defaults to 100_000.
+
+        Raises:
+            ValueError: If the grid is not positive.
+        """
+        if grid <= 0:
+            msg = "grid must be positive"
+            raise ValueError(msg)
+        self.api = api
+        self.tolerance = tolerance
+        self.grid = grid
+        self.stats = IsochroneEngineStats()
+        self._isochrones: LRUCache[_IsochroneKey, Isochrone] = LRUCache(max_size=max_isochrones, ttl=ttl, max_bytes=max_bytes)
+        self.cache_stats = self._isochrones.stats
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def calculate(
+        self: Self,
+        origins: Sequence[LatLon],
+        budgets: Sequence[CalculateReachableRouteParams],
+    ) -> list[list[Isochrone | None]]:
+        """Calculate the isochrones of every origin for every budget.
+
+        Args:
+            origins (Sequence[LatLon]): The origins, e.g. depots.
+            budgets (Sequence[CalculateReachableRouteParams]): The parameters of every budget.
+
+        Returns:
+            list[list[Isochrone | None]]: The isochrones per origin per budget, None when the calculation failed.
+        """
+        keys = [[self.isochrone_key(origin, budget) for budget in budgets] for origin in origins]
+        results: dict[_IsochroneKey, Isochrone | None] = {}
+        pending: dict[_IsochroneKey, tuple[LatLon, CalculateReachableRouteParams]] = {}
+        for origin, row in zip(origins, keys, strict=True):
+            for budget, key in zip(budgets, row, strict=True):
+                if key in results or key in pending:
+                    continue
+                if (cached := self._isochrones.get(key)) is not None:
+                    results[key] = cached
+                else:
+                    pending[key] = (origin, budget)
+        logger.debug("Calculating %d of %d isochrones", len(pending), len(origins) * len(budgets))
+
+        calculated = await asyncio.gather(*(self._calculate(key, origin, budget) for key, (origin, budget) in pending.items()))
+        results.update(zip(pending, calculated, strict=True))
+        return [[results[key] for key in row] for row in keys]
+
+    def isochrone_key(self: Self, origin: LatLon, params: CalculateReachableRouteParams | None) -> _IsochroneKey:
+        """Build the cache key of an isochrone.
+
+        Args:
+            origin (LatLon): The origin of the isochrone.
+            params (CalculateReachableRouteParams | None): The parameters of the calculation.
+
+        Returns:
+            tuple: The snapped latitude and longitude, and the canonical parameters.
+        """
+        return self._snap(origin.lat), self._snap(origin.lon), params_key(params)
+
+    def clear(self: Self) -> None:
+        """Remove all isochrones from the cache."""
+        self._isochrones.clear()
+
+    @property
+    def bytes(self: Self) -> int:
+        """Return the total size of the cached boundaries.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return self._isochrones.bytes
+
+    async def _calculate(self: Self, key: _IsochroneKey, origin: LatLon, params: CalculateReachableRouteParams) -> Isochrone | None:
+        """Request, simplify and cache one isochrone."""
+        async with self._semaphore:
+            self.stats.requests += 1
+            try:
+                response = await self.api.get_calculate_reachable_range(origin=origin, params=params)
+            except TomTomAPIError as error:
+                self.stats.failures += 1
+                logger.warning("Failed to calculate the reachable range of %s: %s", origin.to_comma_separated(), error)
+                return None
+        isochrone = Isochrone.from_reachable_range(response.reachableRange, tolerance=self.tolerance)
+        self.stats.points += len(response.reachableRange.boundary)
+        self.stats.stored_points += len(isochrone.boundary)
+        self._isochrones.set(key, isochrone, size=POINT_BYTES * len(isochrone.boundary))
+        return isochrone
+
+    def _snap(self: Self, value: float) -> float:
+        """Snap a coordinate to the grid."""
+        return round(round(value / self.grid) * self.grid, 10)
+
+    def __len__(self: Self) -> int:
+        """Return the number of cached isochrones."""
+        return len(self._isochrones)
+
+
+class CoverageGrid:
+    """Isochrones rasterized on a shared grid, to calculate their unions and overlaps locally.
+
+    Every isochrone is rasterized with a scanline over its edges into runs of grid cells per row, so memory grows with the perimeter rather than the
+    area. Unions merge the runs per row and overlaps intersect them, pairs of isochrones are found with a sweep over their bounding boxes, so
+    thousands of isochrones that mostly do not overlap stay cheap. Areas are accurate to about a cell along the boundaries.
+
+    Attributes:
+        isochrones (Sequence[Isochrone]): The isochrones, e.g. of every depot for one budget.
+        resolution (float): The size of the grid cells in meters.
+    """
+
+    def __init__(self: Self, isochrones: Sequence[Isochrone], *, resolution: float = 250.0) -> None:
+        """Initialize the CoverageGrid.
+
+        Args:
+            isochrones (Sequence[Isochrone]): The isochrones.
+            resolution (float, optional): The size of the grid cells in meters. Defaults to 250.0.
+
+        Raises:
+            ValueError: If the resolution is not positive.
+        """
+        if resolution <= 0:
+            msg = "resolution must be positive"
+            raise ValueError(msg)
+        self.isochrones = isochrones
+        self.resolution = resolution
+        bboxes = [isochrone.bbox for isochrone in isochrones] or [(0.0, 0.0, 0.0, 0.0)]
+        self._south = min(bbox[0] for bbox in bboxes)
+        self._west = min(bbox[1] for bbox in bboxes)
+        self._dlat = resolution / METERS_PER_DEGREE
+        self._dlon = self._dlat / math.cos(math.radians((self._south + max(bbox[2] for bbox in bboxes)) / 2))
+        self._rasters = [self._rasterize(isochrone) for isochrone in isochrones]
+
+    def area(self: Self, index: int) -> float:
+        """Calculate the covered area of an isochrone.
+
+        Args:
+            index (int): The index of the isochrone.
+
+        Returns:
+            float: The area in square meters.
+        """
+        return sum(self._row_area(row) * _length(runs) for row, runs in self._rasters[index].items())
+
+    def union_area(self: Self, indices: Iterable[int] | None = None) -> float:
+        """Calculate the area covered by any of the isochrones.
+
+        Args:
+            indices (Iterable[int] | None, optional): The indices of the isochrones. Defaults to None, all isochrones.
+
+        Returns:
+            float: The area in square meters.
+        """
+        rows: dict[int, list[tuple[int, int]]] = {}
+        for index in range(len(self._rasters)) if indices is None else indices:
+            for row, runs in self._rasters[index].items():
+                rows.setdefault(row, []).extend(runs)
+        return sum(self._row_area(row) * _length(_merge(runs)) for row, runs in rows.items())
+
+    def overlap_area(self: Self, a: int, b: int) -> float:
+        """Calculate the area covered by both of two isochrones.
+
+        Args:
+            a (int): The index of the first isochrone.
+            b (int): The index of the second isochrone.
+
+        Returns:
+            float: The area in square meters.
+        """
+        first, second = self._rasters[a], self._rasters[b]
+        return sum(self._row_area(row) * _intersection(runs, second[row]) for row, runs in first.items() if row in second)
+
+    def overlaps(self: Self) -> dict[tuple[int, int], float]:
+        """Calculate the overlapping areas of all pairs of isochrones that overlap.
+
+        Returns:
+            dict[tuple[int, int], float]: The area in square meters per (a, b) pair of indices with a < b.
+        """
+        order = sorted(range(len(self.isochrones)), key=lambda i: self.isochrones[i].bbox[1])
+        overlaps: dict[tuple[int, int], float] = {}
+        for position, a in enumerate(order):
+            south, _, north, east = self.isochrones[a].bbox
+            for b in order[position + 1 :]:
+                other = self.isochrones[b].bbox
+                if other[1] > east:
+                    break
+                if other[0] <= north and other[2] >= south and (area := self.overlap_area(a, b)) > 0:
+                    overlaps[min(a, b), max(a, b)] = area
+        return overlaps
+
+    def _rasterize(self: Self, isochrone: Isochrone) -> _Raster:
+        """Rasterize an isochrone into runs of cells per row, a cell is covered when its center is within the boundary."""
+        crossings: dict[int, list[float]] = {}
+        lats, lons = isochrone.boundary.lat, isochrone.boundary.lon
+        for i, (lat2, lon2) in enumerate(zip(lats, lons, strict=True)):
+            lat1, lon1 = lats[i - 1], lons[i - 1]
+            if lat1 == lat2:
+                continue
+            slope = (lon2 - lon1) / (lat2 - lat1)
+            for row in range(self._row(min(lat1, lat2)), self._row(max(lat1, lat2))):
+                crossings.setdefault(row, []).append(lon1 + (self._south + (row + 0.5) * self._dlat - lat1) * slope)
+
+        raster: _Raster = {}
+        for row, lons_crossed in crossings.items():
+            lons_crossed.sort()
+            runs = [(self._column(start), self._column(end)) for start, end in zip(lons_crossed[::2], lons_crossed[1::2], strict=True)]
+            if runs := [(start, end) for start, end in runs if end > start]:
+                raster[row] = runs
+        return raster
+
+    def _row(self: Self, lat: float) -> int:
+        """Get the first row with its center at or above a latitude."""
+        return math.ceil((lat - self._south) / self._dlat - 0.5)
+
+    def _column(self: Self, lon: float) -> int:
+        """Get the first column with its center at or east of a longitude."""
+        return math.ceil((lon - self._west) / self._dlon - 0.5)
+
+    def _row_area(self: Self, row: int) -> float:
+        """Calculate the area of a cell in a row."""
+        return self.resolution * self._dlon * METERS_PER_DEGREE * math.cos(math.radians(self._south + (row + 0.5) * self._dlat))
+
+
+def _length(runs: Iterable[tuple[int, int]]) -> int:
+    """Count the cells in runs."""
+    return sum(end - start for start, end in runs)
+
+
+def _merge(runs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge runs of cells into sorted runs that do not overlap."""
+    runs.sort()
+    merged = [runs[0]]
+    for start, end in runs[1:]:
+        if start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _intersection(first: list[tuple[int, int]], second: list[tuple[int, int]]) -> int:
+    """Count the cells in both of two sorted lists of runs that do not overlap."""
+    count, i, j = 0, 0, 0
+    while i < len(first) and j < len(second):
+        count += max(0, min(first[i][1], second[j][1]) - max(first[i][0], second[j][0]))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return count
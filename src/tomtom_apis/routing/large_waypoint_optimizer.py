@@ -0,0 +1,203 @@
+"""Large waypoint optimizer."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from itertools import pairwise
+from typing import TYPE_CHECKING, Final, Self
+
+from tomtom_apis.geo import haversine_distance
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.models import WaypointOptimizationPostData, WaypointOptimizedResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tomtom_apis.routing.models import WaypointOptimizationPoint
+    from tomtom_apis.routing.waypoint_optimization import WaypointOptimizationApi
+
+logger = logging.getLogger(__name__)
+
+MAX_WAYPOINTS: Final[int] = 150
+
+
+@dataclass(kw_only=True)
+class LargeWaypointOptimizerStats:
+    """Counters of a large waypoint optimizer.
+
+    Attributes:
+        clusters (int): The number of clusters the waypoints were split into.
+        requests (int): The number of requests sent to the API.
+    """
+
+    clusters: int = 0
+    requests: int = 0
+
+
+@dataclass(kw_only=True)
+class OrderingReport:
+    """A comparison of an optimized ordering of waypoints with a baseline ordering.
+
+    Distances are straight line distances along the ordering, from the first to the last waypoint.
+
+    Attributes:
+        distance (float): The distance along the optimized ordering in meters.
+        baseline_distance (float): The distance along the baseline ordering in meters.
+    """
+
+    distance: float
+    baseline_distance: float
+
+    @property
+    def improvement(self: Self) -> float:
+        """Return the fraction of the baseline distance saved by the optimized ordering.
+
+        Returns:
+            float: The improvement, 0.25 means the optimized ordering is a quarter shorter, negative when it is longer.
+        """
+        return 1 - self.distance / self.baseline_distance if self.baseline_distance else 0.0
+
+
+def ordering_distance(waypoints: Sequence[WaypointOptimizationPoint], order: Sequence[int]) -> float:
+    """Calculate the straight line distance along an ordering of waypoints.
+
+    Args:
+        waypoints (Sequence[WaypointOptimizationPoint]): The waypoints.
+        order (Sequence[int]): The indices of the waypoints in visiting order.
+
+    Returns:
+        float: The distance in meters.
+    """
+    return sum(_distance(waypoints[a].point, waypoints[b].point) for a, b in pairwise(order))
+
+
+def ordering_report(waypoints: Sequence[WaypointOptimizationPoint], order: Sequence[int], baseline: Sequence[int] | None = None) -> OrderingReport:
+    """Compare an optimized ordering of waypoints with a baseline ordering.
+
+    Args:
+        waypoints (Sequence[WaypointOptimizationPoint]): The waypoints.
+        order (Sequence[int]): The optimized ordering, e.g. `WaypointOptimizedResponse.optimizedOrder`.
+        baseline (Sequence[int] | None, optional): The baseline ordering. Defaults to None, the order of the waypoints.
+
+    Returns:
+        OrderingReport: The report.
+    """
+    baseline = range(len(waypoints)) if baseline is None else baseline
+    return OrderingReport(distance=ordering_distance(waypoints, order), baseline_distance=ordering_distance(waypoints, baseline))
+
+
+class LargeWaypointOptimizer:  # pylint: disable=too-few-public-methods
+    """Large waypoint optimizer.
+
+    Optimizes more waypoints than the Waypoint Optimization API accepts in one request. The first waypoint is the start, the other waypoints are
+    split into spatial clusters within the waypoint limit by recursively halving them along their widest axis. The clusters are visited in nearest
+    neighbour order of their centroids, starting at the start. Every cluster is entered at its waypoint nearest to the previous cluster, which
+    makes the clusters independent, so they are optimized concurrently with the entry as their first waypoint. The tours are stitched into one
+    ordering that starts at the start, like a `WaypointOptimizedResponse` of the whole problem.
+
+    Attributes:
+        api (WaypointOptimizationApi): The api used to optimize the clusters.
+        max_waypoints (int): The maximum number of waypoints in a request.
+        stats (LargeWaypointOptimizerStats): The counters of the optimizer.
+    """
+
+    def __init__(self: Self, api: WaypointOptimizationApi, *, max_waypoints: int = MAX_WAYPOINTS, max_concurrency: int = 4) -> None:
+        """Initialize the LargeWaypointOptimizer.
+
+        Args:
+            api (WaypointOptimizationApi): The api used to optimize the clusters.
+            max_waypoints (int, optional): The maximum number of waypoints in a request. Defaults to 150.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 4.
+
+        Raises:
+            ValueError: If the maximum number of waypoints is less than 3.
+        """
+        if max_waypoints < 3:  # noqa: PLR2004
+            msg = "max_waypoints must be at least 3"
+            raise ValueError(msg)
+        self.api = api
+        self.max_waypoints = max_waypoints
+        self.stats = LargeWaypointOptimizerStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def optimize(self: Self, data: WaypointOptimizationPostData) -> WaypointOptimizedResponse:
+        """Optimize the order of the waypoints, in clusters when there are more than the maximum.
+
+        Args:
+            data (WaypointOptimizationPostData): The waypoints and options, the first waypoint is the start.
+
+        Returns:
+            WaypointOptimizedResponse: The optimized order of all waypoints.
+        """
+        if len(data.waypoints) <= self.max_waypoints:
+            self.stats.clusters += 1
+            return await self._optimize(data.waypoints, list(range(len(data.waypoints))), data)
+
+        clusters = self._order(data.waypoints, _split(data.waypoints, list(range(1, len(data.waypoints))), self.max_waypoints - 1))
+        self.stats.clusters += len(clusters)
+        logger.debug("Optimizing %d waypoints in %d clusters", len(data.waypoints), len(clusters))
+        tours = await asyncio.gather(*(self._optimize(data.waypoints, cluster, data) for cluster in clusters))
+        return WaypointOptimizedResponse(optimizedOrder=[index for tour in tours for index in tour.optimizedOrder])
+
+    def _order(self: Self, waypoints: Sequence[WaypointOptimizationPoint], clusters: list[list[int]]) -> list[list[int]]:
+        """Order the clusters by nearest neighbour and move the entry of every cluster to its front, the start is the entry of the first one."""
+        remaining = [(_centroid(waypoints, cluster), cluster) for cluster in clusters]
+        position = waypoints[0].point
+        ordered: list[list[int]] = []
+        while remaining:
+            centroid, cluster = remaining.pop(min(range(len(remaining)), key=lambda i: _distance(position, remaining[i][0])))
+            entry = min(cluster, key=lambda i: _distance(position, waypoints[i].point))
+            ordered.append([entry, *(i for i in cluster if i != entry)])
+            position = centroid
+        ordered[0].insert(0, 0)
+        return ordered
+
+    async def _optimize(
+        self: Self,
+        waypoints: Sequence[WaypointOptimizationPoint],
+        indices: list[int],
+        data: WaypointOptimizationPostData,
+    ) -> WaypointOptimizedResponse:
+        """Optimize the waypoints at the indices, the first one stays first, returning the order as indices of all waypoints."""
+        if len(indices) <= 2:  # noqa: PLR2004
+            return WaypointOptimizedResponse(optimizedOrder=indices)
+        async with self._semaphore:
+            self.stats.requests += 1
+            response = await self.api.post_waypointoptimization(
+                data=WaypointOptimizationPostData(waypoints=[waypoints[i] for i in indices], options=data.options),
+            )
+        order = response.optimizedOrder
+        start = order.index(0)
+        return WaypointOptimizedResponse(optimizedOrder=[indices[i] for i in order[start:] + order[:start]])
+
+
+def _split(waypoints: Sequence[WaypointOptimizationPoint], indices: list[int], size: int) -> list[list[int]]:
+    """Recursively halve the waypoints at the indices along their widest axis, until every part has at most size waypoints."""
+    if len(indices) <= size:
+        return [indices]
+    lats = [waypoints[i].point.latitude for i in indices]
+    lons = [waypoints[i].point.longitude for i in indices]
+    lon_scale = math.cos(math.radians(sum(lats) / len(lats)))
+    if max(lats) - min(lats) >= (max(lons) - min(lons)) * lon_scale:
+        indices = sorted(indices, key=lambda i: waypoints[i].point.latitude)
+    else:
+        indices = sorted(indices, key=lambda i: waypoints[i].point.longitude)
+    parts = math.ceil(len(indices) / size)
+    middle = round(len(indices) * (parts // 2) / parts)
+    return _split(waypoints, indices[:middle], size) + _split(waypoints, indices[middle:], size)
+
+
+def _centroid(waypoints: Sequence[WaypointOptimizationPoint], indices: list[int]) -> LatitudeLongitude:
+    """Calculate the mean position of the waypoints at the indices."""
+    return LatitudeLongitude(
+        latitude=sum(waypoints[i].point.latitude for i in indices) / len(indices),
+        longitude=sum(waypoints[i].point.longitude for i in indices) / len(indices),
+    )
+
+
+def _distance(a: LatitudeLongitude, b: LatitudeLongitude) -> float:
+    """Calculate the distance between two points in meters."""
+    return haversine_distance(a.latitude, a.longitude, b.latitude, b.longitude)
@@ -0,0 +1,163 @@
+"""Incremental matrix cache."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import math
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Self
+
+import orjson
+
+from tomtom_apis.cache import LRUCache
+from tomtom_apis.routing.models import MatrixOptions, MatrixTrafficType
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tomtom_apis.models import LatitudeLongitude
+    from tomtom_apis.routing.matrix_tiler import MatrixTiler, TravelMatrix
+
+logger = logging.getLogger(__name__)
+
+type _CellKey = tuple[str, tuple[float, float], tuple[float, float]]
+
+
+class MatrixCache:
+    """Incremental matrix cache.
+
+    Caches the cells of calculated matrices, keyed by the quantized origin and destination and by the routing profile: the options without the
+    departure or arrival time, plus the time bucket it falls in. A matrix of points that mostly were calculated before is assembled from the cached
+    cells, and only the missing cells are calculated with the tiler, so a new point costs a row or a column instead of the whole matrix. Cells
+    calculated with live traffic expire after the traffic ttl, the cache is bounded by its number of cells.
+
+    Attributes:
+        tiler (MatrixTiler): The tiler used to calculate the missing cells.
+        precision (int): The number of decimals the coordinates are rounded to, 5 decimals is about 1 meter.
+        departure_bucket (float): The number of seconds of the time buckets that departure and arrival times are rounded down to.
+        traffic_ttl (float): The number of seconds the cells calculated with live traffic stay valid.
+        stats (CacheStats): The counters of the cache, a lookup is a cell.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self: Self,
+        tiler: MatrixTiler,
+        *,
+        precision: int = 5,
+        departure_bucket: float = 900.0,
+        traffic_ttl: float = 300.0,
+        max_cells: int = 1_000_000,
+    ) -> None:
+        """Initialize the MatrixCache.
+
+        Args:
+            tiler (MatrixTiler): The tiler used to calculate the missing cells.
+            precision (int, optional): The number of decimals the coordinates are rounded to. Defaults to 5.
+            departure_bucket (float, optional): The number of seconds of the departure time buckets. Defaults to 900.0.
+            traffic_ttl (float, optional): The number of seconds the cells calculated with live traffic stay valid. Defaults to 300.0.
+            max_cells (int, optional): The maximum number of cells kept in the cache. Defaults to 1_000_000.
+        """
+        self.tiler = tiler
+        self.precision = precision
+        self.departure_bucket = departure_bucket
+        self.traffic_ttl = traffic_ttl
+        self._cells: LRUCache[_CellKey, tuple[float, float]] = LRUCache(max_size=max_cells)
+        self.stats = self._cells.stats
+
+    async def calculate(
+        self: Self,
+        origins: Sequence[LatitudeLongitude],
+        destinations: Sequence[LatitudeLongitude],
+        *,
+        options: MatrixOptions | None = None,
+    ) -> TravelMatrix:
+        """Calculate the travel times and distances from every origin to every destination, reusing cached cells.
+
+        Args:
+            origins (Sequence[LatitudeLongitude]): The origins, the rows of the matrix.
+            destinations (Sequence[LatitudeLongitude]): The destinations, the columns of the matrix.
+            options (MatrixOptions | None, optional): The options of the matrix. Defaults to None.
+
+        Returns:
+            TravelMatrix: The matrix, with the errors of the cells that could not be calculated.
+        """
+        profile = self.profile_key(options)
+        origin_keys = [self._quantize(point) for point in origins]
+        destination_keys = [self._quantize(point) for point in destinations]
+        cached, missing = self._lookup(profile, origin_keys, destination_keys)
+
+        logger.debug("Matrix of %dx%d cells, %d cached", len(origins), len(destinations), len(cached))
+        matrix = await self.tiler.calculate(origins, destinations, options=options, cells=missing)
+
+        for i, row in missing.items():
+            self._store(matrix, i, row, [(profile, origin_keys[i], destination_keys[j]) for j in row], self._ttl(options))
+        for index, (travel_time, distance) in cached:
+            matrix.travel_times[index] = travel_time
+            matrix.distances[index] = distance
+        return matrix
+
+    def profile_key(self: Self, options: MatrixOptions | None) -> str:
+        """Build the key of the routing profile of a matrix.
+
+        Args:
+            options (MatrixOptions | None): The options of the matrix.
+
+        Returns:
+            str: A string that is equal for options that only differ in a departure or arrival time within the same time bucket.
+        """
+        options = options or MatrixOptions()
+        profile = {k: v for k, v in dataclasses.asdict(options).items() if k not in {"departAt", "arriveAt"} and v is not None}
+        serialized = orjson.dumps(profile, option=orjson.OPT_SORT_KEYS).decode()  # pylint: disable=maybe-no-member
+        if options.arriveAt is not None:
+            return f"{serialized}|{self._time_bucket('arrive', options.arriveAt)}"
+        return f"{serialized}|{self._time_bucket('depart', options.departAt or 'now')}"
+
+    def clear(self: Self) -> None:
+        """Remove all cells from the cache."""
+        self._cells.clear()
+
+    def _lookup(
+        self: Self,
+        profile: str,
+        origin_keys: list[tuple[float, float]],
+        destination_keys: list[tuple[float, float]],
+    ) -> tuple[list[tuple[int, tuple[float, float]]], dict[int, list[int]]]:
+        """Look up the cells of a matrix, returning the (index, cell) of the cached cells and the missing destinations per origin."""
+        cached: list[tuple[int, tuple[float, float]]] = []
+        missing: dict[int, list[int]] = {}
+        for i, origin in enumerate(origin_keys):
+            for j, destination in enumerate(destination_keys):
+                cell = self._cells.get((profile, origin, destination))
+                if cell is None:
+                    missing.setdefault(i, []).append(j)
+                else:
+                    cached.append((i * len(destination_keys) + j, cell))
+        return cached, missing
+
+    def _store(self: Self, matrix: TravelMatrix, origin: int, destinations: list[int], keys: list[_CellKey], ttl: float | None) -> None:
+        """Cache the calculated cells of a row of a matrix, cells without a route are not cached."""
+        for destination, key in zip(destinations, keys, strict=True):
+            index = origin * matrix.destinations + destination
+            if not math.isnan(matrix.travel_times[index]):
+                self._cells.set(key, (matrix.travel_times[index], matrix.distances[index]), ttl=ttl)
+
+    def _ttl(self: Self, options: MatrixOptions | None) -> float | None:
+        """Get the ttl of the cells of a matrix, only cells calculated with live traffic expire."""
+        return self.traffic_ttl if options is not None and options.traffic == MatrixTrafficType.LIVE else None
+
+    def _quantize(self: Self, point: LatitudeLongitude) -> tuple[float, float]:
+        """Round a point to the precision of the cache."""
+        return round(point.latitude, self.precision), round(point.longitude, self.precision)
+
+    def _time_bucket(self: Self, prefix: str, value: str) -> str:
+        """Round a departure or arrival time down to its bucket, now is the current time and any has no time."""
+        if value == "any":
+            return f"{prefix}:any"
+        moment = time.time() if value == "now" else datetime.fromisoformat(value).timestamp()
+        return f"{prefix}:{math.floor(moment / self.departure_bucket)}"
+
+    def __len__(self: Self) -> int:
+        """Return the number of cached cells."""
+        return len(self._cells)
@@ -2,7 +2,8 @@
 
 from typing import Self
 
-from tomtom_apis.api import BaseApi
+from tomtom_apis.api import BaseApi, BaseParams
+from tomtom_apis.routing.models import MatrixJobResponse, MatrixPostData, MatrixResponse
 
 
 class MatrixRoutingApiV2(BaseApi):
@@ -16,10 +17,100 @@ class MatrixRoutingApiV2(BaseApi):
     For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/matrix-routing-v2/matrix-routing-v2-service
     """
 
-    def __init__(self: Self) -> None:  # pylint: disable=super-init-not-called
-        """Not implemented.
+    async def post_matrix_sync(
+        self: Self,
+        *,
+        params: BaseParams | None = None,  # No extra params.
+        data: MatrixPostData,
+    ) -> MatrixResponse:
+        """Post synchronous matrix.
 
-        Raises:
-            NotImplementedError: Always.
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/matrix-routing-v2/synchronous-matrix
+
+        Args:
+            params (BaseParams | None, optional): Optional parameters for the request. Defaults to None.
+            data (MatrixPostData): Data specifying the origins, destinations and options of the matrix.
+
+        Returns:
+            MatrixResponse: The response containing a cell per origin and destination.
         """
-        raise NotImplementedError
+        response = await self.post(
+            endpoint="/routing/matrix/2",
+            params=params,
+            data=data,
+        )
+
+        return await response.deserialize(MatrixResponse)
+
+    async def post_matrix_async_submission(
+        self: Self,
+        *,
+        params: BaseParams | None = None,  # No extra params.
+        data: MatrixPostData,
+    ) -> MatrixJobResponse:
+        """Post asynchronous matrix submission.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/matrix-routing-v2/asynchronous-matrix-submission
+
+        Args:
+            params (BaseParams | None, optional): Optional parameters for the request. Defaults to None.
+            data (MatrixPostData): Data specifying the origins, destinations and options of the matrix.
+
+        Returns:
+            MatrixJobResponse: The id and state of the submitted job.
+        """
+        response = await self.post(
+            endpoint="/routing/matrix/2/async",
+            params=params,
+            data=data,
+        )
+
+        return await response.deserialize(MatrixJobResponse)
+
+    async def get_matrix_async_status(
+        self: Self,
+        *,
+        job_id: str,
+        params: BaseParams | None = None,  # No extra params.
+    ) -> MatrixJobResponse:
+        """Get asynchronous matrix status.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/matrix-routing-v2/asynchronous-matrix-status
+
+        Args:
+            job_id (str): The id of the job.
+            params (BaseParams | None, optional): Optional parameters for the request. Defaults to None.
+
+        Returns:
+            MatrixJobResponse: The id and state of the job.
+        """
+        response = await self.get(
+            endpoint=f"/routing/matrix/2/async/{job_id}",
+            params=params,
+        )
+
+        return await response.deserialize(MatrixJobResponse)
+
+    async def get_matrix_async_result(
+        self: Self,
+        *,
+        job_id: str,
+        params: BaseParams | None = None,  # No extra params.
+    ) -> MatrixResponse:
+        """Get asynchronous matrix result.
+
+        For more information, see: https://developer.tomtom.com/routing-api/documentation/tomtom-maps/matrix-routing-v2/asynchronous-matrix-result
+
+        Args:
+            job_id (str): The id of the completed job.
+            params (BaseParams | None, optional): Optional parameters for the request. Defaults to None.
+
+        Returns:
+            MatrixResponse: The response containing a cell per origin and destination.
+        """
+        response = await self.get(
+            endpoint=f"/routing/matrix/2/async/{job_id}/result",
+            params=params,
+        )
+
+        return await response.deserialize(MatrixResponse)
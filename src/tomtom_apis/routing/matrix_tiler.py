@@ -0,0 +1,334 @@
+"""Matrix tiler for matrices larger than the Matrix Routing service allows."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Final, Self
+
+from tomtom_apis.exceptions import TomTomAPIError, TomTomAPIServerError
+from tomtom_apis.routing.models import MatrixCellError, MatrixJobState, MatrixPoint, MatrixPostData
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+    from tomtom_apis.models import LatitudeLongitude
+    from tomtom_apis.routing.matrix_routing_v2 import MatrixRoutingApiV2
+    from tomtom_apis.routing.models import MatrixOptions, MatrixResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_SYNC_CELLS: Final[int] = 200
+MAX_ASYNC_CELLS: Final[int] = 10_000
+
+_FAILED_JOB_STATES: Final = frozenset({MatrixJobState.FAILED, MatrixJobState.REJECTED, MatrixJobState.CANCELLED, MatrixJobState.EXPIRED})
+
+
+@dataclass(kw_only=True)
+class TravelMatrix:
+    """A dense travel time and distance matrix.
+
+    The matrices are stored row-major, with a row per origin, in arrays of doubles. Cells without a route are NaN.
+
+    Attributes:
+        origins (int): The number of origins, the number of rows.
+        destinations (int): The number of destinations, the number of columns.
+        travel_times (array[float]): The travel times in seconds.
+        distances (array[float]): The lengths of the routes in meters.
+        errors (dict[tuple[int, int], MatrixCellError]): The error per (origin, destination) of the cells without a route.
+    """
+
+    origins: int
+    destinations: int
+    travel_times: array[float]
+    distances: array[float]
+    errors: dict[tuple[int, int], MatrixCellError] = field(default_factory=dict)
+
+    @classmethod
+    def empty(cls: type[Self], origins: int, destinations: int) -> Self:
+        """Create a matrix of which every cell is NaN.
+
+        Args:
+            origins (int): The number of origins.
+            destinations (int): The number of destinations.
+
+        Returns:
+            Self: The matrix.
+        """
+        cells = origins * destinations
+        return cls(origins=origins, destinations=destinations, travel_times=array("d", [math.nan]) * cells, distances=array("d", [math.nan]) * cells)
+
+    def travel_time(self: Self, origin: int, destination: int) -> float:
+        """Get the travel time of a cell.
+
+        Args:
+            origin (int): The index of the origin.
+            destination (int): The index of the destination.
+
+        Returns:
+            float: The travel time in seconds, NaN if there is no route.
+        """
+        return self.travel_times[origin * self.destinations + destination]
+
+    def distance(self: Self, origin: int, destination: int) -> float:
+        """Get the distance of a cell.
+
+        Args:
+            origin (int): The index of the origin.
+            destination (int): The index of the destination.
+
+        Returns:
+            float: The length of the route in meters, NaN if there is no route.
+        """
+        return self.distances[origin * self.destinations + destination]
+
+    def to_numpy(self: Self) -> tuple[Any, Any]:
+        """Convert the matrices to NumPy arrays, without copying.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The travel times and the distances, float64 arrays of shape (origins, destinations).
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        import numpy as np  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        shape = (self.origins, self.destinations)
+        return np.frombuffer(self.travel_times, dtype=np.float64).reshape(shape), np.frombuffer(self.distances, dtype=np.float64).reshape(shape)
+
+
+@dataclass(kw_only=True)
+class MatrixTilerStats:
+    """Counters of a matrix tiler.
+
+    Attributes:
+        tiles (int): The number of sub-matrices calculated.
+        requests (int): The number of requests sent to the API, including the status and result requests of asynchronous jobs.
+        retried_cells (int): The number of cells calculated again after they failed.
+        failed_cells (int): The number of cells without a route after all retries.
+    """
+
+    tiles: int = 0
+    requests: int = 0
+    retried_cells: int = 0
+    failed_cells: int = 0
+
+
+@dataclass(kw_only=True, frozen=True)
+class _Tile:
+    """A sub-matrix, as indices into the origins and destinations of the whole matrix."""
+
+    origins: Sequence[int]
+    destinations: Sequence[int]
+
+
+def tile_matrix(origins: Sequence[int], destinations: Sequence[int], max_cells: int) -> list[tuple[Sequence[int], Sequence[int]]]:
+    """Split a matrix into sub-matrices of at most max_cells cells.
+
+    The sub-matrices are as square as the shape of the matrix allows, so every origin and destination is sent as few times as possible.
+
+    Args:
+        origins (Sequence[int]): The origins of the matrix.
+        destinations (Sequence[int]): The destinations of the matrix.
+        max_cells (int): The maximum number of cells of a sub-matrix.
+
+    Returns:
+        list[tuple[Sequence[int], Sequence[int]]]: The (origins, destinations) of each sub-matrix.
+    """
+    if not origins or not destinations:
+        return []
+    columns = min(len(destinations), max(math.isqrt(max_cells), max_cells // len(origins)))
+    rows = min(len(origins), max_cells // columns)
+    return [
+        (origins[i : i + rows], destinations[j : j + columns]) for i in range(0, len(origins), rows) for j in range(0, len(destinations), columns)
+    ]
+
+
+class MatrixTiler:  # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    """Matrix tiler.
+
+    Calculates matrices of any size with the Matrix Routing v2 API. The matrix is split into sub-matrices within the cell limit of the service,
+    which are calculated concurrently under a concurrency and request rate limit, either synchronously or as asynchronous jobs. The summaries are
+    assembled into a dense `TravelMatrix`. Cells that failed, because of a cell error or because the request of their sub-matrix failed, are
+    calculated again in new sub-matrices of only the failed cells.
+
+    Attributes:
+        api (MatrixRoutingApiV2): The API used to calculate the sub-matrices.
+        use_async (bool): Whether the sub-matrices are calculated as asynchronous jobs.
+        max_cells (int): The maximum number of cells of a sub-matrix.
+        max_rate (float | None): The maximum number of requests per second, None for no limit.
+        retries (int): The number of times failed cells are calculated again.
+        poll_interval (float): The number of seconds between status requests of an asynchronous job.
+        stats (MatrixTilerStats): The counters of this tiler.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: MatrixRoutingApiV2,
+        *,
+        use_async: bool = False,
+        max_cells: int | None = None,
+        max_concurrency: int = 4,
+        max_rate: float | None = None,
+        retries: int = 2,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """Initialize the MatrixTiler.
+
+        Args:
+            api (MatrixRoutingApiV2): The API used to calculate the sub-matrices.
+            use_async (bool, optional): Whether the sub-matrices are calculated as asynchronous jobs. Defaults to False.
+            max_cells (int | None, optional): The maximum number of cells of a sub-matrix. Defaults to None, the limit of the service for the mode.
+            max_concurrency (int, optional): The maximum number of sub-matrices in flight. Defaults to 4.
+            max_rate (float | None, optional): The maximum number of requests per second. Defaults to None, no limit.
+            retries (int, optional): The number of times failed cells are calculated again. Defaults to 2.
+            poll_interval (float, optional): The number of seconds between status requests of an asynchronous job. Defaults to 1.0.
+
+        Raises:
+            ValueError: If max_cells is not between 1 and the limit of the service for the mode, or max_rate is not positive.
+        """
+        limit = MAX_ASYNC_CELLS if use_async else MAX_SYNC_CELLS
+        max_cells = limit if max_cells is None else max_cells
+        if not 1 <= max_cells <= limit:
+            msg = f"max_cells must be between 1 and {limit}"
+            raise ValueError(msg)
+        if max_rate is not None and max_rate <= 0:
+            msg = "max_rate must be positive"
+            raise ValueError(msg)
+
+        self.api = api
+        self.use_async = use_async
+        self.max_cells = max_cells
+        self.max_rate = max_rate
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.stats = MatrixTilerStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_request = 0.0
+
+    async def calculate(
+        self: Self,
+        origins: Sequence[LatitudeLongitude],
+        destinations: Sequence[LatitudeLongitude],
+        *,
+        options: MatrixOptions | None = None,
+        cells: Mapping[int, Sequence[int]] | None = None,
+    ) -> TravelMatrix:
+        """Calculate the travel times and distances from every origin to every destination.
+
+        Args:
+            origins (Sequence[LatitudeLongitude]): The origins, the rows of the matrix.
+            destinations (Sequence[LatitudeLongitude]): The destinations, the columns of the matrix.
+            options (MatrixOptions | None, optional): The options of every sub-matrix. Defaults to None.
+            cells (Mapping[int, Sequence[int]] | None, optional): The destinations to calculate per origin, the other cells are left NaN.
+                Defaults to None, every cell.
+
+        Returns:
+            TravelMatrix: The matrix, with the errors of the cells that still failed after all retries.
+
+        Raises:
+            Exception: Any exception of a sub-matrix other than a TomTomAPIError.
+        """
+        matrix = TravelMatrix.empty(len(origins), len(destinations))
+        if cells is None:
+            tiles = [_Tile(origins=o, destinations=d) for o, d in tile_matrix(range(len(origins)), range(len(destinations)), self.max_cells)]
+        else:
+            tiles = self._regroup(cells)
+        logger.debug("Calculating a %dx%d matrix in %d tiles", len(origins), len(destinations), len(tiles))
+
+        for attempt in range(self.retries + 1):
+            self.stats.tiles += len(tiles)
+            responses = await asyncio.gather(*(self._calculate_tile(tile, origins, destinations, options) for tile in tiles), return_exceptions=True)
+
+            failed: dict[int, list[int]] = {}
+            for tile, response in zip(tiles, responses, strict=True):
+                if isinstance(response, BaseException):
+                    if not isinstance(response, TomTomAPIError):
+                        raise response
+                    error = MatrixCellError(code=type(response).__name__, message=str(response))
+                    for origin in tile.origins:
+                        failed.setdefault(origin, []).extend(tile.destinations)
+                        matrix.errors.update({(origin, destination): error for destination in tile.destinations})
+                else:
+                    _assemble(matrix, tile, response, failed)
+
+            if not failed or attempt == self.retries:
+                break
+            tiles = self._regroup(failed)
+            self.stats.retried_cells += sum(len(cells) for cells in failed.values())
+            logger.debug("Retrying %d failed cells in %d tiles", sum(len(cells) for cells in failed.values()), len(tiles))
+
+        self.stats.failed_cells += len(matrix.errors)
+        return matrix
+
+    def _regroup(self: Self, cells: Mapping[int, Sequence[int]]) -> list[_Tile]:
+        """Group cells into sub-matrices, origins with the same destinations share sub-matrices."""
+        groups: dict[tuple[int, ...], list[int]] = {}
+        for origin, destinations in cells.items():
+            groups.setdefault(tuple(sorted(destinations)), []).append(origin)
+        return [
+            _Tile(origins=o, destinations=d)
+            for destinations, origins in groups.items()
+            for o, d in tile_matrix(origins, destinations, self.max_cells)
+        ]
+
+    async def _calculate_tile(
+        self: Self,
+        tile: _Tile,
+        origins: Sequence[LatitudeLongitude],
+        destinations: Sequence[LatitudeLongitude],
+        options: MatrixOptions | None,
+    ) -> MatrixResponse:
+        """Calculate a sub-matrix under the concurrency limit."""
+        data = MatrixPostData(
+            origins=[MatrixPoint(point=origins[i]) for i in tile.origins],
+            destinations=[MatrixPoint(point=destinations[i]) for i in tile.destinations],
+            options=options,
+        )
+        async with self._semaphore:
+            await self._throttle()
+            if not self.use_async:
+                return await self.api.post_matrix_sync(data=data)
+
+            job = await self.api.post_matrix_async_submission(data=data)
+            while job.state != MatrixJobState.COMPLETED:
+                if job.state in _FAILED_JOB_STATES:
+                    msg = f"Matrix job {job.jobId} ended in state {job.state}"
+                    raise TomTomAPIServerError(msg)
+                await asyncio.sleep(self.poll_interval)
+                await self._throttle()
+                job = await self.api.get_matrix_async_status(job_id=job.jobId)
+            await self._throttle()
+            return await self.api.get_matrix_async_result(job_id=job.jobId)
+
+    async def _throttle(self: Self) -> None:
+        """Wait until the next request is allowed by the rate limit, and count it."""
+        self.stats.requests += 1
+        if self.max_rate is None:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_request)
+        self._next_request = start + 1 / self.max_rate
+        await asyncio.sleep(start - now)
+
+
+def _assemble(matrix: TravelMatrix, tile: _Tile, response: MatrixResponse, failed: dict[int, list[int]]) -> None:
+    """Copy the cells of a sub-matrix into the matrix, and collect the cells without a route."""
+    missing = {(origin, destination) for origin in tile.origins for destination in tile.destinations}
+    for cell in response.data:
+        origin, destination = tile.origins[cell.originIndex], tile.destinations[cell.destinationIndex]
+        if cell.routeSummary is None:
+            matrix.errors[origin, destination] = cell.detailedError or MatrixCellError(code="MissingRouteSummary")
+            continue
+        missing.discard((origin, destination))
+        matrix.errors.pop((origin, destination), None)
+        index = origin * matrix.destinations + destination
+        matrix.travel_times[index] = cell.routeSummary.travelTimeInSeconds
+        matrix.distances[index] = cell.routeSummary.lengthInMeters
+
+    for origin, destination in sorted(missing):
+        matrix.errors.setdefault((origin, destination), MatrixCellError(code="MissingCell"))
+        failed.setdefault(origin, []).append(destination)
@@ -6,6 +6,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import StrEnum
+from typing import Any, Self
 
 from mashumaro.mixins.orjson import DataClassORJSONMixin
 
@@ -28,6 +29,45 @@ class AvoidType(StrEnum):
     LOW_EMISSION_ZONES = "lowEmissionZones"
 
 
+@dataclass(kw_only=True)
+class BatchRoutingItem:
+    """Represents a batch routing item."""
+
+    query: str
+
+
+@dataclass(kw_only=True)
+class BatchRoutingItemResponse(DataClassORJSONMixin):
+    """Represents a batch routing item response, the response is a routing response or an error depending on the status code."""
+
+    statusCode: int
+    response: dict[str, Any]
+
+
+@dataclass(kw_only=True)
+class BatchRoutingPostData(BasePostData):
+    """Data for the post batch routing API."""
+
+    batchItems: list[BatchRoutingItem]
+
+
+@dataclass(kw_only=True)
+class BatchRoutingResponse(DataClassORJSONMixin):
+    """Represents a batch routing response."""
+
+    formatVersion: str
+    batchItems: list[BatchRoutingItemResponse]
+    summary: BatchRoutingSummary
+
+
+@dataclass(kw_only=True)
+class BatchRoutingSummary(DataClassORJSONMixin):
+    """Represents a batch routing response summary."""
+
+    successfulRequests: int
+    totalRequests: int
+
+
 @dataclass(kw_only=True)
 class CalculateLongDistanceEVRouteParams(BaseParams):
     """Parameters for the calculate long distance EV route API."""
@@ -394,6 +434,121 @@ class Leg(DataClassORJSONMixin):
     points: list[LatitudeLongitude]
 
 
+@dataclass(kw_only=True)
+class MatrixCell(DataClassORJSONMixin):
+    """Represents a cell of a matrix, with either a route summary or an error."""
+
+    originIndex: int
+    destinationIndex: int
+    routeSummary: Summary | None = None
+    detailedError: MatrixCellError | None = None
+
+
+@dataclass(kw_only=True)
+class MatrixCellError(DataClassORJSONMixin):
+    """Represents the error of a matrix cell that could not be calculated."""
+
+    code: str
+    message: str | None = None
+
+
+@dataclass(kw_only=True)
+class MatrixJobResponse(DataClassORJSONMixin):
+    """Represents the state of an asynchronous matrix job."""
+
+    jobId: str
+    state: MatrixJobState
+
+
+class MatrixJobState(StrEnum):
+    """Supported states of an asynchronous matrix job."""
+
+    SUBMITTED = "Submitted"
+    ACCEPTED = "Accepted"
+    IN_PROGRESS = "InProgress"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+    REJECTED = "Rejected"
+    CANCELLED = "Cancelled"
+    EXPIRED = "Expired"
+
+
+@dataclass(kw_only=True)
+class MatrixOptions:
+    """Options for the matrix routing API."""
+
+    departAt: str | None = None
+    arriveAt: str | None = None
+    routeType: RouteType | None = None
+    traffic: MatrixTrafficType | None = None
+    avoid: list[AvoidType] | None = None
+    travelMode: TravelModeType | None = None
+    vehicleMaxSpeed: int | None = None
+    vehicleWeight: int | None = None
+    vehicleAxleWeight: int | None = None
+    vehicleLength: float | None = None
+    vehicleWidth: float | None = None
+    vehicleHeight: float | None = None
+    vehicleCommercial: bool | None = None
+    vehicleLoadType: list[VehicleLoadType] | None = None
+    vehicleAdrTunnelRestrictionCode: AdrCategoryType | None = None
+
+
+@dataclass(kw_only=True)
+class MatrixPoint:
+    """An origin or destination of a matrix."""
+
+    point: LatitudeLongitude
+
+
+@dataclass(kw_only=True)
+class MatrixPostData(BasePostData):
+    """Data for the post matrix routing API."""
+
+    origins: list[MatrixPoint]
+    destinations: list[MatrixPoint]
+    options: MatrixOptions | None = None
+
+    def __post_serialize__(self: Self, d: dict[Any, Any]) -> dict[str, Any]:
+        """Removes the options without a value, the service rejects null options.
+
+        Args:
+            d: The dictionary to be processed.
+
+        Returns:
+            The dictionary, with only the options that have a value.
+        """
+        if d.get("options") is None:
+            d.pop("options", None)
+        else:
+            d["options"] = {k: v for k, v in d["options"].items() if v is not None}
+        return d
+
+
+@dataclass(kw_only=True)
+class MatrixResponse(DataClassORJSONMixin):
+    """Represents a matrix routing response."""
+
+    data: list[MatrixCell]
+    statistics: MatrixStatistics
+
+
+@dataclass(kw_only=True)
+class MatrixStatistics(DataClassORJSONMixin):
+    """Represents the statistics of a matrix routing response."""
+
+    totalCount: int
+    successes: int
+    failures: int
+
+
+class MatrixTrafficType(StrEnum):
+    """Supported traffic types of the matrix routing API."""
+
+    HISTORICAL = "historical"
+    LIVE = "live"
+
+
 class PlugType(StrEnum):
     """Supported plug types."""
 
@@ -0,0 +1,237 @@
+"""Compact route geometry encodings."""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from typing import TYPE_CHECKING, Any, Final
+
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.columnar import PointColumns
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAS_NUMPY = False
+
+POLYLINE_PRECISION: Final[int] = 5
+VARINT_PRECISION: Final[int] = 6
+
+# Encoded polyline: 5 bit chunks, continuation flag 0x20, shifted into the printable range by 63.
+_POLYLINE_BITS: Final[int] = 5
+_POLYLINE_OFFSET: Final[int] = 63
+# Varint: 7 bit chunks, continuation flag 0x80.
+_VARINT_BITS: Final[int] = 7
+_VARINT_OFFSET: Final[int] = 0
+
+
+def encode_polyline(points: PointColumns | Sequence[LatitudeLongitude], *, precision: int = POLYLINE_PRECISION, use_numpy: bool | None = None) -> str:
+    """Encode points with the encoded polyline algorithm format.
+
+    Args:
+        points (PointColumns | Sequence[LatitudeLongitude]): The points, e.g. `Leg.points`.
+        precision (int, optional): The number of decimals that are kept. Defaults to 5.
+        use_numpy (bool | None, optional): Whether to encode with NumPy, None to use NumPy when it is installed. Defaults to None.
+
+    Returns:
+        str: The encoded polyline.
+    """
+    return _encode(_columns(points), precision, _POLYLINE_BITS, _POLYLINE_OFFSET, use_numpy=use_numpy).decode("ascii")
+
+
+def decode_polyline(encoded: str, *, precision: int = POLYLINE_PRECISION, use_numpy: bool | None = None) -> PointColumns:
+    """Decode an encoded polyline.
+
+    Args:
+        encoded (str): The encoded polyline.
+        precision (int, optional): The precision the polyline was encoded with. Defaults to 5.
+        use_numpy (bool | None, optional): Whether to decode with NumPy, None to use NumPy when it is installed. Defaults to None.
+
+    Returns:
+        PointColumns: The points.
+
+    Raises:
+        ValueError: If the polyline is not valid.
+    """
+    try:
+        data = encoded.encode("ascii")
+    except UnicodeEncodeError as exception:
+        msg = "Invalid encoded polyline"
+        raise ValueError(msg) from exception
+    return _decode(data, precision, _POLYLINE_BITS, _POLYLINE_OFFSET, use_numpy=use_numpy)
+
+
+def encode_varint(points: PointColumns | Sequence[LatitudeLongitude], *, precision: int = VARINT_PRECISION, use_numpy: bool | None = None) -> bytes:
+    """Encode points as zigzag varints of the deltas between consecutive points.
+
+    Args:
+        points (PointColumns | Sequence[LatitudeLongitude]): The points, e.g. `Leg.points`.
+        precision (int, optional): The number of decimals that are kept. Defaults to 6.
+        use_numpy (bool | None, optional): Whether to encode with NumPy, None to use NumPy when it is installed. Defaults to None.
+
+    Returns:
+        bytes: The encoded points.
+    """
+    return _encode(_columns(points), precision, _VARINT_BITS, _VARINT_OFFSET, use_numpy=use_numpy)
+
+
+def decode_varint(data: bytes, *, precision: int = VARINT_PRECISION, use_numpy: bool | None = None) -> PointColumns:
+    """Decode points encoded with `encode_varint`.
+
+    Args:
+        data (bytes): The encoded points.
+        precision (int, optional): The precision the points were encoded with. Defaults to 6.
+        use_numpy (bool | None, optional): Whether to decode with NumPy, None to use NumPy when it is installed. Defaults to None.
+
+    Returns:
+        PointColumns: The points.
+
+    Raises:
+        ValueError: If the data is not valid.
+    """
+    return _decode(data, precision, _VARINT_BITS, _VARINT_OFFSET, use_numpy=use_numpy)
+
+
+def supporting_points(data: str | bytes, *, precision: int | None = None) -> list[LatitudeLongitude]:
+    """Decode an encoded route geometry into supporting points, to reconstruct a route with `CalculateRoutePostData`.
+
+    Args:
+        data (str | bytes): An encoded polyline, or points encoded with `encode_varint`.
+        precision (int | None, optional): The precision the points were encoded with, None for the default of the encoding. Defaults to None.
+
+    Returns:
+        list[LatitudeLongitude]: The supporting points.
+    """
+    if isinstance(data, str):
+        return decode_polyline(data, precision=POLYLINE_PRECISION if precision is None else precision).points()
+    return decode_varint(data, precision=VARINT_PRECISION if precision is None else precision).points()
+
+
+def _columns(points: PointColumns | Sequence[LatitudeLongitude]) -> PointColumns:
+    """Get the points as columns."""
+    if isinstance(points, PointColumns):
+        return points
+    return PointColumns(lat=array("d", [point.latitude for point in points]), lon=array("d", [point.longitude for point in points]))
+
+
+def _encode(points: PointColumns, precision: int, bits: int, offset: int, *, use_numpy: bool | None) -> bytes:
+    """Encode the points with the chunk size and offset of an encoding."""
+    if HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY:
+        return _numpy_encode(points, 10**precision, bits, offset)
+
+    out = bytearray()
+    factor = 10**precision
+    previous_lat = previous_lon = 0
+    for lat, lon in zip(points.lat, points.lon, strict=True):
+        current_lat, current_lon = round(lat * factor), round(lon * factor)
+        _append_value(out, current_lat - previous_lat, bits, offset)
+        _append_value(out, current_lon - previous_lon, bits, offset)
+        previous_lat, previous_lon = current_lat, current_lon
+    return bytes(out)
+
+
+def _append_value(out: bytearray, value: int, bits: int, offset: int) -> None:
+    """Append a zigzag encoded value as chunks, least significant chunk first."""
+    value = (value << 1) ^ (value >> 63)
+    flag = 1 << bits
+    while value >= flag:
+        out.append(((value & (flag - 1)) | flag) + offset)
+        value >>= bits
+    out.append(value + offset)
+
+
+def _decode(data: bytes, precision: int, bits: int, offset: int, *, use_numpy: bool | None) -> PointColumns:
+    """Decode points with the chunk size and offset of an encoding."""
+    if HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY:
+        return _numpy_decode(data, 10**precision, bits, offset)
+
+    values = _python_values(data, bits, offset)
+
+    factor = 10**precision
+    points = PointColumns()
+    lat = lon = 0
+    for i in range(0, len(values), 2):
+        lat += values[i]
+        lon += values[i + 1]
+        points.lat.append(lat / factor)
+        points.lon.append(lon / factor)
+    return points
+
+
+def _python_values(data: bytes, bits: int, offset: int) -> list[int]:
+    """Decode the zigzag encoded values, one chunk at a time."""
+    flag = 1 << bits
+    values: list[int] = []
+    value = shift = 0
+    for byte in data:
+        chunk = byte - offset
+        if not 0 <= chunk < flag << 1:
+            msg = f"Invalid character {chr(byte)!r} in encoded points"
+            raise ValueError(msg)
+        value |= (chunk & (flag - 1)) << shift
+        if chunk & flag:
+            shift += bits
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+    _check_complete(shift or len(values) % 2)
+    return values
+
+
+def _check_complete(incomplete: int) -> None:
+    """Raise when the encoded points end in the middle of a value or a point."""
+    if incomplete:
+        msg = "Encoded points are truncated"
+        raise ValueError(msg)
+
+
+def _numpy_encode(points: PointColumns, factor: int, bits: int, offset: int) -> bytes:
+    """Encode the points with NumPy, every chunk of every value is computed at once."""
+    lat, lon = points.to_numpy()
+    coordinates = np.empty((len(points), 2), dtype=np.int64)
+    coordinates[:, 0] = np.rint(lat * factor)
+    coordinates[:, 1] = np.rint(lon * factor)
+    deltas = np.diff(coordinates, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+    if not values.size:
+        return b""
+
+    width = max(1, -(-int(values.max()).bit_length() // bits))
+    shifted = values[:, None] >> (np.arange(width, dtype=np.uint64) * np.uint64(bits))
+    counts = np.maximum(1, np.count_nonzero(shifted, axis=1))
+    positions = np.arange(width)
+    chunks = (shifted & np.uint64((1 << bits) - 1)) | (positions < counts[:, None] - 1) * np.uint64(1 << bits)
+    return (chunks[positions < counts[:, None]] + np.uint64(offset)).astype(np.uint8).tobytes()
+
+
+def _numpy_decode(data: bytes, factor: int, bits: int, offset: int) -> PointColumns:
+    """Decode the points with NumPy, chunks are summed per value with one reduction."""
+    chunks = np.frombuffer(data, dtype=np.uint8).astype(np.int64) - offset
+    if chunks.size and (chunks.min() < 0 or chunks.max() >= 2 << bits):
+        msg = "Invalid character in encoded points"
+        raise ValueError(msg)
+    ends = np.flatnonzero(chunks < 1 << bits)
+    _check_complete(chunks.size - (ends[-1] + 1 if ends.size else 0) or ends.size % 2)
+    if not ends.size:
+        return PointColumns()
+
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    positions = np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1)
+    payload = (chunks & ((1 << bits) - 1)).view(np.uint64) << (positions * bits).astype(np.uint64)
+    values = np.add.reduceat(payload, starts).view(np.int64)
+    coordinates = np.cumsum(((values >> 1) ^ -(values & 1)).reshape(-1, 2), axis=0) / factor
+    return PointColumns(lat=_array(coordinates[:, 0]), lon=_array(coordinates[:, 1]))
+
+
+def _array(column: Any) -> array[float]:  # noqa: ANN401
+    """Copy a NumPy column into a packed array."""
+    result = array("d")
+    result.frombytes(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+    return result
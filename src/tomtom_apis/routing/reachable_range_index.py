@@ -0,0 +1,226 @@
+"""Point-in-reachable-range index."""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Self
+
+from tomtom_apis.geo import point_in_polygon
+from tomtom_apis.routing.isochrone_engine import Isochrone
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    HAS_NUMPY = False
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from numpy.typing import NDArray
+
+    from tomtom_apis.routing.models import ReachableRange
+
+logger = logging.getLogger(__name__)
+
+type Coordinates = Sequence[float] | NDArray[np.float64]
+
+
+@dataclass(kw_only=True)
+class RangeMembership:
+    """Sparse membership of points in reachable ranges, in compressed sparse row layout.
+
+    The points within range `i` are `indices[offsets[i]:offsets[i + 1]]`, in ascending order.
+
+    Attributes:
+        ranges (int): The number of reachable ranges, the rows.
+        points (int): The number of points, the columns.
+        offsets (array[int]): The start of every row in the indices, with the end of the last row appended.
+        indices (array[int]): The indices of the points within every range, row after row.
+    """
+
+    ranges: int
+    points: int
+    offsets: array[int]
+    indices: array[int]
+
+    def members(self: Self, index: int) -> array[int]:
+        """Get the points within a reachable range.
+
+        Args:
+            index (int): The index of the reachable range.
+
+        Returns:
+            array[int]: The indices of the points, in ascending order.
+        """
+        return self.indices[self.offsets[index] : self.offsets[index + 1]]
+
+    def transpose(self: Self, *, use_numpy: bool | None = None) -> RangeMembership:
+        """Get the reachable ranges every point is within, as a membership with the points as rows.
+
+        Args:
+            use_numpy (bool | None, optional): Whether to transpose with NumPy, None to use NumPy when it is installed. Defaults to None.
+
+        Returns:
+            RangeMembership: The membership of the reachable ranges in the points.
+        """
+        if HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY:
+            points, rows = self.to_numpy()
+            ranges = np.repeat(np.arange(self.ranges, dtype=np.int64), np.diff(rows))
+            order = np.argsort(points, kind="stable")
+            counts = np.concatenate(([0], np.cumsum(np.bincount(points, minlength=self.points))))
+            return RangeMembership(ranges=self.points, points=self.ranges, offsets=_to_array(counts), indices=_to_array(ranges[order]))
+
+        offsets = array("q", bytes(8 * (self.points + 1)))
+        for point in self.indices:
+            offsets[point + 1] += 1
+        for i in range(self.points):
+            offsets[i + 1] += offsets[i]
+        cursor = offsets[:-1]
+        indices = array("q", bytes(8 * len(self.indices)))
+        for row in range(self.ranges):
+            for point in self.members(row):
+                indices[cursor[point]] = row
+                cursor[point] += 1
+        return RangeMembership(ranges=self.points, points=self.ranges, offsets=offsets, indices=indices)
+
+    def to_numpy(self: Self) -> tuple[Any, Any]:
+        """Get the indices and offsets as NumPy arrays, without copying.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The indices and the offsets, int64 arrays that share memory with the membership.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if not HAS_NUMPY:  # pragma: no cover
+            msg = "NumPy is not installed"
+            raise ImportError(msg)
+        return np.frombuffer(self.indices, dtype=np.int64), np.frombuffer(self.offsets, dtype=np.int64)
+
+    def __len__(self: Self) -> int:
+        """Return the number of memberships."""
+        return len(self.indices)
+
+
+class ReachableRangeIndex:
+    """Point-in-reachable-range index, to find the points within many reachable ranges at once.
+
+    The boundaries and bounding boxes of the reachable ranges are stored once. A query sorts the points by latitude, so the points within the
+    latitude band of a bounding box are a slice found by binary search, and the longitudes of that slice are compared with the bounding box. Only
+    the remaining points get an exact even-odd point-in-polygon test, where every edge is tested against the slice of points within its own
+    latitude span. NumPy is used when it is installed, otherwise plain Python.
+
+    Attributes:
+        isochrones (list[Isochrone]): The reachable ranges, e.g. of every depot.
+        use_numpy (bool): Whether the queries run on NumPy arrays.
+    """
+
+    def __init__(self: Self, ranges: Sequence[ReachableRange | Isochrone], *, use_numpy: bool | None = None) -> None:
+        """Initialize the ReachableRangeIndex.
+
+        Args:
+            ranges (Sequence[ReachableRange | Isochrone]): The reachable ranges, as returned by the API or by an `IsochroneEngine`.
+            use_numpy (bool | None, optional): Whether to run the queries on NumPy arrays, None to use NumPy when it is installed. Defaults to None.
+        """
+        self.isochrones = [item if isinstance(item, Isochrone) else Isochrone.from_reachable_range(item) for item in ranges]
+        self.use_numpy = HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY
+
+    def query(self: Self, lats: Coordinates, lons: Coordinates) -> RangeMembership:
+        """Find the points within every reachable range.
+
+        Args:
+            lats (Coordinates): The latitudes of the points, e.g. an `array("d")` or a NumPy array.
+            lons (Coordinates): The longitudes of the points.
+
+        Returns:
+            RangeMembership: The points within every reachable range.
+
+        Raises:
+            ValueError: If the number of latitudes and longitudes differ.
+        """
+        if len(lats) != len(lons):
+            msg = "lats and lons must have the same length"
+            raise ValueError(msg)
+        logger.debug("Querying %d points in %d reachable ranges", len(lats), len(self.isochrones))
+        rows = self._numpy_rows(lats, lons) if self.use_numpy else self._python_rows(lats, lons)
+        offsets = array("q", [0])
+        indices = array("q")
+        for row in rows:
+            indices.extend(row)
+            offsets.append(len(indices))
+        return RangeMembership(ranges=len(self.isochrones), points=len(lats), offsets=offsets, indices=indices)
+
+    def ranges_at(self: Self, lat: float, lon: float) -> list[int]:
+        """Find the reachable ranges a position is within.
+
+        Args:
+            lat (float): The latitude of the position.
+            lon (float): The longitude of the position.
+
+        Returns:
+            list[int]: The indices of the reachable ranges.
+        """
+        return [i for i, isochrone in enumerate(self.isochrones) if isochrone.contains(lat, lon)]
+
+    def _numpy_rows(self: Self, lats: Coordinates, lons: Coordinates) -> list[array[int]]:
+        """Find the sorted indices of the points within every reachable range with NumPy."""
+        lat_column, lon_column = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        order = np.argsort(lat_column, kind="stable")
+        sorted_lats, sorted_lons = lat_column[order], lon_column[order]
+        rows = []
+        for isochrone in self.isochrones:
+            band = _numpy_in_bbox(sorted_lats, sorted_lons, isochrone.bbox)
+            inside = _numpy_in_polygon(sorted_lats[band], sorted_lons[band], isochrone)
+            rows.append(_to_array(np.sort(order[band[inside]])))
+        return rows
+
+    def _python_rows(self: Self, lats: Coordinates, lons: Coordinates) -> list[array[int]]:
+        """Find the sorted indices of the points within every reachable range in plain Python."""
+        order = sorted(range(len(lats)), key=lats.__getitem__)
+        sorted_lats = [lats[i] for i in order]
+        rows = []
+        for isochrone in self.isochrones:
+            south, west, north, east = isochrone.bbox
+            polygon = isochrone.polygon()
+            members = [
+                order[i]
+                for i in range(bisect_left(sorted_lats, south), bisect_right(sorted_lats, north))
+                if west <= lons[order[i]] <= east and point_in_polygon(sorted_lats[i], lons[order[i]], polygon)
+            ]
+            rows.append(array("q", sorted(members)))
+        return rows
+
+
+def _numpy_in_bbox(lats: Any, lons: Any, bbox: tuple[float, float, float, float]) -> Any:  # noqa: ANN401
+    """Find the indices of positions sorted by latitude within a bounding box, the latitude band is a slice found by binary search."""
+    south, west, north, east = bbox
+    start, end = int(np.searchsorted(lats, south, "left")), int(np.searchsorted(lats, north, "right"))
+    return np.nonzero((lons[start:end] >= west) & (lons[start:end] <= east))[0] + start
+
+
+def _numpy_in_polygon(lats: Any, lons: Any, isochrone: Isochrone) -> Any:  # noqa: ANN401
+    """Test positions sorted by latitude against a boundary with the even-odd rule, every edge only against the positions within its span."""
+    inside = np.zeros(len(lats), dtype=bool)
+    if not inside.size or not isochrone.boundary.lat:
+        return inside
+    lat2, lon2 = isochrone.boundary.to_numpy()
+    lat1, lon1 = np.roll(lat2, 1), np.roll(lon2, 1)
+    starts = np.searchsorted(lats, np.minimum(lat1, lat2), "left").tolist()
+    ends = np.searchsorted(lats, np.maximum(lat1, lat2), "left").tolist()
+    for edge, (start, end) in enumerate(zip(starts, ends, strict=True)):
+        if start < end:
+            slope = (lon2[edge] - lon1[edge]) / (lat2[edge] - lat1[edge])
+            inside[start:end] ^= lons[start:end] < lon1[edge] + (lats[start:end] - lat1[edge]) * slope
+    return inside
+
+
+def _to_array(values: Any) -> array[int]:  # noqa: ANN401
+    """Copy a NumPy array of integers into a packed array."""
+    packed = array("q")
+    packed.frombytes(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+    return packed
@@ -0,0 +1,194 @@
+"""Route result cache."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Self
+
+import orjson
+
+from tomtom_apis.cache import LRUCache
+from tomtom_apis.routing.models import CalculatedRouteResponse, Leg, Route
+
+if TYPE_CHECKING:
+    from tomtom_apis.models import LatLonList
+    from tomtom_apis.routing import RoutingApi
+    from tomtom_apis.routing.models import CalculateRouteParams, CalculateRoutePostData
+
+logger = logging.getLogger(__name__)
+
+type _RouteKey = tuple[tuple[tuple[float, float], ...], str, str]
+
+
+class RouteCache:
+    """Route result cache, in front of `RoutingApi.get_calculate_route` and `RoutingApi.post_calculate_route`.
+
+    Routes are keyed by their locations snapped to a grid, a hash of the parameters and post data without the departure or arrival time, and the
+    time bucket the departure or arrival time falls in, so repeated requests between the same places share one calculated route. Routes that depend
+    on live traffic, departing now with traffic enabled, expire after the traffic ttl. The cache is bounded by the serialized size of the routes, in
+    summary only mode the points and sections are dropped before a route is cached, which makes an entry a few hundred bytes.
+
+    Attributes:
+        api (RoutingApi): The api used to calculate the routes that are not cached.
+        grid (float): The size of the grid cells in degrees that locations are snapped to, 0.0001 degrees is about 11 meters.
+        departure_bucket (float): The number of seconds of the time buckets that departure and arrival times are rounded down to.
+        traffic_ttl (float): The number of seconds the routes that depend on live traffic stay valid.
+        summary_only (bool): Whether only the summaries of the routes and legs are cached and returned.
+        stats (CacheStats): The counters of the cache.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments  # noqa: PLR0913
+        self: Self,
+        api: RoutingApi,
+        *,
+        grid: float = 0.0001,
+        departure_bucket: float = 900.0,
+        traffic_ttl: float = 300.0,
+        summary_only: bool = False,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_routes: int = 100_000,
+    ) -> None:
+        """Initialize the RouteCache.
+
+        Args:
+            api (RoutingApi): The api used to calculate the routes that are not cached.
+            grid (float, optional): The size of the grid cells in degrees that locations are snapped to. Defaults to 0.0001.
+            departure_bucket (float, optional): The number of seconds of the departure time buckets. Defaults to 900.0.
+            traffic_ttl (float, optional): The number of seconds the routes that depend on live traffic stay valid. Defaults to 300.0.
+            summary_only (bool, optional): Whether only the summaries of the routes and legs are cached and returned. Defaults to False.
+            max_bytes (int, optional): The maximum total serialized size of the cached routes. Defaults to 64 MiB.
+            max_routes (int, optional): The maximum number of cached routes. Defaults to 100_000.
+
+        Raises:
+            ValueError: If the grid is not positive.
+        """
+        if grid <= 0:
+            msg = "grid must be positive"
+            raise ValueError(msg)
+        self.api = api
+        self.grid = grid
+        self.departure_bucket = departure_bucket
+        self.traffic_ttl = traffic_ttl
+        self.summary_only = summary_only
+        self._routes: LRUCache[_RouteKey, CalculatedRouteResponse] = LRUCache(max_size=max_routes, max_bytes=max_bytes)
+        self.stats = self._routes.stats
+
+    async def get_calculate_route(self: Self, *, locations: LatLonList, params: CalculateRouteParams | None = None) -> CalculatedRouteResponse:
+        """Calculate a route, or return the cached route between the same locations.
+
+        Args:
+            locations (LatLonList): The locations of the route.
+            params (CalculateRouteParams | None, optional): Additional parameters for the calculation. Defaults to None.
+
+        Returns:
+            CalculatedRouteResponse: The route, stripped to its summaries in summary only mode.
+        """
+        key = self.route_key(locations, params)
+        if (cached := self._routes.get(key)) is not None:
+            return cached
+        response = await self.api.get_calculate_route(locations=locations, params=params)
+        return self._store(key, response, params)
+
+    async def post_calculate_route(
+        self: Self,
+        *,
+        locations: LatLonList,
+        params: CalculateRouteParams | None = None,
+        data: CalculateRoutePostData,
+    ) -> CalculatedRouteResponse:
+        """Calculate a route with post data, or return the cached route between the same locations with the same data.
+
+        Args:
+            locations (LatLonList): The locations of the route.
+            params (CalculateRouteParams | None, optional): Additional parameters for the calculation. Defaults to None.
+            data (CalculateRoutePostData): The data of the calculation.
+
+        Returns:
+            CalculatedRouteResponse: The route, stripped to its summaries in summary only mode.
+        """
+        key = self.route_key(locations, params, data)
+        if (cached := self._routes.get(key)) is not None:
+            return cached
+        response = await self.api.post_calculate_route(locations=locations, params=params, data=data)
+        return self._store(key, response, params)
+
+    def route_key(self: Self, locations: LatLonList, params: CalculateRouteParams | None, data: CalculateRoutePostData | None = None) -> _RouteKey:
+        """Build the cache key of a route.
+
+        Args:
+            locations (LatLonList): The locations of the route.
+            params (CalculateRouteParams | None): The parameters of the calculation.
+            data (CalculateRoutePostData | None, optional): The post data of the calculation. Defaults to None.
+
+        Returns:
+            tuple: The snapped locations, the hash of the parameters and data, and the time bucket.
+        """
+        snapped = tuple((self._snap(location.lat), self._snap(location.lon)) for location in locations.locations)
+        query = {k: v for k, v in params.to_dict().items() if k not in {"key", "departAt", "arriveAt"}} if params is not None else {}
+        canonical = orjson.dumps([query, data.to_dict() if data is not None else None], option=orjson.OPT_SORT_KEYS)  # pylint: disable=maybe-no-member
+        return snapped, hashlib.blake2b(canonical, digest_size=16).hexdigest(), self._time_key(params)
+
+    def clear(self: Self) -> None:
+        """Remove all routes from the cache."""
+        self._routes.clear()
+
+    @property
+    def bytes(self: Self) -> int:
+        """Return the total serialized size of the cached routes.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return self._routes.bytes
+
+    def _store(self: Self, key: _RouteKey, response: CalculatedRouteResponse, params: CalculateRouteParams | None) -> CalculatedRouteResponse:
+        """Cache a calculated route, with the traffic ttl if it depends on live traffic."""
+        if self.summary_only:
+            response = _summaries(response)
+        size = len(response.to_jsonb())
+        logger.debug("Caching route of %d bytes", size)
+        self._routes.set(key, response, ttl=self.traffic_ttl if _live_traffic(params) else None, size=size)
+        return response
+
+    def _snap(self: Self, value: float) -> float:
+        """Snap a coordinate to the grid."""
+        return round(round(value / self.grid) * self.grid, 10)
+
+    def _time_key(self: Self, params: CalculateRouteParams | None) -> str:
+        """Get the time bucket of a route, routes without traffic that depart now do not depend on the time."""
+        if params is not None and params.arriveAt is not None:
+            return f"arrive:{self._bucket(params.arriveAt)}"
+        depart_at = params.departAt if params is not None and params.departAt is not None else "now"
+        if depart_at == "now" and params is not None and params.traffic is False:
+            return "depart:any"
+        return f"depart:{self._bucket(depart_at)}"
+
+    def _bucket(self: Self, value: str) -> int:
+        """Round a departure or arrival time down to its bucket, now is the current time."""
+        moment = time.time() if value == "now" else datetime.fromisoformat(value).timestamp()
+        return math.floor(moment / self.departure_bucket)
+
+    def __len__(self: Self) -> int:
+        """Return the number of cached routes."""
+        return len(self._routes)
+
+
+def _live_traffic(params: CalculateRouteParams | None) -> bool:
+    """Check whether a route depends on live traffic: traffic is enabled by default and it departs now."""
+    if params is None:
+        return True
+    return params.traffic is not False and params.arriveAt is None and params.departAt in {None, "now"}
+
+
+def _summaries(response: CalculatedRouteResponse) -> CalculatedRouteResponse:
+    """Strip a response to the summaries of its routes and legs."""
+    return CalculatedRouteResponse(
+        formatVersion=response.formatVersion,
+        routes=[
+            Route(summary=route.summary, legs=[Leg(summary=leg.summary, points=[]) for leg in route.legs], sections=[]) for route in response.routes
+        ],
+    )
@@ -0,0 +1,488 @@
+"""Local tour solver."""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from functools import partial
+from itertools import pairwise
+from typing import TYPE_CHECKING, Final, Self
+
+from tomtom_apis.routing.matrix_tiler import TravelMatrix
+from tomtom_apis.routing.models import WaypointOptimizationPostData, WaypointOptimizedResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tomtom_apis.routing.waypoint_optimization import WaypointOptimizationApi
+
+logger = logging.getLogger(__name__)
+
+LATENESS_WEIGHT: Final[float] = 1000.0
+UNREACHABLE: Final[float] = 1e9
+
+_EPSILON: Final[float] = 1e-9
+_OR_OPT_SEGMENTS: Final = (1, 2, 3)
+_NEIGHBOURS: Final[int] = 12
+
+
+@dataclass(kw_only=True)
+class TourSolution:
+    """An ordering of waypoints and its times.
+
+    Attributes:
+        order (list[int]): The indices of the waypoints in visiting order, starting with the start.
+        travel_time (float): The sum of the travel times between consecutive waypoints in seconds, back to the start for a round trip.
+        duration (float): The time from departure until the last waypoint is done in seconds, including waiting and service times.
+        lateness (float): The sum of the seconds by which waypoints are reached after their time window.
+    """
+
+    order: list[int]
+    travel_time: float
+    duration: float
+    lateness: float = 0.0
+
+    @property
+    def cost(self: Self) -> float:
+        """Return the objective that is minimized, the duration with a penalty for lateness.
+
+        Returns:
+            float: The cost.
+        """
+        return self.duration + LATENESS_WEIGHT * self.lateness
+
+    def to_response(self: Self) -> WaypointOptimizedResponse:
+        """Convert the solution to a waypoint optimization response.
+
+        Returns:
+            WaypointOptimizedResponse: The response with the order of the solution.
+        """
+        return WaypointOptimizedResponse(optimizedOrder=list(self.order))
+
+
+@dataclass(kw_only=True)
+class _Schedule:  # pylint: disable=too-many-instance-attributes
+    """The schedule of a tour with time windows, to check moves against.
+
+    Attributes:
+        clocks (array[float]): The clock after the service at every position.
+        lateness (array[float]): The lateness up to and including every position.
+        held (array[int]): The number of waypoints before every position that are late or wait for their time window.
+        early (array[float]): Per position how much earlier the waypoints after it can be served before a time window holds them back.
+        slack (array[float]): Per position how much later the waypoints after it can be served before one of them is late.
+        waits (array[float]): Per position the total time waited for time windows after it.
+        end (float): The clock at the end of the tour.
+        cost (float): The cost of the tour.
+    """
+
+    clocks: array[float]
+    lateness: array[float]
+    held: array[int]
+    early: array[float]
+    slack: array[float]
+    waits: array[float]
+    end: float
+    cost: float
+
+    def detour(self: Self, span: tuple[int, int]) -> bool:
+        """Check whether a waypoint from the start up to the rejoin position of a span is late or waits, only then can a longer move help."""
+        return self.held[span[1]] > self.held[span[0]]
+
+    def tail_cost(self: Self, position: int, clock: float, late: float) -> float | None:
+        """Calculate the cost of a tour that is served differently up to a position and like this tour after it, in constant time.
+
+        Serving the waypoints after the position earlier or later shifts them until a time window absorbs the shift, which is exact as long as
+        none of them is late, otherwise None.
+        """
+        if self.lateness[-1] > self.lateness[position]:
+            return None
+        shift = clock - self.clocks[position]
+        if shift <= 0:
+            return self.end + max(shift, -self.early[position]) + LATENESS_WEIGHT * late
+        if shift > self.slack[position]:
+            return None
+        return self.end + max(0.0, shift - self.waits[position]) + LATENESS_WEIGHT * late
+
+
+class TourSolver:  # pylint: disable=too-many-instance-attributes
+    """Local tour solver, for re-optimizing an ordering without a round trip to the Waypoint Optimization API.
+
+    Works on a square travel time matrix, e.g. a `TravelMatrix` of the waypoints from the matrix tiler or cache. A tour is built by nearest neighbour
+    construction, or from an earlier ordering with missing waypoints inserted where they are cheapest, and improved with 2-opt moves and with Or-opt
+    moves next to the nearest neighbours of a segment. The travel time change of a move is computed in constant time, for 2-opt from prefix sums of
+    the tour so asymmetric matrices are handled exactly, so a few hundred waypoints take milliseconds. Time windows and service times are respected
+    where present: a move is then checked against the schedule of the waypoints it changes, and the rest of the tour follows in constant time from
+    the slack of its schedule. Moves that add travel time are only tried where a waypoint is late or waits, as only there can they lower the cost,
+    and late waypoints are moved to the position that minimizes the cost. A few hundred waypoints with time windows take well under a second.
+
+    Attributes:
+        size (int): The number of waypoints.
+        start (int): The index of the waypoint the tour starts at.
+        round_trip (bool): Whether the tour returns to the start.
+    """
+
+    def __init__(
+        self: Self,
+        matrix: TravelMatrix | Sequence[Sequence[float]],
+        *,
+        start: int = 0,
+        round_trip: bool = False,
+        time_windows: Sequence[tuple[float, float] | None] | None = None,
+        service_times: Sequence[float] | None = None,
+    ) -> None:
+        """Initialize the TourSolver.
+
+        Args:
+            matrix (TravelMatrix | Sequence[Sequence[float]]): The travel times in seconds between the waypoints, NaN when there is no route.
+            start (int, optional): The index of the waypoint the tour starts at. Defaults to 0.
+            round_trip (bool, optional): Whether the tour returns to the start. Defaults to False.
+            time_windows (Sequence[tuple[float, float] | None] | None, optional): Per waypoint the earliest and latest arrival in seconds after
+                departure, None for a waypoint without a time window. Defaults to None.
+            service_times (Sequence[float] | None, optional): Per waypoint the seconds spent at it. Defaults to None.
+
+        Raises:
+            ValueError: If the matrix is not square, or the time windows or service times do not match the waypoints.
+        """
+        rows = _rows(matrix)
+        self.size = len(rows)
+        if any(len(row) != self.size for row in rows):
+            msg = "The matrix must be square"
+            raise ValueError(msg)
+        if (time_windows is not None and len(time_windows) != self.size) or (service_times is not None and len(service_times) != self.size):
+            msg = "The time windows and service times must have a value per waypoint"
+            raise ValueError(msg)
+        self.start = start
+        self.round_trip = round_trip
+        self._windows = list(time_windows) if time_windows is not None and any(window is not None for window in time_windows) else None
+        self._service = list(service_times) if service_times is not None else [0.0] * self.size
+
+        # The matrix gets an extra end node, free to reach for an open tour and the start for a round trip, so the last waypoint can move too.
+        self._end = self.size
+        width = self.size + 1
+        self._width = width
+        self._matrix = array("d", bytes(8 * width * width))
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                self._matrix[i * width + j] = UNREACHABLE if math.isnan(value) else value
+            self._matrix[i * width + self._end] = self._matrix[i * width + start] if round_trip else 0.0
+        self._neighbours = [self._nearest(i) for i in range(self.size)]
+
+    def solve(self: Self, initial: Sequence[int] | None = None, *, time_limit: float | None = None) -> TourSolution:
+        """Find a short ordering of the waypoints.
+
+        Args:
+            initial (Sequence[int] | None, optional): An ordering to improve, e.g. an earlier solution, waypoints it misses are inserted where they
+                are cheapest and the start is moved to the front. Defaults to None, a nearest neighbour tour.
+            time_limit (float | None, optional): The maximum number of seconds spent improving the tour. Defaults to None, until no move improves.
+
+        Returns:
+            TourSolution: The improved ordering.
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else math.inf
+        tour = self._insert_missing(initial) if initial is not None else self._nearest_neighbour()
+        tour.append(self._end)
+
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = self._two_opt(tour, deadline)
+            improved = self._or_opt(tour, deadline) or improved
+            if self._windows is not None:
+                improved = self._repair(tour) or improved
+        return self.evaluate(tour[:-1])
+
+    def evaluate(self: Self, order: Sequence[int]) -> TourSolution:
+        """Calculate the times of an ordering.
+
+        Args:
+            order (Sequence[int]): The indices of the waypoints in visiting order, starting with the start.
+
+        Returns:
+            TourSolution: The ordering with its times.
+        """
+        travel_time, duration, lateness = self._schedule([*order, self._end])
+        return TourSolution(order=list(order), travel_time=travel_time, duration=duration, lateness=lateness)
+
+    async def polish(self: Self, api: WaypointOptimizationApi, data: WaypointOptimizationPostData, solution: TourSolution) -> TourSolution:
+        """Let the Waypoint Optimization API improve a solution, keeping the local solution when the API result is not better.
+
+        The API does not know the time windows and service times of the solver, so its ordering is evaluated locally before it is used.
+
+        Args:
+            api (WaypointOptimizationApi): The api used to optimize the ordering.
+            data (WaypointOptimizationPostData): The waypoints and options, the waypoints in the order of the matrix.
+            solution (TourSolution): The local solution.
+
+        Returns:
+            TourSolution: The solution with the lowest cost.
+        """
+        response = await api.post_waypointoptimization(
+            data=WaypointOptimizationPostData(waypoints=[data.waypoints[i] for i in solution.order], options=data.options),
+        )
+        order = response.optimizedOrder
+        first = order.index(0)
+        polished = self.evaluate([solution.order[i] for i in order[first:] + order[:first]])
+        logger.debug("Polished tour cost %.1f, local tour cost %.1f", polished.cost, solution.cost)
+        return polished if polished.cost < solution.cost else solution
+
+    def _cost(self: Self, a: int, b: int) -> float:
+        """Get the travel time from waypoint a to waypoint b."""
+        return self._matrix[a * self._width + b]
+
+    def _nearest(self: Self, waypoint: int) -> list[int]:
+        """Get the waypoints that are the fastest to reach from a waypoint."""
+        row = waypoint * self._width
+        return sorted((j for j in range(self.size) if j != waypoint), key=lambda j: self._matrix[row + j])[:_NEIGHBOURS]
+
+    def _schedule(self: Self, tour: Sequence[int]) -> tuple[float, float, float]:
+        """Calculate the travel time, duration and lateness of a tour that ends with the end node."""
+        travel_time = clock = lateness = 0.0
+        for a, b in pairwise(tour):
+            travel_time += self._cost(a, b)
+            if b == self._end:
+                clock += self._cost(a, b)
+                break
+            clock, late = self._arrival(clock, a, b)
+            lateness += late
+            clock += self._service[b]
+        return travel_time, clock, lateness
+
+    def _late(self: Self, tour: Sequence[int]) -> list[int]:
+        """Get the waypoints of a tour that are reached after their time window."""
+        late: list[int] = []
+        clock = 0.0
+        for a, b in pairwise(tour[:-1]):
+            clock, lateness = self._arrival(clock, a, b)
+            clock += self._service[b]
+            if lateness > 0:
+                late.append(b)
+        return late
+
+    def _tour_cost(self: Self, tour: Sequence[int]) -> float:
+        """Calculate the cost of a tour that ends with the end node."""
+        _, duration, lateness = self._schedule(tour)
+        return duration + LATENESS_WEIGHT * lateness
+
+    def _nearest_neighbour(self: Self) -> list[int]:
+        """Build a tour by repeatedly visiting the waypoint that can be served first."""
+        tour = [self.start]
+        remaining = set(range(self.size)) - {self.start}
+        clock = 0.0
+        while remaining:
+            waypoint = min(remaining, key=partial(self._penalized_arrival, clock, tour[-1]))
+            remaining.remove(waypoint)
+            clock = self._arrival(clock, tour[-1], waypoint)[0] + self._service[waypoint]
+            tour.append(waypoint)
+        return tour
+
+    def _arrival(self: Self, clock: float, current: int, waypoint: int) -> tuple[float, float]:
+        """Calculate when the service at a waypoint starts, after waiting for its time window, and how late that is."""
+        moment = clock + self._cost(current, waypoint)
+        window = self._windows[waypoint] if self._windows is not None else None
+        if window is None:
+            return moment, 0.0
+        moment = max(moment, window[0])
+        return moment, max(0.0, moment - window[1])
+
+    def _penalized_arrival(self: Self, clock: float, current: int, waypoint: int) -> float:
+        """Calculate when the service at a waypoint starts, with the penalty for lateness."""
+        moment, lateness = self._arrival(clock, current, waypoint)
+        return moment + LATENESS_WEIGHT * lateness
+
+    def _insert_missing(self: Self, initial: Sequence[int]) -> list[int]:
+        """Build a tour from an ordering, inserting the missing waypoints at their cheapest position."""
+        seen = {self.start}
+        tour = [self.start]
+        for waypoint in initial:
+            if 0 <= waypoint < self.size and waypoint not in seen:
+                seen.add(waypoint)
+                tour.append(waypoint)
+        tour.append(self._end)
+        for waypoint in range(self.size):
+            if waypoint not in seen:
+                tour.insert(min(range(1, len(tour)), key=partial(self._insertion_cost, tour, waypoint)), waypoint)
+        tour.pop()
+        return tour
+
+    def _insertion_cost(self: Self, tour: Sequence[int], waypoint: int, position: int) -> float:
+        """Calculate the travel time added by inserting a waypoint before a position of the tour."""
+        return self._cost(tour[position - 1], waypoint) + self._cost(waypoint, tour[position]) - self._cost(tour[position - 1], tour[position])
+
+    def _prefix_sums(self: Self, tour: Sequence[int]) -> tuple[array[float], array[float]]:
+        """Calculate the travel time up to every position of the tour, forwards and with every edge reversed."""
+        forward = array("d", bytes(8 * len(tour)))
+        backward = array("d", bytes(8 * len(tour)))
+        for k in range(1, len(tour)):
+            forward[k] = forward[k - 1] + self._cost(tour[k - 1], tour[k])
+            backward[k] = backward[k - 1] + self._cost(tour[k], tour[k - 1])
+        return forward, backward
+
+    def _schedule_prefix(self: Self, tour: Sequence[int]) -> _Schedule | None:  # pylint: disable=too-many-locals
+        """Calculate the schedule of a tour that ends with the end node, None without time windows."""
+        if self._windows is None:
+            return None
+        matrix, width, windows, service = self._matrix, self._width, self._windows, self._service
+        clocks, lateness, held = array("d", [0.0]), array("d", [0.0]), array("q", [0, 0])
+        earliness, latest, waits = [math.inf], [math.inf], [0.0]
+        clock = late = 0.0
+        for a, b in pairwise(tour[:-1]):
+            arrival = clock + matrix[a * width + b]
+            begin = arrival
+            if (window := windows[b]) is not None:
+                begin = max(arrival, window[0])
+                late += max(0.0, begin - window[1])
+                earliness.append(begin - window[0])
+                latest.append(window[1] - begin)
+            else:
+                earliness.append(math.inf)
+                latest.append(math.inf)
+            waits.append(begin - arrival)
+            held.append(held[-1] + (late > lateness[-1] or begin > arrival))
+            clock = begin + service[b]
+            clocks.append(clock)
+            lateness.append(late)
+
+        # Going backwards, a shift of the waypoints after a position stops at the first time window that absorbs it, and a later shift is
+        # absorbed by the waiting before each waypoint as well.
+        size = len(clocks)
+        early, slack, waited = array("d", [math.inf] * size), array("d", [math.inf] * size), array("d", bytes(8 * size))
+        for k in range(size - 2, -1, -1):
+            early[k] = min(earliness[k + 1], early[k + 1])
+            slack[k] = waits[k + 1] + min(latest[k + 1], slack[k + 1])
+            waited[k] = waits[k + 1] + waited[k + 1]
+        end = clocks[-1] + self._cost(tour[-2], tour[-1])
+        return _Schedule(
+            clocks=clocks,
+            lateness=lateness,
+            held=held,
+            early=early,
+            slack=slack,
+            waits=waited,
+            end=end,
+            cost=end + LATENESS_WEIGHT * lateness[-1],
+        )
+
+    def _accept(self: Self, tour: list[int], candidate: list[int], schedule: _Schedule | None, span: tuple[int, int]) -> bool:  # pylint: disable=too-many-locals
+        """Replace the tour with a candidate, with time windows only if it has a lower cost.
+
+        The candidate differs from the tour only from the start up to the rejoin position of the span, so its schedule continues from the schedule
+        of the tour at the start, and once it is back on the tour the cost of the rest follows from the schedule of the tour. It is rejected as soon
+        as its cost so far, which only grows, reaches the cost of the tour.
+        """
+        if schedule is not None and self._windows is not None:
+            start, rejoin = span
+            clocks, lateness, limit = schedule.clocks, schedule.lateness, schedule.cost - _EPSILON
+            matrix, width, windows, service = self._matrix, self._width, self._windows, self._service
+            clock, late = clocks[start - 1], lateness[start - 1]
+            for k, (a, b) in enumerate(pairwise(candidate[start - 1 : -1]), start):
+                # The arrival of `_arrival`, inlined as this is the inner loop of the moves with time windows.
+                clock += matrix[a * width + b]
+                if (window := windows[b]) is not None:
+                    clock = max(clock, window[0])
+                    late += max(0.0, clock - window[1])
+                clock += service[b]
+                if clock + LATENESS_WEIGHT * late >= limit or (k >= rejoin and clock >= clocks[k] and late >= lateness[k]):
+                    return False
+                if k >= rejoin and (cost := schedule.tail_cost(k, clock, late)) is not None:
+                    return self._replace(tour, candidate) if cost < limit else False
+            if clock + matrix[candidate[-2] * width + self._end] + LATENESS_WEIGHT * late >= limit:
+                return False
+        return self._replace(tour, candidate)
+
+    @staticmethod
+    def _replace(tour: list[int], candidate: list[int]) -> bool:
+        """Replace the tour with a candidate."""
+        tour[:] = candidate
+        return True
+
+    def _two_opt(self: Self, tour: list[int], deadline: float) -> bool:
+        """Reverse segments of the tour while that shortens it."""
+        improved = False
+        matrix, width = self._matrix, self._width
+        forward, backward = self._prefix_sums(tour)
+        schedule = self._schedule_prefix(tour)
+        for i in range(1, len(tour) - 2):
+            if time.perf_counter() >= deadline:
+                break
+            # Reversing tour[i..j] replaces the edges into tour[i] and out of tour[j] and reverses the edges in between, the edge out of tour[j]
+            # and the forward edges in between are forward[j + 1] - forward[i], the reversed edges are backward[j] - backward[i].
+            before, first = tour[i - 1] * width, tour[i] * width
+            base = forward[i] - backward[i] - matrix[before + tour[i]]
+            for j in range(i + 1, len(tour) - 1):
+                delta = matrix[before + tour[j]] + matrix[first + tour[j + 1]] + backward[j] - forward[j + 1] + base
+                if (delta < -_EPSILON or (schedule is not None and schedule.detour((i, j + 1)))) and self._accept(
+                    tour, tour[:i] + tour[i : j + 1][::-1] + tour[j + 1 :], schedule, (i, j + 1)
+                ):
+                    improved = True
+                    forward, backward = self._prefix_sums(tour)
+                    schedule = self._schedule_prefix(tour)
+                    before, first = tour[i - 1] * width, tour[i] * width
+                    base = forward[i] - backward[i] - matrix[before + tour[i]]
+        return improved
+
+    def _or_opt(self: Self, tour: list[int], deadline: float) -> bool:
+        """Move segments of up to three waypoints next to one of the nearest neighbours of their ends while that shortens the tour."""
+        improved = False
+        matrix, width = self._matrix, self._width
+        position = {waypoint: k for k, waypoint in enumerate(tour)}
+        schedule = self._schedule_prefix(tour)
+        for length in _OR_OPT_SEGMENTS:
+            i = 1
+            while i + length < len(tour) and time.perf_counter() < deadline:
+                first, last = tour[i], tour[i + length - 1]
+                # Insert the segment between tour[q] and tour[q + 1], after a neighbour of its first or before a neighbour of its last waypoint.
+                for q in [position[v] for v in self._neighbours[first]] + [position[v] - 1 for v in self._neighbours[last]]:
+                    if i - 1 <= q < i + length or q < 0:
+                        continue
+                    delta = (
+                        self._removal_cost(tour, i, length)
+                        + matrix[tour[q] * width + first]
+                        + matrix[last * width + tour[q + 1]]
+                        - matrix[tour[q] * width + tour[q + 1]]
+                    )
+                    span = (min(i, q + 1), max(i + length, q + 1))
+                    if (delta < -_EPSILON or (schedule is not None and schedule.detour(span))) and self._accept(
+                        tour, _move(tour, i, length, q), schedule, span
+                    ):
+                        improved = True
+                        position = {waypoint: k for k, waypoint in enumerate(tour)}
+                        schedule = self._schedule_prefix(tour)
+                        break
+                i += 1
+        return improved
+
+    def _removal_cost(self: Self, tour: Sequence[int], start: int, length: int) -> float:
+        """Calculate the travel time added by removing the segment of the tour at start with the length, negative as it saves time."""
+        before, first, last, after = tour[start - 1], tour[start], tour[start + length - 1], tour[start + length]
+        return self._cost(before, after) - self._cost(before, first) - self._cost(last, after)
+
+    def _repair(self: Self, tour: list[int]) -> bool:
+        """Move late waypoints to the position with the lowest cost, regardless of the travel time."""
+        improved = False
+        for waypoint in self._late(tour):
+            rest = [w for w in tour if w != waypoint]
+            best = min(([*rest[:p], waypoint, *rest[p:]] for p in range(1, len(rest))), key=self._tour_cost)
+            if self._tour_cost(best) < self._tour_cost(tour) - _EPSILON:
+                tour[:] = best
+                improved = True
+        return improved
+
+
+def _move(tour: list[int], start: int, length: int, target: int) -> list[int]:
+    """Move the segment of the tour at start with the length to after the position target."""
+    segment = tour[start : start + length]
+    if target < start:
+        return tour[: target + 1] + segment + tour[target + 1 : start] + tour[start + length :]
+    return tour[:start] + tour[start + length : target + 1] + segment + tour[target + 1 :]
+
+
+def _rows(matrix: TravelMatrix | Sequence[Sequence[float]]) -> list[Sequence[float]]:
+    """Get the rows of a matrix."""
+    if isinstance(matrix, TravelMatrix):
+        if matrix.origins != matrix.destinations:
+            msg = "The matrix must be square"
+            raise ValueError(msg)
+        return [matrix.travel_times[i * matrix.destinations : (i + 1) * matrix.destinations] for i in range(matrix.origins)]
+    return list(matrix)
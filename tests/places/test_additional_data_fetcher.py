@@ -0,0 +1,189 @@
+"""Additional data fetcher tests."""
+
+import asyncio
+import json
+from array import array
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.exceptions import TomTomAPIServerError
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.additional_data_fetcher import AdditionalDataFetcher, compact_coordinates, expand_coordinates
+
+MISSING_ID = "missing"
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def add_additional_data(
+    aresponses: ResponsesMockServer,
+    requests: list[list[str]],
+    zooms: list[str | None] | None = None,
+    delay: float = 0.0,
+) -> None:
+    """Add a handler that returns the fixture geometry for every requested id after a delay, and an error for the missing id."""
+    fixture = json.loads(load_json("places/search/get_additional_data.json"))
+    error, geometry = fixture["additionalData"]
+
+    async def handler(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        ids = request.query["geometries"].split(",")
+        requests.append(ids)
+        if zooms is not None:
+            zooms.append(request.query.get("geometriesZoom"))
+        items = [{**error, "providerID": i} if i == MISSING_ID else {**geometry, "providerID": i} for i in ids if i != "unknown"]
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"additionalData": items}))
+
+    aresponses.add(response=handler, repeat=10)
+
+
+def list_files(path: Path) -> list[str]:
+    """List the files below a directory."""
+    return sorted(file.relative_to(path).as_posix() for file in path.rglob("*") if file.is_file())
+
+
+async def test_batches_and_dedupes(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test ids of concurrent callers are deduplicated and fetched in chunks."""
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests)
+    fetcher = AdditionalDataFetcher(search_api)
+
+    first, second = await asyncio.gather(
+        fetcher.get_additional_data(geometries=[str(i) for i in range(15)]),
+        fetcher.get_additional_data(geometries=[str(i) for i in range(10, 25)] + [MISSING_ID, "unknown", "1"]),
+    )
+
+    assert len(requests) == 2
+    assert sorted(len(ids) for ids in requests) == [7, 20]
+    assert list(first) == [str(i) for i in range(15)]
+    assert second[MISSING_ID].error == "Requested geometry not found"
+    assert "unknown" not in second
+    assert first["12"] is second["12"]
+
+    cached = await fetcher.get_additional_data(geometries=["1", "2", MISSING_ID])
+    assert len(requests) == 2
+    assert cached["1"] is first["1"]
+    assert fetcher.stats.hits == 3
+
+
+async def test_persistent_cache(search_api: SearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test geometries are cached on disk per zoom level."""
+    requests: list[list[str]] = []
+    zooms: list[str | None] = []
+    add_additional_data(aresponses, requests, zooms)
+
+    items = await AdditionalDataFetcher(search_api, cache_dir=tmp_path).get_additional_data(geometries=["a", "b"], geometriesZoom=10)
+    assert (tmp_path / "10" / "a.json").exists()
+
+    fetcher = AdditionalDataFetcher(search_api, cache_dir=tmp_path)
+    assert await fetcher.get_additional_data(geometries=["a", "b"], geometriesZoom=10) == items
+    assert fetcher.stats.hits == 2
+    assert len(requests) == 1
+
+    await fetcher.get_additional_data(geometries=["a"])
+    assert (tmp_path / "default" / "a.json").exists()
+    assert zooms == ["10", None]
+
+
+async def test_persistent_cache_file_names(search_api: SearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test ids with path separators are cached in the cache directory, without temporary files left behind."""
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests)
+    cache_dir = tmp_path / "cache"
+
+    items = await AdditionalDataFetcher(search_api, cache_dir=cache_dir).get_additional_data(geometries=["../../escape"])
+
+    assert list_files(tmp_path) == ["cache/default/..%2F..%2Fescape.json"]
+    fetcher = AdditionalDataFetcher(search_api, cache_dir=cache_dir)
+    assert await fetcher.get_additional_data(geometries=["../../escape"]) == items
+    assert fetcher.stats.hits == 1
+    assert len(requests) == 1
+
+
+async def test_compact(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test coordinates are stored as flat arrays."""
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests)
+    fixture = json.loads(load_json("places/search/get_additional_data.json"))
+    expected = fixture["additionalData"][1]["geometryData"]["features"][0]["geometry"]["coordinates"][0]
+
+    items = await AdditionalDataFetcher(search_api, compact=True).get_additional_data(geometries=["a"])
+
+    geometry_data = items["a"].geometryData
+    assert geometry_data is not None
+    ring = geometry_data["features"][0]["geometry"]["coordinates"][0]
+    assert isinstance(ring, array)
+    assert expand_coordinates(ring) == expected
+
+
+def test_compact_coordinates() -> None:
+    """Test only lists of positions are compacted."""
+    point = {"type": "Point", "coordinates": [4.9, 52.3]}
+    line = {"type": "LineString", "coordinates": [[4.9, 52.3], [5, 52]]}
+
+    assert compact_coordinates(point) == point
+    assert compact_coordinates(line)["coordinates"] == array("d", [4.9, 52.3, 5.0, 52.0])
+    assert compact_coordinates({"type": "GeometryCollection", "geometries": []}) == {"type": "GeometryCollection", "geometries": []}
+
+
+async def test_error(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a failed request fails every caller waiting for it, and is retried on the next call."""
+    aresponses.add("api.tomtom.com", "/search/2/additionalData.json", "GET", aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR))
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests)
+    fetcher = AdditionalDataFetcher(search_api)
+
+    results = await asyncio.gather(
+        fetcher.get_additional_data(geometries=["a"]),
+        fetcher.get_additional_data(geometries=["a", "b"]),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, TomTomAPIServerError) for result in results)
+
+    assert set(await fetcher.get_additional_data(geometries=["a", "b"])) == {"a", "b"}
+
+
+async def test_cancelled_caller(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test cancelling one caller does not cancel the request of a concurrent caller waiting for the same ids."""
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests, delay=0.05)
+    fetcher = AdditionalDataFetcher(search_api)
+
+    first = asyncio.create_task(fetcher.get_additional_data(geometries=["a", "b"]))
+    second = asyncio.create_task(fetcher.get_additional_data(geometries=["a", "b"]))
+    await asyncio.sleep(0.03)
+    first.cancel()
+
+    assert list(await second) == ["a", "b"]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert list(await fetcher.get_additional_data(geometries=["a"])) == ["a"]
+    assert len(requests) == 1
+
+
+async def test_cancelled_fetch(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a cancelled request cancels the callers waiting for it, and is retried on the next call."""
+    requests: list[list[str]] = []
+    add_additional_data(aresponses, requests)
+    fetcher = AdditionalDataFetcher(search_api)
+
+    with patch.object(search_api, "get_additional_data", side_effect=asyncio.CancelledError), pytest.raises(asyncio.CancelledError):
+        await fetcher.get_additional_data(geometries=["a"])
+
+    assert list(await fetcher.get_additional_data(geometries=["a"])) == ["a"]
+    assert len(requests) == 1
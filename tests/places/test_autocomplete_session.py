@@ -0,0 +1,121 @@
+"""Autocomplete session tests."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import Language
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.autocomplete_session import AutocompleteSession
+from tomtom_apis.places.models import AutocompleteParams, Match
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def add_autocomplete_response(aresponses: ResponsesMockServer, repeat: int = 1) -> None:
+    """Add the autocomplete fixture to the mock server."""
+    aresponses.add(
+        response=aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/get_autocomplete.json")),
+        repeat=repeat,
+    )
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["places/search/get_autocomplete.json"], indirect=True)
+async def test_suggest_served_locally(search_api: SearchApi) -> None:
+    """Test extensions of a complete response are served locally."""
+    session = AutocompleteSession(search_api, language=Language.EN_US, params=AutocompleteParams(limit=10), debounce=0)
+
+    response = await session.suggest("pizza")
+    assert response
+    assert len(response.results) == 5
+
+    assert await session.suggest("Pizza") is response
+
+    extended = await session.suggest("pizza h")
+    assert extended
+    assert extended.context.inputQuery == "pizza h"
+    assert [result.segments[0].value for result in extended.results] == ["Pizza Hut"]
+    assert extended.results[0].segments[0].matches.inputQuery == [Match(offset=0, length=5), Match(offset=6, length=1)]
+
+    assert session.stats.requests == 1
+    assert session.stats.served_locally == 2
+    assert [latency.local for latency in session.latencies] == [False, True, True]
+
+
+async def test_suggest_truncated_prefix(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test extensions of a response that hit the limit are requested from the API."""
+    add_autocomplete_response(aresponses, repeat=2)
+    session = AutocompleteSession(search_api, language=Language.EN_US, debounce=0)
+
+    await session.suggest("pizza")
+    extended = await session.suggest("pizza h")
+
+    assert extended
+    assert len(extended.results) == 5
+    assert session.stats.requests == 2
+    assert session.stats.served_locally == 0
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["places/search/get_autocomplete.json"], indirect=True)
+async def test_suggest_cancels_superseded(search_api: SearchApi) -> None:
+    """Test a new keystroke cancels the pending request of the previous one."""
+    session = AutocompleteSession(search_api, language=Language.EN_US, debounce=10)
+
+    superseded = asyncio.create_task(session.suggest("pizz"))
+    await asyncio.sleep(0)
+    session.debounce = 0
+    response = await session.suggest("pizza")
+
+    assert await superseded is None
+    assert response
+    assert session.stats.requests == 1
+    assert session.stats.cancelled == 1
+
+
+async def test_suggest_empty_query(search_api: SearchApi) -> None:
+    """Test an empty query returns no suggestions."""
+    session = AutocompleteSession(search_api, language=Language.EN_US)
+
+    assert await session.suggest("  ") is None
+    assert session.stats.keystrokes == 1
+    assert session.stats.requests == 0
+
+
+async def test_suggest_caller_cancelled(search_api: SearchApi) -> None:
+    """Test cancelling the caller cancels the pending request."""
+    session = AutocompleteSession(search_api, language=Language.EN_US, debounce=10)
+
+    task = asyncio.create_task(session.suggest("pizza"))
+    await asyncio.sleep(0)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await session.close()
+    assert session.stats.requests == 0
+
+
+async def test_close(search_api: SearchApi) -> None:
+    """Test closing the session cancels the pending request."""
+    session = AutocompleteSession(search_api, language=Language.EN_US, debounce=10)
+
+    task = asyncio.create_task(session.suggest("pizza"))
+    await asyncio.sleep(0)
+    await session.close()
+
+    assert await task is None
+    assert session.stats.cancelled == 1
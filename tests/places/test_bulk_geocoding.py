@@ -0,0 +1,222 @@
+"""Bulk geocoding tests."""
+
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places import BatchSearchApi, GeocodingApi
+from tomtom_apis.places.bulk_geocoding import BulkGeocoder, BulkGeocodingProgress, main, normalize_address, read_addresses
+from tomtom_apis.places.models import GeocodeParams
+
+CSV = """id,address,city
+1,De Ruijterkade 154,Amsterdam
+2,  de ruijterkade   154 ,Amsterdam
+3,,Amsterdam
+4,Fail Street 1,Nowhere
+5,Nieuwe Binnenweg 1,Rotterdam
+"""
+
+
+@pytest.fixture(name="geocoding_api")
+async def fixture_geocoding_api() -> AsyncGenerator[GeocodingApi]:
+    """Fixture for GeocodingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with GeocodingApi(options) as geocoding:
+        yield geocoding
+
+
+@pytest.fixture(name="batch_search_api")
+async def fixture_batch_search_api() -> AsyncGenerator[BatchSearchApi]:
+    """Fixture for BatchSearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with BatchSearchApi(options) as batch_search:
+        yield batch_search
+
+
+def add_geocode(aresponses: ResponsesMockServer, queries: list[str]) -> None:
+    """Add a handler that geocodes every query, except queries starting with fail."""
+
+    def handler(request: web.Request) -> web.Response:
+        query = request.path.removeprefix("/search/2/geocode/").removesuffix(".json")
+        queries.append(query)
+        if query.startswith("fail"):
+            return aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/geocoding/get_geocode.json"))
+
+    aresponses.add(response=handler, repeat=10)
+
+
+def read_output(path: Path) -> list[dict]:
+    """Read the NDJSON output."""
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def test_single_requests(geocoding_api: GeocodingApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test rows are normalized, deduplicated and geocoded with single requests."""
+    queries: list[str] = []
+    add_geocode(aresponses, queries)
+    (tmp_path / "in.csv").write_text(CSV)
+    output_path = tmp_path / "out.ndjson"
+
+    progress = await BulkGeocoder(geocoding_api).run(tmp_path / "in.csv", output_path)
+
+    assert sorted(queries) == ["de ruijterkade 154", "fail street 1", "nieuwe binnenweg 1"]
+    assert (progress.rows, progress.requests, progress.cached, progress.failed) == (5, 3, 1, 2)
+    records = read_output(output_path)
+    assert [record["row"] for record in records] == [0, 1, 2, 3, 4]
+    assert records[0]["result"] == records[1]["result"]
+    assert records[0]["result"]["position"]
+    assert records[2] == {"row": 2, "address": "", "result": None, "error": "Empty address"}
+    assert records[3]["error"] == "Server error"
+
+
+async def test_batch(batch_search_api: BatchSearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test rows are geocoded with synchronous batches."""
+    batch = json.loads(load_json("places/batch_search/post_synchronous_batch.json"))
+    success = batch["batchItems"][0]
+    batch["batchItems"] = [
+        success,
+        {"statusCode": 400, "response": {"errorText": "Invalid query"}},
+        {"statusCode": 200, "response": {**success["response"], "results": []}},
+    ]
+    bodies: list[dict] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        bodies.append(await request.json())
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(batch))
+
+    aresponses.add("api.tomtom.com", "/search/2/batch/sync.json", "POST", handler)
+    input_path = tmp_path / "in.jsonl"
+    input_path.write_text('{"query": "Lodz"}\n\n{"query": "?"}\n{"query": "Nowhere"}\n{"query": "lodz"}\n')
+
+    geocoder = BulkGeocoder(batch_search_api, params=GeocodeParams(limit=1, countrySet=["PL"]), chunk_size=500)
+    progress = await geocoder.run(input_path, tmp_path / "out.ndjson", column="query")
+
+    assert geocoder.chunk_size == 100
+    assert [item["query"] for item in bodies[0]["batchItems"]] == [
+        "/geocode/lodz.json?limit=1&countrySet=PL",
+        "/geocode/%3F.json?limit=1&countrySet=PL",
+        "/geocode/nowhere.json?limit=1&countrySet=PL",
+    ]
+    records = read_output(tmp_path / "out.ndjson")
+    assert records[0]["result"]["address"]["municipality"] == "Lodz"
+    assert records[1]["error"] == "Invalid query"
+    assert records[2]["result"] is None
+    assert "error" not in records[2]
+    assert (progress.requests, progress.cached, progress.failed) == (3, 1, 1)
+
+
+async def test_batch_failed(batch_search_api: BatchSearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test a failed batch fails its rows and the job continues with the next chunk."""
+    batch = json.loads(load_json("places/batch_search/post_synchronous_batch.json"))
+    responses = [
+        aresponses.Response(status=HttpStatus.BAD_REQUEST),
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({**batch, "batchItems": batch["batchItems"][:1]})),
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({**batch, "batchItems": batch["batchItems"][:1]})),
+    ]
+    for response in responses:
+        aresponses.add("api.tomtom.com", "/search/2/batch/sync.json", "POST", response)
+    input_path = tmp_path / "in.csv"
+    input_path.write_text("address\n" + "".join(f"Street {i}\n" for i in range(5)))
+
+    progress = await BulkGeocoder(batch_search_api, chunk_size=2).run(input_path, tmp_path / "out.ndjson")
+
+    records = read_output(tmp_path / "out.ndjson")
+    assert [record["row"] for record in records] == [0, 1, 2, 3, 4]
+    assert records[0]["error"] == records[1]["error"] == "Client error"
+    assert records[2]["error"] == records[3]["error"] == "Batch of 2 addresses returned 1 items"
+    assert records[4]["result"]["address"]["municipality"] == "Lodz"
+    assert (progress.rows, progress.requests, progress.failed) == (5, 5, 4)
+
+
+async def test_resume(geocoding_api: GeocodingApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test a killed job resumes after the last completed chunk."""
+    queries: list[str] = []
+    add_geocode(aresponses, queries)
+    input_path = tmp_path / "in.csv"
+    input_path.write_text("address\n" + "".join(f"Street {i}\n" for i in range(5)))
+    output_path = tmp_path / "out.ndjson"
+    checkpoint_path = tmp_path / "job.checkpoint"
+
+    def kill(progress: BulkGeocodingProgress) -> None:
+        # Simulate a partially written chunk after the checkpoint.
+        with output_path.open("ab") as output:
+            output.write(b'{"row": 2, "addr')
+        msg = f"Killed after {progress.rows} rows"
+        raise RuntimeError(msg)
+
+    geocoder = BulkGeocoder(geocoding_api, chunk_size=2)
+    with pytest.raises(RuntimeError, match="Killed after 2 rows"):
+        await geocoder.run(input_path, output_path, checkpoint_path=checkpoint_path, on_progress=kill)
+    assert checkpoint_path.exists()
+
+    progresses: list[tuple[int, float | None]] = []
+    progress = await BulkGeocoder(geocoding_api, chunk_size=2).run(
+        input_path,
+        output_path,
+        checkpoint_path=checkpoint_path,
+        total_rows=5,
+        on_progress=lambda progress: progresses.append((progress.rows, progress.eta)),
+    )
+
+    assert sorted(queries) == [f"street {i}" for i in range(5)]
+    assert [record["row"] for record in read_output(output_path)] == [0, 1, 2, 3, 4]
+    assert progress.resumed_rows == 2
+    assert progress.requests == 3
+    assert progress.throughput > 0
+    assert progresses[-1] == (5, 0)
+    assert not checkpoint_path.exists()
+
+
+def test_read_addresses(tmp_path: Path) -> None:
+    """Test all CSV columns are joined without a column."""
+    (tmp_path / "in.csv").write_text(CSV)
+
+    assert next(read_addresses(tmp_path / "in.csv", column=None)) == (0, "1, De Ruijterkade 154, Amsterdam")
+    assert normalize_address("  De Ruijterkade, 154 ,") == "de ruijterkade, 154"
+
+
+def test_progress() -> None:
+    """Test the ETA is unknown without a total or throughput."""
+    assert BulkGeocodingProgress().eta is None
+    assert BulkGeocodingProgress(total_rows=10).eta is None
+    assert BulkGeocodingProgress(started=float("inf")).throughput == 0.0
+
+
+def test_main(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test the console entry point wires the arguments to the geocoder."""
+    calls: list[tuple[object, ...]] = []
+
+    async def run(self: BulkGeocoder, input_path: Path, output_path: Path, **kwargs: object) -> BulkGeocodingProgress:
+        calls.append((type(self.api), self.params, input_path, output_path, kwargs["column"], kwargs["total_rows"]))
+        return BulkGeocodingProgress(rows=5, total_rows=5)
+
+    monkeypatch.setattr(BulkGeocoder, "run", run)
+    (tmp_path / "in.csv").write_text(CSV)
+    (tmp_path / "in.ndjson").write_text('{"address": "Lodz"}\n')
+
+    assert main([str(tmp_path / "in.csv"), str(tmp_path / "out.ndjson"), "--api-key", API_KEY, "--country", "NL"]) == 0
+    assert main([str(tmp_path / "in.ndjson"), str(tmp_path / "out.ndjson"), "--api-key", API_KEY, "--batch", "--column", "query"]) == 0
+
+    assert calls == [
+        (GeocodingApi, GeocodeParams(limit=1, countrySet=["NL"]), tmp_path / "in.csv", tmp_path / "out.ndjson", "address", 5),
+        (BatchSearchApi, GeocodeParams(limit=1), tmp_path / "in.ndjson", tmp_path / "out.ndjson", "query", 1),
+    ]
+    assert "5/5 rows" in capsys.readouterr().err
+
+
+def test_main_errors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the console entry point rejects a missing API key or input file."""
+    monkeypatch.delenv("TOMTOM_API_KEY", raising=False)
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "in.csv"), str(tmp_path / "out.ndjson")])
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "in.csv"), str(tmp_path / "out.ndjson"), "--api-key", API_KEY])
@@ -0,0 +1,112 @@
+"""POI category taxonomy tests."""
+
+import os
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import Language
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.category_taxonomy import CategoryTaxonomy
+from tomtom_apis.places.models import PoiCategoriesResponse, PoiCategory
+
+CATEGORIES = [
+    PoiCategory(id=7315, name="Restaurant", childCategoryIds=[7315025, 7315036, 7315999], synonyms=["Eatery", "Dining"]),
+    PoiCategory(id=7315025, name="Italian", childCategoryIds=[7315036], synonyms=["Italian Restaurant"]),
+    PoiCategory(id=7315036, name="Pizza", childCategoryIds=[], synonyms=["Pizzeria"]),
+    PoiCategory(id=9361, name="Shop", childCategoryIds=[], synonyms=["Store", "Dining Supplies"]),
+]
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def add_poi_categories(aresponses: ResponsesMockServer) -> None:
+    """Add the POI categories fixture to the mock server."""
+    aresponses.add(
+        "api.tomtom.com",
+        "/search/2/poiCategories.json",
+        "GET",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/get_poi_categories.json")),
+    )
+
+
+def test_tree() -> None:
+    """Test lookups by id and traversal of the tree."""
+    taxonomy = CategoryTaxonomy(CATEGORIES)
+
+    assert len(taxonomy) == 4
+    assert taxonomy.get(7315036) == CATEGORIES[2]
+    assert taxonomy.get(1) is None
+    assert [category.id for category in taxonomy.children(7315)] == [7315025, 7315036]
+    assert taxonomy.children(1) == []
+    assert [category.id for category in taxonomy.parents(7315036)] == [7315, 7315025]
+    assert taxonomy.parents(7315) == []
+    assert sorted(category.id for category in taxonomy.descendants(7315)) == [7315025, 7315036]
+
+
+def test_names() -> None:
+    """Test lookups by name, synonym and prefix."""
+    taxonomy = CategoryTaxonomy(CATEGORIES)
+
+    assert taxonomy.lookup("  PIZZERIA ") == [CATEGORIES[2]]
+    assert taxonomy.lookup("pizz") == []
+    assert [category.id for category in taxonomy.search("piz")] == [7315036]
+    assert [category.id for category in taxonomy.search("dining")] == [7315, 9361]
+    assert [category.id for category in taxonomy.search("restaurant")] == [7315, 7315025]
+    assert [category.id for category in taxonomy.search("restaurant", limit=1)] == [7315]
+    assert taxonomy.search(" ") == []
+    assert taxonomy.search("zzz") == []
+
+
+def test_category_set() -> None:
+    """Test categorySet values are built from ids and names."""
+    taxonomy = CategoryTaxonomy(CATEGORIES)
+
+    assert taxonomy.category_set("pizzeria", 9361) == ["7315036", "9361"]
+    assert taxonomy.category_set("Restaurant", include_descendants=True) == ["7315", "7315025", "7315036"]
+    with pytest.raises(ValueError, match="Unknown POI category: 1"):
+        taxonomy.category_set(1)
+    with pytest.raises(ValueError, match="Unknown POI category: bakery"):
+        taxonomy.category_set("bakery")
+
+
+async def test_load(search_api: SearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test the taxonomy is fetched once and cached on disk per language."""
+    add_poi_categories(aresponses)
+    add_poi_categories(aresponses)
+    expected = PoiCategoriesResponse.from_json(load_json("places/search/get_poi_categories.json"))
+
+    taxonomy = await CategoryTaxonomy.load(search_api, language=Language.EN_US, cache_dir=tmp_path)
+    assert len(taxonomy) == len(expected.poiCategories or [])
+    assert (tmp_path / "poi_categories.en-US.json").exists()
+
+    # Served from the cache, the mock server has a single response left.
+    cached = await CategoryTaxonomy.load(search_api, language=Language.EN_US, cache_dir=tmp_path)
+    assert cached.get(7315) == taxonomy.get(7315)
+
+    # An expired cache file is refreshed.
+    os.utime(tmp_path / "poi_categories.en-US.json", (0, 0))
+    await CategoryTaxonomy.load(search_api, language=Language.EN_US, cache_dir=tmp_path, max_age=60)
+    assert (tmp_path / "poi_categories.en-US.json").stat().st_mtime > 0
+    aresponses.assert_plan_strictly_followed()
+
+
+async def test_load_without_cache(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the taxonomy is fetched without a cache directory."""
+    add_poi_categories(aresponses)
+
+    taxonomy = await CategoryTaxonomy.load(search_api)
+
+    assert taxonomy.get(7315) is not None
@@ -0,0 +1,177 @@
+"""Circle cover planner tests."""
+
+import json
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.geo import haversine_distance
+from tomtom_apis.models import LatLon
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.circle_cover import CircleCoverSearch, plan_circles
+from tomtom_apis.places.models import NearbySearchParams
+
+TEMPLATE = json.loads(load_json("places/search/get_nearby_search.json"))["results"][0]
+
+# Degrees of longitude per meter at latitude 52.
+LON_PER_METER = 1 / 68_460
+
+
+def offset(lat: float, lon: float, east: float = 0.0, north: float = 0.0) -> LatLon:
+    """Get the location a number of meters east and north of a location."""
+    return LatLon(lat=lat + north / 111_195, lon=lon + east * LON_PER_METER)
+
+
+def clustered_sites() -> list[LatLon]:
+    """Build three clusters of ten sites each within 300 meters, and two isolated sites."""
+    centers = [(52.0, 4.0), (52.1, 4.3), (51.9, 4.6)]
+    sites = [offset(lat, lon, east=30.0 * (i % 5), north=60.0 * (i // 5)) for lat, lon in centers for i in range(10)]
+    return [*sites, LatLon(lat=52.5, lon=5.0), LatLon(lat=52.5, lon=5.2)]
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def test_plan_circles() -> None:
+    """Test clustered sites share a circle that contains the search radius around each site."""
+    sites = clustered_sites()
+
+    circles = plan_circles(sites, search_radius=500.0, max_circle_radius=2_000.0)
+
+    assert len(circles) == 5
+    assert sorted(i for circle in circles for i in circle.sites) == list(range(len(sites)))
+    for circle in circles:
+        assert circle.radius <= 2_000
+        for i in circle.sites:
+            assert haversine_distance(circle.lat, circle.lon, sites[i].lat, sites[i].lon) + 500.0 <= circle.radius
+    assert not plan_circles([], search_radius=500.0)
+
+
+def test_plan_circles_off_center() -> None:
+    """Test the circle stays on the seed site when the centroid would not cover all sites."""
+    reach = 1_000.0
+    sites = [offset(52.0, 4.0, east=east * reach) for east in (-0.99, 0.0, 0.5, 0.5, 0.5)]
+
+    circles = plan_circles(sites, search_radius=100.0, max_circle_radius=1_100.0)
+
+    assert len(circles) == 1
+    assert (circles[0].lat, circles[0].lon) == (sites[1].lat, sites[1].lon)
+    assert circles[0].radius == 1_090
+
+
+def test_plan_circles_invalid() -> None:
+    """Test invalid radii."""
+    with pytest.raises(ValueError, match="search_radius"):
+        plan_circles([], search_radius=600.0, max_circle_radius=500.0)
+    with pytest.raises(ValueError, match="50000"):
+        plan_circles([], search_radius=600.0, max_circle_radius=60_000.0)
+
+
+async def test_search(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the results of the circles are assigned to the sites they are near."""
+    sites = clustered_sites()
+    pois = {f"poi-{i}": offset(site.lat, site.lon, east=200.0, north=100.0 * (i % 3)) for i, site in enumerate(sites[::4])}
+    requests: list[web.Request] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request)
+        lat, lon, radius = float(request.query["lat"]), float(request.query["lon"]), float(request.query["radius"])
+        results = [
+            {**TEMPLATE, "id": poi_id, "position": {"lat": poi.lat, "lon": poi.lon}}
+            for poi_id, poi in pois.items()
+            if haversine_distance(lat, lon, poi.lat, poi.lon) <= radius
+        ]
+        body = {"summary": {"query": "", "numResults": len(results)}, "results": results}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+    aresponses.add("api.tomtom.com", "/search/2/nearbySearch/.json", "GET", response=handler, repeat=10)
+    search = CircleCoverSearch(search_api, search_radius=400.0, max_circle_radius=2_000.0)
+
+    found = await search.search(sites, params=NearbySearchParams())
+
+    assert len(requests) == search.stats.requests == 5
+    assert search.stats.sites == len(sites)
+    assert all(request.query["limit"] == "100" for request in requests)
+    for site, results in zip(sites, found, strict=True):
+        distances = {poi_id: haversine_distance(site.lat, site.lon, poi.lat, poi.lon) for poi_id, poi in pois.items()}
+        expected = sorted((poi_id for poi_id, distance in distances.items() if distance <= 400.0), key=distances.__getitem__)
+        assert [result.id for result in results] == expected
+    assert any(found)
+
+
+async def test_search_without_params(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the radius is set when no parameters are given."""
+    requests: list[web.Request] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text='{"summary": {"numResults": 0}, "results": []}')
+
+    aresponses.add("api.tomtom.com", "/search/2/nearbySearch/.json", "GET", response=handler)
+
+    assert await CircleCoverSearch(search_api).search([LatLon(lat=52.0, lon=4.0)]) == [[]]
+    assert requests[0].query["radius"] == "500"
+    assert requests[0].query["limit"] == "100"
+
+
+def add_nearest(aresponses: ResponsesMockServer, pois: dict[str, LatLon], requests: list[web.Request], repeat: int = 1) -> None:
+    """Add a handler to the mock server that returns the POIs nearest the center up to the limit, like the nearby search."""
+
+    def handler(request: web.Request) -> web.Response:
+        requests.append(request)
+        lat, lon, radius, limit = (
+            float(request.query["lat"]),
+            float(request.query["lon"]),
+            float(request.query["radius"]),
+            int(request.query["limit"]),
+        )
+        distances = {poi_id: haversine_distance(lat, lon, poi.lat, poi.lon) for poi_id, poi in pois.items()}
+        within = sorted((poi_id for poi_id, distance in distances.items() if distance <= radius), key=distances.__getitem__)
+        results = [{**TEMPLATE, "id": poi_id, "position": {"lat": pois[poi_id].lat, "lon": pois[poi_id].lon}} for poi_id in within[:limit]]
+        body = {"summary": {"query": "", "numResults": len(results), "totalResults": len(within)}, "results": results}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+    aresponses.add("api.tomtom.com", "/search/2/nearbySearch/.json", "GET", response=handler, repeat=repeat)
+
+
+async def test_search_dense(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a circle with more results than the limit is searched again as smaller circles."""
+    sites = [offset(52.0, 4.0, east=200.0 * i) for i in range(10)]
+    pois = {f"poi-{i}": offset(52.0, 4.0, east=25.0 * i - 300.0) for i in range(97)}
+    requests: list[web.Request] = []
+    add_nearest(aresponses, pois, requests, repeat=20)
+    search = CircleCoverSearch(search_api, search_radius=300.0, max_circle_radius=2_000.0)
+
+    found = await search.search(sites, params=NearbySearchParams(limit=30))
+
+    assert search.stats.splits > 0
+    assert search.stats.truncated == 0
+    assert len(requests) == search.stats.requests > 1
+    for site, results in zip(sites, found, strict=True):
+        distances = {poi_id: haversine_distance(site.lat, site.lon, poi.lat, poi.lon) for poi_id, poi in pois.items()}
+        expected = sorted((poi_id for poi_id, distance in distances.items() if distance <= 300.0), key=distances.__getitem__)
+        assert [result.id for result in results] == expected
+
+
+async def test_search_truncated(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a circle around a single site with more results than the limit is counted as truncated."""
+    pois = {f"poi-{i}": offset(52.0, 4.0, east=10.0 * i) for i in range(20)}
+    requests: list[web.Request] = []
+    add_nearest(aresponses, pois, requests)
+    search = CircleCoverSearch(search_api, search_radius=500.0)
+
+    found = await search.search([LatLon(lat=52.0, lon=4.0)], params=NearbySearchParams(limit=10))
+
+    assert [result.id for result in found[0]] == [f"poi-{i}" for i in range(10)]
+    assert (search.stats.requests, search.stats.splits, search.stats.truncated) == (1, 0, 1)
@@ -0,0 +1,82 @@
+"""Columnar search result tests."""
+
+import math
+import sys
+
+import pytest
+
+from tests.conftest import load_json
+from tomtom_apis.places.columnar import SearchResultColumns
+from tomtom_apis.places.models import SearchResponse
+
+
+def test_from_json() -> None:
+    """Test the columns match the results of the deserialized response."""
+    raw = load_json("places/search/get_search.json")
+    response = SearchResponse.from_json(raw)
+
+    columns = SearchResultColumns.from_json(raw)
+
+    assert len(columns) == len(response.results) == 10
+    for row, result in enumerate(response.results):
+        assert columns.ids[row] == result.id
+        assert columns.types[row] == result.type
+        assert columns.freeform_addresses[row] == result.address.freeformAddress
+        assert columns.lat[row] == result.position.lat
+        assert columns.lon[row] == result.position.lon
+        assert columns.score[row] == result.score
+        assert columns.dist[row] == result.dist
+        assert columns.category_ids[row] == ([category.id for category in result.poi.categorySet or []] if result.poi else [])
+    assert columns.category_ids[0] == [7315036]
+
+
+def test_missing_fields() -> None:
+    """Test missing fields become NaN, None or an empty list."""
+    columns = SearchResultColumns.from_json(b'{"results": [{"id": "a", "type": "Street", "position": {"lat": 1.0, "lon": 2.0}}, {"id": "b"}]}')
+
+    assert columns.ids == ["a", "b"]
+    assert columns.types == ["Street", None]
+    assert columns.names == [None, None]
+    assert columns.lat[0] == 1.0
+    assert math.isnan(columns.lat[1])
+    assert math.isnan(columns.score[0])
+    assert columns.category_ids == [[], []]
+    assert not SearchResultColumns.from_json("{}")
+
+
+def test_to_numpy() -> None:
+    """Test the conversion to a structured array."""
+    np = pytest.importorskip("numpy")
+    columns = SearchResultColumns.from_json(load_json("places/search/get_search.json"))
+
+    records = columns.to_numpy()
+
+    assert records.shape == (10,)
+    assert records["lat"].dtype == np.float64
+    np.testing.assert_array_equal(records["lat"], np.asarray(columns.lat))
+    np.testing.assert_array_equal(records["score"], np.asarray(columns.score))
+    assert list(records["id"]) == columns.ids
+    assert records[0]["category_ids"] == [7315036]
+    assert records[0]["freeform_address"] == "117 East San Carlos Street, San Jose, CA 95112"
+    assert SearchResultColumns().to_numpy().shape == (0,)
+
+
+def test_to_arrow() -> None:
+    """Test the conversion to an Arrow table."""
+    pa = pytest.importorskip("pyarrow")
+    columns = SearchResultColumns.from_json(load_json("places/search/get_search.json"))
+
+    table = columns.to_arrow()
+
+    assert table.num_rows == 10
+    assert table.schema.field("lat").type == pa.float64()
+    assert table.schema.field("category_ids").type == pa.list_(pa.int64())
+    assert table.column("id").to_pylist() == columns.ids
+
+
+def test_to_arrow_without_pyarrow(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the conversion to an Arrow table raises when PyArrow is not installed."""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ImportError):
+        SearchResultColumns().to_arrow()
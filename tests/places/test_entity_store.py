@@ -0,0 +1,164 @@
+"""POI entity store tests."""
+
+import time
+from collections.abc import AsyncGenerator
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import Language, LatLon, ViewType
+from tomtom_apis.places.entity_store import EntityCachingSearchApi, PoiEntityStore
+from tomtom_apis.places.models import (
+    Address,
+    Geometry,
+    GeometrySearchPostData,
+    MapCode,
+    MapCodeType,
+    OpeningHoursType,
+    PlaceByIdParams,
+    PlaceByIdResponse,
+    Poi,
+    Points,
+    RelatedPoisType,
+    Result,
+    SearchAlongRouteData,
+    SearchParams,
+    TimeZone,
+)
+
+SEARCH_ID = "RTEk1nQHbKvXnkRhsbE9lA"
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[EntityCachingSearchApi]:
+    """Fixture for EntityCachingSearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with EntityCachingSearchApi(options) as search:
+        yield search
+
+
+def add_response(aresponses: ResponsesMockServer, path: str, fixture: str, method: str = "GET") -> None:
+    """Add a fixture response to the mock server."""
+    aresponses.add(
+        "api.tomtom.com", path, method, aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json(f"places/search/{fixture}"))
+    )
+
+
+async def test_place_by_id_from_search(search_api: EntityCachingSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test place by id requests are answered from search results when they have the requested fields."""
+    add_response(aresponses, "/search/2/search/pizza.json", "get_search.json")
+    add_response(aresponses, "/search/2/place.json", "get_place_by_id.json")
+
+    await search_api.get_search(query="pizza", params=SearchParams(language=Language.EN_US, view=ViewType.UNIFIED))
+    assert len(search_api.store) > 1
+
+    response = await search_api.get_place_by_id(params=PlaceByIdParams(entityId=SEARCH_ID, language=Language.EN_US, view=ViewType.UNIFIED))
+    assert isinstance(response, PlaceByIdResponse)
+    assert response.results[0].id == SEARCH_ID
+    assert search_api.store.stats.hits == 1
+
+    # The search results have no related POIs, so the API is called.
+    response = await search_api.get_place_by_id(
+        params=PlaceByIdParams(entityId=SEARCH_ID, language=Language.EN_US, view=ViewType.UNIFIED, relatedPois=RelatedPoisType.ALL)
+    )
+    assert response.results[0].id == "626e7GQ5v3DuHQI9p_teZQ"
+    assert search_api.store.stats.misses == 1
+    assert search_api.store.stats.hit_rate == 0.5
+
+
+async def test_search_calls_populate_store(search_api: EntityCachingSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the results of every search call are stored."""
+    add_response(aresponses, "/search/2/poiSearch/pizza.json", "get_poi_search.json")
+    add_response(aresponses, "/search/2/categorySearch/pizza.json", "get_category_search.json")
+    add_response(aresponses, "/search/2/geometrySearch/pizza.json", "get_geometry_search.json")
+    add_response(aresponses, "/search/2/geometrySearch/pizza.json", "post_geometry_search.json", "POST")
+    add_response(aresponses, "/search/2/nearbySearch/.json", "get_nearby_search.json")
+    add_response(aresponses, "/search/2/searchAlongRoute/pizza.json", "post_search_along_route.json", "POST")
+    add_response(aresponses, "/search/2/place.json", "get_place_by_id.json")
+
+    geometries = [Geometry(type="CIRCLE", position="37.71205, -121.36434", radius=6000)]
+    responses = [
+        await search_api.get_poi_search(query="pizza"),
+        await search_api.get_category_search(query="pizza"),
+        await search_api.get_geometry_search(query="pizza", geometryList=geometries),
+        await search_api.post_geometry_search(query="pizza", data=GeometrySearchPostData(geometryList=geometries)),
+        await search_api.get_nearby_search(lat=48.872263, lon=2.299541),
+        await search_api.post_search_along_route(
+            query="pizza",
+            maxDetourTime=600,
+            data=SearchAlongRouteData(route=Points(points=[LatLon(lat=37.7524152, lon=-122.4357604), LatLon(lat=37.7066047, lon=-122.4330139)])),
+        ),
+    ]
+    for response in responses:
+        for result in response.results:
+            assert result.id in search_api.store
+
+    # Place by id results are stored as well, a second request is answered locally.
+    params = PlaceByIdParams(entityId="626e7GQ5v3DuHQI9p_teZQ")
+    await search_api.get_place_by_id(params=params)
+    await search_api.get_place_by_id(params=params)
+    assert search_api.store.stats.hits == 1
+
+
+def test_store_requested_fields() -> None:
+    """Test a stored result only answers requests in its language and view that ask for fields it has."""
+    store = PoiEntityStore()
+    result = Result(id="1", address=Address(), position=LatLon(lat=52.0, lon=4.0))
+    store.add([result], params=SearchParams(language=Language.NL_NL))
+
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, relatedPois=RelatedPoisType.OFF)) is not None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1")) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, view=ViewType.UNIFIED)) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, openingHours=OpeningHoursType.NEXT_SEVEN_DAYS)) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, timeZone="iana")) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, mapcodes=[MapCodeType.LOCAL])) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="2")) is None
+    assert store.stats.hits == 1
+    assert store.stats.misses == 6
+
+
+def test_store_merge() -> None:
+    """Test a less detailed result for a stored entity keeps the fields of the stored result, in another language it replaces it."""
+    store = PoiEntityStore()
+    params = SearchParams(language=Language.NL_NL)
+    mapcodes = [MapCode(type=MapCodeType.LOCAL, fullMapcode="NLD 49.4V", territory="NLD", code="49.4V")]
+    poi = Poi(name="Pizza", timeZone=TimeZone(ianaId="Europe/Amsterdam"))
+    store.add([Result(id="1", score=1.5, address=Address(), position=LatLon(lat=52.0, lon=4.0), poi=poi, mapcodes=mapcodes)], params=params)
+    store.add(
+        [Result(id="1", score=2.5, address=Address(), position=LatLon(lat=52.0, lon=4.0), poi=Poi(name="Pizza", phone="+31 20 123 4567"))],
+        params=params,
+    )
+
+    response = store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, timeZone="iana", mapcodes=[MapCodeType.LOCAL]))
+    assert response is not None
+    assert response.results[0].score == 2.5
+    assert response.results[0].mapcodes == mapcodes
+    assert response.results[0].poi == Poi(name="Pizza", phone="+31 20 123 4567", timeZone=TimeZone(ianaId="Europe/Amsterdam"))
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, mapcodes=[MapCodeType.INTERNATIONAL])) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.NL_NL, mapcodes=[MapCodeType.LOCAL, MapCodeType.LOCAL])) is not None
+
+    store.add([Result(id="1", address=Address(), position=LatLon(lat=52.0, lon=4.0))], params=SearchParams(language=Language.EN_US))
+    assert store.get_place_by_id(PlaceByIdParams(entityId="1", language=Language.EN_US, mapcodes=[MapCodeType.LOCAL])) is None
+
+
+def test_store_bounds() -> None:
+    """Test the store evicts results beyond its size and after the time to live."""
+    store = PoiEntityStore(max_entities=2)
+    store.add([Result(id=str(i), address=Address(), position=LatLon(lat=52.0, lon=4.0)) for i in range(3)])
+
+    assert len(store) == 2
+    assert store.evictions == 1
+    assert store.get_place_by_id(PlaceByIdParams(entityId="0")) is None
+    assert store.get_place_by_id(PlaceByIdParams(entityId="2")) is not None
+
+    store.clear()
+    assert len(store) == 0
+
+    expiring = PoiEntityStore(ttl=0.0)
+    expiring.add([Result(id="1", address=Address(), position=LatLon(lat=52.0, lon=4.0))])
+    time.sleep(0.001)
+    assert expiring.get_place_by_id(PlaceByIdParams(entityId="1")) is None
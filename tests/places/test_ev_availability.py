@@ -0,0 +1,173 @@
+"""EV charging availability aggregator tests."""
+
+import asyncio
+import json
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places import EVSearchApi
+from tomtom_apis.places.ev_availability import ChargingAvailabilityAggregator
+from tomtom_apis.places.models import ConnectorType, Current, EvSearchNearbyParams, SearchResponse
+
+TYPE2 = ConnectorType.IEC62196_TYPE2_OUTLET
+CCS = ConnectorType.IEC62196_TYPE2_CCS
+
+
+@pytest.fixture(name="ev_search_api")
+async def fixture_ev_search_api() -> AsyncGenerator[EVSearchApi]:
+    """Fixture for EVSearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with EVSearchApi(options) as ev_search:
+        yield ev_search
+
+
+def counts(available: int, occupied: int) -> dict[str, int]:
+    """Build the current counts of a connector."""
+    return {"available": available, "occupied": occupied, "reserved": 0, "unknown": 0, "outOfService": 0}
+
+
+def add_availability(
+    aresponses: ResponsesMockServer,
+    parks: dict[str, list[tuple[ConnectorType, dict[str, int]]]],
+    requests: list[str],
+    *,
+    delay: float = 0.0,
+    repeat: int = 20,
+) -> None:
+    """Add an availability handler that serves the connectors of the parks."""
+
+    async def handler(request: web.Request) -> web.Response:
+        charging_availability = request.query["chargingAvailability"]
+        requests.append(charging_availability)
+        await asyncio.sleep(delay)
+        if charging_availability not in parks:
+            return aresponses.Response(status=HttpStatus.BAD_REQUEST)
+        connectors = [
+            {"type": connector_type, "total": sum(current.values()), "availability": {"current": current, "perPowerLevel": []}}
+            for connector_type, current in parks[charging_availability]
+        ]
+        body = {"connectors": connectors, "chargingAvailability": charging_availability}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+    aresponses.add("api.tomtom.com", "/search/2/chargingAvailability.json", "GET", response=handler, repeat=repeat)
+
+
+async def test_refresh_emits_changes(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a refresh only returns the connector types whose counts changed."""
+    parks = {"a": [(TYPE2, counts(1, 1)), (CCS, counts(2, 0))], "b": [(TYPE2, counts(0, 2)), (TYPE2, counts(1, 0))]}
+    requests: list[str] = []
+    add_availability(aresponses, parks, requests)
+    aggregator = ChargingAvailabilityAggregator(ev_search_api)
+    aggregator.track("a", "b", "a")
+
+    initial = await aggregator.refresh()
+
+    assert aggregator.tracked == ["a", "b"]
+    assert [(change.charging_availability, change.connector_type, change.previous) for change in initial] == [
+        ("a", TYPE2, None),
+        ("a", CCS, None),
+        ("b", TYPE2, None),
+    ]
+    assert aggregator.availability("b") == {TYPE2: Current(**counts(1, 2))}
+    assert not await aggregator.refresh()
+
+    parks["a"] = [(TYPE2, counts(0, 2))]
+    changes = await aggregator.refresh()
+
+    assert len(changes) == 2
+    assert changes[0].previous == Current(**counts(1, 1))
+    assert changes[0].current == Current(**counts(0, 2))
+    assert changes[1].connector_type == CCS
+    assert changes[1].current is None
+    assert aggregator.stats.requests == 6
+    assert aggregator.stats.refreshes == 3
+
+
+async def test_coalesces_lookups(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test concurrent lookups of a park share one request."""
+    requests: list[str] = []
+    add_availability(aresponses, {"a": [(TYPE2, counts(1, 1))]}, requests, delay=0.05)
+    aggregator = ChargingAvailabilityAggregator(ev_search_api)
+    aggregator.track("a")
+
+    responses = await asyncio.gather(aggregator.fetch("a"), aggregator.refresh(), aggregator.fetch("a"))
+
+    assert requests == ["a"]
+    assert responses[0] is responses[2]
+    assert len(responses[1]) == 1
+    assert aggregator.stats.coalesced == 2
+
+
+async def test_failures_keep_state(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a failed park keeps its state, and untracked parks are dropped."""
+    parks = {"a": [(TYPE2, counts(1, 1))], "b": [(CCS, counts(1, 0))]}
+    requests: list[str] = []
+    add_availability(aresponses, parks, requests)
+    aggregator = ChargingAvailabilityAggregator(ev_search_api, max_concurrency=1)
+    aggregator.track("a", "b")
+    await aggregator.refresh()
+
+    del parks["a"]
+    assert not await aggregator.refresh()
+    assert aggregator.stats.failures == 1
+    assert aggregator.availability("a") == {TYPE2: Current(**counts(1, 1))}
+
+    aggregator.untrack("a", "unknown")
+    assert aggregator.tracked == ["b"]
+    assert not aggregator.availability("a")
+
+
+async def test_untrack_during_refresh(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a park untracked while its request is in flight is not stored."""
+    requests: list[str] = []
+    add_availability(aresponses, {"a": [(TYPE2, counts(1, 1))]}, requests, delay=0.05)
+    aggregator = ChargingAvailabilityAggregator(ev_search_api)
+    aggregator.track("a")
+
+    refresh = asyncio.create_task(aggregator.refresh())
+    await asyncio.sleep(0.01)
+    aggregator.untrack("a")
+
+    assert not await refresh
+    assert not aggregator.availability("a")
+
+
+async def test_watch(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the scheduled refreshes only yield when something changed."""
+    parks = {"a": [(TYPE2, counts(1, 1))]}
+    requests: list[str] = []
+    add_availability(aresponses, parks, requests)
+    aggregator = ChargingAvailabilityAggregator(ev_search_api)
+    aggregator.track("a")
+
+    watch = aggregator.watch(0.02)
+    first = await anext(watch)
+    parks["a"] = [(TYPE2, counts(0, 2))]
+    second = await anext(watch)
+    await watch.aclose()
+
+    assert first[0].previous is None
+    assert second[0].current == Current(**counts(0, 2))
+    assert len(requests) >= 2
+
+
+async def test_resolve(ev_search_api: EVSearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the parks of a search are tracked by their chargingAvailability id, or by their own id in EV search results."""
+    data = json.loads(load_json("places/ev_search/get_ev_search_nearby.json"))
+    data["results"][1]["dataSources"] = {"chargingAvailability": {"id": "availability"}}
+    nearby = json.dumps(data)
+    aresponses.add("api.tomtom.com", "/search/2/evsearch", "GET", aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=nearby))
+    expected = [SearchResponse.from_json(nearby).results[0].id, "availability"]
+    aggregator = ChargingAvailabilityAggregator(ev_search_api)
+
+    ids = await aggregator.resolve(EvSearchNearbyParams(lat=52.364941, lon=4.8935986, radius=1000))
+
+    assert ids == expected
+    assert aggregator.tracked == expected
@@ -0,0 +1,143 @@
+"""Geocoding cascade tests."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places import GeocodingApi, PremiumGeocodingApi
+from tomtom_apis.places.geocoding_cascade import GeocodingCascade
+from tomtom_apis.places.models import GeocodeParams, SearchResponse
+
+STANDARD = load_json("places/geocoding/get_geocode.json")
+PREMIUM = load_json("places/premium_geocoding/get_geocode.json")
+
+
+@pytest.fixture(name="apis")
+async def fixture_apis() -> AsyncGenerator[tuple[GeocodingApi, PremiumGeocodingApi]]:
+    """Fixture for GeocodingApi and PremiumGeocodingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with GeocodingApi(options) as geocoding, PremiumGeocodingApi(options) as premium:
+        yield geocoding, premium
+
+
+def add_geocode(aresponses: ResponsesMockServer, path: str, text: str, requests: list[web.Request], *, delay: float = 0.0) -> None:
+    """Add a geocode handler that records its requests."""
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request)
+        await asyncio.sleep(delay)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=text)
+
+    aresponses.add("api.tomtom.com", path, "GET", response=handler, repeat=5)
+
+
+async def test_confident_standard_is_cached(apis: tuple[GeocodingApi, PremiumGeocodingApi], aresponses: ResponsesMockServer) -> None:
+    """Test a confident standard result is not escalated and is cached."""
+    standard: list[web.Request] = []
+    add_geocode(aresponses, "/search/2/geocode/de ruijterkade 154 amsterdam.json", STANDARD, standard)
+    cascade = GeocodingCascade(*apis, min_score=5.0)
+
+    first = await cascade.get_geocode(query="de ruijterkade 154 amsterdam")
+    second = await cascade.get_geocode(query="  De Ruijterkade   154 Amsterdam ")
+
+    assert second is first
+    assert first.results[0].address.municipality == "Amsterdam"
+    assert len(standard) == 1
+    assert cascade.stats.standard.transactions == 1
+    assert cascade.stats.standard.milliseconds > 0
+    assert cascade.stats.premium.transactions == 0
+    assert cascade.stats.escalations == 0
+    assert cascade.stats.cache.hits == 1
+
+
+async def test_escalates_to_premium(apis: tuple[GeocodingApi, PremiumGeocodingApi], aresponses: ResponsesMockServer) -> None:
+    """Test a result below the thresholds is escalated, with the shared parameters."""
+    standard: list[web.Request] = []
+    premium: list[web.Request] = []
+    add_geocode(aresponses, "/search/2/geocode/austin.json", STANDARD, standard)
+    add_geocode(aresponses, "/search/2/premiumGeocode/austin.json", PREMIUM, premium)
+    cascade = GeocodingCascade(*apis, min_score=10.0)
+
+    response = await cascade.get_geocode(query="austin", params=GeocodeParams(countrySet=["US"], limit=2, typeahead=True))
+    cached = await cascade.get_geocode(query="austin", params=GeocodeParams(countrySet=["US"], limit=2, typeahead=True))
+
+    assert cached is response
+    assert response.results[0].address.municipality == "Austin"
+    assert premium[0].query["countrySet"] == "US"
+    assert premium[0].query["limit"] == "2"
+    assert "typeahead" not in premium[0].query
+    assert cascade.stats.escalations == 1
+    assert cascade.stats.standard.transactions == cascade.stats.premium.transactions == 1
+
+
+@pytest.mark.parametrize("premium_text", ['{"summary": {"query": "austin", "queryTime": 1, "numResults": 0}, "results": []}', None])
+async def test_falls_back_to_standard(
+    apis: tuple[GeocodingApi, PremiumGeocodingApi],
+    aresponses: ResponsesMockServer,
+    premium_text: str | None,
+) -> None:
+    """Test the standard response is returned when premium has no results or fails."""
+    requests: list[web.Request] = []
+    add_geocode(aresponses, "/search/2/geocode/austin.json", STANDARD, requests)
+    if premium_text is None:
+        aresponses.add("api.tomtom.com", "/search/2/premiumGeocode/austin.json", "GET", aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR))
+    else:
+        add_geocode(aresponses, "/search/2/premiumGeocode/austin.json", premium_text, requests)
+    cascade = GeocodingCascade(*apis, min_match_confidence=None, min_score=10.0)
+
+    response = await cascade.get_geocode(query="austin")
+
+    assert response.results[0].address.municipality == "Amsterdam"
+    assert cascade.stats.premium.failures == (1 if premium_text is None else 0)
+
+
+async def test_deadline(apis: tuple[GeocodingApi, PremiumGeocodingApi], aresponses: ResponsesMockServer) -> None:
+    """Test both tiers share the deadline, a late premium response falls back to the standard response."""
+    requests: list[web.Request] = []
+    add_geocode(aresponses, "/search/2/geocode/austin.json", STANDARD, requests, delay=0.05)
+    add_geocode(aresponses, "/search/2/premiumGeocode/austin.json", PREMIUM, requests, delay=0.5)
+    cascade = GeocodingCascade(*apis, min_score=10.0, time_limit=0.2)
+
+    response = await cascade.get_geocode(query="austin")
+
+    assert response.results[0].address.municipality == "Amsterdam"
+    assert cascade.stats.deadline_exceeded == 1
+    assert cascade.stats.premium.failures == 1
+    assert cascade.stats.standard.milliseconds + cascade.stats.premium.milliseconds < 400
+
+    with pytest.raises(TimeoutError):
+        await cascade.get_geocode(query="austin", time_limit=0.01)
+    assert cascade.stats.deadline_exceeded == 2
+    assert cascade.stats.standard.failures == 1
+
+
+def test_is_confident(apis: tuple[GeocodingApi, PremiumGeocodingApi]) -> None:
+    """Test the thresholds of the top result."""
+    response = SearchResponse.from_json(STANDARD)
+    empty = SearchResponse.from_json('{"summary": {"query": "", "queryTime": 1, "numResults": 0}, "results": []}')
+    without_confidence = SearchResponse.from_json(STANDARD.replace('"matchConfidence"', '"ignored"').replace('"score": 8.2362003326,', ""))
+
+    assert GeocodingCascade(*apis).is_confident(response)
+    assert not GeocodingCascade(*apis, min_score=9.0).is_confident(response)
+    assert not GeocodingCascade(*apis).is_confident(empty)
+    assert not GeocodingCascade(*apis).is_confident(without_confidence)
+    assert not GeocodingCascade(*apis, min_score=1.0, min_match_confidence=None).is_confident(without_confidence)
+    assert GeocodingCascade(*apis, min_match_confidence=None).is_confident(without_confidence)
+
+
+async def test_without_premium(apis: tuple[GeocodingApi, PremiumGeocodingApi], aresponses: ResponsesMockServer) -> None:
+    """Test results are never escalated without a premium tier."""
+    requests: list[web.Request] = []
+    add_geocode(aresponses, "/search/2/geocode/austin.json", STANDARD, requests)
+    cascade = GeocodingCascade(apis[0], min_score=10.0, time_limit=None)
+
+    await cascade.get_geocode(query="austin")
+
+    assert cascade.stats.escalations == 0
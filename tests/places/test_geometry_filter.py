@@ -0,0 +1,83 @@
+"""Local geometry filter tests."""
+
+import json
+
+import pytest
+
+from tests.conftest import load_json
+from tomtom_apis.models import LatLon
+from tomtom_apis.places.geometry_filter import HAS_NUMPY, LocalGeometryFilter, filter_geometries
+from tomtom_apis.places.models import Geometry, GeometryFilterResponse, GeometryPoi
+
+# The geometries of the post geometry filter fixture request, around Manhattan.
+POLYGON = Geometry(
+    type="POLYGON",
+    vertices=["40.80558, -73.96548", "40.80076, -73.96095", "40.79395, -73.96524", "40.79855, -73.97045"],
+)
+CIRCLE = Geometry(type="CIRCLE", position="40.80558, -73.96548", radius=100)
+
+USE_NUMPY = [pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")), False]
+
+
+def grid_pois(size: int) -> list[GeometryPoi]:
+    """Generate a grid of size by size POIs around the geometries."""
+    return [GeometryPoi(position=LatLon(lat=40.78 + 0.04 * i / size, lon=-73.98 + 0.03 * j / size)) for i in range(size) for j in range(size)]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_filter(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test POIs inside a polygon or a circle are kept, in order."""
+    inside_polygon = GeometryPoi(position=LatLon(lat=40.8, lon=-73.965))
+    inside_circle = GeometryPoi(position=LatLon(lat=40.806, lon=-73.9652))
+    outside = GeometryPoi(position=LatLon(lat=40.79, lon=-73.95))
+    pois = [inside_circle, outside, inside_polygon]
+
+    response = filter_geometries(geometryList=[POLYGON, CIRCLE], poiList=pois, use_numpy=use_numpy)
+
+    assert isinstance(response, GeometryFilterResponse)
+    assert response.results == [inside_circle, inside_polygon]
+    assert response.summary.numResults == 2
+    assert filter_geometries(geometryList=[CIRCLE], poiList=pois, use_numpy=use_numpy).results == [inside_circle]
+    assert not filter_geometries(geometryList=[], poiList=pois, use_numpy=use_numpy).results
+
+
+def test_filter_fixture() -> None:
+    """Test the local filter returns the same result as the API for the fixture."""
+    expected = GeometryFilterResponse.from_json(load_json("places/search/post_geometry_filter.json"))
+    pois = [GeometryPoi(position=result.position) for result in expected.results] + grid_pois(3)
+
+    response = filter_geometries(geometryList=[CIRCLE], poiList=pois)
+
+    assert [poi.position for poi in response.results] == [result.position for result in expected.results]
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+def test_numpy_and_python_agree() -> None:
+    """Test the NumPy and the plain Python implementation return the same mask."""
+    pois = grid_pois(70)
+    square = Geometry(type="POLYGON", vertices=["40.79, -73.97", "40.79, -73.96", "40.81, -73.96", "40.81, -73.97"])
+    geometries = [POLYGON, square, Geometry(type="circle", position="40.8, -73.965", radius=800)]
+
+    numpy_filter = LocalGeometryFilter(pois)
+    python_filter = LocalGeometryFilter(pois, use_numpy=False)
+
+    assert numpy_filter.use_numpy
+    assert not python_filter.use_numpy
+    mask = numpy_filter.mask(geometries)
+    assert mask == python_filter.mask(geometries)
+    assert 0 < sum(mask) < len(pois)
+
+
+def test_unsupported_geometry() -> None:
+    """Test geometries without a position and radius or vertices are rejected."""
+    pois = grid_pois(1)
+    for geometry in (Geometry(type="CIRCLE", position="40.8, -73.965"), Geometry(type="LINE", vertices=["40.8, -73.965"])):
+        with pytest.raises(ValueError, match="Unsupported geometry"):
+            filter_geometries(geometryList=[geometry], poiList=pois)
+
+
+def test_summary_serializes() -> None:
+    """Test the response serializes like an API response."""
+    response = filter_geometries(geometryList=[CIRCLE], poiList=[GeometryPoi(position=LatLon(lat=40.80558, lon=-73.96548))])
+
+    assert json.loads(response.to_json())["summary"]["numResults"] == 1
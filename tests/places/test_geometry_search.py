@@ -0,0 +1,108 @@
+"""Geometry search tests."""
+
+import math
+from collections.abc import AsyncGenerator
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatLon
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.geometry_search import GeometrySearch, simplify_geometry
+from tomtom_apis.places.models import Geometry, GeometryFilterResponse, GeometryPoi, GeometrySearchParams, SearchResponse
+
+# A polygon approximating a circle with a radius of about 1 kilometer with 360 vertices.
+DENSE_POLYGON = Geometry(
+    type="POLYGON",
+    vertices=[f"{52.37 + 0.009 * math.sin(math.radians(a))}, {4.89 + 0.0147 * math.cos(math.radians(a))}" for a in range(360)],
+)
+CIRCLE = Geometry(type="CIRCLE", position="52.37, 4.89", radius=1000)
+POIS = [GeometryPoi(position=LatLon(lat=52.37, lon=4.89))]
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def test_simplify_geometry() -> None:
+    """Test polygons are simplified and other geometries are kept."""
+    simplified = simplify_geometry(DENSE_POLYGON, 10.0)
+
+    assert simplified.vertices is not None
+    assert DENSE_POLYGON.vertices is not None
+    assert 3 <= len(simplified.vertices) < len(DENSE_POLYGON.vertices) / 4
+    assert set(simplified.vertices) <= set(DENSE_POLYGON.vertices)
+    assert simplify_geometry(CIRCLE, 10.0) is CIRCLE
+    # A polygon is never simplified to fewer than three vertices.
+    sliver = Geometry(type="POLYGON", vertices=["52.0, 4.0", "52.0, 4.001", "52.0, 4.002", "52.00001, 4.003"])
+    assert simplify_geometry(sliver, 100.0) is sliver
+
+
+async def test_search_get(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a small geometry search is sent with GET."""
+    aresponses.add(
+        "api.tomtom.com",
+        "/search/2/geometrySearch/pizza.json",
+        "GET",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/get_geometry_search.json")),
+    )
+
+    geometry_search = GeometrySearch(search_api)
+    response = await geometry_search.search(query="pizza", geometryList=[DENSE_POLYGON, CIRCLE], params=GeometrySearchParams(categorySet=["7315"]))
+
+    assert isinstance(response, SearchResponse)
+    assert geometry_search.stats.requests == 1
+    assert geometry_search.stats.posted == 0
+    assert geometry_search.stats.vertices_removed > 270
+    assert geometry_search.stats.bytes_saved > 10_000
+
+
+async def test_search_post(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a geometry search that exceeds the URL length is sent with POST."""
+    aresponses.add(
+        "api.tomtom.com",
+        "/search/2/geometrySearch/pizza.json",
+        "POST",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/post_geometry_search.json")),
+    )
+
+    geometry_search = GeometrySearch(search_api, tolerance=None)
+    response = await geometry_search.search(query="pizza", geometryList=[DENSE_POLYGON])
+
+    assert isinstance(response, SearchResponse)
+    assert geometry_search.stats.posted == 1
+    assert geometry_search.stats.bytes_saved == 0
+
+
+async def test_filter(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test geometry filters switch to POST when the URL exceeds the maximum length."""
+    aresponses.add(
+        "api.tomtom.com",
+        "/search/2/geometryFilter.json",
+        "GET",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/get_geometry_filter.json")),
+    )
+    aresponses.add(
+        "api.tomtom.com",
+        "/search/2/geometryFilter.json",
+        "POST",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/search/post_geometry_filter.json")),
+    )
+
+    geometry_search = GeometrySearch(search_api, max_url_length=500)
+    response = await geometry_search.filter(geometryList=[CIRCLE], poiList=POIS)
+    assert isinstance(response, GeometryFilterResponse)
+    assert geometry_search.stats.posted == 0
+
+    response = await geometry_search.filter(geometryList=[DENSE_POLYGON], poiList=POIS)
+    assert isinstance(response, GeometryFilterResponse)
+    assert geometry_search.stats.requests == 2
+    assert geometry_search.stats.posted == 1
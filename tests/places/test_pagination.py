@@ -0,0 +1,116 @@
+"""Pagination tests."""
+
+import json
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatLon
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.models import Address, CategorySearchParams, PoiSearchParams, Result, SearchParams, SearchResponse, Summary
+from tomtom_apis.places.pagination import paginate, paginate_category_search, paginate_nearby_search, paginate_poi_search, paginate_search
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def search_page(ids: list[str], total: int) -> str:
+    """Build a search response with the given result ids, based on the search fixture."""
+    data = json.loads(load_json("places/search/get_search.json"))
+    template = data["results"][0]
+    data["results"] = [{**template, "id": result_id} for result_id in ids]
+    data["summary"]["numResults"] = len(ids)
+    data["summary"]["totalResults"] = total
+    return json.dumps(data)
+
+
+def add_pages(aresponses: ResponsesMockServer, pages: dict[int, str], requested: list[int]) -> None:
+    """Add a handler to the mock server that serves a page per offset."""
+
+    def handler(request: web.Request) -> web.Response:
+        offset = int(request.query["ofs"])
+        requested.append(offset)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=pages[offset])
+
+    aresponses.add(response=handler, repeat=len(pages))
+
+
+async def test_paginate_search(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test all pages are walked and duplicates are skipped."""
+    requested: list[int] = []
+    add_pages(
+        aresponses,
+        {
+            0: search_page(["0", "1", "2", "3"], total=10),
+            4: search_page(["3", "4", "5", "6"], total=10),
+            8: search_page(["7", "8"], total=10),
+        },
+        requested,
+    )
+
+    results = [result async for result in paginate_search(search_api, query="pizza", params=SearchParams(lat=37.337, lon=-121.89), page_size=4)]
+
+    assert [result.id for result in results] == [str(i) for i in range(9)]
+    assert requested == [0, 4, 8]
+
+
+async def test_paginate_total_results(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test iteration stops at the total number of results."""
+    requested: list[int] = []
+    add_pages(aresponses, {4: search_page(["4", "5", "6", "7"], total=8)}, requested)
+
+    results = [result async for result in paginate_poi_search(search_api, query="pizza", params=PoiSearchParams(ofs=4), page_size=4)]
+
+    assert len(results) == 4
+    assert requested == [4]
+
+
+async def test_paginate_break_cancels_prefetch(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test breaking out of the iteration cancels the prefetched page."""
+    requested: list[int] = []
+    add_pages(aresponses, {0: search_page(["0", "1"], total=100), 2: search_page(["2", "3"], total=100)}, requested)
+
+    iterator = paginate_category_search(search_api, query="pizza", params=CategorySearchParams(categorySet=["7315"]), page_size=2)
+    async for result in iterator:
+        assert result.id == "0"
+        break
+    await iterator.aclose()
+
+    assert requested == [0]
+
+
+async def test_paginate_nearby_search(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test a single short page."""
+    requested: list[int] = []
+    add_pages(aresponses, {0: search_page(["0"], total=1)}, requested)
+
+    results = [result async for result in paginate_nearby_search(search_api, lat=48.872263, lon=2.299541)]
+
+    assert len(results) == 1
+    assert requested == [0]
+
+
+async def test_paginate_max_offset() -> None:
+    """Test iteration stops at the maximum offset."""
+    requested: list[int] = []
+
+    async def fetch_page(offset: int, limit: int) -> SearchResponse:
+        requested.append(offset)
+        results = [Result(id=f"{offset + i}", address=Address(), position=LatLon(lat=0, lon=0)) for i in range(limit)]
+        return SearchResponse(summary=Summary(numResults=limit), results=results)
+
+    results = [result async for result in paginate(fetch_page, page_size=2, max_offset=2)]
+
+    assert [result.id for result in results] == ["0", "1", "2", "3"]
+    assert requested == [0, 2]
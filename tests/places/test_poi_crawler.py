@@ -0,0 +1,115 @@
+"""POI crawler tests."""
+
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.exceptions import TomTomAPIServerError
+from tomtom_apis.models import LatLon
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.models import BoundingBox, CategorySearchParams
+from tomtom_apis.places.poi_crawler import PoiCrawler
+
+# Two dense blocks of 60 POIs in the south and 10 scattered POIs in the north.
+POIS: list[tuple[float, float]] = [
+    *[(52.0 + i * 0.001, lon + j * 0.001) for lon in (4.0, 4.6) for i in range(6) for j in range(10)],
+    *[(52.9, 4.1 + i * 0.08) for i in range(10)],
+]
+BBOX = BoundingBox(topLeftPoint=LatLon(lat=53.0, lon=4.0), btmRightPoint=LatLon(lat=52.0, lon=5.0))
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def add_category_search(aresponses: ResponsesMockServer, requests: list[str], failing: set[int] | None = None) -> None:
+    """Add a handler that serves the POIs within the requested bounding box, up to the limit, and fails the given request numbers."""
+    template = json.loads(load_json("places/search/get_category_search.json"))
+
+    def handler(request: web.Request) -> web.Response:
+        requests.append(f"{request.query['topLeft']}:{request.query['btmRight']}")
+        if failing is not None and len(requests) in failing:
+            return aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR)
+
+        north, west = map(float, request.query["topLeft"].split(","))
+        south, east = map(float, request.query["btmRight"].split(","))
+        matches = [(lat, lon) for lat, lon in POIS if south <= lat < north and west <= lon < east]
+        limit = int(request.query["limit"])
+        results = [{**template["results"][0], "id": f"{lat},{lon}", "position": {"lat": lat, "lon": lon}} for lat, lon in matches[:limit]]
+        summary = {**template["summary"], "numResults": len(results), "totalResults": len(matches)}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"summary": summary, "results": results}))
+
+    aresponses.add(response=handler, repeat=100)
+
+
+async def test_crawl_bounding_box(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test cells that hit the limit are subdivided until all POIs are found."""
+    requests: list[str] = []
+    add_category_search(aresponses, requests)
+
+    crawler = PoiCrawler(search_api, max_concurrency=2)
+    result = await crawler.crawl(query="pizza", area=BBOX, params=CategorySearchParams(categorySet=["7315"]))
+
+    assert len(result.results) == len(POIS)
+    assert result.stats.requests == 5
+    assert result.stats.subdivided == 1
+    assert result.stats.truncated == 0
+    assert requests[0] == "53.0,4.0:52.0,5.0"
+
+
+async def test_crawl_polygon(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test cells outside the polygon are skipped and POIs outside the polygon are dropped."""
+    requests: list[str] = []
+    add_category_search(aresponses, requests)
+
+    # A concave polygon around the southern blocks that leaves out the north-east of its bounding box.
+    polygon = [LatLon(lat=51.999, lon=3.999), LatLon(lat=52.95, lon=3.999), LatLon(lat=52.3, lon=4.3), LatLon(lat=51.999, lon=4.95)]
+    result = await PoiCrawler(search_api).crawl(query="pizza", area=polygon)
+
+    assert len(result.results) == 120
+    assert result.stats.skipped == 1
+    assert result.stats.requests == 4
+
+
+async def test_crawl_max_depth(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test cells are not subdivided beyond the maximum depth."""
+    requests: list[str] = []
+    add_category_search(aresponses, requests)
+
+    result = await PoiCrawler(search_api, max_depth=0).crawl(query="pizza", area=BBOX)
+
+    assert len(result.results) == 100
+    assert result.stats.truncated == 1
+
+
+async def test_crawl_resume(search_api: SearchApi, aresponses: ResponsesMockServer, tmp_path: Path) -> None:
+    """Test a failed crawl is resumed from its checkpoint."""
+    requests: list[str] = []
+    add_category_search(aresponses, requests, failing={3})
+    checkpoint_path = tmp_path / "crawl.json"
+
+    crawler = PoiCrawler(search_api, max_concurrency=1, checkpoint_path=checkpoint_path)
+    with pytest.raises(TomTomAPIServerError):
+        await crawler.crawl(query="pizza", area=BBOX)
+
+    assert checkpoint_path.exists()
+    assert len(json.loads(checkpoint_path.read_text())) == 4 - 1
+
+    result = await crawler.crawl(query="pizza", area=BBOX)
+
+    assert len(result.results) == len(POIS)
+    assert result.stats.requests == 3
+    assert not checkpoint_path.exists()
+    assert not checkpoint_path.with_suffix(".results.ndjson").exists()
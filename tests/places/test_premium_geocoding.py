@@ -35,3 +35,5 @@ async def test_deserialization_get_geocode(premium_geocoding_api: PremiumGeocodi
     assert response.results[0].position
     assert response.results[0].position.lat == 30.23966941103544
     assert response.results[0].position.lon == -97.78704138350255
+    assert response.results[0].matchConfidence
+    assert response.results[0].matchConfidence.score == 0.7150310475515943
@@ -0,0 +1,104 @@
+"""Reverse Geocoding cache tests."""
+
+from collections.abc import AsyncGenerator
+from unittest.mock import patch
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatLon
+from tomtom_apis.places import ReverseGeocodingApi
+from tomtom_apis.places.models import ReverseGeocodeParams
+from tomtom_apis.places.reverse_geocoding_cache import ReverseGeocodingCache
+
+
+@pytest.fixture(name="reverse_geocoding_cache")
+async def fixture_reverse_geocoding_cache() -> AsyncGenerator[ReverseGeocodingCache]:
+    """Fixture for ReverseGeocodingCache."""
+    options = ApiOptions(api_key=API_KEY)
+    async with ReverseGeocodingApi(options) as reverse_geocoding:
+        yield ReverseGeocodingCache(reverse_geocoding)
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["places/reverse_geocoding/get_reverse_geocode.json"], indirect=True)
+async def test_get_reverse_geocode_within_tolerance(reverse_geocoding_cache: ReverseGeocodingCache) -> None:
+    """Test a nearby position is answered from the cache."""
+    first = await reverse_geocoding_cache.get_reverse_geocode(position=LatLon(lat=37.8328, lon=-122.27669))
+    # About 11 meters away, the mock server only serves a single response.
+    second = await reverse_geocoding_cache.get_reverse_geocode(position=LatLon(lat=37.8329, lon=-122.27669))
+
+    assert second is first
+    assert second.addresses[0].address.streetName == "42nd Street"
+    assert reverse_geocoding_cache.stats.hits == 1
+    assert reverse_geocoding_cache.stats.misses == 1
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["places/reverse_geocoding/get_reverse_geocode.json"], indirect=True)
+async def test_nearest(reverse_geocoding_cache: ReverseGeocodingCache) -> None:
+    """Test the nearest lookup respects the tolerance, the params and the neighbouring cells."""
+    position = LatLon(lat=37.8328, lon=-122.27669)
+    params = ReverseGeocodeParams(radius=100)
+    response = await reverse_geocoding_cache.get_reverse_geocode(position=position, params=params)
+
+    assert reverse_geocoding_cache.nearest(position=position, params=params) is response
+    assert reverse_geocoding_cache.nearest(position=position) is None
+    assert reverse_geocoding_cache.nearest(position=LatLon(lat=37.8335, lon=-122.27669), params=params) is None
+    # A position in the neighbouring tile, but within the tolerance.
+    assert reverse_geocoding_cache.nearest(position=LatLon(lat=37.8328, lon=-122.27659), params=params) is response
+
+    reverse_geocoding_cache.clear()
+    assert reverse_geocoding_cache.nearest(position=position, params=params) is None
+
+
+async def test_positions_per_cell(reverse_geocoding_cache: ReverseGeocodingCache, aresponses: ResponsesMockServer) -> None:
+    """Test only the most recent positions are kept per cell."""
+    aresponses.add(
+        response=aresponses.Response(
+            status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/reverse_geocoding/get_reverse_geocode.json")
+        ),
+        repeat=2,
+    )
+    reverse_geocoding_cache.max_positions_per_cell = 1
+    position = LatLon(lat=37.8328, lon=-122.27669)
+    await reverse_geocoding_cache.get_reverse_geocode(position=position)
+    await reverse_geocoding_cache.get_reverse_geocode(position=LatLon(lat=37.83285, lon=-122.2764))
+
+    assert reverse_geocoding_cache.nearest(position=position) is None
+    assert reverse_geocoding_cache.stats.misses == 2
+
+
+async def test_ttl(reverse_geocoding_cache: ReverseGeocodingCache, aresponses: ResponsesMockServer) -> None:
+    """Test every cached position expires after the ttl, also when a newer position was stored in its cell."""
+    aresponses.add(
+        response=aresponses.Response(
+            status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=load_json("places/reverse_geocoding/get_reverse_geocode.json")
+        ),
+        repeat=2,
+    )
+    reverse_geocoding_cache.ttl = 10
+    first, second = LatLon(lat=37.8328, lon=-122.27669), LatLon(lat=37.83285, lon=-122.2764)
+    with patch("tomtom_apis.places.reverse_geocoding_cache.time.monotonic", return_value=100.0):
+        await reverse_geocoding_cache.get_reverse_geocode(position=first)
+    with patch("tomtom_apis.places.reverse_geocoding_cache.time.monotonic", return_value=105.0):
+        await reverse_geocoding_cache.get_reverse_geocode(position=second)
+        assert reverse_geocoding_cache.nearest(position=first) is not None
+
+    with patch("tomtom_apis.places.reverse_geocoding_cache.time.monotonic", return_value=111.0):
+        assert reverse_geocoding_cache.nearest(position=first) is None
+        assert reverse_geocoding_cache.nearest(position=second) is not None
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["places/reverse_geocoding/get_reverse_geocode.json"], indirect=True)
+async def test_outside_tile_grid(reverse_geocoding_cache: ReverseGeocodingCache) -> None:
+    """Test positions outside the tile grid are not cached."""
+    position = LatLon(lat=89.0, lon=0.0)
+    await reverse_geocoding_cache.get_reverse_geocode(position=position)
+
+    assert reverse_geocoding_cache.nearest(position=position) is None
@@ -0,0 +1,136 @@
+"""Route corridor search tests."""
+
+import itertools
+import json
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places import SearchApi
+from tomtom_apis.places.models import SearchAlongRouteParams
+from tomtom_apis.places.route_corridor import RouteCorridorSearch, route_points
+from tomtom_apis.routing.models import CalculatedRouteResponse
+
+TEMPLATE = json.loads(load_json("places/search/post_search_along_route.json"))["results"][0]
+
+# POIs along the route by longitude, "everywhere" is returned by every segment.
+POIS = {"east": 5.8, "west": 4.2, "middle": 5.0}
+
+
+@pytest.fixture(name="search_api")
+async def fixture_search_api() -> AsyncGenerator[SearchApi]:
+    """Fixture for SearchApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with SearchApi(options) as search:
+        yield search
+
+
+def zigzag_route(legs: int = 2, points_per_leg: int = 101) -> CalculatedRouteResponse:
+    """Build a route from west to east of about 137 km as the crow flies, zigzagging so simplification keeps every point."""
+    data = json.loads(load_json("routing/routing/get_calculate_route.json"))
+    route = data["routes"][0]
+    leg = route["legs"][0]
+    step = 2.0 / max(1, legs * (points_per_leg - 1))
+    route["legs"] = [
+        {
+            "summary": leg["summary"],
+            "points": [
+                {"latitude": 52.0 + 0.01 * ((i + j * (points_per_leg - 1)) % 2), "longitude": 4.0 + step * (i + j * (points_per_leg - 1))}
+                for i in range(points_per_leg)
+            ],
+        }
+        for j in range(legs)
+    ]
+    return CalculatedRouteResponse.from_dict(data)
+
+
+def detour(west: float) -> int:
+    """Get the detour time of "everywhere" for a segment, the smallest for the segment that starts closest before it."""
+    return round((4.9 - west) * 100) if west <= 4.9 else 1000
+
+
+def add_search_along_route(aresponses: ResponsesMockServer, requests: list[list[dict[str, float]]]) -> None:
+    """Add a search along route handler that returns the POIs within the longitudes of the posted route."""
+
+    async def handler(request: web.Request) -> web.Response:
+        points = (await request.json())["route"]["points"]
+        requests.append(points)
+        west, east = points[0]["lon"], points[-1]["lon"]
+        results: list[dict[str, Any]] = [
+            {**TEMPLATE, "id": poi, "position": {"lat": 52.005, "lon": lon}, "detourTime": 60} for poi, lon in POIS.items() if west <= lon <= east
+        ]
+        results.append({**TEMPLATE, "id": "everywhere", "position": {"lat": 52.005, "lon": 4.9}, "detourTime": detour(west)})
+        body = {"summary": {"query": "pizza", "queryTime": 10, "numResults": len(results)}, "results": results}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+    aresponses.add("api.tomtom.com", "/search/2/searchAlongRoute/pizza.json", "POST", response=handler, repeat=20)
+
+
+async def test_search(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test the route is split into overlapping segments and the results are merged in route order."""
+    requests: list[list[dict[str, float]]] = []
+    add_search_along_route(aresponses, requests)
+    corridor = RouteCorridorSearch(search_api, max_points=60, segment_length=1_000_000.0)
+
+    response = await corridor.search(query="pizza", maxDetourTime=600, route=zigzag_route(), params=SearchAlongRouteParams(limit=20))
+
+    assert [result.id for result in response.results] == ["west", "everywhere", "middle", "east"]
+    assert response.results[1].detourTime == min(detour(points[0]["lon"]) for points in requests)
+    assert response.summary.numResults == 4
+    assert response.summary.queryTime == 10 * len(requests)
+    assert corridor.stats.points == corridor.stats.simplified_points == 201
+    assert corridor.stats.segments == len(requests) == 4
+    assert corridor.stats.duplicates >= len(requests) - 1
+    assert all(len(points) <= 60 for points in requests)
+    for previous, current in itertools.pairwise(requests):
+        assert current[0]["lon"] < previous[-1]["lon"]
+    assert requests[-1][-1]["lon"] == pytest.approx(6.0)
+
+
+async def test_search_segment_length(search_api: SearchApi, aresponses: ResponsesMockServer) -> None:
+    """Test segments are split by length, and straight parts of the route are simplified."""
+    requests: list[list[dict[str, float]]] = []
+    add_search_along_route(aresponses, requests)
+    route = zigzag_route()
+    for leg in route.routes[0].legs:
+        for point in leg.points:
+            point.latitude = 52.0
+    corridor = RouteCorridorSearch(search_api, segment_length=30_000.0, overlap=1_000.0)
+
+    response = await corridor.search(query="pizza", maxDetourTime=600, route=route)
+
+    assert corridor.stats.simplified_points == 2
+    assert len(requests) == 1
+    assert len(response.results) == 4
+
+    corridor.tolerance = 0.0
+    await corridor.search(query="pizza", maxDetourTime=600, route=route)
+
+    # About 137 km in segments of at most 30 km, starting at most 1 km before the end of the previous segment.
+    assert len(requests) == 1 + 5
+
+
+def test_route_points() -> None:
+    """Test the points of consecutive legs are joined once."""
+    points = route_points(zigzag_route(legs=3, points_per_leg=5))
+
+    assert len(points) == 13
+    assert points[0] == (52.0, 4.0)
+    assert points[-1] == pytest.approx((52.0, 6.0))
+
+
+async def test_invalid(search_api: SearchApi) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="max_points"):
+        RouteCorridorSearch(search_api, max_points=1)
+    with pytest.raises(ValueError, match="overlap"):
+        RouteCorridorSearch(search_api, overlap=10.0, segment_length=10.0)
+    with pytest.raises(ValueError, match="2 distinct points"):
+        await RouteCorridorSearch(search_api).search(query="pizza", maxDetourTime=600, route=zigzag_route(legs=1, points_per_leg=1))
@@ -0,0 +1,19 @@
+"""Conftest for the routing tests."""
+
+import math
+
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.models import ReachableRange
+
+
+def circle(lat: float, lon: float, radius: float, count: int = 360) -> ReachableRange:
+    """Build a reachable range with a circular boundary of a radius in meters."""
+    scale = radius / 6_371_000 * 180 / math.pi
+    boundary = [
+        LatitudeLongitude(
+            latitude=lat + scale * math.sin(2 * math.pi * i / count),
+            longitude=lon + scale * math.cos(2 * math.pi * i / count) / math.cos(math.radians(lat)),
+        )
+        for i in range(count)
+    ]
+    return ReachableRange(center=LatitudeLongitude(latitude=lat, longitude=lon), boundary=boundary)
@@ -0,0 +1,220 @@
+"""Batch route executor tests."""
+
+import asyncio
+import json
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientTimeout, web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatLon, LatLonList, TravelModeType
+from tomtom_apis.routing import BatchRoutingApi
+from tomtom_apis.routing.batch_route_executor import BatchRouteExecutor, route_query
+from tomtom_apis.routing.models import AvoidType, CalculateRouteParams
+
+ROUTE = json.loads(load_json("routing/routing/get_calculate_route.json"))
+
+
+@pytest.fixture(name="batch_routing_api")
+async def fixture_batch_routing_api() -> AsyncGenerator[BatchRoutingApi]:
+    """Fixture for BatchRoutingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with BatchRoutingApi(options) as batch_routing:
+        yield batch_routing
+
+
+def routes(count: int) -> list[tuple[LatLonList, CalculateRouteParams | None]]:
+    """Build routes, the route with index 3 can not be calculated."""
+    return [(LatLonList(locations=[LatLon(lat=52.0, lon=4.0), LatLon(lat=52.0, lon=4.0 + i / 100)]), None) for i in range(count)]
+
+
+def batch_response(items: list[dict[str, str]]) -> str:
+    """Build the response of a batch, an item fails when its destination is 4.03."""
+    batch_items: list[dict[str, Any]] = []
+    for item in items:
+        if "52.0,4.03/" in item["query"]:
+            batch_items.append({"statusCode": 400, "response": {"error": {"description": "NO_ROUTE_FOUND"}}})
+        else:
+            batch_items.append({"statusCode": 200, "response": {**ROUTE, "formatVersion": item["query"]}})
+    successes = sum(1 for item in batch_items if item["statusCode"] == 200)
+    return json.dumps(
+        {"formatVersion": "0.0.1", "batchItems": batch_items, "summary": {"successfulRequests": successes, "totalRequests": len(items)}}
+    )
+
+
+async def test_calculate_routes(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test routes are chunked into batches and decoded in order."""
+    sizes: list[int] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        items = (await request.json())["batchItems"]
+        sizes.append(len(items))
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=batch_response(items))
+
+    aresponses.add("api.tomtom.com", "/routing/1/batch/sync/json", "POST", response=handler, repeat=3)
+    executor = BatchRouteExecutor(batch_routing_api, max_items=2)
+
+    results = await executor.calculate_routes(routes(5))
+
+    assert sorted(sizes) == [1, 2, 2]
+    assert [result.status_code for result in results] == [200, 200, 200, 400, 200]
+    assert results[3].response is None
+    assert results[3].error == "NO_ROUTE_FOUND"
+    assert results[4].response
+    assert results[4].response.formatVersion == "/calculateRoute/52.0,4.0:52.0,4.04/json"
+    assert results[4].response.routes[0].summary.lengthInMeters == 1146
+    assert executor.stats.batches == 3
+    assert executor.stats.items == 5
+    assert executor.stats.failures == 1
+
+
+async def test_retries(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test only items that failed temporarily are sent again, up to the maximum number of retries."""
+    sent: list[list[str]] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        items = (await request.json())["batchItems"]
+        sent.append([item["query"].split(":")[1] for item in items])
+        failing = {"52.0,4.01/json": 503} if len(sent) == 1 else {}
+        failing["52.0,4.02/json"] = 429
+        batch = json.loads(batch_response(items))
+        for item, batch_item in zip(items, batch["batchItems"], strict=True):
+            if (status := failing.get(item["query"].split(":")[1])) is not None:
+                batch_item.update(statusCode=status, response={"error": {"description": "Try again"}})
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(batch))
+
+    aresponses.add("api.tomtom.com", "/routing/1/batch/sync/json", "POST", response=handler, repeat=3)
+    executor = BatchRouteExecutor(batch_routing_api, retry_delay=0.01)
+
+    results = await executor.calculate_routes(routes(4))
+
+    assert sent == [["52.0,4.0/json", "52.0,4.01/json", "52.0,4.02/json", "52.0,4.03/json"], ["52.0,4.01/json", "52.0,4.02/json"], ["52.0,4.02/json"]]
+    assert [result.status_code for result in results] == [200, 200, 429, 400]
+    assert results[2].retryable
+    assert not results[3].retryable
+    assert executor.stats.retries == 3
+    assert executor.stats.failures == 2
+
+
+async def test_failed_batch(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test a batch that fails as a whole fails and retries only its own routes, the other batch keeps its results."""
+    sent: list[str] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        items = (await request.json())["batchItems"]
+        sent.append(items[0]["query"].split(":")[1])
+        if sent.count("52.0,4.0/json") == 1 and sent[-1] == "52.0,4.0/json":
+            return aresponses.Response(status=HttpStatus.SERVICE_UNAVAILABLE, headers=DEFAULT_HEADERS, text="{}")
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=batch_response(items))
+
+    aresponses.add("api.tomtom.com", "/routing/1/batch/sync/json", "POST", response=handler, repeat=3)
+    executor = BatchRouteExecutor(batch_routing_api, max_items=2, retry_delay=0.01)
+
+    results = await executor.calculate_routes(routes(4))
+
+    assert sorted(sent) == ["52.0,4.0/json", "52.0,4.0/json", "52.0,4.02/json"]
+    assert [result.status_code for result in results] == [200, 200, 200, 400]
+    assert executor.stats.retries == 2
+    assert executor.stats.failures == 1
+
+
+async def test_failed_batch_status(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test a batch that fails with a client error fails its routes permanently, and a batch with missing items fails all its routes."""
+    aresponses.add(
+        "api.tomtom.com", "/routing/1/batch/sync/json", "POST", aresponses.Response(status=HttpStatus.BAD_REQUEST, headers=DEFAULT_HEADERS, text="{}")
+    )
+    aresponses.add(
+        "api.tomtom.com",
+        "/routing/1/batch/sync/json",
+        "POST",
+        aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=batch_response([])),
+    )
+    executor = BatchRouteExecutor(batch_routing_api, max_retries=0)
+
+    assert [result.status_code for result in await executor.calculate_routes(routes(2))] == [400, 400]
+    results = await executor.calculate_routes(routes(2))
+    assert [result.status_code for result in results] == [500, 500]
+    assert results[0].error == "Batch of 2 routes returned 0 items"
+
+
+async def test_wait_time_is_capped(batch_routing_api: BatchRoutingApi) -> None:
+    """Test the wait time of the service stays below the timeout of the client."""
+    assert BatchRouteExecutor(batch_routing_api).wait_time_seconds == 8
+    assert BatchRouteExecutor(batch_routing_api, wait_time_seconds=5).wait_time_seconds == 5
+    async with BatchRoutingApi(ApiOptions(api_key=API_KEY, timeout=ClientTimeout(total=None))) as api:
+        assert BatchRouteExecutor(api).wait_time_seconds == 120
+
+
+async def test_calculate_routes_async(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test asynchronous batches are downloaded once they are done."""
+    batches: dict[str, list[dict[str, str]]] = {}
+    downloads: list[str] = []
+
+    async def submit(request: web.Request) -> web.Response:
+        assert request.query["redirectMode"] == "manual"
+        assert request.query["waitTimeSeconds"] == "8"
+        batch_id = f"batch-{len(batches)}"
+        batches[batch_id] = (await request.json())["batchItems"]
+        return aresponses.Response(status=HttpStatus.ACCEPTED, headers={"Location": f"/routing/1/batch/{batch_id}?waitTimeSeconds=120"})
+
+    async def download(request: web.Request) -> web.Response:
+        batch_id = request.path.rsplit("/", 1)[-1]
+        downloads.append(batch_id)
+        assert request.query["waitTimeSeconds"] == "8"
+        if downloads.count(batch_id) < 3:
+            return aresponses.Response(status=HttpStatus.ACCEPTED)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=batch_response(batches[batch_id]))
+
+    aresponses.add("api.tomtom.com", "/routing/1/batch/json", "POST", response=submit)
+    aresponses.add("api.tomtom.com", "/routing/1/batch/batch-0", "GET", response=download, repeat=3)
+    executor = BatchRouteExecutor(batch_routing_api, use_async=True, poll_interval=0.01)
+
+    results = await executor.calculate_routes(routes(3))
+
+    assert len(results) == 3
+    assert downloads == ["batch-0", "batch-0", "batch-0"]
+    assert executor.stats.batches == 1
+
+
+async def test_calculate_routes_async_without_location(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test an asynchronous submission without a Location fails its routes with a server error."""
+    aresponses.add("api.tomtom.com", "/routing/1/batch/json", "POST", aresponses.Response(status=HttpStatus.ACCEPTED))
+    executor = BatchRouteExecutor(batch_routing_api, use_async=True, max_retries=0)
+
+    results = await executor.calculate_routes(routes(1))
+
+    assert results[0].status_code == HttpStatus.INTERNAL_SERVER_ERROR
+    assert results[0].error == "Asynchronous batch submission did not return a Location"
+    assert results[0].retryable
+
+
+async def test_cancelled_batch(batch_routing_api: BatchRoutingApi) -> None:
+    """Test a cancelled batch cancels the calculation instead of failing its routes."""
+    executor = BatchRouteExecutor(batch_routing_api)
+
+    with patch.object(executor, "_send", side_effect=asyncio.CancelledError), pytest.raises(asyncio.CancelledError):
+        await executor.calculate_routes(routes(1))
+
+
+def test_route_query() -> None:
+    """Test the query of a batch item, without the api key."""
+    locations = LatLonList(locations=[LatLon(lat=52.5, lon=13.4), LatLon(lat=52.4, lon=13.3)])
+    params = CalculateRouteParams(key="secret", travelMode=TravelModeType.CAR, avoid=[AvoidType.TOLL_ROADS, AvoidType.FERRIES], traffic=True)
+
+    assert route_query(locations) == "/calculateRoute/52.5,13.4:52.4,13.3/json"
+    assert route_query(locations, params) == "/calculateRoute/52.5,13.4:52.4,13.3/json?traffic=true&avoid=tollRoads&avoid=ferries&travelMode=car"
+
+
+async def test_invalid(batch_routing_api: BatchRoutingApi) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="max_items"):
+        BatchRouteExecutor(batch_routing_api, max_items=101)
+    with pytest.raises(ValueError, match="max_items"):
+        BatchRouteExecutor(batch_routing_api, use_async=True, max_items=0)
@@ -0,0 +1,66 @@
+"""Batch Routing tests."""
+
+from collections.abc import AsyncGenerator
+
+import pytest
+from aresponses import ResponsesMockServer
+
+from tests.const import API_KEY
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.places.models import AsynchronousBatchDownloadParams
+from tomtom_apis.routing import BatchRoutingApi
+from tomtom_apis.routing.models import BatchRoutingItem, BatchRoutingPostData, BatchRoutingResponse
+
+DATA = BatchRoutingPostData(
+    batchItems=[
+        BatchRoutingItem(query="/calculateRoute/52.50931,13.42936:52.50274,13.43872/json?travelMode=car&routeType=eco"),
+        BatchRoutingItem(query="/calculateRoute/53.5,8.2:53.5,8.2/json"),
+    ],
+)
+
+
+@pytest.fixture(name="batch_routing_api")
+async def fixture_batch_routing_api() -> AsyncGenerator[BatchRoutingApi]:
+    """Fixture for BatchRoutingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with BatchRoutingApi(options) as batch_routing:
+        yield batch_routing
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/batch_routing/post_synchronous_batch.json"], indirect=True)
+async def test_deserialization_post_synchronous_batch(batch_routing_api: BatchRoutingApi) -> None:
+    """Test the post_synchronous_batch method."""
+    response = await batch_routing_api.post_synchronous_batch(data=DATA)
+
+    assert isinstance(response, BatchRoutingResponse)
+    assert response.summary.totalRequests == 2
+    assert response.batchItems[0].statusCode == 200
+    assert "routes" in response.batchItems[0].response
+
+
+async def test_post_asynchronous_batch_submission(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test the post_asynchronous_batch_submission method."""
+    aresponses.add(response=aresponses.Response(status=HttpStatus.ACCEPTED, headers={"Location": "/routing/1/batch/abc"}))
+
+    response = await batch_routing_api.post_asynchronous_batch_submission(data=DATA)
+
+    assert response == "/routing/1/batch/abc"
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/batch_routing/get_asynchronous_batch_download.json"], indirect=True)
+async def test_deserialization_get_asynchronous_batch_download(batch_routing_api: BatchRoutingApi) -> None:
+    """Test the get_asynchronous_batch_download method."""
+    response = await batch_routing_api.get_asynchronous_batch_download(batch_id="abc", params=AsynchronousBatchDownloadParams(waitTimeSeconds=120))
+
+    assert isinstance(response, BatchRoutingResponse)
+    assert response.summary.successfulRequests == 1
+
+
+async def test_get_asynchronous_batch_download_in_progress(batch_routing_api: BatchRoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test the get_asynchronous_batch_download method while the batch is being processed."""
+    aresponses.add(response=aresponses.Response(status=HttpStatus.ACCEPTED))
+
+    assert await batch_routing_api.get_asynchronous_batch_download(batch_id="abc") is None
@@ -0,0 +1,106 @@
+"""Columnar route geometry tests."""
+
+import json
+
+import pytest
+
+from tests.conftest import load_json
+from tomtom_apis.geo import haversine_distance
+from tomtom_apis.routing.columnar import ColumnarRouteResponse, PointColumns
+from tomtom_apis.routing.models import (
+    CalculatedLongDistanceEVRouteResponse,
+    CalculatedRouteResponse,
+    EVLegSummary,
+    EVSummary,
+    SectionResponseType,
+    Summary,
+)
+
+
+def test_from_json() -> None:
+    """Test the columnar response has the same summaries and points as the regular response."""
+    data = load_json("routing/routing/get_calculate_route.json")
+    expected = CalculatedRouteResponse.from_json(data)
+
+    response = ColumnarRouteResponse.from_json(data.encode())
+
+    assert response.format_version == expected.formatVersion
+    route = response.routes[0]
+    assert route.summary == expected.routes[0].summary
+    assert route.guidance is None
+    assert route.sections == expected.routes[0].sections
+    for leg, expected_leg in zip(route.legs, expected.routes[0].legs, strict=True):
+        assert leg.summary == expected_leg.summary
+        assert len(leg.geometry) == len(expected_leg.points)
+        points = leg.points
+        assert points == expected_leg.points
+        assert leg.points is points
+
+
+def test_from_json_ev() -> None:
+    """Test EV summaries, and that the section point indices refer to the joined points of the legs."""
+    data = load_json("routing/long_distance_ev_routing/post_calculate_long_distance_ev_route.json")
+    expected = CalculatedLongDistanceEVRouteResponse.from_json(data)
+
+    route = ColumnarRouteResponse.from_json(data).routes[0]
+
+    assert isinstance(route.summary, EVSummary)
+    assert [type(leg.summary) for leg in route.legs] == [EVLegSummary, EVLegSummary, Summary]
+    assert [leg.points for leg in route.legs] == [leg.points for leg in expected.routes[0].legs]
+    assert route.sections[0].sectionType == SectionResponseType.TRAVEL_MODE
+    assert len(route.geometry()) == route.sections[-1].endPointIndex + 1
+
+
+def test_from_json_electric_vehicle() -> None:
+    """Test an electric vehicle route without charging information has regular summaries, like the regular response."""
+    data = json.loads(load_json("routing/routing/get_calculate_route.json"))
+    data["routes"][0]["summary"]["batteryConsumptionInkWh"] = 1.5
+    for leg in data["routes"][0]["legs"]:
+        leg["summary"]["batteryConsumptionInkWh"] = 0.5
+    expected = CalculatedRouteResponse.from_dict(data)
+
+    route = ColumnarRouteResponse.from_json(json.dumps(data)).routes[0]
+
+    assert not isinstance(route.summary, EVSummary)
+    assert route.summary == expected.routes[0].summary
+    assert [leg.summary for leg in route.legs] == [leg.summary for leg in expected.routes[0].legs]
+
+
+def test_guidance_is_kept_raw() -> None:
+    """Test guidance is kept as parsed, and missing sections are empty."""
+    data = json.loads(load_json("routing/routing/get_calculate_route.json"))
+    del data["routes"][0]["sections"]
+    data["routes"][0]["guidance"] = {"instructions": [{"routeOffsetInMeters": 0}]}
+
+    route = ColumnarRouteResponse.from_json(json.dumps(data)).routes[0]
+
+    assert route.guidance == {"instructions": [{"routeOffsetInMeters": 0}]}
+    assert not route.sections
+
+
+def test_cumulative_distances() -> None:
+    """Test the cumulative distances match the haversine distance between consecutive points."""
+    columns = PointColumns()
+    assert not columns.cumulative_distances()
+
+    columns.lat.extend([52.0, 52.0, 52.1])
+    columns.lon.extend([4.0, 4.1, 4.1])
+    distances = columns.cumulative_distances()
+
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(haversine_distance(52.0, 4.0, 52.0, 4.1))
+    assert distances[2] == pytest.approx(distances[1] + haversine_distance(52.0, 4.1, 52.1, 4.1))
+
+
+def test_to_numpy() -> None:
+    """Test the NumPy arrays share memory with the columns."""
+    pytest.importorskip("numpy")
+    columns = PointColumns()
+    columns.lat.extend([52.0, 52.1])
+    columns.lon.extend([4.0, 4.1])
+
+    lat, lon = columns.to_numpy()
+
+    assert lat.tolist() == [52.0, 52.1]
+    assert lon.tolist() == [4.0, 4.1]
+    assert not lat.flags.owndata
@@ -0,0 +1,158 @@
+"""Multi-origin isochrone engine tests."""
+
+import json
+import math
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tests.routing.conftest import circle
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.geo import haversine_distance
+from tomtom_apis.models import LatitudeLongitude, LatLon
+from tomtom_apis.routing import RoutingApi
+from tomtom_apis.routing.isochrone_engine import CoverageGrid, Isochrone, IsochroneEngine
+from tomtom_apis.routing.models import CalculatedReachableRangeResponse, CalculateReachableRouteParams, ReachableRange
+
+BUDGETS = [CalculateReachableRouteParams(timeBudgetInSec=300), CalculateReachableRouteParams(timeBudgetInSec=500)]
+
+
+@pytest.fixture(name="routing_api")
+async def fixture_routing_api() -> AsyncGenerator[RoutingApi]:
+    """Fixture for RoutingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with RoutingApi(options) as routing:
+        yield routing
+
+
+def add_reachable_range(aresponses: ResponsesMockServer, requests: list[str], repeat: int, failing: str | None = None) -> None:
+    """Add a reachable range handler that returns a circle at 10 m/s of the time budget and records the requested origins."""
+
+    async def handler(request: web.Request) -> web.Response:
+        origin = request.path.split("/")[-2]
+        requests.append(origin)
+        if origin == failing:
+            return aresponses.Response(status=HttpStatus.BAD_REQUEST, headers=DEFAULT_HEADERS, text=json.dumps({"error": "invalid"}))
+        lat, lon = map(float, origin.split(","))
+        response = CalculatedReachableRangeResponse(
+            formatVersion="0.0.1",
+            reachableRange=circle(lat, lon, float(request.query["timeBudgetInSec"]) * 10),
+        )
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=response.to_json())
+
+    aresponses.add("api.tomtom.com", aresponses.ANY, "GET", response=handler, repeat=repeat)
+
+
+async def test_calculate(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test the isochrones of every origin and budget are calculated once, simplified and cached."""
+    requests: list[str] = []
+    add_reachable_range(aresponses, requests, repeat=4)
+    engine = IsochroneEngine(routing_api, max_concurrency=2)
+    origins = [LatLon(lat=52.37, lon=4.89), LatLon(lat=52.09, lon=5.12), LatLon(lat=52.370001, lon=4.89)]
+
+    isochrones = await engine.calculate(origins, BUDGETS)
+    again = await engine.calculate(origins[:1], BUDGETS[1:])
+
+    assert len(requests) == 4
+    assert len(engine) == 4
+    assert [[isochrone is not None for isochrone in row] for row in isochrones] == [[True, True]] * 3
+    assert isochrones[2] == isochrones[0]
+    assert again[0][0] is isochrones[0][1]
+    assert engine.stats.requests == 4
+    assert engine.stats.points == 4 * 360
+    assert engine.stats.stored_points < engine.stats.points / 5
+    assert engine.bytes == 16 * engine.stats.stored_points
+    assert engine.cache_stats.hits == 1
+
+    isochrone = isochrones[1][1]
+    assert isochrone is not None
+    assert isochrone.area == pytest.approx(math.pi * 5000**2, rel=0.02)
+    for lat, lon in isochrone.polygon():
+        assert haversine_distance(52.09, 5.12, lat, lon) == pytest.approx(5000, rel=0.001)
+
+    engine.clear()
+    assert engine.bytes == 0
+
+
+async def test_calculate_failure(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test failed requests give no isochrone and are not cached."""
+    requests: list[str] = []
+    add_reachable_range(aresponses, requests, repeat=3, failing="52.09,5.12")
+    engine = IsochroneEngine(routing_api)
+
+    isochrones = await engine.calculate([LatLon(lat=52.37, lon=4.89), LatLon(lat=52.09, lon=5.12)], BUDGETS[:1])
+    await engine.calculate([LatLon(lat=52.09, lon=5.12)], BUDGETS[:1])
+
+    assert isochrones[0][0] is not None
+    assert isochrones[1][0] is None
+    assert engine.stats.failures == 2
+    assert len(requests) == 3
+
+
+def test_isochrone() -> None:
+    """Test an isochrone from a reachable range of the API."""
+    response = CalculatedReachableRangeResponse.from_json(load_json("routing/routing/get_calculate_reachable_range.json"))
+
+    isochrone = Isochrone.from_reachable_range(response.reachableRange)
+    simplified = Isochrone.from_reachable_range(response.reachableRange, tolerance=5000)
+
+    assert len(isochrone.boundary) == len(response.reachableRange.boundary)
+    assert len(simplified.boundary) < len(isochrone.boundary)
+    assert isochrone.contains(52.50931, 13.42937)
+    assert simplified.contains(52.50931, 13.42937)
+    assert not isochrone.contains(40.0, 13.42937)
+    assert simplified.area == pytest.approx(isochrone.area, rel=0.05)
+
+    empty = Isochrone.from_reachable_range(ReachableRange(center=LatitudeLongitude(latitude=52.0, longitude=4.0), boundary=[]))
+    assert empty.area == 0.0
+    assert not empty.contains(52.0, 4.0)
+
+
+def test_coverage_grid() -> None:
+    """Test the areas, unions and overlaps of circles against their exact values, the last circle only overlaps the bounding box of another."""
+    radius, distance = 5000.0, 6000.0
+    offset = distance / 6_371_000 * 180 / math.pi / math.cos(math.radians(52.0))
+    isochrones = [
+        Isochrone.from_reachable_range(circle(52.0, 5.0, radius)),
+        Isochrone.from_reachable_range(circle(52.0, 5.0 + offset, radius)),
+        Isochrone.from_reachable_range(circle(52.0, 6.0, radius)),
+        Isochrone.from_reachable_range(circle(52.0 + 0.042, 5.0 + offset * 1.78, radius / 10)),
+    ]
+    lens = 2 * radius**2 * math.acos(distance / 2 / radius) - distance / 2 * math.sqrt(4 * radius**2 - distance**2)
+
+    grid = CoverageGrid(isochrones, resolution=100)
+
+    assert grid.area(0) == pytest.approx(math.pi * radius**2, rel=0.01)
+    assert grid.overlap_area(0, 1) == pytest.approx(lens, rel=0.02)
+    assert grid.overlap_area(1, 0) == grid.overlap_area(0, 1)
+    assert grid.union_area([0, 1]) == pytest.approx(grid.area(0) + grid.area(1) - grid.overlap_area(0, 1))
+    assert grid.union_area() == pytest.approx(grid.union_area([0, 1]) + grid.area(2) + grid.area(3))
+    assert grid.overlap_area(0, 2) == 0.0
+    assert grid.overlaps() == {(0, 1): grid.overlap_area(0, 1)}
+
+
+def test_coverage_grid_square() -> None:
+    """Test a square, with horizontal edges, against its exact area and a grid without isochrones."""
+    corners = [(52.0, 4.0), (52.0, 4.1), (52.1, 4.1), (52.1, 4.0)]
+    square = ReachableRange(
+        center=LatitudeLongitude(latitude=52.05, longitude=4.05),
+        boundary=[LatitudeLongitude(latitude=lat, longitude=lon) for lat, lon in corners],
+    )
+    isochrone = Isochrone.from_reachable_range(square)
+
+    assert CoverageGrid([isochrone], resolution=100).area(0) == pytest.approx(isochrone.area, rel=0.01)
+    assert CoverageGrid([]).union_area() == 0.0
+    assert not CoverageGrid([]).overlaps()
+
+
+async def test_invalid(routing_api: RoutingApi) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="grid"):
+        IsochroneEngine(routing_api, grid=0)
+    with pytest.raises(ValueError, match="resolution"):
+        CoverageGrid([], resolution=0)
@@ -0,0 +1,130 @@
+"""Large waypoint optimizer tests."""
+
+import json
+from collections.abc import AsyncGenerator
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatitudeLongitude, TravelModeType
+from tomtom_apis.routing import WaypointOptimizationApi
+from tomtom_apis.routing.large_waypoint_optimizer import LargeWaypointOptimizer, OrderingReport, ordering_distance, ordering_report
+from tomtom_apis.routing.models import (
+    AdrCategoryType,
+    VehicleLoadType,
+    WaypointOptimizationOptions,
+    WaypointOptimizationPoint,
+    WaypointOptimizationPostData,
+)
+
+OPTIONS = WaypointOptimizationOptions(
+    travelMode=TravelModeType.TRUCK,
+    vehicleMaxSpeed=110,
+    vehicleWeight=36000,
+    vehicleAxleWeight=6000,
+    vehicleLength=16.2,
+    vehicleWidth=2.4,
+    vehicleHeight=3.8,
+    vehicleCommercial=True,
+    vehicleLoadType=[VehicleLoadType.US_HAZMAT_CLASS_3],
+    vehicleAdrTunnelRestrictionCode=AdrCategoryType.B,
+)
+
+
+@pytest.fixture(name="waypoint_optimization_api")
+async def fixture_waypoint_optimization_api() -> AsyncGenerator[WaypointOptimizationApi]:
+    """Fixture for WaypointOptimizationApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with WaypointOptimizationApi(options) as waypoint_optimization:
+        yield waypoint_optimization
+
+
+def waypoints(count: int) -> list[WaypointOptimizationPoint]:
+    """Build waypoints scattered over a 20x10 km area with an additive recurrence, the first one is the start."""
+    return [
+        WaypointOptimizationPoint(point=LatitudeLongitude(latitude=52 + (i * 0.7548777) % 1 / 10, longitude=4 + (i * 0.5698403) % 1 / 3))
+        for i in range(count)
+    ]
+
+
+def add_optimizer(aresponses: ResponsesMockServer, sizes: list[int], repeat: int, *, rotate: bool = False) -> None:
+    """Add an optimization handler that orders the waypoints after the first one by longitude and records the number of waypoints."""
+
+    async def handler(request: web.Request) -> web.Response:
+        body = await request.json()
+        points = body["waypoints"]
+        sizes.append(len(points))
+        order = [0, *sorted(range(1, len(points)), key=lambda i: points[i]["point"]["longitude"])]
+        if rotate:
+            order = order[1:] + order[:1]
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"optimizedOrder": order}))
+
+    aresponses.add("api.tomtom.com", "/routing/waypointoptimization/1", "POST", response=handler, repeat=repeat)
+
+
+async def test_optimize_clusters(waypoint_optimization_api: WaypointOptimizationApi, aresponses: ResponsesMockServer) -> None:
+    """Test the waypoints are optimized in clusters within the limit and stitched into one ordering."""
+    sizes: list[int] = []
+    add_optimizer(aresponses, sizes, repeat=5)
+    data = WaypointOptimizationPostData(waypoints=waypoints(201), options=OPTIONS)
+    optimizer = LargeWaypointOptimizer(waypoint_optimization_api, max_waypoints=50)
+
+    response = await optimizer.optimize(data)
+
+    assert response.optimizedOrder[0] == 0
+    assert sorted(response.optimizedOrder) == list(range(201))
+    assert max(sizes) <= 50
+    assert sum(sizes) == 201
+    assert optimizer.stats.clusters == optimizer.stats.requests == 5
+
+    report = ordering_report(data.waypoints, response.optimizedOrder)
+    assert report.distance == ordering_distance(data.waypoints, response.optimizedOrder)
+    assert report.improvement > 0.5
+
+
+async def test_optimize_small(waypoint_optimization_api: WaypointOptimizationApi, aresponses: ResponsesMockServer) -> None:
+    """Test waypoints within the limit are optimized in one request, with the start first."""
+    sizes: list[int] = []
+    add_optimizer(aresponses, sizes, repeat=1, rotate=True)
+    data = WaypointOptimizationPostData(waypoints=waypoints(10), options=OPTIONS)
+    optimizer = LargeWaypointOptimizer(waypoint_optimization_api)
+
+    response = await optimizer.optimize(data)
+
+    assert response.optimizedOrder[0] == 0
+    assert sorted(response.optimizedOrder) == list(range(10))
+    assert sizes == [10]
+
+
+async def test_optimize_small_clusters(waypoint_optimization_api: WaypointOptimizationApi, aresponses: ResponsesMockServer) -> None:
+    """Test clusters of two waypoints, the entry and one other, are not sent to the API."""
+    sizes: list[int] = []
+    add_optimizer(aresponses, sizes, repeat=1)
+    optimizer = LargeWaypointOptimizer(waypoint_optimization_api, max_waypoints=3)
+
+    response = await optimizer.optimize(WaypointOptimizationPostData(waypoints=waypoints(5), options=OPTIONS))
+
+    assert sorted(response.optimizedOrder) == list(range(5))
+    assert sizes == [3]
+    assert optimizer.stats.clusters == 2
+
+
+def test_ordering_report() -> None:
+    """Test the report against a baseline ordering."""
+    points = waypoints(3)
+
+    report = ordering_report(points, [0, 1, 2], baseline=[0, 2, 1])
+
+    assert report.baseline_distance == ordering_distance(points, [0, 2, 1])
+    assert OrderingReport(distance=75, baseline_distance=100).improvement == 0.25
+    assert OrderingReport(distance=0, baseline_distance=0).improvement == 0.0
+
+
+async def test_invalid(waypoint_optimization_api: WaypointOptimizationApi) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="max_waypoints"):
+        LargeWaypointOptimizer(waypoint_optimization_api, max_waypoints=2)
@@ -0,0 +1,139 @@
+"""Incremental matrix cache tests."""
+
+import asyncio
+import json
+import math
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatitudeLongitude, TravelModeType
+from tomtom_apis.routing import MatrixRoutingApiV2
+from tomtom_apis.routing.matrix_cache import MatrixCache
+from tomtom_apis.routing.matrix_tiler import MatrixTiler
+from tomtom_apis.routing.models import MatrixOptions, MatrixTrafficType
+
+# Origin i is at latitude i and destination j at longitude j, the travel time of a cell is 100 * i + j, destination 9 can not be reached.
+ORIGINS = [LatitudeLongitude(latitude=i, longitude=0) for i in range(4)]
+DESTINATIONS = [LatitudeLongitude(latitude=0, longitude=j) for j in range(4)]
+UNREACHABLE = LatitudeLongitude(latitude=0, longitude=9)
+
+
+@pytest.fixture(name="matrix_cache")
+async def fixture_matrix_cache() -> AsyncGenerator[MatrixCache]:
+    """Fixture for MatrixCache."""
+    options = ApiOptions(api_key=API_KEY)
+    async with MatrixRoutingApiV2(options) as matrix_routing:
+        yield MatrixCache(MatrixTiler(matrix_routing, retries=0))
+
+
+def add_matrix(aresponses: ResponsesMockServer, requested: list[tuple[int, int]]) -> None:
+    """Add a matrix handler that records the requested cells."""
+
+    async def handler(request: web.Request) -> web.Response:
+        body = await request.json()
+        data: list[dict[str, Any]] = []
+        for i, origin in enumerate(body["origins"]):
+            for j, destination in enumerate(body["destinations"]):
+                cell = (round(origin["point"]["latitude"]), round(destination["point"]["longitude"]))
+                requested.append(cell)
+                if cell[1] == 9:
+                    data.append({"originIndex": i, "destinationIndex": j, "detailedError": {"code": "MAP_MATCHING_FAILURE"}})
+                    continue
+                summary = {
+                    "lengthInMeters": 10 * (100 * cell[0] + cell[1]),
+                    "travelTimeInSeconds": 100 * cell[0] + cell[1],
+                    "trafficDelayInSeconds": 0,
+                    "trafficLengthInMeters": 0,
+                    "departureTime": "2024-09-10T13:44:18+02:00",
+                    "arrivalTime": "2024-09-10T13:50:04+02:00",
+                }
+                data.append({"originIndex": i, "destinationIndex": j, "routeSummary": summary})
+        statistics = {"totalCount": len(data), "successes": len(data), "failures": 0}
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"data": data, "statistics": statistics}))
+
+    aresponses.add("api.tomtom.com", "/routing/matrix/2", "POST", response=handler, repeat=20)
+
+
+async def test_only_new_rows_and_columns(matrix_cache: MatrixCache, aresponses: ResponsesMockServer) -> None:
+    """Test a matrix with new points only requests the cells of the new rows and columns."""
+    requested: list[tuple[int, int]] = []
+    add_matrix(aresponses, requested)
+    await matrix_cache.calculate(ORIGINS[:3], DESTINATIONS[:3])
+    requested.clear()
+
+    # The points moved less than the precision of the cache, and the order of the points changed.
+    origins = [LatitudeLongitude(latitude=point.latitude + 1e-7, longitude=point.longitude) for point in reversed(ORIGINS)]
+    matrix = await matrix_cache.calculate(origins, DESTINATIONS)
+
+    assert sorted(requested) == sorted([(3, j) for j in range(4)] + [(i, 3) for i in range(3)])
+    for i, origin in enumerate(reversed(range(4))):
+        for j in range(4):
+            assert matrix.travel_time(i, j) == 100 * origin + j
+            assert matrix.distance(i, j) == 10 * (100 * origin + j)
+    assert matrix_cache.stats.hits == 9
+    assert matrix_cache.stats.misses == 9 + 7
+    assert len(matrix_cache) == 16
+
+    requested.clear()
+    await matrix_cache.calculate(ORIGINS, DESTINATIONS)
+    assert not requested
+
+
+async def test_profiles(matrix_cache: MatrixCache, aresponses: ResponsesMockServer) -> None:
+    """Test cells are shared by options with a departure time in the same bucket only."""
+    requested: list[tuple[int, int]] = []
+    add_matrix(aresponses, requested)
+
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(departAt="2024-09-10T13:05:00+02:00"))
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(departAt="2024-09-10T13:14:59+02:00"))
+    assert len(requested) == 1
+
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(departAt="2024-09-10T13:15:00+02:00"))
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(arriveAt="2024-09-10T13:15:00+02:00"))
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(departAt="any", travelMode=TravelModeType.TRUCK))
+    await matrix_cache.calculate(ORIGINS[:1], DESTINATIONS[:1], options=MatrixOptions(departAt="any", travelMode=TravelModeType.TRUCK))
+    assert len(requested) == 4
+
+    assert matrix_cache.profile_key(None) == matrix_cache.profile_key(MatrixOptions())
+    assert matrix_cache.profile_key(MatrixOptions(departAt="any")) == "{}|depart:any"
+
+
+async def test_live_traffic_expires(matrix_cache: MatrixCache, aresponses: ResponsesMockServer) -> None:
+    """Test cells calculated with live traffic expire after the traffic ttl, and failed cells are not cached."""
+    requested: list[tuple[int, int]] = []
+    add_matrix(aresponses, requested)
+    matrix_cache.traffic_ttl = 0.01
+    options = MatrixOptions(traffic=MatrixTrafficType.LIVE)
+
+    matrix = await matrix_cache.calculate(ORIGINS[:1], [DESTINATIONS[0], UNREACHABLE], options=options)
+    assert math.isnan(matrix.travel_time(0, 1))
+    assert list(matrix.errors) == [(0, 1)]
+    assert len(matrix_cache) == 1
+
+    await asyncio.sleep(0.02)
+    await matrix_cache.calculate(ORIGINS[:1], [DESTINATIONS[0], UNREACHABLE], options=options)
+    assert len(requested) == 4
+
+    matrix_cache.clear()
+    assert len(matrix_cache) == 0
+
+
+async def test_eviction(matrix_cache: MatrixCache, aresponses: ResponsesMockServer) -> None:
+    """Test the cache is bounded by its number of cells."""
+    add_matrix(aresponses, [])
+    options = ApiOptions(api_key=API_KEY)
+    async with MatrixRoutingApiV2(options) as matrix_routing:
+        small = MatrixCache(MatrixTiler(matrix_routing), max_cells=4)
+        matrix = await small.calculate(ORIGINS[:3], DESTINATIONS[:3])
+
+    assert matrix.travel_time(2, 2) == 202
+    assert len(small) == 4
+    assert small.stats.evictions == 5
+    assert not matrix_cache.stats.evictions
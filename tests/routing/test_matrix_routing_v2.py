@@ -1,11 +1,91 @@
 """Matrix Routing V2 tests."""
 
+from collections.abc import AsyncGenerator
+
 import pytest
 
+from tests.const import API_KEY
+from tomtom_apis.api import ApiOptions
 from tomtom_apis.routing import MatrixRoutingApiV2
+from tomtom_apis.routing.models import MatrixJobState, MatrixOptions, MatrixPostData, MatrixResponse, MatrixTrafficType, RouteType
+
+DATA = MatrixPostData.from_dict(
+    {
+        "origins": [
+            {"point": {"latitude": 52.36006, "longitude": 4.85106}},
+            {"point": {"latitude": 52.36187, "longitude": 4.85499}},
+        ],
+        "destinations": [
+            {"point": {"latitude": 52.36241, "longitude": 4.87076}},
+            {"point": {"latitude": 52.50931, "longitude": 13.42936}},
+        ],
+        "options": {"departAt": "now", "routeType": "fastest", "traffic": "historical", "travelMode": "car"},
+    },
+)
+
+
+@pytest.fixture(name="matrix_routing_api")
+async def fixture_matrix_routing_api() -> AsyncGenerator[MatrixRoutingApiV2]:
+    """Fixture for MatrixRoutingApiV2."""
+    options = ApiOptions(api_key=API_KEY)
+    async with MatrixRoutingApiV2(options) as matrix_routing:
+        yield matrix_routing
+
+
+def test_post_data_omits_empty_options() -> None:
+    """Test options without a value are not sent."""
+    data = MatrixPostData(origins=DATA.origins, destinations=DATA.destinations, options=MatrixOptions(routeType=RouteType.FASTEST))
+
+    assert data.to_dict()["options"] == {"routeType": "fastest"}
+    assert "options" not in MatrixPostData(origins=DATA.origins, destinations=DATA.destinations).to_dict()
+    assert DATA.options
+    assert DATA.options.traffic == MatrixTrafficType.HISTORICAL
+
+
+def assert_matrix(response: MatrixResponse) -> None:
+    """Assert the cells of the matrix fixture."""
+    assert isinstance(response, MatrixResponse)
+    assert len(response.data) == 4
+    assert response.data[0].routeSummary
+    assert response.data[0].routeSummary.travelTimeInSeconds == 346
+    assert response.data[3].routeSummary is None
+    assert response.data[3].detailedError
+    assert response.data[3].detailedError.code == "MAP_MATCHING_FAILURE"
+    assert response.statistics.failures == 1
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/matrix_routing_v2/post_matrix_sync.json"], indirect=True)
+async def test_deserialization_post_matrix_sync(matrix_routing_api: MatrixRoutingApiV2) -> None:
+    """Test the post_matrix_sync method."""
+    response = await matrix_routing_api.post_matrix_sync(data=DATA)
+
+    assert_matrix(response)
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/matrix_routing_v2/post_matrix_async_submission.json"], indirect=True)
+async def test_deserialization_post_matrix_async_submission(matrix_routing_api: MatrixRoutingApiV2) -> None:
+    """Test the post_matrix_async_submission method."""
+    response = await matrix_routing_api.post_matrix_async_submission(data=DATA)
+
+    assert response.jobId == "45e47d62-3e5c-4bc6-9a6a-a1e5b0d5c4b2"
+    assert response.state == MatrixJobState.SUBMITTED
+
+
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/matrix_routing_v2/get_matrix_async_status.json"], indirect=True)
+async def test_deserialization_get_matrix_async_status(matrix_routing_api: MatrixRoutingApiV2) -> None:
+    """Test the get_matrix_async_status method."""
+    response = await matrix_routing_api.get_matrix_async_status(job_id="45e47d62-3e5c-4bc6-9a6a-a1e5b0d5c4b2")
+
+    assert response.state == MatrixJobState.COMPLETED
+
 
+@pytest.mark.usefixtures("json_response")
+@pytest.mark.parametrize("json_response", ["routing/matrix_routing_v2/get_matrix_async_result.json"], indirect=True)
+async def test_deserialization_get_matrix_async_result(matrix_routing_api: MatrixRoutingApiV2) -> None:
+    """Test the get_matrix_async_result method."""
+    response = await matrix_routing_api.get_matrix_async_result(job_id="45e47d62-3e5c-4bc6-9a6a-a1e5b0d5c4b2")
 
-def test_api_not_implemented() -> None:
-    """Test API not implemented yet."""
-    with pytest.raises(NotImplementedError):
-        MatrixRoutingApiV2()
+    assert_matrix(response)
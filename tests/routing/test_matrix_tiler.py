@@ -0,0 +1,219 @@
+"""Matrix tiler tests."""
+
+import asyncio
+import json
+import math
+import re
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing import MatrixRoutingApiV2
+from tomtom_apis.routing.matrix_tiler import MAX_ASYNC_CELLS, MatrixTiler, TravelMatrix, tile_matrix
+
+# Origin i is at latitude i and destination j at longitude j, the travel time of a cell is 100 * i + j.
+ORIGINS = [LatitudeLongitude(latitude=i, longitude=0) for i in range(7)]
+DESTINATIONS = [LatitudeLongitude(latitude=0, longitude=j) for j in range(9)]
+
+
+@pytest.fixture(name="matrix_routing_api")
+async def fixture_matrix_routing_api() -> AsyncGenerator[MatrixRoutingApiV2]:
+    """Fixture for MatrixRoutingApiV2."""
+    options = ApiOptions(api_key=API_KEY)
+    async with MatrixRoutingApiV2(options) as matrix_routing:
+        yield matrix_routing
+
+
+class FakeMatrixService:
+    """A matrix service that fails some cells the first time they are requested, and cell (6, 8) always."""
+
+    def __init__(self) -> None:
+        """Initialize the FakeMatrixService."""
+        self.requested: list[tuple[int, int]] = []
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.polls: dict[str, int] = {}
+
+    def calculate(self, body: dict[str, Any]) -> dict[str, Any] | None:
+        """Calculate a matrix, None if the request fails."""
+        origins = [int(origin["point"]["latitude"]) for origin in body["origins"]]
+        destinations = [int(destination["point"]["longitude"]) for destination in body["destinations"]]
+        first = (5, 4) not in self.requested
+        cells = [(origin, destination) for origin in origins for destination in destinations]
+        self.requested.extend(cells)
+        if first and (5, 4) in cells:
+            return None
+
+        data = []
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                if (origin, destination) == (0, 0) and self.requested.count((0, 0)) == 1:
+                    continue
+                cell: dict[str, Any] = {"originIndex": i, "destinationIndex": j}
+                if (origin, destination) == (6, 8) or ((origin, destination) == (2, 3) and self.requested.count((2, 3)) == 1):
+                    cell["detailedError"] = {"code": "MAP_MATCHING_FAILURE", "message": "Not matched."}
+                else:
+                    cell["routeSummary"] = {
+                        "lengthInMeters": 10 * (100 * origin + destination),
+                        "travelTimeInSeconds": 100 * origin + destination,
+                        "trafficDelayInSeconds": 0,
+                        "trafficLengthInMeters": 0,
+                        "departureTime": "2024-09-10T13:44:18+02:00",
+                        "arrivalTime": "2024-09-10T13:50:04+02:00",
+                    }
+                data.append(cell)
+        return {"data": data, "statistics": {"totalCount": len(cells), "successes": len(data), "failures": len(cells) - len(data)}}
+
+    def add_sync(self, aresponses: ResponsesMockServer) -> None:
+        """Add the synchronous matrix handler."""
+
+        async def handler(request: web.Request) -> web.Response:
+            body = self.calculate(await request.json())
+            if body is None:
+                return aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR)
+            return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+        aresponses.add("api.tomtom.com", "/routing/matrix/2", "POST", response=handler, repeat=20)
+
+    def add_async(self, aresponses: ResponsesMockServer) -> None:
+        """Add the asynchronous matrix handlers, every job is in progress on its first status request."""
+
+        async def submit(request: web.Request) -> web.Response:
+            job_id = str(len(self.jobs))
+            self.jobs[job_id] = await request.json()
+            return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"jobId": job_id, "state": "Submitted"}))
+
+        async def status(request: web.Request) -> web.Response:
+            job_id = request.path.rsplit("/", 1)[-1]
+            self.polls[job_id] = self.polls.get(job_id, 0) + 1
+            state = "InProgress" if self.polls[job_id] == 1 else "Completed"
+            if state == "Completed" and job_id == "1":
+                state = "Failed"
+            return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"jobId": job_id, "state": state}))
+
+        async def result(request: web.Request) -> web.Response:
+            body = self.calculate(self.jobs[request.path.split("/")[-2]])
+            if body is None:
+                return aresponses.Response(status=HttpStatus.INTERNAL_SERVER_ERROR)
+            return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps(body))
+
+        aresponses.add("api.tomtom.com", "/routing/matrix/2/async", "POST", response=submit, repeat=20)
+        aresponses.add("api.tomtom.com", re.compile(r"/routing/matrix/2/async/\d+$"), "GET", response=status, repeat=40)
+        aresponses.add("api.tomtom.com", re.compile(r"/routing/matrix/2/async/\d+/result$"), "GET", response=result, repeat=20)
+
+
+async def test_calculate_retries_failed_cells(matrix_routing_api: MatrixRoutingApiV2, aresponses: ResponsesMockServer) -> None:
+    """Test the matrix is tiled, and only cells that failed, were missing or were in a failed tile are calculated again."""
+    service = FakeMatrixService()
+    service.add_sync(aresponses)
+    tiler = MatrixTiler(matrix_routing_api, max_cells=20)
+
+    matrix = await tiler.calculate(ORIGINS, DESTINATIONS)
+
+    for i in range(len(ORIGINS)):
+        for j in range(len(DESTINATIONS)):
+            if (i, j) != (6, 8):
+                assert matrix.travel_time(i, j) == 100 * i + j
+                assert matrix.distance(i, j) == 10 * (100 * i + j)
+    assert math.isnan(matrix.travel_time(6, 8))
+    assert list(matrix.errors) == [(6, 8)]
+    assert matrix.errors[6, 8].code == "MAP_MATCHING_FAILURE"
+    # 6 tiles of at most 20 cells, 4 tiles of the cells that failed: (0, 0), (2, 3), (5, 4..7) and (6, 4..8), and 1 tile for (6, 8).
+    assert tiler.stats.tiles == 6 + 4 + 1
+    assert tiler.stats.retried_cells == 1 + 1 + 4 + 5 + 1
+    assert tiler.stats.failed_cells == 1
+    assert tiler.stats.requests == tiler.stats.tiles
+    assert len(service.requested) == len(ORIGINS) * len(DESTINATIONS) + tiler.stats.retried_cells
+
+
+async def test_calculate_async(matrix_routing_api: MatrixRoutingApiV2, aresponses: ResponsesMockServer) -> None:
+    """Test sub-matrices are submitted as jobs and polled until they complete, a failed job is retried."""
+    service = FakeMatrixService()
+    service.add_async(aresponses)
+    tiler = MatrixTiler(matrix_routing_api, use_async=True, max_cells=20, poll_interval=0.0, retries=3)
+
+    matrix = await tiler.calculate(ORIGINS, DESTINATIONS)
+
+    assert matrix.travel_time(5, 4) == 504
+    assert matrix.travel_time(2, 3) == 203
+    assert list(matrix.errors) == [(6, 8)]
+    assert tiler.stats.tiles == len(service.jobs)
+    # Every job is submitted and polled twice, the completed jobs are downloaded.
+    assert tiler.stats.requests == 4 * len(service.jobs) - 1
+
+
+async def test_calculate_rate_limit(matrix_routing_api: MatrixRoutingApiV2, aresponses: ResponsesMockServer) -> None:
+    """Test requests are spread out by the rate limit."""
+    service = FakeMatrixService()
+    service.add_sync(aresponses)
+    tiler = MatrixTiler(matrix_routing_api, max_cells=20, max_rate=200.0, retries=0)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    matrix = await tiler.calculate(ORIGINS[:5], DESTINATIONS[:8])
+
+    assert loop.time() - start >= 0.005
+    assert tiler.stats.requests == 2
+    assert (0, 0) in matrix.errors
+    assert matrix.errors[0, 0].code == "MissingCell"
+
+
+async def test_calculate_request_failure_after_retries(matrix_routing_api: MatrixRoutingApiV2, aresponses: ResponsesMockServer) -> None:
+    """Test the cells of a tile whose request failed keep the error of the request."""
+    service = FakeMatrixService()
+    service.add_sync(aresponses)
+    tiler = MatrixTiler(matrix_routing_api, max_cells=20, retries=0)
+
+    matrix = await tiler.calculate(ORIGINS[5:], DESTINATIONS[4:])
+
+    assert matrix.errors[0, 0].code == "TomTomAPIServerError"
+    assert len(matrix.errors) == 2 * 5
+    assert tiler.stats.failed_cells == 2 * 5
+
+
+async def test_calculate_unexpected_error(matrix_routing_api: MatrixRoutingApiV2, aresponses: ResponsesMockServer) -> None:
+    """Test errors other than API errors are raised."""
+    aresponses.add("api.tomtom.com", "/routing/matrix/2", "POST", aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text="{}"))
+    tiler = MatrixTiler(matrix_routing_api)
+
+    with pytest.raises(Exception, match="data"):
+        await tiler.calculate(ORIGINS[:1], DESTINATIONS[:1])
+
+
+def test_to_numpy() -> None:
+    """Test the matrices are shared with NumPy as 2D arrays."""
+    pytest.importorskip("numpy")
+    matrix = TravelMatrix.empty(2, 3)
+    matrix.travel_times[1 * 3 + 2] = 42.0
+
+    travel_times, distances = matrix.to_numpy()
+
+    assert travel_times.shape == distances.shape == (2, 3)
+    assert travel_times[1, 2] == 42.0
+    assert math.isnan(distances[1, 2])
+
+
+def test_tile_matrix() -> None:
+    """Test matrices are split into sub-matrices within the cell limit, as square as possible."""
+    assert tile_matrix(range(3), range(1000), 200) == [(range(3), range(j, min(j + 66, 1000))) for j in range(0, 1000, 66)]
+    tiles = tile_matrix(range(2000), range(2000), MAX_ASYNC_CELLS)
+    assert len(tiles) == 400
+    assert all(len(origins) * len(destinations) <= MAX_ASYNC_CELLS for origins, destinations in tiles)
+    assert tile_matrix(range(1000), range(3), 200)[0] == (range(66), range(3))
+    assert not tile_matrix([], range(3), 200)
+
+
+async def test_invalid(matrix_routing_api: MatrixRoutingApiV2) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="max_cells"):
+        MatrixTiler(matrix_routing_api, max_cells=201)
+    with pytest.raises(ValueError, match="max_cells"):
+        MatrixTiler(matrix_routing_api, use_async=True, max_cells=0)
+    with pytest.raises(ValueError, match="max_rate"):
+        MatrixTiler(matrix_routing_api, max_rate=0.0)
@@ -0,0 +1,99 @@
+"""Compact route geometry encoding tests."""
+
+import pytest
+
+from tests.conftest import load_json
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.columnar import PointColumns
+from tomtom_apis.routing.models import CalculatedLongDistanceEVRouteResponse, CalculateRoutePostData
+from tomtom_apis.routing.polyline import HAS_NUMPY, decode_polyline, decode_varint, encode_polyline, encode_varint, supporting_points
+
+# The example of the encoded polyline algorithm format documentation.
+POINTS = [
+    LatitudeLongitude(latitude=38.5, longitude=-120.2),
+    LatitudeLongitude(latitude=40.7, longitude=-120.95),
+    LatitudeLongitude(latitude=43.252, longitude=-126.453),
+]
+ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+USE_NUMPY = [pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")), False]
+
+ROUTE_POINTS = [
+    point
+    for leg in CalculatedLongDistanceEVRouteResponse.from_json(
+        load_json("routing/long_distance_ev_routing/post_calculate_long_distance_ev_route.json"),
+    )
+    .routes[0]
+    .legs
+    for point in leg.points
+]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_polyline(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test encoding and decoding the documented example."""
+    assert encode_polyline(POINTS, use_numpy=use_numpy) == ENCODED
+    assert decode_polyline(ENCODED, use_numpy=use_numpy).points() == POINTS
+    assert not encode_polyline([], use_numpy=use_numpy)
+    assert not decode_polyline("", use_numpy=use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_round_trip(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test a route survives encoding, with both encodings and NumPy and Python producing the same data."""
+    polyline = encode_polyline(ROUTE_POINTS, use_numpy=use_numpy)
+    varint = encode_varint(ROUTE_POINTS, use_numpy=use_numpy)
+
+    assert polyline == encode_polyline(ROUTE_POINTS, use_numpy=not use_numpy)
+    assert varint == encode_varint(ROUTE_POINTS, use_numpy=not use_numpy)
+    assert decode_polyline(polyline, use_numpy=use_numpy).points() == ROUTE_POINTS
+    assert decode_varint(varint, use_numpy=use_numpy).points() == ROUTE_POINTS
+    assert len(encode_varint(ROUTE_POINTS, precision=5, use_numpy=use_numpy)) < len(polyline)
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_precision(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test the precision the points are rounded to."""
+    columns = PointColumns()
+    columns.lat.extend([52.1234567, -33.8688197])
+    columns.lon.extend([4.7654321, 151.2092955])
+
+    decoded = decode_varint(encode_varint(columns, precision=7, use_numpy=use_numpy), precision=7, use_numpy=use_numpy)
+    rounded = decode_polyline(encode_polyline(columns, precision=3, use_numpy=use_numpy), precision=3, use_numpy=use_numpy)
+
+    assert list(decoded.lat) == list(columns.lat)
+    assert list(decoded.lon) == list(columns.lon)
+    assert list(rounded.lat) == [52.123, -33.869]
+    assert list(rounded.lon) == [4.765, 151.209]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+@pytest.mark.parametrize(("encoded", "match"), [("_p~iF~ps|U_ulLnnqC_mqNvxq", "truncated"), ("_p~iF", "truncated"), ("_p~ iF", "Invalid")])
+def test_invalid_polyline(encoded: str, match: str, use_numpy: bool) -> None:  # noqa: FBT001
+    """Test invalid polylines."""
+    with pytest.raises(ValueError, match=match):
+        decode_polyline(encoded, use_numpy=use_numpy)
+
+
+def test_invalid_polyline_non_ascii() -> None:
+    """Test polylines with non ASCII characters."""
+    with pytest.raises(ValueError, match="Invalid"):
+        decode_polyline("_p~iF~ps|Ué")
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_invalid_varint(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test varints that end in the middle of a value."""
+    with pytest.raises(ValueError, match="truncated"):
+        decode_varint(encode_varint(POINTS)[:-1], use_numpy=use_numpy)
+
+
+def test_supporting_points() -> None:
+    """Test rebuilding the supporting points of a route from either encoding."""
+    assert supporting_points(ENCODED) == POINTS
+    assert supporting_points(encode_varint(POINTS)) == POINTS
+    assert supporting_points(encode_polyline(POINTS, precision=6), precision=6) == POINTS
+
+    data = CalculateRoutePostData(supportingPoints=supporting_points(encode_polyline(ROUTE_POINTS)))
+
+    assert data.supportingPoints == ROUTE_POINTS
@@ -0,0 +1,77 @@
+"""Point-in-reachable-range index tests."""
+
+from array import array
+
+import pytest
+
+from tests.conftest import load_json
+from tests.routing.conftest import circle
+from tomtom_apis.models import LatitudeLongitude
+from tomtom_apis.routing.isochrone_engine import Isochrone
+from tomtom_apis.routing.models import CalculatedReachableRangeResponse, ReachableRange
+from tomtom_apis.routing.reachable_range_index import HAS_NUMPY, RangeMembership, ReachableRangeIndex
+
+RANGES = [
+    circle(52.0, 5.0, 5000, count=60),
+    circle(52.05, 5.05, 8000, count=60),
+    circle(53.0, 6.0, 3000, count=60),
+    ReachableRange(center=LatitudeLongitude(latitude=52.0, longitude=4.9), boundary=[]),
+]
+
+USE_NUMPY = [pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")), False]
+
+
+def points(count: int) -> tuple[array[float], array[float]]:
+    """Build points scattered over a 0.3x0.4 degree area around the first ranges with an additive recurrence."""
+    lats = array("d", (51.9 + (i * 0.7548777) % 1 * 0.3 for i in range(count)))
+    lons = array("d", (4.85 + (i * 0.5698403) % 1 * 0.4 for i in range(count)))
+    return lats, lons
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_query(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test the membership equals testing every point against every range."""
+    lats, lons = points(5000)
+    index = ReachableRangeIndex([*RANGES[:1], Isochrone.from_reachable_range(RANGES[1], tolerance=10), *RANGES[2:]], use_numpy=use_numpy)
+
+    membership = index.query(lats, lons)
+
+    assert (membership.ranges, membership.points) == (4, 5000)
+    for row, isochrone in enumerate(index.isochrones):
+        assert list(membership.members(row)) == [i for i in range(5000) if isochrone.contains(lats[i], lons[i])]
+    assert len(membership.members(0)) > 0
+    assert len(membership.members(2)) == len(membership.members(3)) == 0
+    assert len(membership) == sum(len(index.ranges_at(lat, lon)) for lat, lon in zip(lats, lons, strict=True))
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_transpose(use_numpy: bool) -> None:  # noqa: FBT001
+    """Test the transposed membership lists the ranges of every point."""
+    lats, lons = points(2000)
+    index = ReachableRangeIndex(RANGES)
+
+    transposed = index.query(lats, lons).transpose(use_numpy=use_numpy)
+
+    assert (transposed.ranges, transposed.points) == (2000, 4)
+    for i in range(2000):
+        assert list(transposed.members(i)) == index.ranges_at(lats[i], lons[i])
+
+
+def test_query_numpy_arrays() -> None:
+    """Test coordinate arrays, a reachable range of the API and the arrays of the membership."""
+    np = pytest.importorskip("numpy")
+    response = CalculatedReachableRangeResponse.from_json(load_json("routing/routing/get_calculate_reachable_range.json"))
+    index = ReachableRangeIndex([response.reachableRange])
+
+    membership = index.query(np.array([52.50931, 40.0, 53.0]), np.array([13.42937, 13.0, 13.5]))
+    indices, offsets = membership.to_numpy()
+
+    assert indices.tolist() == [0, 2]
+    assert offsets.tolist() == [0, 2]
+    assert index.query(np.array([]), np.array([])) == RangeMembership(ranges=1, points=0, offsets=array("q", [0, 0]), indices=array("q"))
+
+
+def test_invalid() -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="same length"):
+        ReachableRangeIndex(RANGES).query([52.0], [])
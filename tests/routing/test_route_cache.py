@@ -0,0 +1,138 @@
+"""Route result cache tests."""
+
+from collections.abc import AsyncGenerator
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.conftest import load_json
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import LatitudeLongitude, LatLon, LatLonList
+from tomtom_apis.routing import RoutingApi
+from tomtom_apis.routing.models import CalculateRouteParams, CalculateRoutePostData, RouteType
+from tomtom_apis.routing.route_cache import RouteCache
+
+ROUTE = load_json("routing/routing/get_calculate_route.json")
+LOCATIONS = LatLonList(locations=[LatLon(lat=52.37242, lon=4.89406), LatLon(lat=51.92442, lon=4.47772)])
+NEARBY = LatLonList(locations=[LatLon(lat=52.372421, lon=4.894058), LatLon(lat=51.92442, lon=4.47772)])
+NO_TRAFFIC = CalculateRouteParams(traffic=False, routeType=RouteType.FASTEST)
+
+
+@pytest.fixture(name="routing_api")
+async def fixture_routing_api() -> AsyncGenerator[RoutingApi]:
+    """Fixture for RoutingApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with RoutingApi(options) as routing:
+        yield routing
+
+
+def add_route(aresponses: ResponsesMockServer, method: str, requests: list[str], repeat: int = 1) -> None:
+    """Add a calculate route handler that records the requested paths."""
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request.path)
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=ROUTE)
+
+    aresponses.add("api.tomtom.com", "/routing/1/calculateRoute/52.37242,4.89406:51.92442,4.47772/json", method, response=handler, repeat=repeat)
+
+
+async def test_get_calculate_route(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test routes between locations on the same grid cell share a cache entry."""
+    requests: list[str] = []
+    add_route(aresponses, "GET", requests)
+    cache = RouteCache(routing_api)
+
+    response = await cache.get_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC)
+    cached = await cache.get_calculate_route(locations=NEARBY, params=CalculateRouteParams(routeType=RouteType.FASTEST, traffic=False, key="other"))
+
+    assert cached is response
+    assert len(requests) == 1
+    assert len(cache) == 1
+    assert cache.bytes == len(response.to_jsonb())
+    assert cache.stats.hits == 1
+    assert len(response.routes[0].legs[0].points) > 0
+
+
+async def test_post_calculate_route(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test the post data is part of the key."""
+    requests: list[str] = []
+    add_route(aresponses, "POST", requests, repeat=2)
+    cache = RouteCache(routing_api)
+    data = CalculateRoutePostData(supportingPoints=[LatitudeLongitude(latitude=52.0, longitude=4.6)])
+
+    await cache.post_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC, data=data)
+    await cache.post_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC, data=data)
+    await cache.post_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC, data=CalculateRoutePostData())
+
+    assert len(requests) == 2
+
+
+async def test_summary_only(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test only the summaries are cached and returned in summary only mode."""
+    add_route(aresponses, "GET", [])
+    cache = RouteCache(routing_api, summary_only=True)
+
+    response = await cache.get_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC)
+
+    assert response.routes[0].summary.lengthInMeters == 1146
+    assert not response.routes[0].legs[0].points
+    assert not response.routes[0].sections
+    assert cache.bytes < len(ROUTE)
+
+
+async def test_traffic_ttl(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test routes that depend on live traffic expire after the traffic ttl."""
+    requests: list[str] = []
+    add_route(aresponses, "GET", requests, repeat=3)
+    cache = RouteCache(routing_api, traffic_ttl=60)
+
+    with patch("tomtom_apis.cache.time.monotonic", return_value=100.0), patch("tomtom_apis.routing.route_cache.time.time", return_value=1000.0):
+        await cache.get_calculate_route(locations=LOCATIONS)
+        await cache.get_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC)
+    with patch("tomtom_apis.cache.time.monotonic", return_value=200.0), patch("tomtom_apis.routing.route_cache.time.time", return_value=1000.0):
+        await cache.get_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC)
+        assert len(requests) == 2
+        await cache.get_calculate_route(locations=LOCATIONS)
+
+    assert len(requests) == 3
+
+
+async def test_max_bytes(routing_api: RoutingApi, aresponses: ResponsesMockServer) -> None:
+    """Test the least recently used routes are evicted to stay within max_bytes."""
+    add_route(aresponses, "GET", [], repeat=2)
+    cache = RouteCache(routing_api, max_bytes=len(ROUTE) + 100)
+
+    await cache.get_calculate_route(locations=LOCATIONS, params=NO_TRAFFIC)
+    await cache.get_calculate_route(locations=LOCATIONS, params=CalculateRouteParams(traffic=False, routeType=RouteType.SHORTEST))
+
+    assert len(cache) == 1
+    assert cache.stats.evictions == 1
+    cache.clear()
+    assert cache.bytes == 0
+
+
+async def test_route_key(routing_api: RoutingApi) -> None:
+    """Test the time buckets of the key."""
+    cache = RouteCache(routing_api, departure_bucket=3600)
+
+    def time_key(params: CalculateRouteParams | None) -> str:
+        return cache.route_key(LOCATIONS, params)[2]
+
+    with patch("tomtom_apis.routing.route_cache.time.time", return_value=7200.0):
+        assert time_key(None) == time_key(CalculateRouteParams(departAt="now")) == "depart:2"
+    assert time_key(NO_TRAFFIC) == "depart:any"
+    assert time_key(CalculateRouteParams(departAt="2025-01-01T08:10:00+00:00")) == time_key(
+        CalculateRouteParams(departAt="2025-01-01T08:50:00+00:00", traffic=False),
+    )
+    assert time_key(CalculateRouteParams(arriveAt="2025-01-01T08:10:00+00:00")).startswith("arrive:")
+    assert cache.route_key(LOCATIONS, NO_TRAFFIC)[0] == ((52.3724, 4.8941), (51.9244, 4.4777))
+
+
+async def test_invalid(routing_api: RoutingApi) -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="grid"):
+        RouteCache(routing_api, grid=0)
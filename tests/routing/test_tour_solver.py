@@ -0,0 +1,251 @@
+"""Local tour solver tests."""
+
+import itertools
+import json
+import math
+import time
+from array import array
+from collections.abc import AsyncGenerator
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aresponses import ResponsesMockServer
+
+from tests.const import API_KEY, DEFAULT_HEADERS
+from tomtom_apis.api import ApiOptions
+from tomtom_apis.const import HttpStatus
+from tomtom_apis.models import AdrCategoryType, LatitudeLongitude, TravelModeType
+from tomtom_apis.routing import WaypointOptimizationApi
+from tomtom_apis.routing.matrix_tiler import TravelMatrix
+from tomtom_apis.routing.models import WaypointOptimizationOptions, WaypointOptimizationPoint, WaypointOptimizationPostData
+from tomtom_apis.routing.tour_solver import TourSolution, TourSolver
+
+
+@pytest.fixture(name="waypoint_optimization_api")
+async def fixture_waypoint_optimization_api() -> AsyncGenerator[WaypointOptimizationApi]:
+    """Fixture for WaypointOptimizationApi."""
+    options = ApiOptions(api_key=API_KEY)
+    async with WaypointOptimizationApi(options) as waypoint_optimization:
+        yield waypoint_optimization
+
+
+def matrix(count: int) -> list[list[float]]:
+    """Build the travel times between points scattered over a 10x10 km square with an additive recurrence, at 10 m/s."""
+    points = [((i * 0.7548777) % 1 * 10_000, (i * 0.5698403) % 1 * 10_000) for i in range(count)]
+    return [[math.dist(a, b) / 10 for b in points] for a in points]
+
+
+def line(count: int) -> list[list[float]]:
+    """Build the travel times between points on a line, a second apart."""
+    return [[float(abs(i - j)) for j in range(count)] for i in range(count)]
+
+
+def test_solve() -> None:
+    """Test the solution is an ordering of all waypoints that starts at the start and improves on nearest neighbour."""
+    solver = TourSolver(matrix(120))
+
+    solution = solver.solve()
+
+    assert solution.order[0] == 0
+    assert sorted(solution.order) == list(range(120))
+    assert solution.travel_time == solution.duration == solver.evaluate(solution.order).travel_time
+    assert solution.travel_time < 0.9 * solver.evaluate(solver.solve(time_limit=0).order).travel_time
+    assert solution.to_response().optimizedOrder == solution.order
+
+
+@pytest.mark.parametrize("round_trip", [True, False])
+def test_solve_optimal(round_trip: bool) -> None:  # noqa: FBT001
+    """Test small problems are solved close to optimal."""
+    solver = TourSolver(matrix(8), round_trip=round_trip)
+
+    solution = solver.solve()
+    optimal = min(solver.evaluate([0, *order]).travel_time for order in itertools.permutations(range(1, 8)))
+
+    assert solution.travel_time <= optimal * 1.05
+
+
+def test_solve_asymmetric() -> None:
+    """Test asymmetric travel times, going up the line is cheap and going down is expensive."""
+    times = [[float(j - i) if j > i else 10.0 * (i - j) for j in range(6)] for i in range(6)]
+
+    solution = TourSolver(times).solve(initial=[0, 5, 4, 3, 2, 1])
+
+    assert solution.order == [0, 1, 2, 3, 4, 5]
+    assert solution.travel_time == 5.0
+
+
+def test_solve_round_trip_start() -> None:
+    """Test a round trip from another start returns to the start."""
+    solution = TourSolver(line(5), start=2, round_trip=True).solve()
+
+    assert solution.order[0] == 2
+    assert solution.travel_time == 8.0
+
+
+def test_solve_initial() -> None:
+    """Test an earlier ordering is improved, with missing waypoints inserted and unknown waypoints ignored."""
+    solver = TourSolver(line(6))
+
+    solution = solver.solve(initial=[0, 1, 2, 4, 5, 9], time_limit=0)
+
+    assert solution.order == [0, 1, 2, 3, 4, 5]
+
+
+def test_time_limit() -> None:
+    """Test the improvement stops at the time limit."""
+    solver = TourSolver(matrix(50))
+    clock = itertools.chain([0.0, 0.0], itertools.repeat(1.0))
+
+    with patch("tomtom_apis.routing.tour_solver.time.perf_counter", side_effect=lambda: next(clock)):
+        solution = solver.solve(time_limit=0.5)
+
+    assert solution == solver.solve(time_limit=0)
+
+
+def test_time_windows() -> None:
+    """Test time windows are respected, even when that makes the tour longer."""
+    windows: list[tuple[float, float] | None] = [None] * 6
+    windows[5] = (0.0, 5.0)
+    windows[1] = (20.0, 30.0)
+
+    solution = TourSolver(line(6), time_windows=windows, service_times=[1.0] * 6).solve()
+
+    assert solution.order[1] == 5
+    assert solution.lateness == 0.0
+    assert solution.order.index(1) == 5
+    assert solution.duration == 21.0
+    assert solution.cost == solution.duration
+
+
+def test_time_windows_late() -> None:
+    """Test waypoints that can not be reached within their time window are reached as early as possible."""
+    windows: list[tuple[float, float] | None] = [None, None, None, None, None, (0.0, 2.0)]
+
+    solution = TourSolver(line(6), time_windows=windows, service_times=[1.0] * 6).solve(initial=[0, 1, 2, 3, 4, 5])
+
+    assert solution.order[1] == 5
+    assert solution.lateness == 3.0
+
+
+def test_time_windows_detour() -> None:
+    """Test moves that add travel time are made when they lower the cost, the best tour with time windows is longer than the shortest tour."""
+    windows: list[tuple[float, float] | None] = [None, None, None, (0.0, 1200.0), None, None, (0.0, 2400.0), None]
+    solver = TourSolver(matrix(8), time_windows=windows, service_times=[60.0] * 8)
+
+    solution = solver.solve()
+    tours = [solver.evaluate([0, *order]) for order in itertools.permutations(range(1, 8))]
+
+    assert solution.cost == pytest.approx(min(tour.cost for tour in tours))
+    assert solution.lateness == 0.0
+    assert solution.travel_time > min(tour.travel_time for tour in tours) + 100
+
+
+def test_time_windows_unreachable() -> None:
+    """Test time windows that can not all be met, the late waypoints are moved to where they cost the least."""
+    windows: list[tuple[float, float] | None] = [(0.0, 100.0 * i) if i % 2 == 0 and i > 0 else None for i in range(10)]
+    solver = TourSolver(matrix(10), time_windows=windows, service_times=[60.0] * 10)
+
+    solution = solver.solve()
+
+    assert sorted(solution.order) == list(range(10))
+    assert solution.lateness > 0.0
+    assert solution.cost < solver.solve(time_limit=0).cost / 2
+
+
+@pytest.mark.parametrize(
+    ("times", "windows", "service_time", "round_trip"),
+    [
+        (line(6), [None, None, None, (5.4, 6.0), None, None], 1.0, True),
+        (matrix(6), [None, (400.0, 800.0), (800.0, 1600.0), (1200.0, 2400.0), (1600.0, 3200.0), (2000.0, 4000.0)], 60.0, False),
+    ],
+)
+def test_time_windows_optimal(
+    times: list[list[float]],
+    windows: list[tuple[float, float] | None],
+    service_time: float,
+    round_trip: bool,  # noqa: FBT001
+) -> None:
+    """Test small problems with time windows, that can and can not all be met, are solved optimally."""
+    solver = TourSolver(times, time_windows=windows, service_times=[service_time] * 6, round_trip=round_trip)
+
+    solution = solver.solve()
+
+    assert solution.cost == pytest.approx(min(solver.evaluate([0, *order]).cost for order in itertools.permutations(range(1, 6))))
+
+
+def test_time_windows_speed() -> None:
+    """Test time windows keep a few hundred waypoints with an asymmetric matrix within a small factor of the time without them."""
+    times = [[value * (1.0 + (i * 7 + j * 13) % 10 / 30) for j, value in enumerate(row)] for i, row in enumerate(matrix(200))]
+    windows: list[tuple[float, float] | None] = [(0.0, (i * 0.618034) % 1 * 20_000 + 600) if i % 10 == 0 and i > 0 else None for i in range(200)]
+    solver = TourSolver(times, time_windows=windows, service_times=[60.0] * 200)
+
+    started = time.perf_counter()
+    TourSolver(times, service_times=[60.0] * 200).solve()
+    plain = time.perf_counter() - started
+    solution = solver.solve()
+    windowed = time.perf_counter() - started - plain
+
+    assert windowed < 15 * plain
+    assert solution.lateness == 0.0
+    assert solution.cost < solver.solve(time_limit=0).cost
+
+
+def test_travel_matrix() -> None:
+    """Test a travel matrix, cells without a route are avoided."""
+    times = [float(abs(i - j)) for i in range(4) for j in range(4)]
+    times[0 * 4 + 1] = math.nan
+    travel_matrix = TravelMatrix(origins=4, destinations=4, travel_times=array("d", times), distances=array("d", times))
+
+    solution = TourSolver(travel_matrix).solve()
+
+    assert solution.order[1] != 1
+    assert solution.travel_time < 10
+
+
+def test_invalid() -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="square"):
+        TourSolver([[0.0, 1.0], [1.0]])
+    with pytest.raises(ValueError, match="square"):
+        TourSolver(TravelMatrix.empty(2, 3))
+    with pytest.raises(ValueError, match="per waypoint"):
+        TourSolver(line(3), time_windows=[None, None])
+    with pytest.raises(ValueError, match="per waypoint"):
+        TourSolver(line(3), service_times=[1.0])
+
+
+@pytest.mark.parametrize(("optimized_order", "expected"), [([0, 2, 1, 3], [0, 1, 3, 2]), ([0, 1, 2, 3], [0, 3, 1, 2])])
+async def test_polish(
+    waypoint_optimization_api: WaypointOptimizationApi,
+    aresponses: ResponsesMockServer,
+    optimized_order: list[int],
+    expected: list[int],
+) -> None:
+    """Test the API result is used when it is better than the local solution."""
+
+    async def handler(request: web.Request) -> web.Response:
+        assert len((await request.json())["waypoints"]) == 4
+        return aresponses.Response(status=HttpStatus.OK, headers=DEFAULT_HEADERS, text=json.dumps({"optimizedOrder": optimized_order}))
+
+    aresponses.add("api.tomtom.com", "/routing/waypointoptimization/1", "POST", response=handler)
+    points = [WaypointOptimizationPoint(point=LatitudeLongitude(latitude=52.0, longitude=4.0 + i / 100)) for i in range(4)]
+    options = WaypointOptimizationOptions(
+        travelMode=TravelModeType.CAR,
+        vehicleMaxSpeed=0,
+        vehicleWeight=0,
+        vehicleAxleWeight=0,
+        vehicleLength=0,
+        vehicleWidth=0,
+        vehicleHeight=0,
+        vehicleCommercial=False,
+        vehicleLoadType=[],
+        vehicleAdrTunnelRestrictionCode=AdrCategoryType.B,
+    )
+    solver = TourSolver(line(4))
+    local = solver.evaluate([0, 3, 1, 2])
+
+    polished = await solver.polish(waypoint_optimization_api, WaypointOptimizationPostData(waypoints=points, options=options), local)
+
+    assert isinstance(polished, TourSolution)
+    assert polished.order == expected
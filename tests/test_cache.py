@@ -0,0 +1,106 @@
+"""Test cache."""
+
+from unittest.mock import patch
+
+from tomtom_apis.cache import CacheStats, LRUCache, params_key
+from tomtom_apis.models import ViewType
+from tomtom_apis.places.models import ReverseGeocodeParams
+
+
+def test_cache_stats_hit_rate() -> None:
+    """Test the hit rate of the cache stats."""
+    assert CacheStats().hit_rate == 0.0
+    assert CacheStats(hits=3, misses=1).hit_rate == 0.75
+
+
+def test_lru_cache_get_set() -> None:
+    """Test getting and setting values."""
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    assert cache.get("a") is None
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 1
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=0)
+
+
+def test_lru_cache_eviction() -> None:
+    """Test the least recently used entry is evicted."""
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats.evictions == 1
+
+
+def test_lru_cache_ttl() -> None:
+    """Test entries expire after the ttl."""
+    cache: LRUCache[str, int] = LRUCache(max_size=2, ttl=10)
+    with patch("tomtom_apis.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("tomtom_apis.cache.time.monotonic", return_value=105.0):
+        assert "a" in cache
+        assert cache.get("a") == 1
+    with patch("tomtom_apis.cache.time.monotonic", return_value=111.0):
+        assert "a" not in cache
+        assert cache.get("a") is None
+
+    assert len(cache) == 0
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=1)
+
+
+def test_lru_cache_ttl_per_entry() -> None:
+    """Test the ttl of an entry overrides the ttl of the cache."""
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    with patch("tomtom_apis.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1, ttl=10)
+        cache.set("b", 2)
+    with patch("tomtom_apis.cache.time.monotonic", return_value=111.0):
+        assert "a" not in cache
+        assert "b" in cache
+
+
+def test_lru_cache_max_bytes() -> None:
+    """Test the least recently used entries are evicted to keep the total size within max_bytes."""
+    cache: LRUCache[str, int] = LRUCache(max_size=10, max_bytes=100)
+    cache.set("a", 1, size=40)
+    cache.set("b", 2, size=40)
+    cache.set("a", 3, size=50)
+    assert cache.bytes == 90
+
+    cache.set("c", 4, size=30)
+
+    assert "b" not in cache
+    assert cache.bytes == 80
+    assert cache.pop("a") == 3
+    assert cache.bytes == 30
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_lru_cache_pop_and_clear() -> None:
+    """Test removing entries."""
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_params_key() -> None:
+    """Test the canonical params key."""
+    assert params_key(None) == ""
+    assert params_key(ReverseGeocodeParams(radius=100, view=ViewType.UNIFIED)) == params_key(
+        ReverseGeocodeParams(view=ViewType.UNIFIED, radius=100, key="other-key"),
+    )
+    assert params_key(ReverseGeocodeParams(radius=100)) != params_key(ReverseGeocodeParams(radius=200))
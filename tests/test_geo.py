@@ -0,0 +1,50 @@
+"""Test geo."""
+
+import math
+
+from tomtom_apis.geo import douglas_peucker, haversine_distance, point_in_polygon, rectangle_intersects_polygon
+
+from .const import LOC_AMSTERDAM, LOC_ROTTERDAM
+
+
+def test_haversine_distance() -> None:
+    """Test the haversine distance."""
+    assert haversine_distance(LOC_AMSTERDAM.lat, LOC_AMSTERDAM.lon, LOC_AMSTERDAM.lat, LOC_AMSTERDAM.lon) == 0.0
+    assert math.isclose(haversine_distance(LOC_AMSTERDAM.lat, LOC_AMSTERDAM.lon, LOC_ROTTERDAM.lat, LOC_ROTTERDAM.lon), 58_300, rel_tol=1e-3)
+    assert math.isclose(haversine_distance(0.0, 0.0, 0.0, 1.0), 111_195, rel_tol=1e-3)
+
+
+SQUARE: list[tuple[float, float]] = [(0.0, 0.0), (0.0, 10.0), (10.0, 10.0), (10.0, 0.0)]
+TRIANGLE: list[tuple[float, float]] = [(0.0, 0.0), (10.0, 0.0), (0.0, 10.0)]
+
+
+def test_point_in_polygon() -> None:
+    """Test the point in polygon check."""
+    assert point_in_polygon(5.0, 5.0, SQUARE)
+    assert not point_in_polygon(15.0, 5.0, SQUARE)
+    assert point_in_polygon(2.0, 2.0, TRIANGLE)
+    assert not point_in_polygon(8.0, 8.0, TRIANGLE)
+
+
+def test_rectangle_intersects_polygon() -> None:
+    """Test the rectangle and polygon overlap check."""
+    # A polygon vertex inside the rectangle.
+    assert rectangle_intersects_polygon(-1.0, -1.0, 1.0, 1.0, TRIANGLE)
+    # The rectangle inside the polygon.
+    assert rectangle_intersects_polygon(1.0, 1.0, 2.0, 2.0, TRIANGLE)
+    # Only the edges cross.
+    assert rectangle_intersects_polygon(4.0, -1.0, 5.0, 11.0, SQUARE)
+    # Outside of the polygon, but within its bounding box.
+    assert not rectangle_intersects_polygon(8.0, 8.0, 9.0, 9.0, TRIANGLE)
+    assert not rectangle_intersects_polygon(20.0, 20.0, 21.0, 21.0, SQUARE)
+
+
+def test_douglas_peucker() -> None:
+    """Test the Douglas-Peucker simplification."""
+    # About 11 meters off the line between the first and the last point.
+    line = [(52.0, 4.0), (52.0001, 4.001), (52.0, 4.002), (52.0, 4.003)]
+    assert douglas_peucker(line, 5.0) == [0, 1, 2, 3]
+    assert douglas_peucker(line, 20.0) == [0, 3]
+    assert douglas_peucker(line[:2], 20.0) == [0, 1]
+    # Repeated points are collapsed.
+    assert douglas_peucker([(52.0, 4.0), (52.0, 4.0), (52.0, 4.0)], 1.0) == [0, 2]